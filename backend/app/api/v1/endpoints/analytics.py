@@ -1,21 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.pagination import DEFAULT_PAGE_SIZE, InvalidCursor, paginated_response
+from app.repositories import LearnerRepository
+from app.services.analytics import learner_progress, team_analytics
 
 router = APIRouter()
 
 @router.get("/progress")
-async def get_progress_analytics():
-    """Get progress analytics - TODO: Implement progress analytics"""
-    # TODO: Calculate learning progress
-    # TODO: Generate skill mastery data
-    # TODO: Return analytics data
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+async def get_progress_analytics(
+    tenant_id: str,
+    learner_id: List[str] = Query([]),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=settings.LEARNER_PROGRESS_MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get learning progress for a page of a tenant's learners, or for the given learners"""
+    # The tenant is an explicit parameter: this API has no authentication yet
+    # (see auth.py), so there is no caller to derive it from. Explicit
+    # learner_id values are still filtered to that tenant
+    repository = LearnerRepository(db)
+    if learner_id:
+        if len(learner_id) > settings.LEARNER_PROGRESS_MAX_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail="Too many learner_id values")
+        learners = [learner for learner in await repository.get_by_ids_ordered(learner_id)
+                    if learner.tenant_id == tenant_id]
+    else:
+        try:
+            learners = await repository.get_by_tenant(tenant_id, limit=limit, cursor=cursor)
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    progress = {entry.learner_id: entry for entry in await learner_progress(db, [learner.id for learner in learners])}
+    response = paginated_response(learners, lambda learner: {
+        **progress[learner.id].to_dict(),
+        "title": (learner.profile or {}).get("title"),
+        "department": (learner.profile or {}).get("department"),
+    }, limit)
+    if learner_id:
+        response["pagination"]["next_cursor"] = None  # Explicit learners are a single page
+    return response
 
 @router.get("/team")
-async def get_team_analytics():
-    """Get team analytics - TODO: Implement team analytics"""
-    # TODO: Aggregate team learning data
-    # TODO: Generate team insights
-    # TODO: Return team analytics
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+async def get_team_analytics(
+    tenant_id: str,
+    department: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get team analytics from the team × skill rollups"""
+    # The tenant is an explicit parameter: this API has no authentication yet
+    # (see auth.py), so there is no caller to derive it from
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from is after date_to")
+    data = await team_analytics(db, tenant_id, department, date_from, date_to)
+    return {"data": data, "message": "Team analytics retrieved successfully", "status": "success"}
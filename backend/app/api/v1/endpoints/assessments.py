@@ -1,22 +1,106 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, paginated_response
+from app.models.assessment import Assessment, AssessmentAttempt, AttemptStatus
+from app.models.learner import Learner
+from app.repositories import AssessmentRepository
+from app.schemas.assessment import AssessmentRead, AttemptRead, AttemptSubmission
+from app.services.grading import GradingJob, GradingQueueFull, get_grading_pool
 
 router = APIRouter()
 
 @router.get("/")
-async def list_assessments():
-    """List assessments - TODO: Implement assessments listing"""
-    # TODO: Add filtering by skill
-    # TODO: Retrieve assessments from database
-    # TODO: Return assessments list
-    raise HTTPException(status_code=501, detail="Not implemented yet")
-
-@router.post("/{assessment_id}/attempts")
-async def submit_assessment_attempt(assessment_id: str):
-    """Submit assessment attempt - TODO: Implement assessment submission"""
-    # TODO: Validate assessment_id
-    # TODO: Grade assessment answers
-    # TODO: Update mastery levels
-    # TODO: Return results and recommendations
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+async def list_assessments(
+    skill_id: Optional[str] = None,
+    learner_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    """List assessments with optional skill/learner filters and cursor pagination"""
+    try:
+        assessments = await AssessmentRepository(db).get_page(skill_id, learner_id, limit=limit, cursor=cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return paginated_response(
+        assessments, lambda assessment: AssessmentRead.model_validate(assessment).model_dump(), limit
+    )
+
+@router.post("/{assessment_id}/attempts", status_code=202)
+async def submit_assessment_attempt(
+    assessment_id: str,
+    submission: AttemptSubmission,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    """Submit answers for grading; returns at once with a status URL to poll for the graded attempt"""
+    assessment = await db.get(Assessment, assessment_id)
+    if assessment is None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    learner = await db.get(Learner, assessment.learner_id)
+    spec = assessment.compiled_spec()
+
+    pool = get_grading_pool()
+    if not pool.has_capacity(learner.tenant_id):
+        raise HTTPException(status_code=503, detail="Grading queue is full", headers={"Retry-After": "30"})
+
+    # Claim the next attempt number atomically; updated_at is kept so the spec version does not change
+    attempt_number = await db.scalar(
+        update(Assessment)
+        .where(Assessment.id == assessment_id, Assessment.attempt_count < spec.max_attempts)
+        .values(attempt_count=Assessment.attempt_count + 1, updated_at=Assessment.updated_at)
+        .returning(Assessment.attempt_count)
+    )
+    if attempt_number is None:
+        raise HTTPException(status_code=409, detail="No attempts left for this assessment")
+
+    answers = [answer.model_dump() for answer in submission.answers]
+    attempt = AssessmentAttempt(
+        assessment_id=assessment_id,
+        learner_id=assessment.learner_id,
+        attempt_number=attempt_number,
+        status=AttemptStatus.GRADING,
+        details={"submitted": answers, "time_taken_min": submission.time_taken_min},
+    )
+    db.add(attempt)
+    await db.commit()
+
+    try:
+        pool.submit(GradingJob(attempt.id, learner.tenant_id, spec, answers, submission.time_taken_min))
+    except GradingQueueFull:
+        attempt.status = AttemptStatus.ABANDONED
+        await db.execute(
+            update(Assessment).where(Assessment.id == assessment_id)
+            .values(attempt_count=Assessment.attempt_count - 1, updated_at=Assessment.updated_at)
+        )
+        await db.commit()
+        raise HTTPException(status_code=503, detail="Grading queue is full", headers={"Retry-After": "30"})
+
+    status_url = str(request.url_for("get_assessment_attempt", assessment_id=assessment_id, attempt_id=attempt.id))
+    response.headers["Location"] = status_url
+    return {
+        "data": {
+            "id": attempt.id,
+            "assessment_id": assessment_id,
+            "status": attempt.status.value,
+            "status_url": status_url,
+        },
+        "message": "Assessment attempt queued for grading",
+        "status": "success",
+    }
+
+@router.get("/{assessment_id}/attempts/{attempt_id}")
+async def get_assessment_attempt(assessment_id: str, attempt_id: str, db: AsyncSession = Depends(get_db)):
+    """Get an attempt; status is "grading" until its answers have been graded"""
+    attempt = await db.get(AssessmentAttempt, attempt_id)
+    if attempt is None or attempt.assessment_id != assessment_id:
+        raise HTTPException(status_code=404, detail="Assessment attempt not found")
+    return {
+        "data": AttemptRead.model_validate(attempt).model_dump(),
+        "message": "Assessment attempt retrieved successfully",
+        "status": "success",
+    }
@@ -1,6 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.models.calendar import CalendarEvent, CalendarProvider, EventStatus
+from app.models.learner import Learner
+from app.models.plan import LearningPlan, PlanStep
+from app.repositories import CalendarEventRepository
+from app.schemas.calendar import (
+    CalendarConnect,
+    CalendarEventCreate,
+    CalendarEventRead,
+    CalendarSyncRequest,
+    ScheduleRequest,
+)
+from app.services.calendar_sync import connect_calendar, get_calendar_sync
+from app.services.scheduler import schedule_learners
 
 router = APIRouter()
 
@@ -12,10 +26,126 @@ async def get_calendar_events():
     # TODO: Return calendar events
     raise HTTPException(status_code=501, detail="Not implemented yet")
 
-@router.post("/events")
-async def schedule_event():
-    """Schedule learning event - TODO: Implement event scheduling"""
-    # TODO: Validate event data
-    # TODO: Create calendar event
-    # TODO: Return scheduled event
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+@router.post("/events", status_code=201)
+async def schedule_event(event_in: CalendarEventCreate, db: AsyncSession = Depends(get_db)):
+    """Schedule a learning event, refusing overlaps with the learner's scheduled events"""
+    if await db.get(Learner, event_in.learner_id) is None:
+        raise HTTPException(status_code=404, detail="Learner not found")
+    step = None
+    if event_in.plan_step_id:
+        step = (await db.execute(
+            select(PlanStep)
+            .join(LearningPlan, LearningPlan.id == PlanStep.plan_id)
+            .where(PlanStep.id == event_in.plan_step_id, LearningPlan.learner_id == event_in.learner_id)
+        )).scalar_one_or_none()
+        if step is None:
+            raise HTTPException(status_code=404, detail="Plan step not found")
+
+    if not event_in.allow_conflicts:
+        conflicts = await CalendarEventRepository(db).get_overlapping(
+            event_in.learner_id, event_in.start_at, event_in.end_at
+        )
+        if conflicts:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "message": "Event overlaps the learner's scheduled events",
+                    "events": [CalendarEventRead.model_validate(event).model_dump(mode="json") for event in conflicts],
+                },
+            )
+
+    event = CalendarEvent(
+        learner_id=event_in.learner_id,
+        plan_step_id=event_in.plan_step_id,
+        provider=event_in.provider,
+        title=event_in.title,
+        description=event_in.description,
+        start_at=event_in.start_at,
+        end_at=event_in.end_at,
+        status=EventStatus.SCHEDULED,
+        location=event_in.location,
+        attendees=event_in.attendees,
+    )
+    db.add(event)
+    await db.commit()
+    await db.refresh(event)
+    # Events of external providers reach the learner's calendar with the next sync
+    data = CalendarEventRead.model_validate(event).model_dump()
+    data["plan_step"] = {"id": step.id, "title": step.title} if step is not None else None
+    return {"data": data, "message": "Calendar event created successfully", "status": "success"}
+
+@router.post("/schedule")
+async def schedule_plan_steps(request: ScheduleRequest, db: AsyncSession = Depends(get_db)):
+    """Auto-schedule a learner's pending plan steps into study blocks around their events and working hours"""
+    if await db.get(Learner, request.learner_id) is None:
+        raise HTTPException(status_code=404, detail="Learner not found")
+    schedules = await db.run_sync(schedule_learners, [request.learner_id])
+    await db.commit()
+    schedule = schedules[request.learner_id]
+    return {
+        "data": {
+            "learner_id": schedule.learner_id,
+            "blocks": [
+                {
+                    "plan_step_id": block.step_id,
+                    "start_at": block.start_at,
+                    "end_at": block.end_at,
+                    "block": block.block,
+                    "blocks": block.blocks,
+                }
+                for block in schedule.blocks
+            ],
+            "unscheduled_step_ids": schedule.unscheduled,
+        },
+        "message": "Plan steps scheduled successfully",
+        "status": "success",
+    }
+
+@router.post("/connections", status_code=201)
+async def connect_external_calendar(request: CalendarConnect, db: AsyncSession = Depends(get_db)):
+    """Connect a learner's Google or Outlook calendar; its first sync lists it in full"""
+    if request.provider == CalendarProvider.INTERNAL:
+        raise HTTPException(status_code=422, detail="Only external calendars can be connected")
+    if await db.get(Learner, request.learner_id) is None:
+        raise HTTPException(status_code=404, detail="Learner not found")
+    state = await connect_calendar(db, request.learner_id, request.provider, request.access_token,
+                                   request.calendar_id, request.refresh_token, request.expires_in)
+    await db.commit()
+    return {
+        "data": {
+            "id": state.id,
+            "learner_id": state.learner_id,
+            "provider": state.provider,
+            "calendar_id": state.calendar_id,
+            "last_synced_at": state.last_synced_at,
+        },
+        "message": "Calendar connected successfully",
+        "status": "success",
+    }
+
+@router.post("/sync")
+async def sync_external_calendars(request: CalendarSyncRequest, db: AsyncSession = Depends(get_db)):
+    """Pull changes from and push local changes to a learner's connected calendars now"""
+    if await db.get(Learner, request.learner_id) is None:
+        raise HTTPException(status_code=404, detail="Learner not found")
+    reports = await get_calendar_sync().sync_learner(request.learner_id)
+    return {
+        "data": {
+            "learner_id": request.learner_id,
+            "calendars": [
+                {
+                    "provider": report.provider,
+                    "full": report.full,
+                    "pages": report.pages,
+                    "upserted": report.upserted,
+                    "removed": report.removed,
+                    "pushed": report.pushed,
+                    "push_failed": report.push_failed,
+                    "error": report.error,
+                }
+                for report in reports
+            ],
+        },
+        "message": "Calendars synced successfully",
+        "status": "success",
+    }
@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from contextlib import aclosing
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from app.core.database import AsyncSessionLocal
+from app.models.learner import Learner
+from app.services.coach import CoachStream, coach_stream_limiter
 
 router = APIRouter()
 
+async def learner_tenant(learner_id: str) -> Optional[str]:
+    """Tenant of a learner, looked up in a session returned to the pool before any streaming starts"""
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(Learner.tenant_id).where(Learner.id == learner_id))
+
 @router.post("/chat")
 async def chat_with_coach():
     """Chat with AI coach - TODO: Implement AI coach chat"""
@@ -14,9 +24,58 @@ async def chat_with_coach():
     raise HTTPException(status_code=501, detail="Not implemented yet")
 
 @router.get("/chat/stream")
-async def stream_chat():
-    """Stream chat responses - TODO: Implement streaming chat"""
-    # TODO: Implement WebSocket streaming
-    # TODO: Stream AI responses in real-time
-    # TODO: Handle connection management
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+async def stream_chat(
+    learner_id: str,
+    message: str = Query(..., min_length=1, max_length=4000),
+    plan_id: Optional[str] = None,
+):
+    """Stream a coach answer as server-sent events (start, token, citation, done/error)"""
+    tenant_id = await learner_tenant(learner_id)
+    if tenant_id is None:
+        raise HTTPException(status_code=404, detail="Learner not found")
+    if not coach_stream_limiter.has_room():
+        raise HTTPException(status_code=503, detail="Too many active coach streams", headers={"Retry-After": "5"})
+
+    # The stream takes its limiter slot once the response starts iterating it
+    stream = CoachStream(learner_id, tenant_id, message, {"current_plan_id": plan_id} if plan_id else None,
+                         limiter=coach_stream_limiter)
+
+    async def body():
+        async with aclosing(stream.events()) as events:
+            event_id = 0
+            async for event in events:
+                event_id += 1
+                yield event.sse(event_id)
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # Stop nginx from buffering the stream
+    })
+
+@router.websocket("/chat/stream")
+async def stream_chat_websocket(websocket: WebSocket):
+    """Stream coach answers over a WebSocket, one answer per incoming message"""
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive_json()
+            learner_id, content = message.get("learner_id"), message.get("content")
+            if message.get("type") != "message" or not learner_id or not content:
+                await websocket.send_json({"type": "error", "detail": "Expected a message with learner_id and content"})
+                continue
+            tenant_id = await learner_tenant(learner_id)
+            if tenant_id is None:
+                await websocket.send_json({"type": "error", "detail": "Learner not found"})
+                continue
+            if not coach_stream_limiter.has_room():
+                await websocket.send_json({"type": "error", "detail": "Too many active coach streams"})
+                continue
+
+            stream = CoachStream(learner_id, tenant_id, content, message.get("context"),
+                                 limiter=coach_stream_limiter)
+            async with aclosing(stream.events()) as events:
+                async for event in events:
+                    if event.type != "heartbeat":
+                        await websocket.send_json(event.payload())
+    except WebSocketDisconnect:
+        pass
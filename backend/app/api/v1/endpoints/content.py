@@ -1,21 +1,105 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import entity_tag, response_cache
 from app.core.database import get_db
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, paginated_response
+from app.models.content import ContentType, LicenseType
+from app.repositories import ContentItemRepository
+from app.schemas.content import ContentItemRead, ContentSearchResult
+from app.services.rag import SearchFilters, content_search_registry
 
 router = APIRouter()
 
+def _split_tags(value: Optional[str]) -> List[str]:
+    return [tag.strip() for tag in value.split(",") if tag.strip()] if value else []
+
+@router.get("/")
+async def list_content(
+    type: Optional[ContentType] = None,
+    tags: Optional[str] = Query(None, description="Comma-separated tags the item must all have"),
+    any_tags: Optional[str] = Query(None, description="Comma-separated tags the item must have at least one of"),
+    exclude_tags: Optional[str] = Query(None, description="Comma-separated tags the item must not have"),
+    provider_id: List[str] = Query([]),
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    """List active content items with optional type filter and cursor pagination.
+
+    Tag and provider filters are answered from the tag
+    index and return total and facet counts; they page with skip instead of
+    a cursor.
+    """
+    repository = ContentItemRepository(db)
+    if tags or any_tags or exclude_tags or provider_id:
+        if type:
+            raise HTTPException(status_code=400, detail="type cannot be combined with tag or provider filters")
+        items, result = await repository.search_tags(
+            _split_tags(tags), _split_tags(any_tags), _split_tags(exclude_tags),
+            provider_ids=provider_id or None, skip=skip, limit=limit,
+        )
+        return {
+            "data": [ContentItemRead.model_validate(item).model_dump() for item in items],
+            "pagination": {"limit": limit, "skip": skip, "total": result.total},
+            "facets": result.facets,
+            "status": "success",
+        }
+
+    try:
+        if type:
+            items = await repository.get_by_type(type, limit=limit, cursor=cursor)
+        else:
+            items = await repository.get_active(limit=limit, cursor=cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return paginated_response(items, lambda item: ContentItemRead.model_validate(item).model_dump(), limit)
+
 @router.get("/search")
-async def search_content():
-    """Search content - TODO: Implement content search"""
-    # TODO: Add search query parameters
-    # TODO: Implement RAG-based search
-    # TODO: Return search results with citations
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+async def search_content(
+    q: str = Query(..., min_length=1, max_length=500),
+    type: List[ContentType] = Query([]),
+    license: List[LicenseType] = Query([]),
+    language: List[str] = Query([]),
+    level: List[str] = Query([]),
+    duration_min: Optional[int] = Query(None, ge=0),
+    duration_max: Optional[int] = Query(None, ge=0),
+    cost_max: Optional[float] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    """Search active content with hybrid lexical + vector ranking; filters apply before ranking"""
+    engine = await content_search_registry.get()
+    filters = SearchFilters(
+        licenses=license,
+        types=type,
+        languages=language,
+        levels=level,
+        min_duration_min=duration_min,
+        max_duration_min=duration_max,
+        max_cost=cost_max,
+    )
+    hits = engine.search(q, filters, limit=limit)
+
+    items = {item.id: item for item in await ContentItemRepository(db).get_by_ids(hit.item_id for hit in hits)}
+    data = [
+        ContentSearchResult(
+            **ContentItemRead.model_validate(items[hit.item_id]).model_dump(), relevance_score=hit.score
+        ).model_dump()
+        for hit in hits
+        if hit.item_id in items and items[hit.item_id].is_active
+    ]
+    return {"data": data, "status": "success"}
 
 @router.get("/{content_id}")
-async def get_content(content_id: str):
-    """Get content details - TODO: Implement content retrieval"""
-    # TODO: Validate content_id
-    # TODO: Retrieve content from database
-    # TODO: Return content details
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+async def get_content(content_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """Get content details (cached, supports If-None-Match)"""
+    async def load():
+        item = await ContentItemRepository(db).get_by_id(content_id)
+        if item is None:
+            raise HTTPException(status_code=404, detail="Content not found")
+        data = ContentItemRead.model_validate(item).model_dump()
+        return {"data": data, "message": "Content retrieved successfully", "status": "success"}, []
+
+    return await response_cache.respond(request, "content.detail", [entity_tag("content", content_id)], load)
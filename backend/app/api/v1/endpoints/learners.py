@@ -1,9 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, paginated_response
+from app.repositories import LearnerRepository
+from app.services.analytics import learner_progress
+from app.schemas.learner import LearnerRead
 
 router = APIRouter()
 
+@router.get("/")
+async def list_learners(
+    tenant_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_progress: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
+    """List learners of a tenant with cursor pagination, optionally with their learning progress"""
+    # The tenant is an explicit parameter: this API has no authentication yet
+    # (see auth.py), so there is no caller to derive it from
+    try:
+        learners = await LearnerRepository(db).get_by_tenant(tenant_id, limit=limit, cursor=cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if not include_progress:
+        return paginated_response(learners, lambda learner: LearnerRead.model_validate(learner).model_dump(), limit)
+    progress = {entry.learner_id: entry for entry in await learner_progress(db, [learner.id for learner in learners])}
+    return paginated_response(learners, lambda learner: {
+        **LearnerRead.model_validate(learner).model_dump(),
+        "progress": progress[learner.id].to_dict(),
+    }, limit)
+
 @router.get("/me")
 async def get_learner_profile():
     """Get current learner profile - TODO: Implement profile retrieval"""
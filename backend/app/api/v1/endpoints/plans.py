@@ -1,30 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import entity_tag, response_cache
 from app.core.database import get_db
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, paginated_response
+from app.models.learner import Learner
+from app.models.plan import PlanStatus
+from app.repositories import LearningPlanRepository
+from app.schemas.plan import PlanConstraints, PlanCreate, PlanRead, PlanStepRead
+from app.services.planner import create_learning_plan, narrate_plan
 
 router = APIRouter()
 
-@router.post("/")
-async def create_plan():
-    """Create learning plan - TODO: Implement plan creation"""
-    # TODO: Validate plan data
-    # TODO: Use AI planner to generate plan
-    # TODO: Save plan to database
-    # TODO: Return plan with steps and citations
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+@router.post("/", status_code=201)
+async def create_plan(plan_in: PlanCreate, db: AsyncSession = Depends(get_db)):
+    """Create learning plan from target skills and time constraints"""
+    learner = await db.get(Learner, plan_in.learner_id)
+    if learner is None:
+        raise HTTPException(status_code=404, detail="Learner not found")
+
+    plan, steps, result = await create_learning_plan(
+        db,
+        learner,
+        title=plan_in.title,
+        objective=plan_in.objective,
+        target_skill_ids=plan_in.target_skill_ids,
+        target_date=plan_in.target_date,
+        start_date=plan_in.start_date,
+        time_budget_hours=plan_in.time_budget_hours,
+    )
+    if result.unknown_skill_ids:
+        raise HTTPException(
+            status_code=422,
+            detail={"message": "Unknown target skills", "skill_ids": result.unknown_skill_ids},
+        )
+    await db.commit()
+
+    narrative = await narrate_plan(learner.tenant_id, plan, steps)
+    return {
+        "data": {
+            "plan": PlanRead.model_validate(plan).model_dump(),
+            "narrative": narrative,
+            "steps": [PlanStepRead.model_validate(step).model_dump() for step in steps],
+            "constraints": PlanConstraints(
+                feasible=result.feasible,
+                total_effort_min=result.total_effort_min,
+                projected_completion=result.projected_completion,
+                required_weekly_hours=result.required_weekly_hours,
+                known_skill_ids=result.known_skill_ids,
+            ).model_dump(),
+        },
+        "message": "Plan created successfully",
+        "status": "success",
+    }
 
 @router.get("/")
-async def list_plans():
-    """List learning plans - TODO: Implement plans listing"""
-    # TODO: Add pagination and filtering
-    # TODO: Retrieve plans from database
-    # TODO: Return plans list
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+async def list_plans(
+    learner_id: Optional[str] = None,
+    status: Optional[PlanStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    """List learning plans with optional learner/status filters and cursor pagination"""
+    try:
+        plans = await LearningPlanRepository(db).get_page(learner_id, status, limit=limit, cursor=cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return paginated_response(plans, lambda plan: PlanRead.model_validate(plan).model_dump(), limit)
 
 @router.get("/{plan_id}")
-async def get_plan(plan_id: str):
-    """Get plan details - TODO: Implement plan retrieval"""
-    # TODO: Validate plan_id
-    # TODO: Retrieve plan from database
-    # TODO: Return plan details with steps
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+async def get_plan(plan_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """Get plan details with steps (cached, supports If-None-Match)"""
+    async def load():
+        plan = await LearningPlanRepository(db).get_with_steps(plan_id)
+        if plan is None:
+            raise HTTPException(status_code=404, detail="Plan not found")
+        data = PlanRead.model_validate(plan).model_dump()
+        data["progress_percentage"] = plan.get_progress_percentage()
+        data["steps"] = [PlanStepRead.model_validate(step).model_dump() for step in plan.plan_steps]
+        return {"data": data, "message": "Learning plan retrieved successfully", "status": "success"}, []
+
+    return await response_cache.respond(request, "plans.detail", [entity_tag("plan", plan_id)], load)
@@ -1,21 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import entity_tag, response_cache
 from app.core.database import get_db
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, paginated_response
+from app.models.skill import SkillRelation
+from app.repositories import SkillEdgeRepository, SkillRepository
+from app.schemas.skill import SkillRead
 
 router = APIRouter()
 
+def _split_tags(value: Optional[str]) -> List[str]:
+    return [tag.strip() for tag in value.split(",") if tag.strip()] if value else []
+
 @router.get("/")
-async def list_skills():
-    """List all skills - TODO: Implement skills listing"""
-    # TODO: Add filtering and pagination
-    # TODO: Retrieve skills from database
-    # TODO: Return skills list
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+async def list_skills(
+    domain: Optional[str] = None,
+    tags: Optional[str] = Query(None, description="Comma-separated tags the skill must all have"),
+    any_tags: Optional[str] = Query(None, description="Comma-separated tags the skill must have at least one of"),
+    exclude_tags: Optional[str] = Query(None, description="Comma-separated tags the skill must not have"),
+    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    """List skills with optional domain filter and cursor pagination.
+
+    Tag filters are answered from the tag index and return total and facet
+    counts; they page with skip instead of a cursor.
+    """
+    repository = SkillRepository(db)
+    if tags or any_tags or exclude_tags:
+        skills, result = await repository.search_tags(
+            _split_tags(tags), _split_tags(any_tags), _split_tags(exclude_tags),
+            domains=[domain] if domain else None, skip=skip, limit=limit,
+        )
+        return {
+            "data": [SkillRead.model_validate(skill).model_dump() for skill in skills],
+            "pagination": {"limit": limit, "skip": skip, "total": result.total},
+            "facets": result.facets,
+            "status": "success",
+        }
+
+    try:
+        if domain:
+            skills = await repository.get_by_domain(domain, limit=limit, cursor=cursor)
+        else:
+            skills = await repository.get_all(limit=limit, cursor=cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return paginated_response(skills, lambda skill: SkillRead.model_validate(skill).model_dump(), limit)
 
 @router.get("/{skill_id}")
-async def get_skill(skill_id: str):
-    """Get skill details - TODO: Implement skill retrieval"""
-    # TODO: Validate skill_id
-    # TODO: Retrieve skill from database
-    # TODO: Return skill details
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+async def get_skill(skill_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """Get skill details with its related skills (cached, supports If-None-Match)"""
+    async def load():
+        skill = await SkillRepository(db).get_by_id(skill_id)
+        if skill is None:
+            raise HTTPException(status_code=404, detail="Skill not found")
+
+        # Prerequisites point at this skill; outgoing prerequisite edges are skills it unlocks
+        related = []
+        for edge in await SkillEdgeRepository(db).get_edges_for_skill(skill_id):
+            incoming = edge.dst_skill_id == skill_id
+            other_id = edge.src_skill_id if incoming else edge.dst_skill_id
+            relation = edge.relation.value
+            if edge.relation == SkillRelation.PREREQUISITE and not incoming:
+                relation = "unlocks"
+            related.append((other_id, relation))
+        labels = {other.id: other.label for other in await SkillRepository(db).get_by_ids(
+            {other_id for other_id, _ in related}
+        )}
+
+        data = SkillRead.model_validate(skill).model_dump()
+        data["related_skills"] = [
+            {"id": other_id, "label": labels[other_id], "relation": relation}
+            for other_id, relation in related if other_id in labels
+        ]
+        payload = {"data": data, "message": "Skill retrieved successfully", "status": "success"}
+        return payload, [entity_tag("skill", other_id) for other_id in labels]
+
+    return await response_cache.respond(request, "skills.detail", [entity_tag("skill", skill_id)], load)
@@ -0,0 +1,70 @@
+from typing import Callable, Generic, Optional, TypeVar
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BackgroundBuild(Generic[T]):
+    """Single-flight build of a process-wide structure on a worker thread.
+
+    ``start`` runs ``build`` on the loop's default executor unless a build
+    is already running, then hands the result to ``publish`` on the event
+    loop. Readers keep serving the previous value meanwhile; nothing on the
+    loop ever waits on the build or on a thread lock.
+    """
+
+    def __init__(self, name: str, build: Callable[[], T], publish: Callable[[T], None]):
+        self.name = name
+        self.build = build
+        self.publish = publish
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether a build is in flight on the current event loop"""
+        task = self._task
+        if task is None or task.done():
+            return False
+        try:
+            return task.get_loop() is asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+    def start(self) -> "asyncio.Task[T]":
+        """Start a build unless one is running and return its task (needs a running loop)"""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            # Failures are logged in _run; retrieve them so an unawaited task doesn't warn again
+            self._task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._task
+
+    def start_soon(self) -> bool:
+        """Start a build if there is a running loop to run it on; False from sync code"""
+        try:
+            self.start()
+        except RuntimeError:
+            return False
+        return True
+
+    async def wait(self) -> T:
+        """Wait for the running build, starting one if needed.
+
+        Shielded, so a caller that gives up doesn't cancel the build for
+        everyone else.
+        """
+        return await asyncio.shield(self.start())
+
+    async def _run(self) -> T:
+        started = time.perf_counter()
+        try:
+            value = await asyncio.get_running_loop().run_in_executor(None, self.build)
+        except Exception:
+            logger.exception("Background build of %s failed", self.name)
+            raise
+        self.publish(value)
+        logger.info("Built %s in %.2fs", self.name, time.perf_counter() - started)
+        return value
@@ -0,0 +1,375 @@
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+import asyncio
+import hashlib
+import json
+import logging
+import struct
+import time
+import uuid
+import zlib
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.exc import MissingGreenlet
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.util import await_only
+
+from app.core.config import settings
+from app.core.redis import get_binary_redis, get_sync_redis
+from app.models.content import ContentItem
+from app.models.plan import LearningPlan, PlanStep
+from app.models.skill import Skill, SkillEdge
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "cache"
+
+# Entry layout: format version, 16-byte ETag digest, flags, tag count, then
+# per tag its UTF-8 name (length-prefixed) and the version it was read at,
+# then the JSON body, zlib-compressed once it is worth it
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<B16sBH")
+_TAG_LENGTH = struct.Struct("<H")
+_TAG_VERSION = struct.Struct("<Q")
+_COMPRESSED = 0x01
+COMPRESS_MIN_BYTES = 512
+
+# Single-flight across workers: the first miss takes a short Redis lock and
+# recomputes; other workers poll for its result until the lock is released
+LOCK_TIMEOUT_MS = 5_000
+LOCK_POLL_SECONDS = 0.02
+
+_RELEASE_LOCK = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+# A loader returns the response payload and any tags discovered while
+# building it (for example the IDs of embedded related entities)
+Loader = Callable[[], Awaitable[Tuple[Any, Sequence[str]]]]
+
+
+def entity_tag(kind: str, entity_id: str) -> str:
+    """Invalidation tag for one entity, e.g. ``skill:<id>``"""
+    return f"{kind}:{entity_id}"
+
+
+@dataclass
+class CacheEntry:
+    """A cached response body with its ETag and the tag versions it was built at"""
+
+    etag: str
+    body: bytes
+    tags: Dict[str, int] = field(default_factory=dict)
+
+
+def encode_entry(entry: CacheEntry) -> bytes:
+    body, flags = entry.body, 0
+    if len(body) >= COMPRESS_MIN_BYTES:
+        body, flags = zlib.compress(body), _COMPRESSED
+    parts = [_HEADER.pack(FORMAT_VERSION, bytes.fromhex(entry.etag), flags, len(entry.tags))]
+    for tag, version in entry.tags.items():
+        raw = tag.encode()
+        parts += [_TAG_LENGTH.pack(len(raw)), raw, _TAG_VERSION.pack(version)]
+    parts.append(body)
+    return b"".join(parts)
+
+
+def decode_entry(raw: bytes) -> Optional[CacheEntry]:
+    """Decode a stored entry; None for entries written in another format"""
+    try:
+        version, digest, flags, num_tags = _HEADER.unpack_from(raw)
+        if version != FORMAT_VERSION:
+            return None
+        offset, tags = _HEADER.size, {}
+        for _ in range(num_tags):
+            (length,) = _TAG_LENGTH.unpack_from(raw, offset)
+            offset += _TAG_LENGTH.size
+            tag = raw[offset:offset + length].decode()
+            offset += length
+            (tags[tag],) = _TAG_VERSION.unpack_from(raw, offset)
+            offset += _TAG_VERSION.size
+        body = raw[offset:]
+        if flags & _COMPRESSED:
+            body = zlib.decompress(body)
+    except (struct.error, zlib.error, UnicodeDecodeError):
+        return None
+    return CacheEntry(digest.hex(), body, tags)
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/").strip('"') == etag for candidate in candidates
+    )
+
+
+@dataclass
+class CacheStats:
+    """Per-route counters"""
+
+    hits: int = 0
+    misses: int = 0
+    not_modified: int = 0  # 304s, counted in addition to the hit or miss
+    stale: int = 0  # Entries found but invalidated by a tag, counted as misses
+    coalesced: int = 0  # Misses answered by a recompute already in flight
+    errors: int = 0  # Redis failures; the request is served uncached
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache:
+    """Redis-backed cache for read endpoints, invalidated by entity tags.
+
+    Routes opt in by returning ``await response_cache.respond(...)`` with
+    the tags their response depends on. Invalidation never deletes
+    entries: each tag has a version counter in Redis, an entry records the
+    versions it was built at, and bumping a tag makes every entry built
+    under an older version a miss. Tag versions are read before the loader
+    runs, so a write that commits while a response is being rebuilt still
+    invalidates it. Recomputes are single-flight within the process and,
+    through a short Redis lock, across workers. Redis failures degrade to
+    uncached responses.
+    """
+
+    def __init__(self, redis_factory: Callable[[], Awaitable] = get_binary_redis,
+                 ttl_seconds: Optional[int] = None, prefix: str = KEY_PREFIX):
+        self.redis_factory = redis_factory
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.stats: Dict[str, CacheStats] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    # Keys
+
+    def entry_key(self, route: str, request: Request) -> str:
+        query = urlencode(sorted(request.query_params.multi_items()))
+        digest = hashlib.blake2b(f"{request.url.path}?{query}".encode(), digest_size=16).hexdigest()
+        return f"{self.prefix}:{route}:{digest}"
+
+    def tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    # Serving
+
+    async def respond(self, request: Request, route: str, tags: Iterable[str], load: Loader,
+                      ttl_seconds: Optional[int] = None) -> Response:
+        """Serve a response from the cache, building and storing it with ``load`` on a miss"""
+        stats = self.stats.setdefault(route, CacheStats())
+        if not settings.RESPONSE_CACHE_ENABLED:
+            payload, _ = await load()
+            return self._response(request, build_entry(payload, {}), "BYPASS", stats)
+
+        key, tags = self.entry_key(route, request), list(dict.fromkeys(tags))
+        client, entry, versions = None, None, {}
+        try:
+            client = await self.redis_factory()
+            entry, versions = await self._read(client, key, tags, stats)
+        except (RedisError, OSError) as exc:
+            stats.errors += 1
+            client = None
+            logger.warning("Response cache read failed for %s: %s", route, exc)
+
+        if entry is not None:
+            stats.hits += 1
+            return self._response(request, entry, "HIT", stats)
+        stats.misses += 1
+        entry = await self._single_flight(
+            key, stats, lambda: self._fill(client, key, tags, versions, load, ttl_seconds, stats)
+        )
+        return self._response(request, entry, "MISS", stats)
+
+    def _response(self, request: Request, entry: CacheEntry, status: str, stats: CacheStats) -> Response:
+        headers = {"ETag": f'"{entry.etag}"', "Cache-Control": "private, no-cache", "X-Cache": status}
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            stats.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    async def _read(self, client, key: str, tags: List[str],
+                    stats: CacheStats) -> Tuple[Optional[CacheEntry], Dict[str, int]]:
+        """Current entry, if still valid, and the current versions of the route's tags"""
+        values = await client.mget([key] + [self.tag_key(tag) for tag in tags])
+        versions = {tag: int(value or 0) for tag, value in zip(tags, values[1:])}
+        entry = decode_entry(values[0]) if values[0] is not None else None
+        if entry is None:
+            return None, versions
+
+        # Tags the loader discovered (not known up front) are checked in a second round trip
+        current = dict(versions)
+        extra = [tag for tag in entry.tags if tag not in current]
+        if extra:
+            extra_values = await client.mget([self.tag_key(tag) for tag in extra])
+            current.update((tag, int(value or 0)) for tag, value in zip(extra, extra_values))
+        if any(current.get(tag, 0) != version for tag, version in entry.tags.items()) \
+                or any(tag not in entry.tags for tag in versions):
+            stats.stale += 1
+            return None, versions
+        return entry, versions
+
+    async def _single_flight(self, key: str, stats: CacheStats,
+                             fill: Callable[[], Awaitable[CacheEntry]]) -> CacheEntry:
+        """Run one fill per key in this process; concurrent misses share its result"""
+        pending = self._inflight.get(key)
+        if pending is not None:
+            stats.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            entry = await fill()
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # Retrieved here so lone failures are not reported as unhandled
+            raise
+        else:
+            future.set_result(entry)
+            return entry
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _fill(self, client, key: str, tags: List[str], versions: Dict[str, int], load: Loader,
+                    ttl_seconds: Optional[int], stats: CacheStats) -> CacheEntry:
+        if client is None:
+            payload, _ = await load()
+            return build_entry(payload, versions)
+
+        lock_key, token, locked = f"{key}:lock", uuid.uuid4().hex, False
+        try:
+            locked = bool(await client.set(lock_key, token, nx=True, px=LOCK_TIMEOUT_MS))
+            if not locked:
+                entry = await self._wait_for_fill(client, key, lock_key, tags, stats)
+                if entry is not None:
+                    stats.coalesced += 1
+                    return entry
+        except (RedisError, OSError) as exc:
+            stats.errors += 1
+            logger.warning("Response cache lock failed for %s: %s", key, exc)
+
+        try:
+            payload, discovered = await load()
+            versions = dict(versions)
+            try:
+                extra = [tag for tag in dict.fromkeys(discovered) if tag not in versions]
+                if extra:
+                    values = await client.mget([self.tag_key(tag) for tag in extra])
+                    versions.update((tag, int(value or 0)) for tag, value in zip(extra, values))
+                entry = build_entry(payload, versions)
+                ttl = ttl_seconds or self.ttl_seconds or settings.RESPONSE_CACHE_TTL_SECONDS
+                await client.set(key, encode_entry(entry), ex=ttl)
+            except (RedisError, OSError) as exc:
+                stats.errors += 1
+                logger.warning("Response cache write failed for %s: %s", key, exc)
+                entry = build_entry(payload, versions)
+            return entry
+        finally:
+            if locked:
+                try:
+                    await client.eval(_RELEASE_LOCK, 1, lock_key, token)
+                except (RedisError, OSError):
+                    pass  # The lock expires on its own
+
+    async def _wait_for_fill(self, client, key: str, lock_key: str, tags: List[str],
+                             stats: CacheStats) -> Optional[CacheEntry]:
+        """Poll for another worker's recompute until its lock is released or expires"""
+        deadline = time.monotonic() + LOCK_TIMEOUT_MS / 1000
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+            entry, _ = await self._read(client, key, tags, CacheStats())
+            if entry is not None or not await client.exists(lock_key):
+                return entry
+        return None
+
+    # Invalidation
+
+    async def invalidate(self, tags: Iterable[str]):
+        """Bump tag versions so entries built under them become misses"""
+        client = await self.redis_factory()
+        pipeline = client.pipeline(transaction=False)
+        for tag in set(tags):
+            pipeline.incr(self.tag_key(tag))
+        await pipeline.execute()
+
+    def invalidate_blocking(self, tags: Iterable[str]):
+        """Same as ``invalidate`` for code running outside the event loop"""
+        pipeline = get_sync_redis().pipeline(transaction=False)
+        for tag in set(tags):
+            pipeline.incr(self.tag_key(tag))
+        pipeline.execute()
+
+    def stats_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            route: {**asdict(stats), "hit_ratio": round(stats.hit_ratio, 4)}
+            for route, stats in sorted(self.stats.items())
+        }
+
+
+def build_entry(payload: Any, versions: Dict[str, int]) -> CacheEntry:
+    """Serialize a payload to compact JSON and fingerprint it"""
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+    return CacheEntry(hashlib.blake2b(body, digest_size=16).hexdigest(), body, dict(versions))
+
+
+response_cache = ResponseCache()
+
+
+# Invalidation: collect entity tags of writes per session, bump them on commit
+
+_CACHE_TAGS_KEY = "response_cache_tags"
+
+# Cache tags each model's writes invalidate
+ENTITY_TAGS: Dict[type, Callable[[Any], List[str]]] = {
+    Skill: lambda skill: [entity_tag("skill", skill.id)],
+    SkillEdge: lambda edge: [entity_tag("skill", edge.src_skill_id), entity_tag("skill", edge.dst_skill_id)],
+    ContentItem: lambda item: [entity_tag("content", item.id)],
+    LearningPlan: lambda plan: [entity_tag("plan", plan.id)],
+    PlanStep: lambda step: [entity_tag("plan", step.plan_id)],
+}
+
+
+def invalidate_on_commit(session, tags: Iterable[str]):
+    """Invalidate tags when the session commits (for writes that bypass ORM events, e.g. bulk upserts)"""
+    session = getattr(session, "sync_session", session)
+    session.info.setdefault(_CACHE_TAGS_KEY, set()).update(tags)
+
+
+def _record_entity_write(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        invalidate_on_commit(session, ENTITY_TAGS[type(target)](target))
+
+
+for _model in ENTITY_TAGS:
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _record_entity_write)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_cache_tags(session):
+    tags = session.info.pop(_CACHE_TAGS_KEY, None)
+    if not tags:
+        return
+    # AsyncSession commits run in a greenlet, so the async client can be awaited inline
+    invalidation = response_cache.invalidate(tags)
+    try:
+        await_only(invalidation)
+    except MissingGreenlet:
+        invalidation.close()
+        try:
+            response_cache.invalidate_blocking(tags)
+        except (RedisError, OSError) as exc:
+            logger.warning("Response cache invalidation failed for %d tags: %s", len(tags), exc)
+    except (RedisError, OSError) as exc:
+        logger.warning("Response cache invalidation failed for %d tags: %s", len(tags), exc)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_cache_tags(session):
+    session.info.pop(_CACHE_TAGS_KEY, None)
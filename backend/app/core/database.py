@@ -1,5 +1,6 @@
+from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 from app.core.config import settings
 
 # Create async engine
@@ -17,6 +18,22 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# Sync engine and sessions for blocking work on worker threads (in-memory index builds),
+# kept small since only background builds use it
+sync_engine = create_engine(
+    settings.DATABASE_URL,
+    pool_size=2,
+    max_overflow=2,
+    pool_pre_ping=True,
+    echo=settings.DEBUG,
+)
+
+SessionLocal = sessionmaker(
+    sync_engine,
+    class_=Session,
+    expire_on_commit=False,
+)
+
 # Base class for models
 Base = declarative_base()
 
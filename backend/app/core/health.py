@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.core.cache import response_cache
 from app.core.redis import get_redis
+from app.services.llm import get_llm_gateway
+from app.services.grading import get_grading_pool
 
 health_router = APIRouter()
 
@@ -43,3 +46,27 @@ async def liveness_check():
         "status": "alive",
         "timestamp": "2024-01-01T00:00:00Z"
     }
+
+@health_router.get("/cache")
+async def cache_stats():
+    """Response cache hit/miss counters for this worker, per route"""
+    return {
+        "status": "success",
+        "data": response_cache.stats_snapshot(),
+    }
+
+@health_router.get("/llm")
+async def llm_stats():
+    """LLM gateway counters for this worker: model calls, cache hits, coalesced requests"""
+    return {
+        "status": "success",
+        "data": get_llm_gateway().stats_snapshot(),
+    }
+
+@health_router.get("/grading")
+async def grading_stats():
+    """Grading pool counters for this worker: queued, running, graded, rejected submissions"""
+    return {
+        "status": "success",
+        "data": get_grading_pool().stats_snapshot(),
+    }
@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence
+import base64
+import json
+
+from sqlalchemy import DateTime, tuple_
+
+# Keyset orderings: rows are ordered by these columns, with id as the tie-breaker
+CREATED_KEYS = ("created_at", "id")
+SEQUENCE_KEYS = ("sequence", "id")
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode keyset values into an opaque URL-safe cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> tuple:
+    """Decode a cursor back into values typed for the keyset columns"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        raise InvalidCursor("Cursor does not match this listing")
+
+    values = []
+    for column, value in zip(columns, payload):
+        if isinstance(column.type, DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError) as exc:
+                raise InvalidCursor("Malformed cursor") from exc
+        values.append(value)
+    return tuple(values)
+
+
+def keyset(query, model, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+           keys: Sequence[str] = CREATED_KEYS, skip: int = 0):
+    """Apply keyset pagination to a Query or select().
+
+    Rows come back ordered by ``keys`` starting strictly after the cursor
+    position, so the database seeks through the matching index instead of
+    scanning and discarding ``skip`` rows. ``skip`` is only honoured for
+    legacy callers that pass no cursor.
+    """
+    columns = [getattr(model, key) for key in keys]
+    if cursor:
+        query = query.filter(tuple_(*columns) > tuple_(*decode_cursor(cursor, columns)))
+    query = query.order_by(*columns)
+    if skip and not cursor:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def next_cursor(items: Sequence, limit: int, keys: Sequence[str] = CREATED_KEYS) -> Optional[str]:
+    """Get the cursor for the page after items, or None if this was the last page"""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor([getattr(last, key) for key in keys])
+
+
+def paginated_response(items: Sequence, serialize: Callable[[Any], Any], limit: int,
+                       keys: Sequence[str] = CREATED_KEYS) -> dict:
+    """Build the paginated response envelope for a keyset page"""
+    data: List[Any] = [serialize(item) for item in items]
+    return {
+        "data": data,
+        "pagination": {
+            "limit": limit,
+            "next_cursor": next_cursor(items, limit, keys),
+        },
+        "status": "success",
+    }
@@ -1,3 +1,4 @@
+import redis as redis_sync
 import redis.asyncio as redis
 from app.core.config import settings
 
@@ -9,10 +10,36 @@ redis_pool = redis.ConnectionPool.from_url(
     max_connections=20
 )
 
+# Connection pool for raw byte values (packed vectors, encoded payloads)
+binary_redis_pool = redis.ConnectionPool.from_url(
+    settings.REDIS_URL,
+    password=settings.REDIS_PASSWORD,
+    decode_responses=False,
+    max_connections=20
+)
+
+# Blocking client for code running outside the event loop (workers, scripts)
+sync_redis_pool = redis_sync.ConnectionPool.from_url(
+    settings.REDIS_URL,
+    password=settings.REDIS_PASSWORD,
+    decode_responses=False,
+    max_connections=5
+)
+
 async def get_redis() -> redis.Redis:
     """Get Redis connection"""
     return redis.Redis(connection_pool=redis_pool)
 
+async def get_binary_redis() -> redis.Redis:
+    """Get Redis connection that returns values as bytes"""
+    return redis.Redis(connection_pool=binary_redis_pool)
+
+def get_sync_redis() -> redis_sync.Redis:
+    """Get blocking Redis connection that returns values as bytes"""
+    return redis_sync.Redis(connection_pool=sync_redis_pool)
+
 async def close_redis():
-    """Close Redis connection pool"""
+    """Close Redis connection pools"""
     await redis_pool.disconnect()
+    await binary_redis_pool.disconnect()
+    sync_redis_pool.disconnect()
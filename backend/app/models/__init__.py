@@ -8,8 +8,10 @@ from .content import ContentProvider, ContentItem
 from .plan import LearningPlan, PlanStep
 from .assessment import Assessment, AssessmentAttempt
 from .coach import CoachMessage
-from .calendar import CalendarEvent
+from .calendar import CalendarEvent, CalendarSyncState
 from .citation import Citation
+from .analytics import TeamSkillRollup, TeamSkillTotal, LearnerSkillState
+from .notification import NotificationDelivery
 
 __all__ = [
     'Base',
@@ -25,5 +27,10 @@ __all__ = [
     'AssessmentAttempt',
     'CoachMessage',
     'CalendarEvent',
-    'Citation'
+    'CalendarSyncState',
+    'Citation',
+    'TeamSkillRollup',
+    'TeamSkillTotal',
+    'LearnerSkillState',
+    'NotificationDelivery'
 ]
@@ -0,0 +1,113 @@
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, Index, UniqueConstraint
+from .base import BaseModel
+
+# Rollup rows with this skill_id count learner-level activity (any skill)
+ALL_SKILLS = ""
+
+# Rollup rows with this team sum every team of the tenant
+ALL_TEAMS = "*"
+
+MASTERY_BUCKETS = 5  # Histogram of current mastery: [0, 0.2), [0.2, 0.4), ... [0.8, 1.0]
+
+
+class RollupMetrics:
+    """Additive team × skill metrics shared by the daily and running-total rollups"""
+
+    # Learners with at least one completed attempt (coverage); on ALL_SKILLS rows, any activity
+    learners = Column(Integer, nullable=False, default=0)
+
+    # Learners whose latest activity fell on the day; kept current rather than as of a date,
+    # so the sum from a date on counts the learners active since then
+    last_active = Column(Integer, nullable=False, default=0)
+
+    # Learners by current mastery bucket, and the sum of their current mastery
+    mastery_0 = Column(Integer, nullable=False, default=0)
+    mastery_1 = Column(Integer, nullable=False, default=0)
+    mastery_2 = Column(Integer, nullable=False, default=0)
+    mastery_3 = Column(Integer, nullable=False, default=0)
+    mastery_4 = Column(Integer, nullable=False, default=0)
+    mastery_sum = Column(Float, nullable=False, default=0.0)
+
+    # Completed attempts
+    attempts = Column(Integer, nullable=False, default=0)
+    attempts_passed = Column(Integer, nullable=False, default=0)
+
+    # Learners reaching proficiency, and days from first attempt to proficiency summed over them
+    proficient = Column(Integer, nullable=False, default=0)
+    proficiency_days_sum = Column(Float, nullable=False, default=0.0)
+
+    # Plan steps added (net of removed ones), completed plan steps,
+    # and hours from step creation to completion summed over them
+    steps_planned = Column(Integer, nullable=False, default=0)
+    steps_completed = Column(Integer, nullable=False, default=0)
+    step_hours_sum = Column(Float, nullable=False, default=0.0)
+
+
+METRIC_COLUMNS = [
+    "learners", "last_active", "mastery_0", "mastery_1", "mastery_2", "mastery_3", "mastery_4", "mastery_sum",
+    "attempts", "attempts_passed", "proficient", "proficiency_days_sum", "steps_planned", "steps_completed",
+    "step_hours_sum",
+]
+
+
+class TeamSkillRollup(RollupMetrics, BaseModel):
+    """Per-day changes of team × skill metrics (tenant × team × skill × day).
+
+    Counts that move between buckets (mastery histogram, coverage) are
+    stored as net changes on the day they happened, so the state on any
+    date is the running total minus the changes after it.
+    """
+
+    __tablename__ = "team_skill_rollups"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "team", "skill_id", "day", name="uq_team_skill_rollups_key"),
+        # Covers the per-skill activity of a date window, so reading it never touches the table
+        Index("ix_team_skill_rollups_tenant_team_day", "tenant_id", "team", "day", "skill_id",
+              "learners", "attempts", "attempts_passed"),
+    )
+
+    tenant_id = Column(String(36), nullable=False)
+    team = Column(String(255), nullable=False)  # Learner.profile["department"] ("" when unset), or ALL_TEAMS
+    skill_id = Column(String(36), nullable=False)  # ALL_SKILLS for learner-level activity
+    day = Column(Date, nullable=False)
+
+    def __repr__(self):
+        return f"<TeamSkillRollup(team={self.team}, skill_id={self.skill_id}, day={self.day})>"
+
+
+class TeamSkillTotal(RollupMetrics, BaseModel):
+    """Running totals of team × skill metrics (tenant × team × skill), the current state"""
+
+    __tablename__ = "team_skill_totals"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "team", "skill_id", name="uq_team_skill_totals_key"),
+    )
+
+    tenant_id = Column(String(36), nullable=False)
+    team = Column(String(255), nullable=False)
+    skill_id = Column(String(36), nullable=False)
+
+    def __repr__(self):
+        return f"<TeamSkillTotal(tenant_id={self.tenant_id}, team={self.team}, skill_id={self.skill_id})>"
+
+
+class LearnerSkillState(BaseModel):
+    """Where a learner stands on a skill, so rollups can be updated by difference"""
+
+    __tablename__ = "learner_skill_states"
+    __table_args__ = (
+        UniqueConstraint("learner_id", "skill_id", name="uq_learner_skill_states_key"),
+        Index("ix_learner_skill_states_tenant", "tenant_id"),
+    )
+
+    learner_id = Column(String(36), nullable=False)
+    skill_id = Column(String(36), nullable=False)  # ALL_SKILLS for the learner's first activity
+    tenant_id = Column(String(36), nullable=False)
+    team = Column(String(255), nullable=False)  # Team the learner was counted in
+    mastery = Column(Float, nullable=False, default=0.0)
+    first_active_at = Column(DateTime(timezone=True), nullable=False)
+    last_active_at = Column(DateTime(timezone=True), nullable=False)
+    proficient_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<LearnerSkillState(learner_id={self.learner_id}, skill_id={self.skill_id}, mastery={self.mastery})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, JSON, Integer, ForeignKey, Float, Enum, DateTime
+from sqlalchemy import Column, String, Text, JSON, Integer, ForeignKey, Float, Enum, DateTime, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -18,6 +18,7 @@ class QuestionType(enum.Enum):
 
 class AttemptStatus(enum.Enum):
     IN_PROGRESS = "in_progress"
+    GRADING = "grading"
     COMPLETED = "completed"
     ABANDONED = "abandoned"
 
@@ -25,6 +26,11 @@ class Assessment(BaseModel):
     """Assessment model for learning evaluations"""
     
     __tablename__ = "assessments"
+    __table_args__ = (
+        Index("ix_assessments_created_at_id", "created_at", "id"),
+        Index("ix_assessments_skill_created_at_id", "skill_id", "created_at", "id"),
+        Index("ix_assessments_learner_created_at_id", "learner_id", "created_at", "id"),
+    )
     
     learner_id = Column(String(36), ForeignKey("learners.id"), nullable=False, index=True)
     skill_id = Column(String(36), ForeignKey("skills.id"), nullable=False, index=True)
@@ -50,8 +56,11 @@ class Assessment(BaseModel):
     #   "max_attempts": 3
     # }
     
+    # Attempts handed out so far; numbers attempts without loading them
+    attempt_count = Column(Integer, nullable=False, default=0)
+    
     # Assessment metadata
-    metadata = Column(JSON, nullable=False, default=dict)
+    metadata_ = Column("metadata", JSON, nullable=False, default=dict)
     # {
     #   "estimated_difficulty": 3,
     #   "tags": ["python", "basics"],
@@ -81,33 +90,47 @@ class Assessment(BaseModel):
             cls.skill_id == skill_id
         ).order_by(cls.created_at.desc()).all()
     
+    def compiled_spec(self):
+        """Compiled spec (answer key, points, limits), cached per process by spec version"""
+        version = (self.id, self.updated_at)
+        memo = self.__dict__.get('_compiled_spec')
+        if memo is not None and memo[0] == version and version[1] is not None:
+            return memo[1]
+        from app.services.grading.spec import compiled_spec
+        compiled = compiled_spec(self)
+        self._compiled_spec = (version, compiled)
+        return compiled
+    
     def get_total_points(self):
         """Calculate total possible points"""
-        total = 0
-        for question in self.spec.get('questions', []):
-            total += question.get('points', 0)
-        return total
+        return self.compiled_spec().total_points
     
     def get_passing_score(self):
         """Get passing score threshold"""
-        return self.spec.get('passing_score', 70)
+        return self.compiled_spec().passing_score
     
     def get_time_limit(self):
         """Get time limit in minutes"""
-        return self.spec.get('time_limit_min', None)
+        return self.compiled_spec().time_limit_min
     
     def get_max_attempts(self):
         """Get maximum allowed attempts"""
-        return self.spec.get('max_attempts', 1)
+        return self.compiled_spec().max_attempts
 
 class AssessmentAttempt(BaseModel):
     """Assessment attempt model for tracking individual attempts"""
     
     __tablename__ = "assessment_attempts"
+    __table_args__ = (
+        Index("ix_assessment_attempts_updated_at", "updated_at"),  # Incremental analytics exports
+    )
     
     assessment_id = Column(String(36), ForeignKey("assessments.id"), nullable=False, index=True)
     learner_id = Column(String(36), ForeignKey("learners.id"), nullable=False, index=True)
     
+    # 1-based, taken from Assessment.attempt_count when the attempt is created
+    attempt_number = Column(Integer, nullable=True)
+    
     # Results
     score = Column(Float, nullable=False, default=0.0)
     mastery_prob = Column(Float, nullable=False, default=0.0)  # Bayesian Knowledge Tracing
@@ -161,16 +184,22 @@ class AssessmentAttempt(BaseModel):
             cls.learner_id == learner_id
         ).order_by(cls.created_at.desc()).first()
     
-    def calculate_score(self):
-        """Calculate score based on answers"""
-        total_points = 0
+    def calculate_score(self, answers: list = None, total_points: float = None):
+        """Calculate score based on answers (the stored ones by default), out of total_points if given"""
+        answer_points = 0
         earned_points = 0
         
-        for answer in self.details.get('answers', []):
+        for answer in self.details.get('answers', []) if answers is None else answers:
+            if 'points_possible' in answer:
+                # Graded answers: partial credit (code challenges) counts
+                earned_points += answer.get('points_earned', 0)
+                answer_points += answer['points_possible']
+                continue
             if answer.get('is_correct', False):
                 earned_points += answer.get('points_earned', 0)
-            total_points += answer.get('points_earned', 0)
+            answer_points += answer.get('points_earned', 0)
         
+        total_points = answer_points if total_points is None else total_points
         if total_points == 0:
             return 0
         
@@ -183,21 +212,37 @@ class AssessmentAttempt(BaseModel):
     
     def complete(self, answers: list, time_taken_min: int):
         """Complete the assessment attempt"""
-        self.details['answers'] = answers
-        self.details['time_taken_min'] = time_taken_min
-        self.details['attempt_number'] = len(self.assessment.attempts) + 1
+        assessment = self.assessment
+        if self.attempt_number is None:
+            assessment.attempt_count = (assessment.attempt_count or 0) + 1
+            self.attempt_number = assessment.attempt_count
+        
+        # Reassigned rather than mutated so the JSON column is seen as changed
+        self.details = {
+            **(self.details or {}),
+            'answers': answers,
+            'time_taken_min': time_taken_min,
+            'attempt_number': self.attempt_number,
+        }
         
-        self.score = self.calculate_score()
+        spec = assessment.compiled_spec()
+        self.score = self.calculate_score(answers, spec.total_points)
+        
+        # Bayesian Knowledge Tracing: update the learner's mastery of the
+        # skill from their previous attempt, passing counts as correct
+        from sqlalchemy.orm import object_session
+        from app.services.mastery import BKTParams, latest_mastery, load_skill_params, update_mastery
+
+        skill_id = assessment.skill_id
+        db_session = object_session(self)
+        params, prior = BKTParams(), None
+        if db_session is not None:
+            params = load_skill_params(db_session, [skill_id])[skill_id]
+            prior = latest_mastery(db_session, self.learner_id, skill_id, exclude_id=self.id)
+        passed = self.score >= spec.passing_score
+        self.mastery_prob = update_mastery(params.p_init if prior is None else prior, passed, params)
+        
+        # Marked completed last: the lookups above autoflush, and the completion
+        # must reach the flush together with its mastery (team rollups count it)
         self.status = AttemptStatus.COMPLETED
         self.completed_at = datetime.utcnow()
-        
-        # Calculate mastery probability (simplified)
-        # In production, you'd use Bayesian Knowledge Tracing
-        if self.score >= 90:
-            self.mastery_prob = 0.9
-        elif self.score >= 80:
-            self.mastery_prob = 0.7
-        elif self.score >= 70:
-            self.mastery_prob = 0.5
-        else:
-            self.mastery_prob = 0.2
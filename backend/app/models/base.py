@@ -4,6 +4,8 @@ from sqlalchemy.sql import func
 from datetime import datetime
 import uuid
 
+from app.core.pagination import keyset
+
 Base = declarative_base()
 
 class BaseModel(Base):
@@ -18,8 +20,8 @@ class BaseModel(Base):
     def to_dict(self):
         """Convert model instance to dictionary"""
         return {
-            column.name: getattr(self, column.name)
-            for column in self.__table__.columns
+            attribute.columns[0].name: getattr(self, attribute.key)
+            for attribute in self.__mapper__.column_attrs
         }
     
     def update(self, **kwargs):
@@ -35,6 +37,6 @@ class BaseModel(Base):
         return db_session.query(cls).filter(cls.id == id).first()
     
     @classmethod
-    def get_all(cls, db_session, skip: int = 0, limit: int = 100):
-        """Get all model instances with pagination"""
-        return db_session.query(cls).offset(skip).limit(limit).all()
+    def get_all(cls, db_session, skip: int = 0, limit: int = 100, cursor: str = None):
+        """Get all model instances with keyset pagination on (created_at, id)"""
+        return keyset(db_session.query(cls), cls, cursor, limit, skip=skip).all()
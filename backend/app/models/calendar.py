@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Text, JSON, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, String, Text, JSON, ForeignKey, DateTime, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
+from app.core.crypto import EncryptedText
 from .base import BaseModel
 import enum
 
@@ -12,11 +13,16 @@ class EventStatus(enum.Enum):
     SCHEDULED = "scheduled"
     COMPLETED = "completed"
     CANCELLED = "cancelled"
+    MISSED = "missed"  # Ended while still scheduled (see app.services.reminders)
 
 class CalendarEvent(BaseModel):
     """Calendar event model for learning schedule management"""
     
     __tablename__ = "calendar_events"
+    __table_args__ = (
+        Index("ix_calendar_events_updated_at", "updated_at"),  # Incremental analytics exports
+        UniqueConstraint("learner_id", "provider", "external_id", name="uq_calendar_events_external"),
+    )
     
     learner_id = Column(String(36), ForeignKey("learners.id"), nullable=False, index=True)
     plan_step_id = Column(String(36), ForeignKey("plan_steps.id"), nullable=True, index=True)
@@ -29,13 +35,14 @@ class CalendarEvent(BaseModel):
     start_at = Column(DateTime(timezone=True), nullable=False)
     end_at = Column(DateTime(timezone=True), nullable=False)
     status = Column(Enum(EventStatus), nullable=False, default=EventStatus.SCHEDULED)
+    synced_at = Column(DateTime(timezone=True), nullable=True)  # updated_at as last read from or pushed to the provider
     
     # Location and attendees
     location = Column(String(500), nullable=True)
     attendees = Column(JSON, nullable=False, default=list)  # List of email addresses
     
     # Event metadata
-    metadata = Column(JSON, nullable=False, default=dict)
+    metadata_ = Column("metadata", JSON, nullable=False, default=dict)
     # {
     #   "reminder_minutes": 15,
     #   "recurrence": "weekly",
@@ -90,3 +97,31 @@ class CalendarEvent(BaseModel):
         """Get event duration in minutes"""
         duration = self.end_at - self.start_at
         return int(duration.total_seconds() / 60)
+    
+    def has_local_changes(self):
+        """Check if the event changed since it was last synced with its provider"""
+        return self.synced_at is None or self.updated_at != self.synced_at
+
+class CalendarSyncState(BaseModel):
+    """A learner's connected external calendar and where its incremental sync left off"""
+    
+    __tablename__ = "calendar_sync_states"
+    __table_args__ = (
+        UniqueConstraint("learner_id", "provider", name="uq_calendar_sync_states_key"),
+    )
+    
+    learner_id = Column(String(36), ForeignKey("learners.id"), nullable=False)
+    provider = Column(Enum(CalendarProvider), nullable=False)
+    calendar_id = Column(String(255), nullable=False, default="primary")
+    # OAuth tokens, encrypted at rest; the access token is refreshed when it expires or the provider answers 401
+    access_token = Column(EncryptedText, nullable=True)
+    refresh_token = Column(EncryptedText, nullable=True)
+    token_expires_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Google's nextSyncToken, or the Graph deltaLink; None until the first full sync
+    sync_token = Column(Text, nullable=True)
+    last_synced_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    
+    def __repr__(self):
+        return f"<CalendarSyncState(learner_id={self.learner_id}, provider={self.provider})>"
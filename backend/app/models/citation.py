@@ -20,7 +20,7 @@ class Citation(BaseModel):
     confidence = Column(Float, nullable=False, default=1.0)
     
     # Citation metadata
-    metadata = Column(JSON, nullable=False, default=dict)
+    metadata_ = Column("metadata", JSON, nullable=False, default=dict)
     # {
     #   "source_type": "document" | "video" | "course",
     #   "author": "Dr. Sarah Chen",
@@ -20,7 +20,7 @@ class CoachMessage(BaseModel):
     type = Column(Enum(MessageType), nullable=False, default=MessageType.TEXT)
     
     # Message metadata
-    metadata = Column(JSON, nullable=False, default=dict)
+    metadata_ = Column("metadata", JSON, nullable=False, default=dict)
     # {
     #   "suggestions": ["Continue with next lesson", "Review previous concepts"],
     #   "plan_changes": [...],
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Text, JSON, Integer, ForeignKey, Float, Enum, Boolean
+from sqlalchemy import Column, String, Text, JSON, Integer, ForeignKey, Float, Enum, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
+from app.core.pagination import keyset
 from .base import BaseModel
 import enum
 
@@ -54,6 +55,11 @@ class ContentItem(BaseModel):
     """Content item model for individual learning resources"""
     
     __tablename__ = "content_items"
+    __table_args__ = (
+        Index("ix_content_items_created_at_id", "created_at", "id"),
+        Index("ix_content_items_type_created_at_id", "type", "created_at", "id"),
+        UniqueConstraint("provider_id", "uri", name="uq_content_items_provider_uri"),  # Feed upsert key
+    )
     
     provider_id = Column(String(36), ForeignKey("content_providers.id"), nullable=False, index=True)
     uri = Column(String(1000), nullable=False)
@@ -68,7 +74,7 @@ class ContentItem(BaseModel):
     tags = Column(JSON, nullable=False, default=list)
     
     # Rich metadata
-    metadata = Column(JSON, nullable=False, default=dict)
+    metadata_ = Column("metadata", JSON, nullable=False, default=dict)
     # {
     #   "thumbnail_url": "https://...",
     #   "instructor": "Dr. Sarah Chen",
@@ -79,6 +85,9 @@ class ContentItem(BaseModel):
     #   "last_updated": "2024-01-10T00:00:00Z"
     # }
     
+    # Deduplication: the canonical item of this item's near-duplicate cluster (NULL if canonical itself)
+    canonical_id = Column(String(36), ForeignKey("content_items.id"), nullable=True, index=True)
+    
     # Content availability
     is_active = Column(Boolean, default=True, nullable=False)
     is_featured = Column(Boolean, default=False, nullable=False)
@@ -99,20 +108,24 @@ class ContentItem(BaseModel):
         ).offset(skip).limit(limit).all()
     
     @classmethod
-    def get_by_tags(cls, db_session, tags: list, skip: int = 0, limit: int = 100):
-        """Get content items by tags"""
-        query = db_session.query(cls)
-        for tag in tags:
-            query = query.filter(cls.tags.contains([tag]))
-        return query.filter(cls.is_active == True).offset(skip).limit(limit).all()
+    def get_by_tags(cls, db_session, tags: list, skip: int = 0, limit: int = 100,
+                    any_tags: list = None, exclude_tags: list = None, provider_ids: list = None):
+        """Get active content items by tags using the in-memory tag index"""
+        from app.services.tags import get_tag_index
+        ids = get_tag_index(db_session, cls).search(
+            tags, any_tags or (), exclude_tags or (), provider_ids, skip=skip, limit=limit, facet_limit=None
+        ).ids
+        items = {item.id: item for item in db_session.query(cls).filter(cls.id.in_(ids))} if ids else {}
+        return [items[item_id] for item_id in ids if item_id in items]
     
     @classmethod
-    def get_by_type(cls, db_session, content_type: ContentType, skip: int = 0, limit: int = 100):
-        """Get content items by type"""
-        return db_session.query(cls).filter(
+    def get_by_type(cls, db_session, content_type: ContentType, skip: int = 0, limit: int = 100, cursor: str = None):
+        """Get content items by type with keyset pagination"""
+        query = db_session.query(cls).filter(
             cls.type == content_type,
             cls.is_active == True
-        ).offset(skip).limit(limit).all()
+        )
+        return keyset(query, cls, cursor, limit, skip=skip).all()
     
     @classmethod
     def get_featured(cls, db_session, skip: int = 0, limit: int = 100):
@@ -1,11 +1,15 @@
-from sqlalchemy import Column, String, ForeignKey, JSON, Integer, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, ForeignKey, JSON, Integer, Text, Index
+from sqlalchemy.orm import object_session, relationship
+from app.core.pagination import keyset
 from .base import BaseModel
 
 class Learner(BaseModel):
     """Learner model with detailed profile, goals, and preferences"""
     
     __tablename__ = "learners"
+    __table_args__ = (
+        Index("ix_learners_tenant_created_at_id", "tenant_id", "created_at", "id"),
+    )
     
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False, unique=True)
     tenant_id = Column(String(36), nullable=False, index=True)
@@ -34,7 +38,10 @@ class Learner(BaseModel):
     # Learning preferences
     preferences = Column(JSON, nullable=False, default=dict)
     # {
-    #   "notification_frequency": "daily",
+    #   "notification_frequency": "daily",  # "never" turns nudges off
+    #   "notification_channel": "slack",  # "slack", "teams" or "email" (default)
+    #   "slack_user_id": "U024BE7LH",
+    #   "teams_webhook_url": "https://...",  # Defaults to the organisation's TEAMS_WEBHOOK_URL
     #   "preferred_content_types": ["video", "interactive"],
     #   "difficulty_preference": "intermediate",
     #   "language": "en"
@@ -65,30 +72,39 @@ class Learner(BaseModel):
         return db_session.query(cls).filter(cls.user_id == user_id).first()
     
     @classmethod
-    def get_by_tenant(cls, db_session, tenant_id: str, skip: int = 0, limit: int = 100):
-        """Get learners by tenant with pagination"""
-        return db_session.query(cls).filter(
-            cls.tenant_id == tenant_id
-        ).offset(skip).limit(limit).all()
+    def get_by_tenant(cls, db_session, tenant_id: str, skip: int = 0, limit: int = 100, cursor: str = None):
+        """Get learners by tenant with keyset pagination"""
+        query = db_session.query(cls).filter(cls.tenant_id == tenant_id)
+        return keyset(query, cls, cursor, limit, skip=skip).all()
     
     def get_current_plan(self):
-        """Get the learner's current active learning plan"""
-        for plan in self.learning_plans:
-            if plan.status == "active":
-                return plan
-        return None
+        """Get the learner's current active learning plan (one query, not a walk over all plans)"""
+        from .plan import LearningPlan, PlanStatus
+        session = object_session(self)
+        if session is None:
+            return next((plan for plan in self.learning_plans if plan.status == PlanStatus.ACTIVE), None)
+        return session.query(LearningPlan).filter(
+            LearningPlan.learner_id == self.id,
+            LearningPlan.status == PlanStatus.ACTIVE,
+        ).order_by(LearningPlan.updated_at.desc()).first()
     
     def get_learning_progress(self):
-        """Calculate overall learning progress"""
+        """Calculate overall learning progress (percentage of hours done over active and completed plans)"""
+        from .plan import PlanStatus
+        session = object_session(self)
+        if session is not None:
+            from app.services.analytics.progress import load_progress
+            return load_progress(session, [self.id])[self.id].progress_percentage
+        
         total_hours = 0
         completed_hours = 0
         
         for plan in self.learning_plans:
-            if plan.status in ["active", "completed"]:
+            if plan.status in (PlanStatus.ACTIVE, PlanStatus.COMPLETED):
                 total_hours += plan.total_hours
                 completed_hours += plan.completed_hours
         
         if total_hours == 0:
             return 0
         
-        return (completed_hours / total_hours) * 100
+        return round(completed_hours / total_hours * 100, 1)
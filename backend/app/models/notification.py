@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, Text, JSON, Integer, ForeignKey, DateTime, Enum, Index
+from .base import BaseModel
+import enum
+
+class NotificationChannel(enum.Enum):
+    SLACK = "slack"
+    TEAMS = "teams"
+    EMAIL = "email"
+
+class DeliveryStatus(enum.Enum):
+    SENT = "sent"
+    FAILED = "failed"  # Rejected, or still failing after the retries
+    SKIPPED = "skipped"  # Learner opted out, or no channel configured to reach them
+
+class NotificationDelivery(BaseModel):
+    """Outcome of sending one learner a digest of nudges (see app.services.notifications)"""
+
+    __tablename__ = "notification_deliveries"
+    __table_args__ = (
+        Index("ix_notification_deliveries_learner_created_at", "learner_id", "created_at"),
+        Index("ix_notification_deliveries_status_created_at", "status", "created_at"),
+    )
+
+    learner_id = Column(String(36), ForeignKey("learners.id"), nullable=False)
+    channel = Column(Enum(NotificationChannel), nullable=True)  # None when skipped before picking one
+    status = Column(Enum(DeliveryStatus), nullable=False)
+
+    # What the digest covered
+    nudge_count = Column(Integer, nullable=False, default=0)
+    item_ids = Column(JSON, nullable=False, default=list)  # Calendar event and plan step IDs
+
+    # Sending
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<NotificationDelivery(id={self.id}, learner_id={self.learner_id}, status={self.status})>"
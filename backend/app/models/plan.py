@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Text, JSON, Integer, ForeignKey, DateTime, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, JSON, Integer, ForeignKey, DateTime, Enum, Index
+from sqlalchemy.orm import relationship, validates
 from .base import BaseModel
 import enum
 from datetime import datetime
@@ -27,6 +27,10 @@ class LearningPlan(BaseModel):
     """Learning plan model for personalized learning paths"""
     
     __tablename__ = "learning_plans"
+    __table_args__ = (
+        Index("ix_learning_plans_created_at_id", "created_at", "id"),
+        Index("ix_learning_plans_learner_created_at_id", "learner_id", "created_at", "id"),
+    )
     
     learner_id = Column(String(36), ForeignKey("learners.id"), nullable=False, index=True)
     title = Column(String(255), nullable=False)
@@ -40,7 +44,7 @@ class LearningPlan(BaseModel):
     target_date = Column(DateTime(timezone=True), nullable=False)
     
     # Plan metadata
-    metadata = Column(JSON, nullable=False, default=dict)
+    metadata_ = Column("metadata", JSON, nullable=False, default=dict)
     # {
     #   "created_by": "ai" | "human" | "template",
     #   "template_id": "template-123",
@@ -84,6 +88,10 @@ class PlanStep(BaseModel):
     """Plan step model for individual learning activities"""
     
     __tablename__ = "plan_steps"
+    __table_args__ = (
+        Index("ix_plan_steps_plan_sequence_id", "plan_id", "sequence", "id"),
+        Index("ix_plan_steps_updated_at", "updated_at"),  # Incremental analytics exports
+    )
     
     plan_id = Column(String(36), ForeignKey("learning_plans.id"), nullable=False, index=True)
     skill_id = Column(String(36), ForeignKey("skills.id"), nullable=False, index=True)
@@ -99,6 +107,7 @@ class PlanStep(BaseModel):
     
     # Timing
     due_at = Column(DateTime(timezone=True), nullable=True)
+    overdue_at = Column(DateTime(timezone=True), nullable=True)  # Set by the overdue sweep (see app.services.reminders)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     
     # Progress tracking
@@ -109,7 +118,7 @@ class PlanStep(BaseModel):
     unlocks = Column(JSON, nullable=False, default=list)  # List of step IDs
     
     # Step metadata
-    metadata = Column(JSON, nullable=False, default=dict)
+    metadata_ = Column("metadata", JSON, nullable=False, default=dict)
     # {
     #   "estimated_difficulty": 3,
     #   "learning_objectives": ["Understand functions", "Practice loops"],
@@ -121,6 +130,13 @@ class PlanStep(BaseModel):
     skill = relationship("Skill", back_populates="plan_steps")
     content_item = relationship("ContentItem", back_populates="plan_steps")
     
+    @validates("due_at")
+    def _rearm_overdue(self, key, value):
+        """A new due date makes the step due again rather than overdue"""
+        if value != self.due_at:
+            self.overdue_at = None
+        return value
+    
     def __repr__(self):
         return f"<PlanStep(id={self.id}, title={self.title}, status={self.status})>"
     
@@ -134,27 +150,17 @@ class PlanStep(BaseModel):
     @classmethod
     def get_available_steps(cls, db_session, plan_id: str):
         """Get steps that are available to start (prerequisites met)"""
-        # This is a simplified implementation
-        # In production, you'd want to check prerequisite completion
-        return db_session.query(cls).filter(
-            cls.plan_id == plan_id,
-            cls.status == StepStatus.PENDING
-        ).order_by(cls.sequence).all()
+        from app.services.planner.availability import PlanAvailability
+        return PlanAvailability.load(db_session, plan_id).available_steps()
     
     def can_start(self, db_session):
         """Check if step can be started (prerequisites met)"""
         if not self.prerequisites:
             return True
         
-        # Check if all prerequisites are completed
-        for prereq_id in self.prerequisites:
-            prereq = db_session.query(PlanStep).filter(
-                PlanStep.id == prereq_id
-            ).first()
-            if not prereq or prereq.status != StepStatus.COMPLETED:
-                return False
-        
-        return True
+        # Check all prerequisites against the plan's steps in a single query
+        from app.services.planner.availability import PlanAvailability
+        return PlanAvailability.load(db_session, self.plan_id).can_start(self.id)
     
     def start(self):
         """Mark step as in progress"""
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Text, JSON, Integer, ForeignKey, Float, Enum
+from sqlalchemy import Column, String, Text, JSON, Integer, ForeignKey, Float, Enum, Index
 from sqlalchemy.orm import relationship
+from app.core.pagination import keyset
 from .base import BaseModel
 import enum
 
@@ -17,6 +18,10 @@ class Skill(BaseModel):
     """Skill model representing learning objectives and competencies"""
     
     __tablename__ = "skills"
+    __table_args__ = (
+        Index("ix_skills_created_at_id", "created_at", "id"),
+        Index("ix_skills_domain_created_at_id", "domain", "created_at", "id"),
+    )
     
     slug = Column(String(255), unique=True, nullable=False, index=True)
     label = Column(String(255), nullable=False)
@@ -40,6 +45,16 @@ class Skill(BaseModel):
     # Difficulty level
     difficulty = Column(Enum(SkillDifficulty), nullable=False, default=SkillDifficulty.BEGINNER)
     
+    # Bayesian Knowledge Tracing parameters (None until fitted, then defaults apply)
+    bkt_params = Column(JSON, nullable=True)
+    # {
+    #   "p_init": 0.2,
+    #   "p_learn": 0.15,
+    #   "p_guess": 0.2,
+    #   "p_slip": 0.1,
+    #   "p_forget": 0.0
+    # }
+    
     # Relationships
     incoming_edges = relationship("SkillEdge", foreign_keys="SkillEdge.dst_skill_id", back_populates="dst_skill")
     outgoing_edges = relationship("SkillEdge", foreign_keys="SkillEdge.src_skill_id", back_populates="src_skill")
@@ -55,20 +70,21 @@ class Skill(BaseModel):
         return db_session.query(cls).filter(cls.slug == slug).first()
     
     @classmethod
-    def get_by_domain(cls, db_session, domain: str, skip: int = 0, limit: int = 100):
-        """Get skills by domain with pagination"""
-        return db_session.query(cls).filter(
-            cls.domain == domain
-        ).offset(skip).limit(limit).all()
+    def get_by_domain(cls, db_session, domain: str, skip: int = 0, limit: int = 100, cursor: str = None):
+        """Get skills by domain with keyset pagination"""
+        query = db_session.query(cls).filter(cls.domain == domain)
+        return keyset(query, cls, cursor, limit, skip=skip).all()
     
     @classmethod
-    def search_by_tags(cls, db_session, tags: list, skip: int = 0, limit: int = 100):
-        """Search skills by tags"""
-        # This is a simplified search - in production, you might want to use full-text search
-        query = db_session.query(cls)
-        for tag in tags:
-            query = query.filter(cls.tags.contains([tag]))
-        return query.offset(skip).limit(limit).all()
+    def search_by_tags(cls, db_session, tags: list, skip: int = 0, limit: int = 100,
+                       any_tags: list = None, exclude_tags: list = None, domains: list = None):
+        """Search skills by tags using the in-memory tag index"""
+        from app.services.tags import get_tag_index
+        ids = get_tag_index(db_session, cls).search(
+            tags, any_tags or (), exclude_tags or (), domains, skip=skip, limit=limit, facet_limit=None
+        ).ids
+        skills = {skill.id: skill for skill in db_session.query(cls).filter(cls.id.in_(ids))} if ids else {}
+        return [skills[skill_id] for skill_id in ids if skill_id in skills]
     
     def get_prerequisite_skills(self, db_session):
         """Get all prerequisite skills"""
@@ -84,6 +100,26 @@ class Skill(BaseModel):
         return db_session.query(Skill).join(SkillEdge).filter(
             (SkillEdge.src_skill_id == self.id) | (SkillEdge.dst_skill_id == self.id)
         ).all()
+    
+    def get_graph_prerequisite_ids(self, db_session):
+        """Get direct prerequisite skill IDs from the in-memory skill graph"""
+        from app.services.graph import get_skill_graph
+        return get_skill_graph(db_session).get_prerequisites(self.id)
+    
+    def get_graph_dependent_ids(self, db_session):
+        """Get IDs of skills this skill directly unlocks from the in-memory skill graph"""
+        from app.services.graph import get_skill_graph
+        return get_skill_graph(db_session).get_dependents(self.id)
+    
+    def get_graph_related_ids(self, db_session):
+        """Get related skill IDs from the in-memory skill graph"""
+        from app.services.graph import get_skill_graph
+        return get_skill_graph(db_session).get_related(self.id)
+    
+    def get_graph_alternative_ids(self, db_session):
+        """Get alternative skill IDs from the in-memory skill graph"""
+        from app.services.graph import get_skill_graph
+        return get_skill_graph(db_session).get_alternatives(self.id)
 
 class SkillEdge(BaseModel):
     """Skill edge model for representing relationships between skills"""
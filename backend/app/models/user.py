@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Enum, Boolean
+from sqlalchemy import Column, String, Enum, Boolean, Index
 from sqlalchemy.orm import relationship
+from app.core.pagination import keyset
 from .base import BaseModel
 import enum
 
@@ -12,6 +13,9 @@ class User(BaseModel):
     """User model for authentication and basic profile"""
     
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_tenant_created_at_id", "tenant_id", "created_at", "id"),
+    )
     
     email = Column(String(255), unique=True, nullable=False, index=True)
     name = Column(String(255), nullable=False)
@@ -33,9 +37,10 @@ class User(BaseModel):
         return db_session.query(cls).filter(cls.email == email).first()
     
     @classmethod
-    def get_by_tenant(cls, db_session, tenant_id: str, skip: int = 0, limit: int = 100):
-        """Get users by tenant with pagination"""
-        return db_session.query(cls).filter(
+    def get_by_tenant(cls, db_session, tenant_id: str, skip: int = 0, limit: int = 100, cursor: str = None):
+        """Get users by tenant with keyset pagination"""
+        query = db_session.query(cls).filter(
             cls.tenant_id == tenant_id,
             cls.is_active == True
-        ).offset(skip).limit(limit).all()
+        )
+        return keyset(query, cls, cursor, limit, skip=skip).all()
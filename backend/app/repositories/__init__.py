@@ -0,0 +1,26 @@
+# Async repositories: SQLAlchemy 2.0 select() queries over AsyncSession, one module per aggregate
+
+from .base import BaseRepository
+from .skills import SkillRepository, SkillEdgeRepository
+from .content import ContentProviderRepository, ContentItemRepository
+from .plans import LearningPlanRepository, PlanStepRepository
+from .assessments import AssessmentRepository, AssessmentAttemptRepository
+from .calendar import CalendarEventRepository
+from .coach import CoachMessageRepository
+from .learners import LearnerRepository, UserRepository
+
+__all__ = [
+    'BaseRepository',
+    'SkillRepository',
+    'SkillEdgeRepository',
+    'ContentProviderRepository',
+    'ContentItemRepository',
+    'LearningPlanRepository',
+    'PlanStepRepository',
+    'AssessmentRepository',
+    'AssessmentAttemptRepository',
+    'CalendarEventRepository',
+    'CoachMessageRepository',
+    'LearnerRepository',
+    'UserRepository',
+]
@@ -0,0 +1,84 @@
+from typing import List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+
+from app.core.pagination import keyset
+from app.models.assessment import Assessment, AssessmentAttempt, AssessmentType
+from .base import BaseRepository
+
+
+class AssessmentRepository(BaseRepository[Assessment]):
+    """Async queries for assessments"""
+
+    model = Assessment
+
+    async def get_page(self, skill_id: Optional[str] = None, learner_id: Optional[str] = None,
+                       limit: int = 100, cursor: Optional[str] = None) -> List[Assessment]:
+        """Get assessments with optional skill/learner filters and keyset pagination"""
+        statement = select(Assessment)
+        if skill_id:
+            statement = statement.where(Assessment.skill_id == skill_id)
+        if learner_id:
+            statement = statement.where(Assessment.learner_id == learner_id)
+        return await self.scalars(keyset(statement, Assessment, cursor, limit))
+
+    async def get_by_learner(self, learner_id: str, assessment_type: AssessmentType = None) -> List[Assessment]:
+        """Get assessments by learner with optional type filter"""
+        statement = select(Assessment).where(Assessment.learner_id == learner_id)
+        if assessment_type:
+            statement = statement.where(Assessment.type == assessment_type)
+        return await self.scalars(statement.order_by(Assessment.created_at.desc()))
+
+    async def get_by_skill(self, skill_id: str) -> List[Assessment]:
+        """Get assessments by skill"""
+        return await self.scalars(
+            select(Assessment).where(Assessment.skill_id == skill_id).order_by(Assessment.created_at.desc())
+        )
+
+
+class AssessmentAttemptRepository(BaseRepository[AssessmentAttempt]):
+    """Async queries for assessment attempts"""
+
+    model = AssessmentAttempt
+
+    async def get_with_assessment(self, attempt_id: str) -> Optional[AssessmentAttempt]:
+        """Get an attempt with its assessment loaded (needed by is_passing)"""
+        return await self.get_by_id(attempt_id, options=[selectinload(AssessmentAttempt.assessment)])
+
+    async def get_by_assessment(self, assessment_id: str) -> List[AssessmentAttempt]:
+        """Get all attempts for an assessment"""
+        return await self.scalars(
+            select(AssessmentAttempt)
+            .where(AssessmentAttempt.assessment_id == assessment_id)
+            .order_by(AssessmentAttempt.created_at.desc())
+        )
+
+    async def get_by_learner(self, learner_id: str) -> List[AssessmentAttempt]:
+        """Get all attempts by a learner"""
+        return await self.scalars(
+            select(AssessmentAttempt)
+            .where(AssessmentAttempt.learner_id == learner_id)
+            .order_by(AssessmentAttempt.created_at.desc())
+        )
+
+    async def get_latest_attempt(self, assessment_id: str, learner_id: str) -> Optional[AssessmentAttempt]:
+        """Get the latest attempt for a specific assessment by a learner"""
+        return await self.scalar(
+            select(AssessmentAttempt)
+            .where(
+                AssessmentAttempt.assessment_id == assessment_id,
+                AssessmentAttempt.learner_id == learner_id,
+            )
+            .order_by(AssessmentAttempt.created_at.desc())
+        )
+
+    async def count_attempts(self, assessment_id: str, learner_id: Optional[str] = None) -> int:
+        """Count attempts for an assessment without loading them"""
+        statement = select(func.count(AssessmentAttempt.id)).where(
+            AssessmentAttempt.assessment_id == assessment_id
+        )
+        if learner_id:
+            statement = statement.where(AssessmentAttempt.learner_id == learner_id)
+        result = await self.db.execute(statement)
+        return result.scalar_one()
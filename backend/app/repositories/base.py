@@ -0,0 +1,59 @@
+from typing import Generic, Iterable, List, Optional, Type, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.core.pagination import keyset
+from app.models.base import BaseModel
+
+ModelType = TypeVar("ModelType", bound=BaseModel)
+
+
+class BaseRepository(Generic[ModelType]):
+    """Async data access for one model, built on SQLAlchemy 2.0 select()"""
+
+    model: Type[ModelType]
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def scalars(self, statement: Select) -> List[ModelType]:
+        """Execute a statement and return all scalar results"""
+        result = await self.db.execute(statement)
+        return list(result.scalars().all())
+
+    async def scalar(self, statement: Select) -> Optional[ModelType]:
+        """Execute a statement and return the first scalar result"""
+        result = await self.db.execute(statement.limit(1))
+        return result.scalars().first()
+
+    async def get_by_id(self, id: str, options: Iterable = ()) -> Optional[ModelType]:
+        """Get model instance by ID"""
+        return await self.scalar(select(self.model).where(self.model.id == id).options(*options))
+
+    async def get_by_ids(self, ids: Iterable[str]) -> List[ModelType]:
+        """Get model instances by ID in a single query"""
+        ids = list(ids)
+        if not ids:
+            return []
+        return await self.scalars(select(self.model).where(self.model.id.in_(ids)))
+
+    async def get_by_ids_ordered(self, ids: Iterable[str]) -> List[ModelType]:
+        """Get model instances by ID in a single query, in the order of ids (missing IDs skipped)"""
+        ids = list(ids)
+        instances = {instance.id: instance for instance in await self.get_by_ids(ids)}
+        return [instances[id] for id in ids if id in instances]
+
+    async def get_all(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[ModelType]:
+        """Get all model instances with keyset pagination on (created_at, id)"""
+        return await self.scalars(keyset(select(self.model), self.model, cursor, limit, skip=skip))
+
+    def add(self, instance: ModelType) -> ModelType:
+        """Add an instance to the session (the caller commits)"""
+        self.db.add(instance)
+        return instance
+
+    async def delete(self, instance: ModelType):
+        """Delete an instance (the caller commits)"""
+        await self.db.delete(instance)
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import select
+
+from app.models.calendar import CalendarEvent, EventStatus
+from .base import BaseRepository
+
+
+class CalendarEventRepository(BaseRepository[CalendarEvent]):
+    """Async queries for calendar events"""
+
+    model = CalendarEvent
+
+    async def get_by_learner(self, learner_id: str, start_date=None, end_date=None) -> List[CalendarEvent]:
+        """Get calendar events for a learner within date range"""
+        statement = select(CalendarEvent).where(CalendarEvent.learner_id == learner_id)
+        if start_date:
+            statement = statement.where(CalendarEvent.start_at >= start_date)
+        if end_date:
+            statement = statement.where(CalendarEvent.end_at <= end_date)
+        return await self.scalars(statement.order_by(CalendarEvent.start_at))
+
+    async def get_by_plan_step(self, plan_step_id: str) -> List[CalendarEvent]:
+        """Get calendar events for a specific plan step"""
+        return await self.scalars(
+            select(CalendarEvent)
+            .where(CalendarEvent.plan_step_id == plan_step_id)
+            .order_by(CalendarEvent.start_at)
+        )
+
+    async def get_upcoming_events(self, learner_id: str, limit: int = 10) -> List[CalendarEvent]:
+        """Get upcoming calendar events for a learner"""
+        return await self.scalars(
+            select(CalendarEvent)
+            .where(
+                CalendarEvent.learner_id == learner_id,
+                CalendarEvent.start_at >= datetime.now(timezone.utc),
+                CalendarEvent.status == EventStatus.SCHEDULED,
+            )
+            .order_by(CalendarEvent.start_at)
+            .limit(limit)
+        )
+
+    async def get_overlapping(self, learner_id: str, start_at: datetime, end_at: datetime) -> List[CalendarEvent]:
+        """Get a learner's scheduled events that intersect [start_at, end_at)"""
+        return await self.scalars(
+            select(CalendarEvent)
+            .where(
+                CalendarEvent.learner_id == learner_id,
+                CalendarEvent.status == EventStatus.SCHEDULED,
+                CalendarEvent.start_at < end_at,
+                CalendarEvent.end_at > start_at,
+            )
+            .order_by(CalendarEvent.start_at)
+        )
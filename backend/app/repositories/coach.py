@@ -0,0 +1,30 @@
+from typing import List
+
+from sqlalchemy import select
+
+from app.models.coach import CoachMessage, MessageType
+from .base import BaseRepository
+
+
+class CoachMessageRepository(BaseRepository[CoachMessage]):
+    """Async queries for coach messages"""
+
+    model = CoachMessage
+
+    async def get_conversation_history(self, learner_id: str, limit: int = 50) -> List[CoachMessage]:
+        """Get conversation history for a learner"""
+        return await self.scalars(
+            select(CoachMessage)
+            .where(CoachMessage.learner_id == learner_id)
+            .order_by(CoachMessage.created_at.desc())
+            .limit(limit)
+        )
+
+    async def get_messages_by_type(self, learner_id: str, message_type: MessageType, limit: int = 20) -> List[CoachMessage]:
+        """Get messages by type for a learner"""
+        return await self.scalars(
+            select(CoachMessage)
+            .where(CoachMessage.learner_id == learner_id, CoachMessage.type == message_type)
+            .order_by(CoachMessage.created_at.desc())
+            .limit(limit)
+        )
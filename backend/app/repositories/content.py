@@ -0,0 +1,70 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.core.pagination import keyset
+from app.models.content import ContentItem, ContentProvider, ContentType
+from app.services.tags import TagSearchResult, tag_index_registry
+from .base import BaseRepository
+
+
+class ContentProviderRepository(BaseRepository[ContentProvider]):
+    """Async queries for content providers"""
+
+    model = ContentProvider
+
+
+class ContentItemRepository(BaseRepository[ContentItem]):
+    """Async queries for content items"""
+
+    model = ContentItem
+
+    async def get_with_provider(self, item_id: str):
+        """Get a content item with its provider loaded"""
+        return await self.get_by_id(item_id, options=[selectinload(ContentItem.provider)])
+
+    async def search_by_query(self, query: str, skip: int = 0, limit: int = 100) -> List[ContentItem]:
+        """Search content items by query (simplified)"""
+        return await self.scalars(
+            select(ContentItem)
+            .where(ContentItem.title.ilike(f"%{query}%"), ContentItem.is_active.is_(True))
+            .offset(skip)
+            .limit(limit)
+        )
+
+    async def search_tags(self, tags: list, any_tags: list = (), exclude_tags: list = (),
+                          provider_ids: Optional[list] = None, skip: int = 0, limit: int = 100,
+                          facet_limit: Optional[int] = 20) -> Tuple[List[ContentItem], TagSearchResult]:
+        """Run a tag query over active content on the tag index and load the page of items"""
+        index = await tag_index_registry.get(ContentItem)
+        result = index.search(tags, any_tags, exclude_tags, provider_ids, skip=skip, limit=limit,
+                              facet_limit=facet_limit)
+        return await self.get_by_ids_ordered(result.ids), result
+
+    async def get_by_tags(self, tags: list, skip: int = 0, limit: int = 100) -> List[ContentItem]:
+        """Get content items by tags"""
+        items, _ = await self.search_tags(tags, skip=skip, limit=limit, facet_limit=None)
+        return items
+
+    async def get_by_type(self, content_type: ContentType, skip: int = 0, limit: int = 100,
+                          cursor: Optional[str] = None) -> List[ContentItem]:
+        """Get content items by type with keyset pagination"""
+        statement = select(ContentItem).where(
+            ContentItem.type == content_type, ContentItem.is_active.is_(True)
+        )
+        return await self.scalars(keyset(statement, ContentItem, cursor, limit, skip=skip))
+
+    async def get_active(self, limit: int = 100, cursor: Optional[str] = None) -> List[ContentItem]:
+        """Get active content items with keyset pagination"""
+        statement = select(ContentItem).where(ContentItem.is_active.is_(True))
+        return await self.scalars(keyset(statement, ContentItem, cursor, limit))
+
+    async def get_featured(self, skip: int = 0, limit: int = 100) -> List[ContentItem]:
+        """Get featured content items"""
+        return await self.scalars(
+            select(ContentItem)
+            .where(ContentItem.is_featured.is_(True), ContentItem.is_active.is_(True))
+            .offset(skip)
+            .limit(limit)
+        )
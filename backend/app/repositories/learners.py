@@ -0,0 +1,45 @@
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.core.pagination import keyset
+from app.models.learner import Learner
+from app.models.user import User
+from .base import BaseRepository
+
+
+class LearnerRepository(BaseRepository[Learner]):
+    """Async queries for learners"""
+
+    model = Learner
+
+    async def get_by_user_id(self, user_id: str) -> Optional[Learner]:
+        """Get learner by user ID"""
+        return await self.scalar(select(Learner).where(Learner.user_id == user_id))
+
+    async def get_by_tenant(self, tenant_id: str, skip: int = 0, limit: int = 100,
+                            cursor: Optional[str] = None) -> List[Learner]:
+        """Get learners by tenant with keyset pagination"""
+        statement = select(Learner).where(Learner.tenant_id == tenant_id)
+        return await self.scalars(keyset(statement, Learner, cursor, limit, skip=skip))
+
+    async def get_with_plans(self, learner_id: str) -> Optional[Learner]:
+        """Get a learner with learning plans loaded (used by progress helpers)"""
+        return await self.get_by_id(learner_id, options=[selectinload(Learner.learning_plans)])
+
+
+class UserRepository(BaseRepository[User]):
+    """Async queries for users"""
+
+    model = User
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        """Get user by email address"""
+        return await self.scalar(select(User).where(User.email == email))
+
+    async def get_by_tenant(self, tenant_id: str, skip: int = 0, limit: int = 100,
+                            cursor: Optional[str] = None) -> List[User]:
+        """Get users by tenant with keyset pagination"""
+        statement = select(User).where(User.tenant_id == tenant_id, User.is_active.is_(True))
+        return await self.scalars(keyset(statement, User, cursor, limit, skip=skip))
@@ -0,0 +1,93 @@
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.core.pagination import SEQUENCE_KEYS, keyset
+from app.models.plan import LearningPlan, PlanStatus, PlanStep, StepStatus
+from app.services.planner.availability import PlanAvailability
+from .base import BaseRepository
+
+
+class LearningPlanRepository(BaseRepository[LearningPlan]):
+    """Async queries for learning plans"""
+
+    model = LearningPlan
+
+    async def get_with_steps(self, plan_id: str) -> Optional[LearningPlan]:
+        """Get a plan with its steps loaded (two queries regardless of step count)"""
+        return await self.get_by_id(plan_id, options=[selectinload(LearningPlan.plan_steps)])
+
+    async def get_page(self, learner_id: Optional[str] = None, status: Optional[PlanStatus] = None,
+                       limit: int = 100, cursor: Optional[str] = None) -> List[LearningPlan]:
+        """Get plans with optional learner/status filters and keyset pagination"""
+        statement = select(LearningPlan)
+        if learner_id:
+            statement = statement.where(LearningPlan.learner_id == learner_id)
+        if status:
+            statement = statement.where(LearningPlan.status == status)
+        return await self.scalars(keyset(statement, LearningPlan, cursor, limit))
+
+    async def get_by_learner(self, learner_id: str, status: PlanStatus = None,
+                             with_steps: bool = False) -> List[LearningPlan]:
+        """Get plans by learner with optional status filter"""
+        statement = select(LearningPlan).where(LearningPlan.learner_id == learner_id)
+        if status:
+            statement = statement.where(LearningPlan.status == status)
+        if with_steps:
+            statement = statement.options(selectinload(LearningPlan.plan_steps))
+        return await self.scalars(statement.order_by(LearningPlan.created_at.desc()))
+
+    async def get_active(self, learner_id: str) -> Optional[LearningPlan]:
+        """Get the learner's most recently updated active plan"""
+        return await self.scalar(
+            select(LearningPlan)
+            .where(LearningPlan.learner_id == learner_id, LearningPlan.status == PlanStatus.ACTIVE)
+            .order_by(LearningPlan.updated_at.desc())
+            .limit(1)
+        )
+
+
+class PlanStepRepository(BaseRepository[PlanStep]):
+    """Async queries for plan steps"""
+
+    model = PlanStep
+
+    async def get_by_plan(self, plan_id: str) -> List[PlanStep]:
+        """Get all steps for a plan ordered by sequence"""
+        return await self.scalars(
+            select(PlanStep).where(PlanStep.plan_id == plan_id).order_by(PlanStep.sequence)
+        )
+
+    async def get_page(self, plan_id: str, limit: int = 100, cursor: Optional[str] = None) -> List[PlanStep]:
+        """Get steps of a plan with keyset pagination on (sequence, id)"""
+        statement = select(PlanStep).where(PlanStep.plan_id == plan_id)
+        return await self.scalars(keyset(statement, PlanStep, cursor, limit, keys=SEQUENCE_KEYS))
+
+    async def get_by_status(self, plan_id: str, status: StepStatus) -> List[PlanStep]:
+        """Get steps of a plan in a given status ordered by sequence"""
+        return await self.scalars(
+            select(PlanStep)
+            .where(PlanStep.plan_id == plan_id, PlanStep.status == status)
+            .order_by(PlanStep.sequence)
+        )
+
+    async def get_completed_steps(self, plan_id: str) -> List[PlanStep]:
+        """Get all completed steps of a plan"""
+        return await self.get_by_status(plan_id, StepStatus.COMPLETED)
+
+    async def get_current_step(self, plan_id: str) -> Optional[PlanStep]:
+        """Get the current in-progress step of a plan"""
+        return await self.scalar(
+            select(PlanStep)
+            .where(PlanStep.plan_id == plan_id, PlanStep.status == StepStatus.IN_PROGRESS)
+            .order_by(PlanStep.sequence)
+        )
+
+    async def get_availability(self, plan_id: str) -> PlanAvailability:
+        """Get step availability for a plan from a single steps query"""
+        return PlanAvailability(await self.get_by_plan(plan_id))
+
+    async def get_available_steps(self, plan_id: str) -> List[PlanStep]:
+        """Get steps that are available to start (prerequisites met)"""
+        return (await self.get_availability(plan_id)).available_steps()
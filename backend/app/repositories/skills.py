@@ -0,0 +1,79 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_, select
+
+from app.core.pagination import keyset
+from app.models.skill import Skill, SkillEdge, SkillRelation
+from app.services.graph import skill_graph_registry
+from app.services.tags import TagSearchResult, tag_index_registry
+from .base import BaseRepository
+
+
+class SkillRepository(BaseRepository[Skill]):
+    """Async queries for skills"""
+
+    model = Skill
+
+    async def get_by_slug(self, slug: str) -> Optional[Skill]:
+        """Get skill by slug"""
+        return await self.scalar(select(Skill).where(Skill.slug == slug))
+
+    async def get_by_domain(self, domain: str, skip: int = 0, limit: int = 100,
+                            cursor: Optional[str] = None) -> List[Skill]:
+        """Get skills by domain with keyset pagination"""
+        statement = select(Skill).where(Skill.domain == domain)
+        return await self.scalars(keyset(statement, Skill, cursor, limit, skip=skip))
+
+    async def search_tags(self, tags: list, any_tags: list = (), exclude_tags: list = (),
+                          domains: Optional[list] = None, skip: int = 0, limit: int = 100,
+                          facet_limit: Optional[int] = 20) -> Tuple[List[Skill], TagSearchResult]:
+        """Run a tag query on the tag index and load the page of skills"""
+        index = await tag_index_registry.get(Skill)
+        result = index.search(tags, any_tags, exclude_tags, domains, skip=skip, limit=limit,
+                              facet_limit=facet_limit)
+        return await self.get_by_ids_ordered(result.ids), result
+
+    async def search_by_tags(self, tags: list, skip: int = 0, limit: int = 100) -> List[Skill]:
+        """Search skills by tags"""
+        skills, _ = await self.search_tags(tags, skip=skip, limit=limit, facet_limit=None)
+        return skills
+
+    async def get_prerequisite_skills(self, skill_id: str) -> List[Skill]:
+        """Get direct prerequisite skills (IDs from the skill graph, rows in one query)"""
+        graph = await skill_graph_registry.get()
+        return await self.get_by_ids(graph.get_prerequisites(skill_id))
+
+    async def get_related_skills(self, skill_id: str) -> List[Skill]:
+        """Get related skills (IDs from the skill graph, rows in one query)"""
+        graph = await skill_graph_registry.get()
+        return await self.get_by_ids(graph.get_related(skill_id))
+
+
+class SkillEdgeRepository(BaseRepository[SkillEdge]):
+    """Async queries for skill edges"""
+
+    model = SkillEdge
+
+    async def get_prerequisites_for_skill(self, skill_id: str) -> List[SkillEdge]:
+        """Get all prerequisite edges for a skill"""
+        return await self.scalars(
+            select(SkillEdge).where(
+                SkillEdge.dst_skill_id == skill_id,
+                SkillEdge.relation == SkillRelation.PREREQUISITE,
+            )
+        )
+
+    async def get_edges_for_skill(self, skill_id: str) -> List[SkillEdge]:
+        """Get all edges touching a skill, in either direction"""
+        return await self.scalars(
+            select(SkillEdge).where(or_(SkillEdge.src_skill_id == skill_id, SkillEdge.dst_skill_id == skill_id))
+        )
+
+    async def get_related_skills_for_skill(self, skill_id: str) -> List[SkillEdge]:
+        """Get all related edges for a skill"""
+        return await self.scalars(
+            select(SkillEdge).where(
+                or_(SkillEdge.src_skill_id == skill_id, SkillEdge.dst_skill_id == skill_id),
+                SkillEdge.relation == SkillRelation.RELATED,
+            )
+        )
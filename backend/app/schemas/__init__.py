@@ -0,0 +1 @@
+# Pydantic request/response schemas for the Learning Path Generator API
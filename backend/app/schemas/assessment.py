@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.models.assessment import AssessmentType, AttemptStatus
+
+
+class AssessmentRead(BaseModel):
+    """Assessment summary as returned by the API (the spec with answers is never exposed)"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    learner_id: str
+    skill_id: str
+    type: AssessmentType
+    title: str
+    description: Optional[str] = None
+    created_at: datetime
+
+
+class AnswerSubmission(BaseModel):
+    """One submitted answer; code challenges submit source code"""
+
+    question_id: str
+    answer: Any = None
+
+
+class AttemptSubmission(BaseModel):
+    """Request body for submitting an assessment attempt for grading"""
+
+    answers: List[AnswerSubmission] = Field(..., max_length=1000)
+    time_taken_min: int = Field(0, ge=0)
+
+
+class AttemptRead(BaseModel):
+    """Assessment attempt as returned by the API; graded answers once grading is done"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    assessment_id: str
+    learner_id: str
+    status: AttemptStatus
+    score: float
+    mastery_prob: float
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    details: Dict[str, Any]
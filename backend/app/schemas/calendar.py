@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from app.models.calendar import CalendarProvider, EventStatus
+
+
+class CalendarEventCreate(BaseModel):
+    """Request body for scheduling a calendar event"""
+
+    learner_id: str
+    title: str = Field(..., max_length=255)
+    description: Optional[str] = None
+    start_at: datetime
+    end_at: datetime
+    location: Optional[str] = Field(None, max_length=500)
+    attendees: List[str] = []
+    plan_step_id: Optional[str] = None
+    provider: CalendarProvider = CalendarProvider.INTERNAL
+    allow_conflicts: bool = False  # Create the event even if it overlaps the learner's scheduled events
+
+    @model_validator(mode="after")
+    def check_times(self):
+        # Naive times are taken as UTC
+        if self.start_at.tzinfo is None:
+            self.start_at = self.start_at.replace(tzinfo=timezone.utc)
+        if self.end_at.tzinfo is None:
+            self.end_at = self.end_at.replace(tzinfo=timezone.utc)
+        if self.end_at <= self.start_at:
+            raise ValueError("end_at must be after start_at")
+        return self
+
+
+class CalendarEventRead(BaseModel):
+    """Calendar event as returned by the API"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    learner_id: str
+    plan_step_id: Optional[str] = None
+    provider: CalendarProvider
+    external_id: Optional[str] = None
+    title: str
+    description: Optional[str] = None
+    start_at: datetime
+    end_at: datetime
+    status: EventStatus
+    location: Optional[str] = None
+    attendees: List[str]
+    created_at: Optional[datetime] = None
+
+
+class ScheduleRequest(BaseModel):
+    """Request body for auto-scheduling a learner's pending plan steps"""
+
+    learner_id: str
+
+
+class CalendarConnect(BaseModel):
+    """Request body for connecting a learner's external calendar for sync"""
+
+    learner_id: str
+    provider: CalendarProvider
+    access_token: str = Field(..., min_length=1)
+    refresh_token: Optional[str] = Field(None, min_length=1)  # Without one, the calendar must be reconnected when the access token expires
+    expires_in: Optional[int] = Field(None, gt=0)  # Seconds, as in the provider's token response
+    calendar_id: str = Field("primary", max_length=255)
+
+
+class CalendarSyncRequest(BaseModel):
+    """Request body for syncing a learner's connected calendars now"""
+
+    learner_id: str
@@ -0,0 +1,94 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import json
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+from app.models.content import ContentType, LicenseType
+
+
+class ContentItemRead(BaseModel):
+    """Content item as returned by the API"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    provider_id: str
+    uri: str
+    title: str
+    description: Optional[str] = None
+    type: ContentType
+    duration_min: int
+    level: str
+    language: str
+    cost: float
+    license: LicenseType
+    tags: List[str]
+    is_featured: bool
+    canonical_id: Optional[str] = None
+    created_at: datetime
+
+
+class ContentSearchResult(ContentItemRead):
+    """Content item ranked by /content/search"""
+
+    relevance_score: float
+
+
+CONTENT_LEVELS = ("beginner", "intermediate", "advanced")
+
+
+class ContentFeedItem(BaseModel):
+    """One row of a provider catalog feed (JSONL object or CSV record)"""
+
+    model_config = ConfigDict(str_strip_whitespace=True, extra="ignore")
+
+    uri: str = Field(..., min_length=1, max_length=1000)
+    title: str = Field(..., min_length=1, max_length=500)
+    description: Optional[str] = None
+    type: ContentType
+    duration_min: int = Field(0, ge=0)
+    level: str = "beginner"
+    language: str = Field("en", max_length=10)
+    cost: float = Field(0.0, ge=0)
+    license: Optional[LicenseType] = None  # Defaults to the provider's license
+    tags: List[str] = Field(default_factory=list)
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+    @model_validator(mode="before")
+    @classmethod
+    def drop_empty_values(cls, data):
+        # CSV feeds spell missing values as empty strings
+        if isinstance(data, dict):
+            return {key: value for key, value in data.items() if value not in ("", None)}
+        return data
+
+    @field_validator("type", "license", mode="before")
+    @classmethod
+    def lowercase_enum(cls, value):
+        return value.strip().lower() if isinstance(value, str) else value
+
+    @field_validator("level", "language")
+    @classmethod
+    def lowercase(cls, value: str) -> str:
+        return value.lower()
+
+    @field_validator("level")
+    @classmethod
+    def known_level(cls, value: str) -> str:
+        if value not in CONTENT_LEVELS:
+            raise ValueError(f"level must be one of {', '.join(CONTENT_LEVELS)}")
+        return value
+
+    @field_validator("tags", mode="before")
+    @classmethod
+    def split_tags(cls, value):
+        if isinstance(value, str):
+            value = value.replace("|", ",").split(",")
+        return sorted({tag.strip().lower() for tag in value or () if tag and tag.strip()})
+
+    @field_validator("metadata", mode="before")
+    @classmethod
+    def parse_metadata(cls, value):
+        # CSV feeds carry metadata as a JSON object string
+        return json.loads(value) if isinstance(value, str) else value
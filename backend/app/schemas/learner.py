@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class LearnerRead(BaseModel):
+    """Learner profile as returned by the API"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    user_id: str
+    tenant_id: str
+    profile: dict
+    goals: dict
+    preferences: dict
+    created_at: datetime
@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from app.models.plan import PlanStatus, StepKind, StepStatus
+
+
+class PlanCreate(BaseModel):
+    """Request body for creating a learning plan"""
+
+    learner_id: str
+    title: str = Field(..., max_length=255)
+    objective: str
+    target_skill_ids: List[str] = Field(..., min_length=1)
+    target_date: datetime
+    start_date: Optional[datetime] = None
+    time_budget_hours: Optional[float] = Field(None, gt=0)  # Hours per week; defaults to learner goals
+
+    @model_validator(mode="after")
+    def check_dates(self):
+        # Naive times are taken as UTC
+        if self.target_date.tzinfo is None:
+            self.target_date = self.target_date.replace(tzinfo=timezone.utc)
+        if self.start_date is not None and self.start_date.tzinfo is None:
+            self.start_date = self.start_date.replace(tzinfo=timezone.utc)
+        return self
+
+
+class PlanStepRead(BaseModel):
+    """Plan step as returned by the API"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    skill_id: str
+    content_item_id: Optional[str] = None
+    kind: StepKind
+    title: str
+    effort_min: int
+    sequence: int
+    status: StepStatus
+    due_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    prerequisites: List[str]
+    unlocks: List[str]
+
+
+class PlanRead(BaseModel):
+    """Learning plan as returned by the API"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    learner_id: str
+    title: str
+    objective: str
+    status: PlanStatus
+    total_hours: int
+    completed_hours: int
+    start_date: datetime
+    target_date: datetime
+    created_at: Optional[datetime] = None
+
+
+class PlanConstraints(BaseModel):
+    """Feasibility of a solved plan against its time constraints"""
+
+    feasible: bool
+    total_effort_min: int
+    projected_completion: datetime
+    required_weekly_hours: float
+    known_skill_ids: List[str]
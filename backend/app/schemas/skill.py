@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel, ConfigDict
+
+from app.models.skill import SkillDifficulty
+
+
+class SkillRead(BaseModel):
+    """Skill as returned by the API"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    slug: str
+    label: str
+    description: str
+    tags: List[str]
+    domain: str
+    level_range: dict
+    prerequisites: List[str]
+    estimated_hours: int
+    difficulty: SkillDifficulty
+    created_at: datetime
@@ -0,0 +1 @@
+# Business logic services for the Learning Path Generator
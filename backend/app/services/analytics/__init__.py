@@ -0,0 +1,42 @@
+# Analytics: team rollups kept current from attempt and plan-step writes, the queries that read them,
+# and batched learner progress
+
+from .rollups import (
+    team_of,
+    LearnerState,
+    RollupBuilder,
+    load_states,
+    RollupBackfill,
+    build_chunk,
+    backfill_team_rollups,
+)
+from .team import team_analytics
+from .progress import (
+    PlanProgress,
+    SkillMastery,
+    LearnerProgress,
+    load_progress,
+    ProgressCache,
+    progress_cache,
+    learner_progress,
+    progress_changed_on_commit,
+)
+
+__all__ = [
+    'team_of',
+    'LearnerState',
+    'RollupBuilder',
+    'load_states',
+    'RollupBackfill',
+    'build_chunk',
+    'backfill_team_rollups',
+    'team_analytics',
+    'PlanProgress',
+    'SkillMastery',
+    'LearnerProgress',
+    'load_progress',
+    'ProgressCache',
+    'progress_cache',
+    'learner_progress',
+    'progress_changed_on_commit',
+]
@@ -0,0 +1,247 @@
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import threading
+import time
+
+from sqlalchemy import case, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.analytics import ALL_SKILLS, LearnerSkillState
+from app.models.assessment import AssessmentAttempt
+from app.models.plan import LearningPlan, PlanStatus
+from app.models.skill import Skill
+
+QUERY_BATCH_SIZE = 500  # Learner IDs per IN list
+
+# Plans whose hours count towards a learner's progress
+COUNTED_STATUSES = (PlanStatus.ACTIVE, PlanStatus.COMPLETED)
+
+# Learners whose progress changed in the session, dropped from the cache on commit
+_CHANGED_KEY = "learner_progress_changed"
+
+
+def _percentage(completed: float, total: float) -> float:
+    return round(completed / total * 100, 1) if total else 0.0
+
+
+@dataclass
+class PlanProgress:
+    """The learner's current (most recently updated active) plan"""
+
+    id: str
+    title: str
+    total_hours: int
+    completed_hours: int
+    progress_percentage: float
+    target_date: Optional[datetime]
+
+
+@dataclass
+class SkillMastery:
+    """Current mastery of one skill, from the learner's latest completed attempt"""
+
+    skill_id: str
+    skill_name: Optional[str]
+    mastery: float
+    last_assessed_at: datetime
+
+
+@dataclass
+class LearnerProgress:
+    """Progress over a learner's active and completed plans, current plan and per-skill mastery"""
+
+    learner_id: str
+    total_hours: int = 0
+    completed_hours: int = 0
+    progress_percentage: float = 0.0
+    active_plans: int = 0
+    completed_plans: int = 0
+    current_plan: Optional[PlanProgress] = None
+    skills: List[SkillMastery] = field(default_factory=list)
+
+    @property
+    def average_mastery(self) -> Optional[float]:
+        if not self.skills:
+            return None
+        return round(sum(skill.mastery for skill in self.skills) / len(self.skills), 3)
+
+    @property
+    def proficient_skills(self) -> int:
+        return sum(1 for skill in self.skills if skill.mastery >= settings.TEAM_ROLLUP_PROFICIENT_MASTERY)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "average_mastery": self.average_mastery, "proficient_skills": self.proficient_skills}
+
+
+def _batches(ids: Sequence[str]) -> Iterable[Sequence[str]]:
+    for offset in range(0, len(ids), QUERY_BATCH_SIZE):
+        yield ids[offset:offset + QUERY_BATCH_SIZE]
+
+
+def load_progress(db_session, learner_ids: Iterable[str]) -> Dict[str, LearnerProgress]:
+    """Progress of many learners in three set-based queries per batch, whatever their plan and skill counts.
+
+    Hours are summed per learner in one grouped aggregation over their
+    plans; the current plans come from a query over active plans only and
+    per-skill mastery from the learner skill states the team rollups keep
+    (see ``app.services.analytics.rollups``). Learners without plans or
+    attempts get zero progress.
+    """
+    learner_ids = list(dict.fromkeys(learner_ids))
+    progress = {learner_id: LearnerProgress(learner_id) for learner_id in learner_ids}
+    counted = LearningPlan.status.in_(COUNTED_STATUSES)
+    for batch in _batches(learner_ids):
+        totals = db_session.execute(
+            select(
+                LearningPlan.learner_id,
+                func.sum(case((counted, LearningPlan.total_hours), else_=0)),
+                func.sum(case((counted, LearningPlan.completed_hours), else_=0)),
+                func.count(case((LearningPlan.status == PlanStatus.ACTIVE, 1))),
+                func.count(case((LearningPlan.status == PlanStatus.COMPLETED, 1))),
+            ).where(LearningPlan.learner_id.in_(batch)).group_by(LearningPlan.learner_id)
+        )
+        for learner_id, total_hours, completed_hours, active, completed in totals:
+            entry = progress[learner_id]
+            entry.total_hours, entry.completed_hours = int(total_hours or 0), int(completed_hours or 0)
+            entry.progress_percentage = _percentage(entry.completed_hours, entry.total_hours)
+            entry.active_plans, entry.completed_plans = active, completed
+
+        # Latest first, so the first active plan seen per learner is the current one
+        active_plans = db_session.execute(
+            select(LearningPlan.learner_id, LearningPlan.id, LearningPlan.title, LearningPlan.total_hours,
+                   LearningPlan.completed_hours, LearningPlan.target_date)
+            .where(LearningPlan.learner_id.in_(batch), LearningPlan.status == PlanStatus.ACTIVE)
+            .order_by(LearningPlan.learner_id, LearningPlan.updated_at.desc(), LearningPlan.id)
+        )
+        for learner_id, plan_id, title, total_hours, completed_hours, target_date in active_plans:
+            entry = progress[learner_id]
+            if entry.current_plan is None:
+                entry.current_plan = PlanProgress(plan_id, title, total_hours, completed_hours,
+                                                  _percentage(completed_hours, total_hours), target_date)
+
+        mastery = db_session.execute(
+            select(LearnerSkillState.learner_id, LearnerSkillState.skill_id, Skill.label,
+                   LearnerSkillState.mastery, LearnerSkillState.last_active_at)
+            .outerjoin(Skill, Skill.id == LearnerSkillState.skill_id)
+            .where(LearnerSkillState.learner_id.in_(batch), LearnerSkillState.skill_id != ALL_SKILLS)
+            .order_by(LearnerSkillState.learner_id, LearnerSkillState.mastery.desc(), LearnerSkillState.skill_id)
+        )
+        for learner_id, skill_id, label, value, last_active_at in mastery:
+            progress[learner_id].skills.append(SkillMastery(skill_id, label, round(value, 3), last_active_at))
+    return progress
+
+
+@dataclass
+class _CachedProgress:
+    progress: LearnerProgress
+    expires_at: float
+
+
+class ProgressCache:
+    """Thread-safe in-process LRU of learner progress with a short expiry.
+
+    Commits in this process that touch a learner's plans or attempts drop
+    their entries (see the session hooks below); changes made by other
+    workers show once the entry expires, after at most
+    ``LEARNER_PROGRESS_CACHE_TTL_SECONDS``.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries if max_entries is not None else settings.LEARNER_PROGRESS_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.LEARNER_PROGRESS_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[str, _CachedProgress]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_many(self, learner_ids: Iterable[str], now: Optional[float] = None
+                 ) -> Tuple[Dict[str, LearnerProgress], List[str]]:
+        """Cached progress by learner, and the learners missing from the cache"""
+        now = now or time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for learner_id in learner_ids:
+                cached = self._entries.get(learner_id)
+                if cached is not None and cached.expires_at > now:
+                    self._entries.move_to_end(learner_id)
+                    found[learner_id] = cached.progress
+                else:
+                    if cached is not None:
+                        del self._entries[learner_id]
+                    missing.append(learner_id)
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, progress: Iterable[LearnerProgress], now: Optional[float] = None):
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        expires_at = (now or time.monotonic()) + self.ttl_seconds
+        with self._lock:
+            for entry in progress:
+                self._entries[entry.learner_id] = _CachedProgress(entry, expires_at)
+                self._entries.move_to_end(entry.learner_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, learner_ids: Iterable[str]):
+        with self._lock:
+            for learner_id in learner_ids:
+                self._entries.pop(learner_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+progress_cache = ProgressCache()
+
+
+async def learner_progress(db: AsyncSession, learner_ids: Sequence[str],
+                           cache: Optional[ProgressCache] = None) -> List[LearnerProgress]:
+    """Progress of the given learners, in their order, loading only those not cached"""
+    cache = progress_cache if cache is None else cache
+    found, missing = cache.get_many(learner_ids)
+    if missing:
+        loaded = await db.run_sync(load_progress, missing)
+        cache.put_many(loaded.values())
+        found.update(loaded)
+    return [found[learner_id] for learner_id in learner_ids]
+
+
+# Invalidation: learners whose plans or attempts a session writes are dropped from the cache on commit
+
+def _record_progress_write(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_KEY, set()).add(target.learner_id)
+
+
+def progress_changed_on_commit(session, learner_ids: Iterable[str]):
+    """Drop cached progress of learners when the session commits (for writes that bypass ORM events)"""
+    session = getattr(session, "sync_session", session)
+    session.info.setdefault(_CHANGED_KEY, set()).update(learner_ids)
+
+
+for _model in (LearningPlan, AssessmentAttempt):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _record_progress_write)
+
+
+@event.listens_for(Session, "after_commit")
+def _discard_changed_progress(session):
+    changed = session.info.pop(_CHANGED_KEY, None)
+    if changed:
+        progress_cache.discard(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_progress(session):
+    session.info.pop(_CHANGED_KEY, None)
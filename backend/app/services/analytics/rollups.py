@@ -0,0 +1,538 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import multiprocessing
+import os
+import time
+
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.analytics import (
+    ALL_SKILLS,
+    ALL_TEAMS,
+    MASTERY_BUCKETS,
+    METRIC_COLUMNS,
+    LearnerSkillState,
+    TeamSkillRollup,
+    TeamSkillTotal,
+)
+from app.models.assessment import Assessment, AssessmentAttempt, AttemptStatus
+from app.models.learner import Learner
+from app.models.plan import LearningPlan, PlanStep, StepStatus
+from app.services.grading.spec import compile_spec
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 5_000
+
+# Passing score read in SQL, so neither path loads assessment specs
+PASSING_SCORE = func.coalesce(Assessment.spec["passing_score"].as_float(), compile_spec(None).passing_score)
+
+_COLUMN = {name: index for index, name in enumerate(METRIC_COLUMNS)}
+_BUCKET_COLUMNS = [f"mastery_{bucket}" for bucket in range(MASTERY_BUCKETS)]
+
+# Per-flush events recorded by the mapper hooks, and lookups cached for the session
+_EVENTS_KEY = "team_rollup_events"
+_LEARNERS_KEY = "team_rollup_learners"
+_PLANS_KEY = "team_rollup_plans"
+_ASSESSMENTS_KEY = "team_rollup_assessments"
+
+DayKey = Tuple[str, str, str, date]  # (tenant_id, team, skill_id, day)
+StateKey = Tuple[str, str]  # (learner_id, skill_id)
+
+
+def team_of(profile: Optional[Dict[str, Any]]) -> str:
+    """Team a learner is rolled up under: their profile's department, "" when unset"""
+    return str((profile or {}).get("department") or "")
+
+
+def mastery_bucket(mastery: float) -> int:
+    return max(0, min(int(mastery * MASTERY_BUCKETS), MASTERY_BUCKETS - 1))
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Timestamps compared as naive UTC, however the database returned them"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@dataclass(slots=True)
+class LearnerState:
+    """A learner's standing on one skill (or on ALL_SKILLS) as the rollups last counted it"""
+
+    tenant_id: str
+    team: str
+    mastery: float
+    first_active_at: datetime
+    last_active_at: datetime
+    proficient_at: Optional[datetime] = None
+
+
+class RollupBuilder:
+    """Turns attempt and plan-step events into rollup changes.
+
+    Shared by the incremental path, which starts from the stored states
+    of the learners a flush touched, and by the backfill, which replays
+    each learner's whole history from empty states. Events of a learner
+    must come in time order. Changes are kept per (tenant, team, skill,
+    day) as lists in METRIC_COLUMNS order; ``write`` adds them, and
+    their ALL_TEAMS sums, to the daily and running-total rollups and
+    stores the touched states.
+    """
+
+    def __init__(self, states: Optional[Dict[StateKey, LearnerState]] = None,
+                 proficient_mastery: float = settings.TEAM_ROLLUP_PROFICIENT_MASTERY):
+        self.states: Dict[StateKey, LearnerState] = states if states is not None else {}
+        self.proficient_mastery = proficient_mastery
+        self.changes: Dict[DayKey, List[float]] = {}
+        self.touched: Set[StateKey] = set()
+
+    def _add(self, tenant_id: str, team: str, skill_id: str, day: date, column: str, amount: float):
+        key = (tenant_id, team, skill_id, day)
+        row = self.changes.get(key)
+        if row is None:
+            row = self.changes[key] = [0] * len(METRIC_COLUMNS)
+        row[_COLUMN[column]] += amount
+
+    def _team(self, learner_id: str, team: str) -> str:
+        # A learner stays in the team of their first activity until the next backfill
+        learner = self.states.get((learner_id, ALL_SKILLS))
+        return learner.team if learner is not None else team
+
+    def _activity(self, learner_id: str, tenant_id: str, team: str, skill_id: str,
+                  at: datetime) -> Tuple[LearnerState, bool]:
+        """State of (learner, skill) after activity at ``at``, and whether it is the first"""
+        key = (learner_id, skill_id)
+        self.touched.add(key)
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = LearnerState(tenant_id, team, 0.0, at, at)
+            self._add(tenant_id, team, skill_id, at.date(), "learners", 1)
+            self._add(tenant_id, team, skill_id, at.date(), "last_active", 1)
+            return state, True
+        if at.date() > state.last_active_at.date():
+            self._add(state.tenant_id, state.team, skill_id, state.last_active_at.date(), "last_active", -1)
+            self._add(state.tenant_id, state.team, skill_id, at.date(), "last_active", 1)
+        if at > state.last_active_at:
+            state.last_active_at = at
+        return state, False
+
+    def attempt(self, learner_id: str, tenant_id: str, team: str, skill_id: str, completed_at: datetime,
+                passed: bool, mastery: float):
+        """A completed assessment attempt and the mastery it left the learner with"""
+        at = _naive_utc(completed_at)
+        day = at.date()
+        team = self._team(learner_id, team)
+        self._activity(learner_id, tenant_id, team, ALL_SKILLS, at)
+        self._add(tenant_id, team, ALL_SKILLS, day, "attempts", 1)
+        self._add(tenant_id, team, ALL_SKILLS, day, "attempts_passed", int(passed))
+
+        state, first = self._activity(learner_id, tenant_id, team, skill_id, at)
+        self._add(tenant_id, team, skill_id, day, "attempts", 1)
+        self._add(tenant_id, team, skill_id, day, "attempts_passed", int(passed))
+        if not first:
+            self._add(tenant_id, team, skill_id, day, _BUCKET_COLUMNS[mastery_bucket(state.mastery)], -1)
+            self._add(tenant_id, team, skill_id, day, "mastery_sum", -state.mastery)
+        self._add(tenant_id, team, skill_id, day, _BUCKET_COLUMNS[mastery_bucket(mastery)], 1)
+        self._add(tenant_id, team, skill_id, day, "mastery_sum", mastery)
+        state.mastery = mastery
+
+        if state.proficient_at is None and mastery >= self.proficient_mastery:
+            state.proficient_at = at
+            self._add(tenant_id, team, skill_id, day, "proficient", 1)
+            self._add(tenant_id, team, skill_id, day, "proficiency_days_sum",
+                      (at - _naive_utc(state.first_active_at)).total_seconds() / 86400)
+
+    def step_planned(self, learner_id: str, tenant_id: str, team: str, skill_id: str, day: date, count: int = 1):
+        """Plan steps added to (or, with a negative count, removed from) a learner's plan"""
+        team = self._team(learner_id, team)
+        for row_skill in (ALL_SKILLS, skill_id):
+            self._add(tenant_id, team, row_skill, day, "steps_planned", count)
+
+    def step_completed(self, learner_id: str, tenant_id: str, team: str, skill_id: str, at: datetime,
+                       hours: float, count: int = 1):
+        """A plan step completed ``hours`` after it was planned (a negative count takes one back)"""
+        at = _naive_utc(at)
+        day = at.date()
+        team = self._team(learner_id, team)
+        if count > 0:
+            self._activity(learner_id, tenant_id, team, ALL_SKILLS, at)
+        for row_skill in (ALL_SKILLS, skill_id):
+            self._add(tenant_id, team, row_skill, day, "steps_completed", count)
+            self._add(tenant_id, team, row_skill, day, "step_hours_sum", count * hours)
+
+    def merge(self, other: "RollupBuilder"):
+        """Fold in a builder that covered other learners (backfill chunks)"""
+        for key, row in other.changes.items():
+            mine = self.changes.get(key)
+            if mine is None:
+                self.changes[key] = row
+            else:
+                for index, amount in enumerate(row):
+                    mine[index] += amount
+        self.states.update(other.states)
+        self.touched.update(other.touched)
+
+    def rollups(self) -> Tuple[Dict[DayKey, List[float]], Dict[Tuple[str, str, str], List[float]]]:
+        """Daily changes with the ALL_TEAMS rows added, and the same summed over days"""
+        daily: Dict[DayKey, List[float]] = {}
+        totals: Dict[Tuple[str, str, str], List[float]] = {}
+        for (tenant_id, team, skill_id, day), row in self.changes.items():
+            for key, sums in (((tenant_id, team, skill_id, day), daily), ((tenant_id, team, skill_id), totals),
+                              ((tenant_id, ALL_TEAMS, skill_id, day), daily),
+                              ((tenant_id, ALL_TEAMS, skill_id), totals)):
+                total = sums.get(key)
+                sums[key] = list(row) if total is None else [a + b for a, b in zip(total, row)]
+        return daily, totals
+
+    def write(self, connection) -> int:
+        """Add the changes to the rollups and store the touched states, in the connection's transaction.
+
+        Returns the number of daily rollup rows written.
+        """
+        dialect = connection.dialect.name
+        changes, totals = self.rollups()
+        daily = [
+            {"tenant_id": tenant_id, "team": team, "skill_id": skill_id, "day": day, **dict(zip(METRIC_COLUMNS, row))}
+            for (tenant_id, team, skill_id, day), row in changes.items()
+        ]
+        totals = [
+            {"tenant_id": tenant_id, "team": team, "skill_id": skill_id, **dict(zip(METRIC_COLUMNS, row))}
+            for (tenant_id, team, skill_id), row in totals.items()
+        ]
+        states = [
+            {"learner_id": learner_id, "skill_id": skill_id, "tenant_id": state.tenant_id, "team": state.team,
+             "mastery": state.mastery, "first_active_at": state.first_active_at,
+             "last_active_at": state.last_active_at, "proficient_at": state.proficient_at}
+            for learner_id, skill_id in self.touched
+            for state in (self.states[(learner_id, skill_id)],)
+        ]
+        for table, rows in ((TeamSkillRollup.__table__, daily), (TeamSkillTotal.__table__, totals),
+                            (LearnerSkillState.__table__, states)):
+            if not rows:
+                continue
+            statement = _upsert_statement(dialect, table)
+            for start in range(0, len(rows), WRITE_BATCH_SIZE):
+                connection.execute(statement, rows[start:start + WRITE_BATCH_SIZE])
+        return len(daily)
+
+
+@lru_cache(maxsize=None)
+def _upsert_statement(dialect: str, table):
+    """Multi-row insert that adds metrics to existing rollup rows (or replaces existing learner states)"""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Team rollups are not implemented for {dialect}")
+    statement = insert(table)
+    if table is LearnerSkillState.__table__:
+        index_elements = [table.c.learner_id, table.c.skill_id]
+        set_ = {column: statement.excluded[column]
+                for column in ("team", "mastery", "first_active_at", "last_active_at", "proficient_at")}
+    else:
+        index_elements = [table.c.tenant_id, table.c.team, table.c.skill_id]
+        if table is TeamSkillRollup.__table__:
+            index_elements.append(table.c.day)
+        set_ = {column: table.c[column] + statement.excluded[column] for column in METRIC_COLUMNS}
+    return statement.on_conflict_do_update(index_elements=index_elements, set_={**set_, "updated_at": func.now()})
+
+
+def load_states(connection, learner_ids: Iterable[str]) -> Dict[StateKey, LearnerState]:
+    """Stored states of the given learners, on every skill"""
+    learner_ids = list(learner_ids)
+    if not learner_ids:
+        return {}
+    rows = connection.execute(
+        select(LearnerSkillState.learner_id, LearnerSkillState.skill_id, LearnerSkillState.tenant_id,
+               LearnerSkillState.team, LearnerSkillState.mastery, LearnerSkillState.first_active_at,
+               LearnerSkillState.last_active_at, LearnerSkillState.proficient_at)
+        .where(LearnerSkillState.learner_id.in_(learner_ids))
+    )
+    return {
+        (learner_id, skill_id): LearnerState(tenant_id, team, mastery, _naive_utc(first_active_at),
+                                             _naive_utc(last_active_at),
+                                             _naive_utc(proficient_at) if proficient_at is not None else None)
+        for learner_id, skill_id, tenant_id, team, mastery, first_active_at, last_active_at, proficient_at in rows
+    }
+
+
+# Incremental updates: mapper hooks record completions during a flush, and
+# after the flush they are resolved in a few batched lookups and added to
+# the rollups in the same transaction, so rollups commit (or roll back)
+# together with the attempts and steps they count
+
+
+def _record(target, *rollup_event):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_EVENTS_KEY, []).append(rollup_event)
+
+
+def _status_change(target, completed) -> Tuple[bool, bool]:
+    """(was completed, is completed) across the pending status change"""
+    history = inspect(target).attrs.status.history
+    if not history.added:
+        return False, False
+    return completed in history.deleted, target.status == completed
+
+
+def _completed_at(target) -> Optional[datetime]:
+    history = inspect(target).attrs.completed_at.history
+    return (history.deleted or [target.__dict__.get("completed_at")])[0]
+
+
+def _event_time(rollup_event) -> datetime:
+    """When the activity behind an event happened (flushes do not keep time order)"""
+    if rollup_event[0] == "attempt":
+        return _naive_utc(rollup_event[3])
+    if rollup_event[0] == "completed" and rollup_event[6] > 0:
+        return _naive_utc(rollup_event[5])
+    return datetime.max  # Not activity
+
+
+@event.listens_for(AssessmentAttempt, "after_insert")
+@event.listens_for(AssessmentAttempt, "after_update")
+def _record_attempt(mapper, connection, attempt):
+    was_completed, is_completed = _status_change(attempt, AttemptStatus.COMPLETED)
+    if is_completed and not was_completed and attempt.completed_at is not None:
+        _record(attempt, "attempt", attempt.learner_id, attempt.assessment_id, attempt.completed_at,
+                attempt.score, attempt.mastery_prob or 0.0)
+
+
+@event.listens_for(PlanStep, "after_insert")
+def _record_step_insert(mapper, connection, step):
+    today = datetime.utcnow()
+    _record(step, "planned", step.plan_id, step.skill_id, today.date(), 1)
+    if step.status == StepStatus.COMPLETED:
+        _record(step, "completed", step.plan_id, step.id, step.skill_id, today, step.completed_at or today, 1)
+
+
+@event.listens_for(PlanStep, "after_update")
+def _record_step_update(mapper, connection, step):
+    was_completed, is_completed = _status_change(step, StepStatus.COMPLETED)
+    if is_completed and not was_completed:
+        completed_at = step.completed_at or datetime.utcnow()
+        _record(step, "completed", step.plan_id, step.id, step.skill_id, step.__dict__.get("created_at"),
+                completed_at, 1)
+    elif was_completed and not is_completed:
+        _record(step, "completed", step.plan_id, step.id, step.skill_id, step.__dict__.get("created_at"),
+                _completed_at(step), -1)
+
+
+@event.listens_for(PlanStep, "after_delete")
+def _record_step_delete(mapper, connection, step):
+    _record(step, "planned", step.plan_id, step.skill_id, datetime.utcnow().date(), -1)
+    if step.status == StepStatus.COMPLETED:
+        _record(step, "completed", step.plan_id, step.id, step.skill_id, step.__dict__.get("created_at"),
+                _completed_at(step), -1)
+
+
+def _lookup(session, connection, cache_key: str, keys: Set[str], query) -> Dict[str, Any]:
+    """Session-cached lookup of the keys not seen yet, in one query"""
+    cache = session.info.setdefault(cache_key, {})
+    missing = [key for key in keys if key not in cache]
+    if missing:
+        for key, *values in connection.execute(query(missing)):
+            cache[key] = tuple(values)
+    return cache
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_rollup_events(session, flush_context):
+    events = session.info.pop(_EVENTS_KEY, None)
+    if not events:
+        return
+    connection = session.connection()
+    attempts = [rollup_event for rollup_event in events if rollup_event[0] == "attempt"]
+    steps = [rollup_event for rollup_event in events if rollup_event[0] != "attempt"]
+
+    assessments = _lookup(session, connection, _ASSESSMENTS_KEY, {e[2] for e in attempts}, lambda ids: select(
+        Assessment.id, Assessment.skill_id, PASSING_SCORE,
+    ).where(Assessment.id.in_(ids)))
+    plans = _lookup(session, connection, _PLANS_KEY, {e[1] for e in steps}, lambda ids: select(
+        LearningPlan.id, LearningPlan.learner_id,
+    ).where(LearningPlan.id.in_(ids)))
+    learner_ids = {e[1] for e in attempts} | {plans[e[1]][0] for e in steps if e[1] in plans}
+    # The learner rows are locked until commit, so concurrent transactions update a learner's
+    # states (and the rollups counted from them) one after the other instead of from the same
+    # stale read; FOR NO KEY UPDATE still lets rows referencing the learner be inserted
+    learners = _lookup(session, connection, _LEARNERS_KEY, learner_ids, lambda ids: select(
+        Learner.id, Learner.tenant_id, Learner.profile,
+    ).where(Learner.id.in_(ids)).order_by(Learner.id).with_for_update(key_share=True))
+
+    # Creation times of completed steps that were not loaded with them
+    unloaded = [e[2] for e in steps if e[0] == "completed" and e[4] is None]
+    created = dict(connection.execute(
+        select(PlanStep.id, PlanStep.created_at).where(PlanStep.id.in_(unloaded))
+    ).all()) if unloaded else {}
+
+    builder = RollupBuilder(load_states(connection, learner_ids))
+    for kind, *values in sorted(events, key=_event_time):
+        if kind == "attempt":
+            learner_id, assessment_id, completed_at, score, mastery = values
+            skill_id, passing_score = assessments[assessment_id]
+            tenant_id, profile = learners[learner_id]
+            builder.attempt(learner_id, tenant_id, team_of(profile), skill_id, completed_at,
+                            score is not None and score >= passing_score, mastery)
+            continue
+        learner_id = plans.get(values[0], (None,))[0]
+        if learner_id is None or learner_id not in learners:
+            continue
+        tenant_id, profile = learners[learner_id]
+        if kind == "planned":
+            _, skill_id, day, count = values
+            builder.step_planned(learner_id, tenant_id, team_of(profile), skill_id, day, count)
+        else:
+            _, step_id, skill_id, created_at, completed_at, count = values
+            created_at = created_at or created.get(step_id)
+            hours = 0.0
+            if created_at is not None and completed_at is not None:
+                hours = max(0.0, (_naive_utc(completed_at) - _naive_utc(created_at)).total_seconds() / 3600)
+            at = completed_at if count > 0 and completed_at is not None else datetime.utcnow()
+            builder.step_completed(learner_id, tenant_id, team_of(profile), skill_id, at, hours, count)
+    builder.write(connection)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _clear_rollup_lookups(session):
+    for key in (_EVENTS_KEY, _LEARNERS_KEY, _PLANS_KEY, _ASSESSMENTS_KEY):
+        session.info.pop(key, None)
+
+
+# Backfill: rebuild a tenant's rollups from raw history, learners split
+# into chunks that worker processes replay in parallel
+
+
+@dataclass
+class RollupBackfill:
+    """Outcome of a rollup backfill"""
+
+    tenant_id: str
+    learners: int = 0
+    attempts: int = 0
+    steps: int = 0
+    chunks: int = 0
+    workers: int = 1
+    rollup_rows: int = 0
+    learner_states: int = 0
+    elapsed_seconds: float = 0.0
+
+
+def _read_chunk(db_session, learners: Dict[str, Tuple[str, str]]) -> Tuple[list, list]:
+    learner_ids = list(learners)
+    attempts = db_session.execute(
+        select(AssessmentAttempt.learner_id, Assessment.skill_id, AssessmentAttempt.completed_at,
+               AssessmentAttempt.score >= PASSING_SCORE, AssessmentAttempt.mastery_prob)
+        .join(Assessment, Assessment.id == AssessmentAttempt.assessment_id)
+        .where(AssessmentAttempt.learner_id.in_(learner_ids),
+               AssessmentAttempt.status == AttemptStatus.COMPLETED,
+               AssessmentAttempt.completed_at.isnot(None))
+    ).all()
+    steps = db_session.execute(
+        select(LearningPlan.learner_id, PlanStep.skill_id, PlanStep.created_at, PlanStep.status,
+               PlanStep.completed_at)
+        .join(LearningPlan, LearningPlan.id == PlanStep.plan_id)
+        .where(LearningPlan.learner_id.in_(learner_ids))
+    ).all()
+    return [tuple(row) for row in attempts], [tuple(row) for row in steps]
+
+
+def build_chunk(learners: Dict[str, Tuple[str, str]], attempts: list, steps: list,
+                proficient_mastery: float) -> RollupBuilder:
+    """Replay a chunk of learners' attempts and plan steps in time order (runs in a backfill worker)"""
+    timeline = []
+    for learner_id, skill_id, completed_at, passed, mastery in attempts:
+        timeline.append((learner_id, _naive_utc(completed_at), 1, skill_id, bool(passed), mastery or 0.0))
+    for learner_id, skill_id, created_at, status, completed_at in steps:
+        created_at = _naive_utc(created_at)
+        timeline.append((learner_id, created_at, 0, skill_id, None, None))
+        if status == StepStatus.COMPLETED:
+            completed_at = _naive_utc(completed_at) if completed_at is not None else created_at
+            timeline.append((learner_id, completed_at, 2, skill_id, created_at, None))
+    timeline.sort(key=lambda entry: entry[:3])
+
+    builder = RollupBuilder(proficient_mastery=proficient_mastery)
+    for learner_id, at, kind, skill_id, extra, mastery in timeline:
+        tenant_id, team = learners[learner_id]
+        if kind == 1:
+            builder.attempt(learner_id, tenant_id, team, skill_id, at, extra, mastery)
+        elif kind == 0:
+            builder.step_planned(learner_id, tenant_id, team, skill_id, at.date())
+        else:
+            builder.step_completed(learner_id, tenant_id, team, skill_id, at,
+                                   max(0.0, (at - extra).total_seconds() / 3600))
+    return builder
+
+
+def backfill_team_rollups(db_session, tenant_id: str, workers: int = 0,
+                          chunk_learners: int = settings.TEAM_ROLLUP_BACKFILL_CHUNK_LEARNERS) -> RollupBackfill:
+    """Rebuild a tenant's team rollups and learner states from every attempt and plan step.
+
+    Learners are read in chunks; each chunk is replayed in a worker
+    process while the next one is read, and the partial rollups are
+    merged and written in place of the tenant's old ones. Also the way
+    to recount after bulk writes that skip the ORM (``recompute_mastery``)
+    or to move learners to the team in their current profile. The caller
+    commits. Takes a sync session; from async code use
+    ``await db.run_sync(backfill_team_rollups, tenant_id)``.
+    """
+    started = time.perf_counter()
+    workers = workers or settings.TEAM_ROLLUP_BACKFILL_WORKERS or os.cpu_count() or 1
+    report = RollupBackfill(tenant_id=tenant_id, workers=workers)
+    proficient_mastery = settings.TEAM_ROLLUP_PROFICIENT_MASTERY
+
+    learners = {
+        learner_id: (tenant_id, team_of(profile))
+        for learner_id, profile in db_session.execute(
+            select(Learner.id, Learner.profile).where(Learner.tenant_id == tenant_id).order_by(Learner.id)
+        )
+    }
+    report.learners = len(learners)
+    learner_ids = list(learners)
+    chunks = [
+        {learner_id: learners[learner_id] for learner_id in learner_ids[start:start + chunk_learners]}
+        for start in range(0, len(learner_ids), chunk_learners)
+    ]
+    report.chunks = len(chunks)
+
+    merged = RollupBuilder(proficient_mastery=proficient_mastery)
+    if workers == 1:
+        for chunk in chunks:
+            attempts, steps = _read_chunk(db_session, chunk)
+            report.attempts += len(attempts)
+            report.steps += len(steps)
+            merged.merge(build_chunk(chunk, attempts, steps, proficient_mastery))
+    elif chunks:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            pending = set()
+            for chunk in chunks:
+                attempts, steps = _read_chunk(db_session, chunk)
+                report.attempts += len(attempts)
+                report.steps += len(steps)
+                pending.add(executor.submit(build_chunk, chunk, attempts, steps, proficient_mastery))
+                # Read ahead of the workers by at most one chunk each
+                while len(pending) > workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        merged.merge(future.result())
+            for future in pending:
+                merged.merge(future.result())
+
+    connection = db_session.connection()
+    for model in (TeamSkillRollup, TeamSkillTotal, LearnerSkillState):
+        connection.execute(delete(model.__table__).where(model.__table__.c.tenant_id == tenant_id))
+    report.rollup_rows = merged.write(connection)
+    report.learner_states = len(merged.touched)
+    report.elapsed_seconds = time.perf_counter() - started
+    logger.info("Rebuilt team rollups for tenant %s: %d learners, %d attempts, %d steps in %d chunks, %.1fs",
+                tenant_id, report.learners, report.attempts, report.steps, report.chunks, report.elapsed_seconds)
+    return report
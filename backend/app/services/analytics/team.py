@@ -0,0 +1,185 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.analytics import (
+    ALL_SKILLS,
+    ALL_TEAMS,
+    MASTERY_BUCKETS,
+    METRIC_COLUMNS,
+    TeamSkillRollup,
+    TeamSkillTotal,
+)
+from app.models.skill import Skill
+
+TOP_SKILLS = 3  # Per department
+SKILL_DEMAND = 10  # Skills in the demand trend
+TREND_COLUMNS = ("learners", "attempts", "attempts_passed", "steps_planned", "steps_completed")  # Summed per week
+
+# Positions in a metrics row (METRIC_COLUMNS order)
+LEARNERS, LAST_ACTIVE, MASTERY_SUM, ATTEMPTS, PASSED, PROFICIENT, PROFICIENCY_DAYS, PLANNED, COMPLETED, STEP_HOURS = (
+    METRIC_COLUMNS.index(column) for column in (
+        "learners", "last_active", "mastery_sum", "attempts", "attempts_passed", "proficient", "proficiency_days_sum",
+        "steps_planned", "steps_completed", "step_hours_sum",
+    )
+)
+HISTOGRAM = slice(METRIC_COLUMNS.index("mastery_0"), METRIC_COLUMNS.index("mastery_0") + MASTERY_BUCKETS)
+
+Metrics = List[float]
+
+
+def _ratio(numerator: float, denominator: float, digits: int = 3) -> Optional[float]:
+    return round(numerator / denominator, digits) if denominator else None
+
+
+def _accumulate(sums: Dict[Any, Metrics], key, row: Metrics):
+    total = sums.get(key)
+    sums[key] = list(row) if total is None else [a + b for a, b in zip(total, row)]
+
+
+def _week(day: date) -> str:
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+async def team_analytics(db: AsyncSession, tenant_id: str, department: Optional[str] = None,
+                         date_from: Optional[date] = None, date_to: Optional[date] = None) -> Dict[str, Any]:
+    """Team analytics for L&D leaders, read from the rollups alone.
+
+    Standing (coverage, mastery histograms, proficiency, completion
+    rates) is current, from the running totals. Activity (attempts,
+    active and new learners, weekly trends) covers ``date_from`` to
+    ``date_to``, the last TEAM_ANALYTICS_DEFAULT_DAYS days by default,
+    and is read from the daily rows of the department or of ALL_TEAMS,
+    so its cost grows with skills × days, not with learners or attempts.
+    """
+    window_to = date_to or datetime.utcnow().date()
+    window_from = date_from or window_to - timedelta(days=settings.TEAM_ANALYTICS_DEFAULT_DAYS - 1)
+    scope = department if department is not None else ALL_TEAMS
+
+    def daily(keys, columns, *conditions):
+        return select(*keys, *[func.sum(getattr(TeamSkillRollup, column)) for column in columns]).where(
+            TeamSkillRollup.tenant_id == tenant_id, TeamSkillRollup.day >= window_from,
+            TeamSkillRollup.day <= window_to, *conditions,
+        ).group_by(*keys)
+
+    totals_query = select(TeamSkillTotal.team, TeamSkillTotal.skill_id,
+                          *[getattr(TeamSkillTotal, column) for column in METRIC_COLUMNS]).where(
+        TeamSkillTotal.tenant_id == tenant_id
+    )
+    if department is not None:
+        totals_query = totals_query.where(TeamSkillTotal.team == department)
+    # Core execution on the session's connection: the rows are plain tuples, nothing for the ORM to load
+    connection = await db.connection()
+    standing = (await connection.execute(totals_query)).all()
+    by_skill = (await connection.execute(daily(
+        (TeamSkillRollup.skill_id,), ("learners", "attempts", "attempts_passed"),
+        TeamSkillRollup.team == scope, TeamSkillRollup.skill_id != ALL_SKILLS,
+    ))).all()
+    # Teams listed so each one's learner-level rows are a range of the rollup key
+    team_names = {team for team, skill_id, *_ in standing if skill_id == ALL_SKILLS}
+    team_days = (await connection.execute(daily(
+        (TeamSkillRollup.team, TeamSkillRollup.day), ("last_active",) + TREND_COLUMNS,
+        TeamSkillRollup.team.in_(team_names), TeamSkillRollup.skill_id == ALL_SKILLS,
+    ))).all() if team_names else []
+
+    # One pass over the team × skill cells; the scope's own rows give the per-skill and overall standing
+    zero = [0] * len(METRIC_COLUMNS)
+    overall: Metrics = zero
+    teams: Dict[str, Metrics] = {}
+    skills: Dict[str, Metrics] = {}
+    cells: Dict[str, List[Tuple[str, Metrics]]] = {}
+    for team, skill_id, *row in standing:
+        if team == scope:
+            if skill_id == ALL_SKILLS:
+                overall = row
+            elif row[LEARNERS] > 0:
+                skills[skill_id] = row
+        if team == ALL_TEAMS:
+            continue
+        if skill_id == ALL_SKILLS:
+            teams[team] = row
+        elif row[LEARNERS] > 0:
+            cells.setdefault(team, []).append((skill_id, row))
+    activity = {skill_id: [value or 0 for value in values] for skill_id, *values in by_skill}
+    active: Dict[str, float] = {}
+    weekly: Dict[str, Metrics] = {}
+    for team, day, last_active, *values in team_days:
+        active[team] = active.get(team, 0) + (last_active or 0)
+        if team == scope:
+            _accumulate(weekly, _week(day), [value or 0 for value in values])
+
+    skill_ids = set(skills) | set(activity)
+    labels = dict((await connection.execute(select(Skill.id, Skill.label).where(Skill.id.in_(skill_ids)))).all()) \
+        if skill_ids else {}
+
+    skill_coverage = []
+    for skill_id, row in sorted(skills.items(), key=lambda item: (-item[1][LEARNERS], item[0])):
+        learners, attempts, passed = activity.get(skill_id, (0, 0, 0))
+        skill_coverage.append({
+            "skill_id": skill_id,
+            "skill_name": labels.get(skill_id),
+            "learners_count": int(row[LEARNERS]),
+            "average_mastery": _ratio(row[MASTERY_SUM], row[LEARNERS]),
+            "mastery_histogram": [int(count) for count in row[HISTOGRAM]],
+            "proficient_learners": int(row[PROFICIENT]),
+            "average_days_to_proficiency": _ratio(row[PROFICIENCY_DAYS], row[PROFICIENT], 1),
+            "completion_rate": _ratio(row[COMPLETED], row[PLANNED]),
+            "attempts": int(attempts),
+            "pass_rate": _ratio(passed, attempts),
+        })
+
+    skill_heatmap, department_performance = [], []
+    for team in sorted(set(teams) | set(cells)):
+        ranked = sorted(cells.get(team, []), key=lambda cell: (-cell[1][MASTERY_SUM], cell[0]))
+        skill_heatmap.extend({
+            "department": team,
+            "skill_id": skill_id,
+            "learners_count": int(row[LEARNERS]),
+            "average_mastery": _ratio(row[MASTERY_SUM], row[LEARNERS]),
+            "proficient_learners": int(row[PROFICIENT]),
+        } for skill_id, row in ranked)
+        team_row = teams.get(team, zero)
+        learners, mastery_sum, proficient, proficiency_days = (
+            sum(row[column] for _, row in ranked) for column in (LEARNERS, MASTERY_SUM, PROFICIENT, PROFICIENCY_DAYS)
+        )
+        department_performance.append({
+            "department": team,
+            "learners_count": int(team_row[LEARNERS]),
+            "active_learners": int(active.get(team, 0)),
+            "average_progress": _ratio(team_row[COMPLETED], team_row[PLANNED]),
+            "average_mastery": _ratio(mastery_sum, learners),
+            "average_days_to_proficiency": _ratio(proficiency_days, proficient, 1),
+            "top_skills": [labels.get(skill_id, skill_id) for skill_id, _ in ranked[:TOP_SKILLS]],
+        })
+
+    weeks = sorted(weekly.items())
+    demand = sorted(activity.items(), key=lambda item: (-item[1][1], item[0]))[:SKILL_DEMAND]
+    mastery = [sum(column) for column in zip(zero, *skills.values())]
+    return {
+        "window": {"date_from": window_from.isoformat(), "date_to": window_to.isoformat()},
+        "team_overview": {
+            "total_learners": int(overall[LEARNERS]),
+            "active_learners": int(active.get(scope, 0)),
+            "total_skills_covered": len(skill_coverage),
+            "average_completion_rate": _ratio(overall[COMPLETED], overall[PLANNED]),
+            "average_mastery": _ratio(mastery[MASTERY_SUM], mastery[LEARNERS]),
+            "proficient_learner_skills": int(mastery[PROFICIENT]),
+            "average_days_to_proficiency": _ratio(mastery[PROFICIENCY_DAYS], mastery[PROFICIENT], 1),
+            "average_step_hours": _ratio(overall[STEP_HOURS], overall[COMPLETED], 1),
+        },
+        "skill_coverage": skill_coverage,
+        "skill_heatmap": skill_heatmap,
+        "department_performance": department_performance,
+        "trends": {
+            "weekly_enrollment": [{"week": week, "new_learners": int(values[0])} for week, values in weeks],
+            "skill_demand": [{"skill_id": skill_id, "skill_name": labels.get(skill_id), "attempts": int(attempts),
+                              "new_learners": int(learners)}
+                             for skill_id, (learners, attempts, _) in demand if attempts > 0],
+            "completion_rates": [{"week": week, "attempts": int(values[1]), "pass_rate": _ratio(values[2], values[1]),
+                                  "steps_planned": int(values[3]), "steps_completed": int(values[4])}
+                                 for week, values in weeks],
+        },
+    }
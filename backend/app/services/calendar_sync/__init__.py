@@ -0,0 +1,47 @@
+# Calendar sync: incremental two-way sync of learners' Google and Outlook calendars with their calendar events
+
+from .http import ProviderLimiter, get_http_client, set_http_client, close_http_client, get_limiter
+from .providers import (
+    ProviderError,
+    SyncTokenExpired,
+    CalendarAccount,
+    RemoteEvent,
+    LocalEvent,
+    PushResult,
+    CalendarAPI,
+    GoogleCalendarAPI,
+    OutlookCalendarAPI,
+)
+from .service import (
+    AccountSyncReport,
+    SyncReport,
+    CalendarSync,
+    connect_calendar,
+    get_calendar_sync,
+    set_calendar_sync,
+)
+from .fake import FakeCalendarServer
+
+__all__ = [
+    'ProviderLimiter',
+    'get_http_client',
+    'set_http_client',
+    'close_http_client',
+    'get_limiter',
+    'ProviderError',
+    'SyncTokenExpired',
+    'CalendarAccount',
+    'RemoteEvent',
+    'LocalEvent',
+    'PushResult',
+    'CalendarAPI',
+    'GoogleCalendarAPI',
+    'OutlookCalendarAPI',
+    'AccountSyncReport',
+    'SyncReport',
+    'CalendarSync',
+    'connect_calendar',
+    'get_calendar_sync',
+    'set_calendar_sync',
+    'FakeCalendarServer',
+]
@@ -0,0 +1,388 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+import json
+import threading
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from .providers import decode_multipart, encode_multipart, parse_http_message
+
+
+@dataclass
+class FakeEvent:
+    id: str
+    version: int
+    title: str = ""
+    description: Optional[str] = None
+    start_at: Optional[datetime] = None
+    end_at: Optional[datetime] = None
+    location: Optional[str] = None
+    attendees: List[str] = field(default_factory=list)
+    deleted: bool = False
+    transaction_id: Optional[str] = None
+
+
+@dataclass
+class FakeCalendar:
+    """One account's calendar: its events and a version bumped on every change"""
+
+    provider: str
+    events: Dict[str, FakeEvent] = field(default_factory=dict)
+    version: int = 0
+    epoch: int = 0  # Bumped to expire the sync tokens handed out so far
+
+    def put(self, event_id: str, **values) -> FakeEvent:
+        self.version += 1
+        event = self.events.get(event_id)
+        if event is None:
+            event = self.events[event_id] = FakeEvent(event_id, self.version)
+        event.version = self.version
+        for name, value in values.items():
+            setattr(event, name, value)
+        return event
+
+    def changed(self, since: int, until: int) -> List[FakeEvent]:
+        """Events changed in (since, until] by version; a full listing (since 0) leaves out deleted ones"""
+        return sorted(
+            (event for event in self.events.values()
+             if since < event.version <= until and not (since == 0 and event.deleted)),
+            key=lambda event: event.version,
+        )
+
+
+@dataclass
+class FakeServerStats:
+    requests: int = 0
+    batch_calls: int = 0
+    throttled: int = 0
+    events_listed: int = 0
+    connections: Set[Tuple[str, int]] = field(default_factory=set)  # Client (host, port) pairs seen
+
+
+def _iso(value: datetime) -> str:
+    return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _graph_iso(value: datetime) -> str:
+    # Graph writes UTC times without an offset and with seven fractional digits
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f") + "0"
+
+
+def _parse_time(value: Dict[str, Any]) -> Optional[datetime]:
+    text = value.get("dateTime")
+    if not text:
+        return None
+    parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class FakeCalendarServer:
+    """Local stand-in for the Google Calendar and Microsoft Graph calendar APIs.
+
+    Serves the calls ``GoogleCalendarAPI`` and ``OutlookCalendarAPI`` make:
+    paged delta listings with sync tokens (Google) and delta links
+    (Graph), and batched creates, updates and deletes. Each access token
+    is one calendar. Every ``throttle_every``-th request, or call inside a
+    batch, is answered 429 with a Retry-After of ``retry_after`` seconds;
+    ``expire_tokens`` makes a calendar's sync tokens answer 410 as when
+    the provider drops them, and ``expire_access_token`` makes its access
+    token answer 401 until a refresh token is traded at ``/token``. Used
+    by benchmarks, either in process through an ASGI transport or over
+    real connections with ``serve``.
+    """
+
+    def __init__(self, page_size: int = 250, throttle_every: int = 0, retry_after: float = 0.05):
+        self.page_size = page_size
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.calendars: Dict[str, FakeCalendar] = {}
+        self.issued: Dict[str, str] = {}  # Access tokens handed out by /token -> the calendar's original token
+        self.expired: Set[str] = set()
+        self.refresh_tokens: Dict[str, str] = {}
+        self.stats = FakeServerStats()
+        self._counter = 0
+        self._lock = threading.Lock()
+        self.app = self._build_app()
+
+    # Accounts and remote changes
+
+    def add_calendar(self, token: str, provider: str) -> FakeCalendar:
+        calendar = self.calendars[token] = FakeCalendar(provider)
+        return calendar
+
+    def add_event(self, token: str, title: str, start_at: datetime, minutes: int = 60, **values) -> FakeEvent:
+        calendar = self.calendars[token]
+        event_id = uuid.uuid4().hex if calendar.provider == "google" else f"AAMk{uuid.uuid4().hex}"
+        return calendar.put(event_id, title=title, start_at=start_at, end_at=start_at + timedelta(minutes=minutes),
+                            **values)
+
+    def update_event(self, token: str, event_id: str, **values) -> FakeEvent:
+        return self.calendars[token].put(event_id, **values)
+
+    def delete_event(self, token: str, event_id: str) -> FakeEvent:
+        return self.calendars[token].put(event_id, deleted=True)
+
+    def expire_tokens(self, token: str):
+        self.calendars[token].epoch += 1
+
+    def expire_access_token(self, token: str, refresh_token: str):
+        """Answer 401 to ``token`` from now on; ``refresh_token`` gets a new access token to the same calendar"""
+        self.expired.add(token)
+        self.refresh_tokens[refresh_token] = self.issued.get(token, token)
+
+    # Protocol plumbing
+
+    def _throttled(self) -> bool:
+        if not self.throttle_every:
+            return False
+        with self._lock:
+            self._counter += 1
+            throttled = self._counter % self.throttle_every == 0
+        if throttled:
+            self.stats.throttled += 1
+        return throttled
+
+    def _calendar(self, request: Request) -> Optional[FakeCalendar]:
+        self.stats.requests += 1
+        if request.client is not None:
+            self.stats.connections.add((request.client.host, request.client.port))
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if token in self.expired:
+            return None
+        return self.calendars.get(self.issued.get(token, token))
+
+    def _too_many(self) -> JSONResponse:
+        return JSONResponse({"error": {"code": 429, "message": "Rate limit exceeded"}}, status_code=429,
+                            headers={"Retry-After": str(self.retry_after)})
+
+    def _page(self, calendar: FakeCalendar, sync_token: Optional[str],
+              page_token: Optional[str]) -> Tuple[Optional[List[FakeEvent]], str, bool]:
+        """Events of a page, the token that follows it and whether it is the last page.
+
+        A sync token is "epoch.version", a page token "epoch.since.until.offset";
+        tokens of an older epoch have expired and give no events.
+        """
+        try:
+            if page_token:
+                epoch, since, until, offset = (int(part) for part in page_token.split("."))
+            elif sync_token:
+                (epoch, since), until, offset = (int(part) for part in sync_token.split(".")), calendar.version, 0
+            else:
+                epoch, since, until, offset = calendar.epoch, 0, calendar.version, 0
+        except ValueError:
+            return None, "", True
+        if epoch != calendar.epoch:
+            return None, "", True
+        changed = calendar.changed(since, until)
+        events = changed[offset:offset + self.page_size]
+        self.stats.events_listed += len(events)
+        if offset + self.page_size >= len(changed):
+            return events, f"{epoch}.{until}", True
+        return events, f"{epoch}.{since}.{until}.{offset + self.page_size}", False
+
+    # Google Calendar
+
+    def _google_item(self, event: FakeEvent) -> Dict[str, Any]:
+        if event.deleted:
+            return {"id": event.id, "status": "cancelled"}
+        return {
+            "id": event.id,
+            "status": "confirmed",
+            "summary": event.title,
+            "description": event.description,
+            "location": event.location,
+            "start": {"dateTime": _iso(event.start_at)},
+            "end": {"dateTime": _iso(event.end_at)},
+            "attendees": [{"email": email} for email in event.attendees],
+        }
+
+    def _google_write(self, calendar: FakeCalendar, method: str, path: str,
+                      body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        event_id = path.rstrip("/").rsplit("/", 1)[-1] if method != "POST" else body.get("id") or uuid.uuid4().hex
+        event = calendar.events.get(event_id)
+        if method == "DELETE":
+            if event is None or event.deleted:
+                return 410, {"error": {"code": 410, "message": "Resource has been deleted"}}
+            calendar.put(event_id, deleted=True)
+            return 204, {}
+        values = {
+            "title": body.get("summary") or "",
+            "description": body.get("description"),
+            "location": body.get("location"),
+            "start_at": _parse_time(body.get("start") or {}),
+            "end_at": _parse_time(body.get("end") or {}),
+            "attendees": [attendee["email"] for attendee in body.get("attendees") or ()],
+        }
+        if method == "POST":
+            if event is not None:
+                return 409, {"error": {"code": 409, "message": "The requested identifier already exists."}}
+            return 200, self._google_item(calendar.put(event_id, **values))
+        if event is None or event.deleted:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        return 200, self._google_item(calendar.put(event_id, **values))
+
+    # Microsoft Graph
+
+    def _graph_item(self, event: FakeEvent) -> Dict[str, Any]:
+        if event.deleted:
+            return {"id": event.id, "@removed": {"reason": "deleted"}}
+        return {
+            "id": event.id,
+            "subject": event.title,
+            "body": {"contentType": "text", "content": event.description or ""},
+            "start": {"dateTime": _graph_iso(event.start_at), "timeZone": "UTC"},
+            "end": {"dateTime": _graph_iso(event.end_at), "timeZone": "UTC"},
+            "location": {"displayName": event.location or ""},
+            "attendees": [{"emailAddress": {"address": email}, "type": "required"} for email in event.attendees],
+            "isCancelled": False,
+        }
+
+    def _graph_write(self, calendar: FakeCalendar, method: str, url: str,
+                     body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        if method == "POST":
+            transaction_id = body.get("transactionId")
+            for event in calendar.events.values():
+                if transaction_id and event.transaction_id == transaction_id:
+                    return 201, self._graph_item(event)
+            event_id = f"AAMk{uuid.uuid4().hex}"
+        else:
+            event_id = url.rstrip("/").rsplit("/", 1)[-1]
+        event = calendar.events.get(event_id)
+        if method == "DELETE":
+            if event is None or event.deleted:
+                return 404, {"error": {"code": "ErrorItemNotFound", "message": "Not found"}}
+            calendar.put(event_id, deleted=True)
+            return 204, {}
+        if method != "POST" and (event is None or event.deleted):
+            return 404, {"error": {"code": "ErrorItemNotFound", "message": "Not found"}}
+        values = {
+            "title": body.get("subject") or "",
+            "description": (body.get("body") or {}).get("content") or None,
+            "location": (body.get("location") or {}).get("displayName") or None,
+            "start_at": _parse_time(body.get("start") or {}),
+            "end_at": _parse_time(body.get("end") or {}),
+            "attendees": [attendee["emailAddress"]["address"] for attendee in body.get("attendees") or ()],
+        }
+        if method == "POST":
+            return 201, self._graph_item(calendar.put(event_id, transaction_id=body.get("transactionId"), **values))
+        return 200, self._graph_item(calendar.put(event_id, **values))
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+        unauthorized = {"error": {"code": 401, "message": "Invalid credentials"}}
+
+        @app.post("/token")
+        async def token(request: Request):
+            self.stats.requests += 1
+            form = await request.form()
+            calendar_token = self.refresh_tokens.get(form.get("refresh_token", ""))
+            if form.get("grant_type") != "refresh_token" or calendar_token is None:
+                return JSONResponse({"error": "invalid_grant"}, status_code=400)
+            access_token = f"{calendar_token}.{uuid.uuid4().hex}"
+            self.issued[access_token] = calendar_token
+            return {"access_token": access_token, "expires_in": 3600, "token_type": "Bearer"}
+
+        @app.get("/calendar/v3/calendars/{calendar_id}/events")
+        async def google_list(calendar_id: str, request: Request):
+            calendar = self._calendar(request)
+            if calendar is None:
+                return JSONResponse(unauthorized, status_code=401)
+            if self._throttled():
+                return self._too_many()
+            params = request.query_params
+            events, following, last = self._page(calendar, params.get("syncToken"), params.get("pageToken"))
+            if events is None:
+                return JSONResponse({"error": {"code": 410, "message": "Sync token is no longer valid"}},
+                                    status_code=410)
+            data = {"kind": "calendar#events", "items": [self._google_item(event) for event in events]}
+            data["nextSyncToken" if last else "nextPageToken"] = following
+            return data
+
+        @app.post("/batch/calendar/v3")
+        async def google_batch(request: Request):
+            calendar = self._calendar(request)
+            if calendar is None:
+                return JSONResponse(unauthorized, status_code=401)
+            if self._throttled():
+                return self._too_many()
+            parts = []
+            for content_id, raw in decode_multipart(request.headers["Content-Type"], await request.body()):
+                self.stats.batch_calls += 1
+                start, _, body = parse_http_message(raw)
+                method, path = start.split()[:2]
+                if self._throttled():
+                    status, answer, extra = 429, {"error": {"code": 429, "message": "Rate limit exceeded"}}, \
+                        f"Retry-After: {self.retry_after}\r\n"
+                else:
+                    status, answer = self._google_write(calendar, method, path, json.loads(body) if body else {})
+                    extra = ""
+                payload = json.dumps(answer).encode() if status != 204 else b""
+                parts.append((f"response-{content_id}", (
+                    f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n{extra}\r\n"
+                ).encode() + payload))
+            boundary = f"batch_{uuid.uuid4().hex}"
+            return Response(encode_multipart(parts, boundary), media_type=f"multipart/mixed; boundary={boundary}")
+
+        @app.get("/v1.0/me/calendarView/delta")
+        async def graph_delta(request: Request):
+            calendar = self._calendar(request)
+            if calendar is None:
+                return JSONResponse(unauthorized, status_code=401)
+            if self._throttled():
+                return self._too_many()
+            params = request.query_params
+            events, following, last = self._page(calendar, params.get("$deltatoken"), params.get("$skiptoken"))
+            if events is None:
+                return JSONResponse({"error": {"code": "SyncStateNotFound", "message": "Delta token expired"}},
+                                    status_code=410)
+            base = str(request.url).split("?", 1)[0]
+            data = {"value": [self._graph_item(event) for event in events]}
+            if last:
+                data["@odata.deltaLink"] = f"{base}?$deltatoken={following}"
+            else:
+                data["@odata.nextLink"] = f"{base}?$skiptoken={following}"
+            return data
+
+        @app.post("/v1.0/$batch")
+        async def graph_batch(request: Request):
+            calendar = self._calendar(request)
+            if calendar is None:
+                return JSONResponse(unauthorized, status_code=401)
+            if self._throttled():
+                return self._too_many()
+            responses = []
+            for call in (await request.json()).get("requests") or ():
+                self.stats.batch_calls += 1
+                if self._throttled():
+                    responses.append({"id": call["id"], "status": 429,
+                                      "headers": {"Retry-After": str(self.retry_after)},
+                                      "body": {"error": {"code": "TooManyRequests", "message": "Throttled"}}})
+                    continue
+                status, answer = self._graph_write(calendar, call["method"], call["url"], call.get("body") or {})
+                responses.append({"id": call["id"], "status": status, "body": answer})
+            return {"responses": responses}
+
+        return app
+
+    @contextmanager
+    def serve(self, host: str = "127.0.0.1") -> Iterator[str]:
+        """Run the server with uvicorn in a background thread on a free port; yields its base URL"""
+        import uvicorn
+
+        server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=0, log_level="warning", access_log=False))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("Fake calendar server did not start")
+            thread.join(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        try:
+            yield f"http://{host}:{port}"
+        finally:
+            server.should_exit = True
+            thread.join()
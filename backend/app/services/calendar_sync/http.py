@@ -0,0 +1,146 @@
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.models.calendar import CalendarProvider
+
+logger = logging.getLogger(__name__)
+
+# Answers that mean "slow down and try again"
+RETRY_STATUSES = frozenset({429, 503})
+
+
+def retry_after(headers, default: float) -> float:
+    """Seconds to wait from a Retry-After header (delta seconds or an HTTP date), else ``default``"""
+    value = headers.get("Retry-After") if headers else None
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass
+class LimiterStats:
+    requests: int = 0
+    throttled: int = 0  # 429/503 answers, including per-item answers inside batches
+    retries: int = 0
+    errors: int = 0  # Connection errors and timeouts
+
+
+class ProviderLimiter:
+    """Bounds the requests in flight to one provider and backs off together when it throttles.
+
+    Every request takes a slot of the provider's semaphore for as long as
+    it runs. A 429 or 503 answer pauses all of the provider's requests
+    from this worker until its Retry-After (or an exponential backoff
+    with jitter) has passed, instead of letting each caller keep hitting
+    the limit; the request is then retried, up to ``max_retries`` times.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_retries: Optional[int] = None,
+                 backoff_seconds: Optional[float] = None):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_retries = max_retries if max_retries is not None else settings.CALENDAR_SYNC_MAX_RETRIES
+        self.backoff_seconds = backoff_seconds if backoff_seconds is not None else settings.CALENDAR_SYNC_BACKOFF_SECONDS
+        self.stats = LimiterStats()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._resume_at = 0.0
+
+    def backoff(self, attempt: int) -> float:
+        delay = self.backoff_seconds * 2 ** attempt
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def throttle(self, delay: float):
+        """Hold back the provider's requests for ``delay`` seconds"""
+        self.stats.throttled += 1
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+    async def _wait(self):
+        while True:
+            delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request within the provider's limits, retrying throttled and failed attempts"""
+        attempt = 0
+        while True:
+            await self._wait()
+            async with self._semaphore:
+                await self._wait()
+                self.stats.requests += 1
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except httpx.TransportError:
+                    self.stats.errors += 1
+                    if attempt >= self.max_retries:
+                        raise
+                    response = None
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                return response
+            if attempt >= self.max_retries:
+                return response
+            delay = self.backoff(attempt)
+            if response is not None:
+                delay = retry_after(response.headers, delay)
+                self.throttle(delay)
+            else:
+                await asyncio.sleep(delay)
+            attempt += 1
+            self.stats.retries += 1
+            logger.debug("Retrying %s %s in %.2fs (attempt %d)", method, url, delay, attempt)
+
+
+_client: Optional[httpx.AsyncClient] = None
+_limiters: Dict[CalendarProvider, ProviderLimiter] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide HTTP client every calendar provider call goes through, for pooled connections"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=settings.CALENDAR_SYNC_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=settings.CALENDAR_SYNC_MAX_CONNECTIONS,
+                                max_keepalive_connections=settings.CALENDAR_SYNC_MAX_CONNECTIONS),
+        )
+    return _client
+
+
+def set_http_client(client: Optional[httpx.AsyncClient]):
+    """Replace the process-wide HTTP client (e.g. one pointed at a fake provider server)"""
+    global _client
+    _client = client
+
+
+async def close_http_client():
+    """Close the process-wide HTTP client's connections; run at worker shutdown"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_limiter(provider: CalendarProvider) -> ProviderLimiter:
+    """Get the process-wide limiter of a provider, sized by ``CALENDAR_SYNC_CONCURRENCY``"""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limiter = _limiters[provider] = ProviderLimiter(
+            provider.value, settings.CALENDAR_SYNC_CONCURRENCY.get(provider.value, 10)
+        )
+    return limiter
@@ -0,0 +1,406 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set
+import asyncio
+import logging
+import time
+
+import httpx
+from sqlalchemy import String, bindparam, case, cast, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.calendar import CalendarEvent, CalendarProvider, CalendarSyncState, EventStatus
+from app.models.learner import Learner
+from app.services.coach.context import CALENDAR, context_changed_on_commit
+from .http import get_http_client, get_limiter
+from .providers import (
+    CalendarAccount,
+    CalendarAPI,
+    GoogleCalendarAPI,
+    LocalEvent,
+    OutlookCalendarAPI,
+    ProviderError,
+    PushResult,
+    RemoteEvent,
+    SyncTokenExpired,
+)
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 1_000
+
+_events = CalendarEvent.__table__
+
+# Remote values overwrite these columns; plan step, metadata and local IDs stay
+_SYNCED_COLUMNS = ("title", "description", "start_at", "end_at", "status", "location", "attendees",
+                   "synced_at", "updated_at")
+
+
+@lru_cache(maxsize=None)
+def _upsert_statement(dialect: str):
+    """Multi-row insert of remote events that updates the local copy found by external ID.
+
+    A local copy changed since its last sync keeps its changes; the push
+    that follows writes them to the provider.
+    """
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Calendar sync is not implemented for {dialect}")
+    statement = insert(_events)
+    return statement.on_conflict_do_update(
+        index_elements=[_events.c.learner_id, _events.c.provider, _events.c.external_id],
+        set_={column: statement.excluded[column] for column in _SYNCED_COLUMNS},
+        where=_events.c.updated_at == _events.c.synced_at,
+    )
+
+
+# The version of an event is its updated_at as stored, compared as text so that values written by the
+# database clock and by the application compare alike on every dialect
+_version = cast(_events.c.updated_at, String)
+
+# Records the provider's ID of pushed events and marks them synced, unless they changed again while the push
+# was in flight; those are pushed next time. Setting updated_at to itself skips its onupdate
+_mark_pushed = (
+    update(_events)
+    .where(_events.c.id == bindparam("b_id"))
+    .values(
+        external_id=func.coalesce(bindparam("b_external_id"), _events.c.external_id),
+        synced_at=case((_version == bindparam("b_version"), _events.c.updated_at), else_=_events.c.synced_at),
+        updated_at=_events.c.updated_at,
+    )
+)
+
+
+@dataclass
+class AccountSyncReport:
+    """What one sync of one learner's calendar did"""
+
+    learner_id: str
+    provider: str
+    full: bool = False  # Listed in full: first sync, or the provider expired the sync token
+    pages: int = 0
+    upserted: int = 0
+    removed: int = 0  # Local copies of events deleted remotely, now cancelled
+    pushed: int = 0
+    push_failed: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class SyncReport:
+    """Counters for a sync over many calendars"""
+
+    accounts: int = 0
+    failed: int = 0
+    full: int = 0
+    pages: int = 0
+    upserted: int = 0
+    removed: int = 0
+    pushed: int = 0
+    push_failed: int = 0
+    elapsed_seconds: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)  # Sync state ID -> error, first 100
+
+    def add(self, state_id: str, account: AccountSyncReport):
+        self.accounts += 1
+        self.full += account.full
+        self.pages += account.pages
+        self.upserted += account.upserted
+        self.removed += account.removed
+        self.pushed += account.pushed
+        self.push_failed += account.push_failed
+        if account.error is not None:
+            self.failed += 1
+            if len(self.errors) < 100:
+                self.errors[state_id] = account.error
+
+
+def _store_tokens(state: CalendarSyncState, account: CalendarAccount):
+    """Keep tokens the provider issued during a sync (a rotated refresh token is the only valid one)"""
+    if account.refreshed:
+        state.access_token = account.access_token
+        state.refresh_token = account.refresh_token
+        state.token_expires_at = account.expires_at
+
+
+class CalendarSync:
+    """Two-way incremental sync between learners' external calendars and their ``CalendarEvent`` rows.
+
+    A sync of one connected calendar (a ``CalendarSyncState``):
+
+    * pulls the events changed since the stored sync token, page by
+      page, and bulk-upserts each page by ``external_id``; events deleted
+      remotely are cancelled locally. Without a token (first sync, or
+      the provider expired it) the calendar is listed in full and local
+      copies of events no longer listed are cancelled. The new token is
+      committed with the last page, so a sync cut short is redone from
+      the old one;
+    * pushes local events of that provider created, changed or cancelled
+      since their last sync in the provider's batch requests.
+
+    A local change wins over a remote change to the same event made
+    since its last sync. All provider calls share one pooled HTTP client
+    and each provider's limiter, which bounds requests in flight and
+    backs off on 429s. An expired access token (or a 401) is refreshed
+    with the stored refresh token, and the new tokens are saved.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, client: Optional[httpx.AsyncClient] = None,
+                 apis: Optional[Dict[CalendarProvider, CalendarAPI]] = None, max_accounts: Optional[int] = None):
+        self.session_factory = session_factory
+        self._client = client
+        self._apis = dict(apis or {})
+        self.max_accounts = max_accounts or settings.CALENDAR_SYNC_MAX_ACCOUNTS
+
+    def api(self, provider: CalendarProvider) -> CalendarAPI:
+        api = self._apis.get(provider)
+        if api is None:
+            client = self._client or get_http_client()
+            if provider == CalendarProvider.GOOGLE:
+                api = GoogleCalendarAPI(client, get_limiter(provider))
+            elif provider == CalendarProvider.OUTLOOK:
+                api = OutlookCalendarAPI(client, get_limiter(provider))
+            else:
+                raise ValueError(f"No sync for {provider.value} calendars")
+            self._apis[provider] = api
+        return api
+
+    async def sync_account(self, state_id: str) -> AccountSyncReport:
+        """Pull then push one connected calendar; errors are recorded on its sync state, not raised"""
+        async with self.session_factory() as db:
+            state = await db.get(CalendarSyncState, state_id)
+            if state is None:
+                raise ValueError(f"Unknown calendar sync state: {state_id}")
+            report = AccountSyncReport(state.learner_id, state.provider.value)
+            account = CalendarAccount(state.learner_id, state.provider, state.calendar_id, state.access_token or "",
+                                      state.refresh_token, state.token_expires_at)
+            api = self.api(state.provider)
+            try:
+                try:
+                    state.sync_token = await self._pull(db, api, account, state.sync_token, report)
+                except SyncTokenExpired:
+                    await db.rollback()
+                    logger.info("Sync token of %s calendar of learner %s expired; listing in full",
+                                account.provider.value, account.learner_id)
+                    state.sync_token = await self._pull(db, api, account, None, report)
+                state.last_synced_at = datetime.now(timezone.utc)
+                _store_tokens(state, account)
+                await db.commit()
+                await self._push(db, api, account, report)
+                state.last_error = None
+                _store_tokens(state, account)
+                await db.commit()
+            except (httpx.HTTPError, ProviderError) as exc:
+                await db.rollback()
+                report.error = f"{type(exc).__name__}: {exc}"[:1000]
+                state.last_error = report.error
+                _store_tokens(state, account)
+                await db.commit()
+                logger.warning("Calendar sync of %s failed: %s", state_id, report.error)
+        return report
+
+    async def _pull(self, db: AsyncSession, api: CalendarAPI, account: CalendarAccount,
+                    sync_token: Optional[str], report: AccountSyncReport) -> Optional[str]:
+        full = sync_token is None
+        report.full = report.full or full
+        seen: Set[str] = set()
+        next_token = None
+        async for page in api.changes(account, sync_token):
+            report.pages += 1
+            await self._apply(db, account, page.events, report)
+            if full:
+                seen.update(event.external_id for event in page.events if not event.deleted)
+            next_token = page.sync_token or next_token
+        if full:
+            report.removed += await self._cancel_unlisted(db, api, account, seen)
+        return next_token
+
+    async def _apply(self, db: AsyncSession, account: CalendarAccount, events: List[RemoteEvent],
+                     report: AccountSyncReport):
+        """Bulk-upsert a page of remote events and cancel the local copies of deleted ones"""
+        now = datetime.now(timezone.utc)
+        rows, deleted = [], []
+        for event in events:
+            if event.deleted:
+                deleted.append(event.external_id)
+            elif event.start_at is not None and event.end_at is not None:
+                rows.append({
+                    "learner_id": account.learner_id,
+                    "provider": account.provider,
+                    "external_id": event.external_id,
+                    "title": event.title[:255],
+                    "description": event.description,
+                    "start_at": event.start_at,
+                    "end_at": event.end_at,
+                    "status": EventStatus.SCHEDULED,
+                    "location": (event.location or "")[:500] or None,
+                    "attendees": event.attendees,
+                    "metadata": {},
+                    "synced_at": now,
+                    "updated_at": now,
+                })
+        if rows:
+            statement = _upsert_statement(db.bind.dialect.name)
+            for offset in range(0, len(rows), WRITE_BATCH_SIZE):
+                await db.execute(statement, rows[offset:offset + WRITE_BATCH_SIZE])
+            report.upserted += len(rows)
+        cancelled = 0
+        for offset in range(0, len(deleted), WRITE_BATCH_SIZE):
+            result = await db.execute(
+                update(_events)
+                .where(_events.c.learner_id == account.learner_id, _events.c.provider == account.provider,
+                       _events.c.external_id.in_(deleted[offset:offset + WRITE_BATCH_SIZE]),
+                       _events.c.status != EventStatus.CANCELLED)
+                .values(status=EventStatus.CANCELLED, synced_at=now, updated_at=now)
+            )
+            cancelled += result.rowcount
+        report.removed += cancelled
+        if rows or cancelled:
+            context_changed_on_commit(db, account.learner_id, [CALENDAR], refresh=False)
+
+    async def _cancel_unlisted(self, db: AsyncSession, api: CalendarAPI, account: CalendarAccount,
+                               seen: Set[str]) -> int:
+        """After a full listing, cancel synced local copies of events the provider no longer has"""
+        query = (
+            select(_events.c.id, _events.c.external_id)
+            .where(_events.c.learner_id == account.learner_id, _events.c.provider == account.provider,
+                   _events.c.external_id.isnot(None), _events.c.status != EventStatus.CANCELLED)
+        )
+        window = api.listing_window()
+        if window is not None:
+            query = query.where(_events.c.start_at >= window[0], _events.c.start_at < window[1])
+        rows = await db.execute(query)
+        gone = [event_id for event_id, external_id in rows if external_id not in seen]
+        now = datetime.now(timezone.utc)
+        for offset in range(0, len(gone), WRITE_BATCH_SIZE):
+            await db.execute(
+                update(_events).where(_events.c.id.in_(gone[offset:offset + WRITE_BATCH_SIZE]))
+                .values(status=EventStatus.CANCELLED, synced_at=now, updated_at=now)
+            )
+        if gone:
+            context_changed_on_commit(db, account.learner_id, [CALENDAR], refresh=False)
+        return len(gone)
+
+    async def _push(self, db: AsyncSession, api: CalendarAPI, account: CalendarAccount, report: AccountSyncReport):
+        rows = (await db.execute(
+            select(_events.c.id, _events.c.external_id, _events.c.title, _events.c.description, _events.c.start_at,
+                   _events.c.end_at, _events.c.status, _events.c.location, _events.c.attendees,
+                   _version)
+            .where(_events.c.learner_id == account.learner_id, _events.c.provider == account.provider,
+                   or_(_events.c.synced_at.is_(None), _events.c.updated_at != _events.c.synced_at))
+        )).all()
+        if not rows:
+            return
+        to_push, versions, marks = [], {}, []
+        for event_id, external_id, title, description, start_at, end_at, status, location, attendees, version \
+                in rows:
+            versions[event_id] = version
+            cancelled = status == EventStatus.CANCELLED
+            if cancelled and external_id is None:
+                # Never reached the provider: nothing to delete there
+                marks.append({"b_id": event_id, "b_external_id": None, "b_version": version})
+                continue
+            to_push.append(LocalEvent(event_id, external_id, title, description, start_at, end_at, cancelled,
+                                      location, list(attendees or ())))
+
+        results: List[PushResult] = await api.push(account, to_push) if to_push else []
+        for pushed in results:
+            if not pushed.ok:
+                report.push_failed += 1
+                logger.warning("Could not push event %s to %s: %s %s", pushed.event_id, account.provider.value,
+                               pushed.status_code, pushed.error)
+                continue
+            report.pushed += 1
+            marks.append({"b_id": pushed.event_id, "b_external_id": pushed.external_id,
+                          "b_version": versions[pushed.event_id]})
+        for offset in range(0, len(marks), WRITE_BATCH_SIZE):
+            await db.execute(_mark_pushed, marks[offset:offset + WRITE_BATCH_SIZE])
+
+    async def sync_learner(self, learner_id: str) -> List[AccountSyncReport]:
+        """Sync every connected calendar of a learner"""
+        async with self.session_factory() as db:
+            state_ids = (await db.execute(
+                select(CalendarSyncState.id)
+                .where(CalendarSyncState.learner_id == learner_id, CalendarSyncState.access_token.isnot(None))
+                .order_by(CalendarSyncState.provider)
+            )).scalars().all()
+        return [await self.sync_account(state_id) for state_id in state_ids]
+
+    async def sync_accounts(self, state_ids: Iterable[str]) -> SyncReport:
+        """Sync many calendars, at most ``max_accounts`` at a time"""
+        started = time.perf_counter()
+        report = SyncReport()
+        queue: asyncio.Queue = asyncio.Queue()
+        for state_id in state_ids:
+            queue.put_nowait(state_id)
+
+        async def worker():
+            while True:
+                try:
+                    state_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                report.add(state_id, await self.sync_account(state_id))
+
+        await asyncio.gather(*(worker() for _ in range(min(self.max_accounts, queue.qsize()))))
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+    async def sync_tenant(self, tenant_id: str) -> SyncReport:
+        """Sync every connected calendar of a tenant's learners; run periodically"""
+        async with self.session_factory() as db:
+            state_ids = (await db.execute(
+                select(CalendarSyncState.id)
+                .join(Learner, Learner.id == CalendarSyncState.learner_id)
+                .where(Learner.tenant_id == tenant_id, CalendarSyncState.access_token.isnot(None))
+                .order_by(CalendarSyncState.last_synced_at, CalendarSyncState.id)
+            )).scalars().all()
+        report = await self.sync_accounts(state_ids)
+        logger.info("Synced %d calendars of tenant %s (%d failed): %d pages, %d events in, %d removed, "
+                    "%d pushed in %.1fs", report.accounts, tenant_id, report.failed, report.pages, report.upserted,
+                    report.removed, report.pushed, report.elapsed_seconds)
+        return report
+
+
+async def connect_calendar(db: AsyncSession, learner_id: str, provider: CalendarProvider, access_token: str,
+                           calendar_id: str = "primary", refresh_token: Optional[str] = None,
+                           expires_in: Optional[int] = None) -> CalendarSyncState:
+    """Connect (or reconnect) a learner's external calendar; the next sync lists it in full (the caller commits)"""
+    state = (await db.execute(
+        select(CalendarSyncState)
+        .where(CalendarSyncState.learner_id == learner_id, CalendarSyncState.provider == provider)
+    )).scalar_one_or_none()
+    if state is None:
+        state = CalendarSyncState(learner_id=learner_id, provider=provider)
+        db.add(state)
+    if state.calendar_id != calendar_id:
+        state.sync_token = None
+    state.calendar_id = calendar_id
+    state.access_token = access_token
+    state.refresh_token = refresh_token
+    state.token_expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in) if expires_in else None
+    state.last_error = None
+    return state
+
+
+_sync: Optional[CalendarSync] = None
+
+
+def get_calendar_sync() -> CalendarSync:
+    """Get the process-wide calendar sync"""
+    global _sync
+    if _sync is None:
+        _sync = CalendarSync()
+    return _sync
+
+
+def set_calendar_sync(sync: CalendarSync):
+    """Replace the process-wide calendar sync (e.g. one pointed at a fake provider server)"""
+    global _sync
+    _sync = sync
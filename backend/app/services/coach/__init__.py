@@ -0,0 +1,26 @@
+# AI coach: learner context snapshots and token streaming of coach answers
+
+from .context import (
+    SECTIONS,
+    LearnerContext,
+    LearnerContextStore,
+    learner_context_store,
+    context_changed_on_commit,
+    decode_snapshot,
+    render_learner_context,
+)
+from .streaming import StreamEvent, StreamLimiter, coach_stream_limiter, CoachStream
+
+__all__ = [
+    'SECTIONS',
+    'LearnerContext',
+    'LearnerContextStore',
+    'learner_context_store',
+    'context_changed_on_commit',
+    'decode_snapshot',
+    'render_learner_context',
+    'StreamEvent',
+    'StreamLimiter',
+    'coach_stream_limiter',
+    'CoachStream',
+]
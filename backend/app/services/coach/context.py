@@ -0,0 +1,445 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import time
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, select
+from sqlalchemy.exc import MissingGreenlet
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.util import await_only
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_binary_redis, get_sync_redis
+from app.models.assessment import Assessment, AssessmentAttempt, AttemptStatus
+from app.models.calendar import CalendarEvent
+from app.models.coach import CoachMessage
+from app.models.learner import Learner
+from app.models.plan import LearningPlan, PlanStep, StepStatus
+from app.models.skill import Skill
+from app.repositories import (
+    CalendarEventRepository,
+    CoachMessageRepository,
+    LearningPlanRepository,
+    PlanStepRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "learner_context"
+
+# Bumped when a section's layout changes; older snapshots are rebuilt in full
+SCHEMA_VERSION = 2
+
+PROFILE = "profile"
+PLAN = "plan"
+MASTERY = "mastery"
+CALENDAR = "calendar"
+MESSAGES = "messages"
+SECTIONS = (PROFILE, PLAN, MASTERY, CALENDAR, MESSAGES)
+
+# How much of each kind of history a snapshot keeps
+RECENT_MESSAGES = 10
+RECENT_ATTEMPTS = 10
+UPCOMING_EVENTS = 5
+NEXT_STEPS = 3
+
+# Commits touching more learners than this leave the refresh to the next read
+EAGER_REFRESH_MAX_LEARNERS = 100
+
+# A section builder returns JSON-ready data and, for data that goes stale
+# with time alone (upcoming events), when it must be rebuilt at the latest
+SectionBuilder = Callable[[AsyncSession, str], Awaitable[Tuple[Any, Optional[datetime]]]]
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _value(enum_or_str) -> Optional[str]:
+    return getattr(enum_or_str, "value", enum_or_str)
+
+
+async def build_profile(db: AsyncSession, learner_id: str) -> Tuple[Any, Optional[datetime]]:
+    learner = await db.get(Learner, learner_id)
+    if learner is None:
+        return None, None
+    goals, profile = learner.goals or {}, learner.profile or {}
+    return {
+        "tenant_id": learner.tenant_id,
+        "title": profile.get("title"),
+        "timezone": profile.get("timezone"),
+        "primary_goal": goals.get("primary_goal"),
+        "target_roles": goals.get("target_roles", []),
+        "time_budget_hours": goals.get("time_budget_hours"),
+        "preferences": learner.preferences or {},
+    }, None
+
+
+async def build_plan(db: AsyncSession, learner_id: str) -> Tuple[Any, Optional[datetime]]:
+    plan = await LearningPlanRepository(db).get_active(learner_id)
+    if plan is None:
+        return None, None
+    steps = await PlanStepRepository(db).get_by_plan(plan.id)
+    completed = sum(1 for step in steps if step.status == StepStatus.COMPLETED)
+    current = next((step for step in steps if step.status == StepStatus.IN_PROGRESS), None)
+    pending = [step for step in steps if step.status == StepStatus.PENDING]
+    if current is None and pending:
+        current = pending.pop(0)
+    elif current is not None and current in pending:
+        pending.remove(current)
+    return {
+        "id": plan.id,
+        "title": plan.title,
+        "objective": plan.objective,
+        "target_date": _iso(plan.target_date),
+        "steps_total": len(steps),
+        "steps_completed": completed,
+        "current_step": {
+            "id": current.id,
+            "title": current.title,
+            "status": _value(current.status),
+            "effort_min": current.effort_min,
+            "due_at": _iso(current.due_at),
+            "overdue": current.overdue_at is not None,
+        } if current is not None else None,
+        "next_steps": [step.title for step in pending[:NEXT_STEPS]],
+    }, None
+
+
+async def build_mastery(db: AsyncSession, learner_id: str) -> Tuple[Any, Optional[datetime]]:
+    rows = await db.execute(
+        select(Assessment.skill_id, Skill.label, AssessmentAttempt.mastery_prob, AssessmentAttempt.score,
+               AssessmentAttempt.completed_at)
+        .join(Assessment, Assessment.id == AssessmentAttempt.assessment_id)
+        .join(Skill, Skill.id == Assessment.skill_id)
+        .where(AssessmentAttempt.learner_id == learner_id, AssessmentAttempt.status == AttemptStatus.COMPLETED)
+        .order_by(AssessmentAttempt.completed_at.desc())
+        .limit(RECENT_ATTEMPTS)
+    )
+    return [
+        {"skill_id": skill_id, "skill": label, "mastery": round(mastery, 3), "score": score,
+         "completed_at": _iso(completed_at)}
+        for skill_id, label, mastery, score, completed_at in rows.all()
+    ], None
+
+
+async def build_calendar(db: AsyncSession, learner_id: str) -> Tuple[Any, Optional[datetime]]:
+    events = await CalendarEventRepository(db).get_upcoming_events(learner_id, limit=UPCOMING_EVENTS)
+    # The list is only "upcoming" until the first event starts
+    return [
+        {"id": calendar_event.id, "title": calendar_event.title, "start_at": _iso(calendar_event.start_at),
+         "end_at": _iso(calendar_event.end_at), "plan_step_id": calendar_event.plan_step_id}
+        for calendar_event in events
+    ], events[0].start_at if events else None
+
+
+async def build_messages(db: AsyncSession, learner_id: str) -> Tuple[Any, Optional[datetime]]:
+    history = await CoachMessageRepository(db).get_conversation_history(learner_id, limit=RECENT_MESSAGES)
+    return [
+        {"sender": message.sender, "content": message.content, "created_at": _iso(message.created_at)}
+        for message in reversed(history)
+    ], None
+
+
+SECTION_BUILDERS: Dict[str, SectionBuilder] = {
+    PROFILE: build_profile,
+    PLAN: build_plan,
+    MASTERY: build_mastery,
+    CALENDAR: build_calendar,
+    MESSAGES: build_messages,
+}
+
+
+@dataclass
+class LearnerContext:
+    """A learner's coach grounding: one JSON-ready value per section"""
+
+    learner_id: str
+    sections: Dict[str, Any]
+    revisions: Dict[str, int]  # Per-section change counters the sections were built at
+    rebuilt: List[str] = field(default_factory=list)  # Sections that were stale on this read
+
+    @property
+    def version(self) -> str:
+        """Version stamp: schema version and the revision of every section"""
+        return f"{SCHEMA_VERSION}:" + ".".join(str(self.revisions.get(section, 0)) for section in SECTIONS)
+
+
+def decode_snapshot(fields: Mapping[bytes, bytes], now: Optional[float] = None
+                    ) -> Tuple[Dict[str, Any], Dict[str, int], List[str]]:
+    """Split a stored snapshot hash into (sections, current revisions, stale sections).
+
+    A section is stale when it is missing, was built at an older revision
+    than its current one, or has passed its rebuild deadline; all of them
+    are when the snapshot was written with another schema version.
+    """
+    now = now or time.time()
+    fields = {key.decode(): value for key, value in fields.items()}
+    same_schema = fields.get("schema") == str(SCHEMA_VERSION).encode()
+    sections, revisions, stale = {}, {}, []
+    for section in SECTIONS:
+        revisions[section] = int(fields.get(f"{section}:rev", 0))
+        data, built, until = fields.get(section), fields.get(f"{section}:built"), fields.get(f"{section}:until")
+        if (not same_schema or data is None or built is None or int(built) != revisions[section]
+                or (until and float(until) <= now)):
+            stale.append(section)
+            continue
+        try:
+            sections[section] = json.loads(data)
+        except ValueError:
+            stale.append(section)
+    return sections, revisions, stale
+
+
+class LearnerContextStore:
+    """Materialized learner contexts in Redis, one hash per learner.
+
+    Each section (profile, active plan, recent mastery, upcoming events,
+    recent messages) is stored as JSON next to the revision it was built
+    at. Writes that affect a section bump its revision counter in the same
+    hash on commit (see ``context_changed_on_commit``), which marks it
+    stale; a read is one HGETALL, and only stale sections are rebuilt from
+    the database and written back. Commits made from the event loop also
+    refresh the affected sections right away in the background, so the
+    next coach turn usually finds the snapshot current.
+
+    A rebuild records the revision it read before querying, so a change
+    committed while it runs leaves the section stale rather than masking
+    it. When Redis is unavailable, contexts are assembled from the
+    database on every read.
+    """
+
+    def __init__(self, redis_factory: Callable[[], Awaitable] = get_binary_redis,
+                 session_factory: Callable = AsyncSessionLocal, ttl_seconds: Optional[int] = None):
+        self.redis_factory = redis_factory
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.LEARNER_CONTEXT_TTL_SECONDS
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def key(self, learner_id: str) -> str:
+        return f"{KEY_PREFIX}:{learner_id}"
+
+    async def _read(self, learner_id: str) -> Tuple[Any, Mapping[bytes, bytes]]:
+        try:
+            client = await self.redis_factory()
+            return client, await client.hgetall(self.key(learner_id))
+        except RedisError as exc:
+            logger.warning("Learner context read failed, assembling from the database: %s", exc)
+            return None, {}
+
+    async def get(self, learner_id: str, db: Optional[AsyncSession] = None) -> LearnerContext:
+        """Get the learner's context, rebuilding only the sections that are stale"""
+        client, fields = await self._read(learner_id)
+        sections, revisions, stale = decode_snapshot(fields)
+        context = LearnerContext(learner_id, sections, revisions)
+        if stale:
+            await self._rebuild(context, stale, db, client)
+        return context
+
+    async def rebuild(self, learner_id: str, db: Optional[AsyncSession] = None) -> LearnerContext:
+        """Rebuild every section of a learner's context (repairs, backfills)"""
+        client, fields = await self._read(learner_id)
+        _, revisions, _ = decode_snapshot(fields)
+        context = LearnerContext(learner_id, {}, revisions)
+        await self._rebuild(context, list(SECTIONS), db, client)
+        return context
+
+    async def _rebuild(self, context: LearnerContext, sections: List[str], db: Optional[AsyncSession], client):
+        if db is None:
+            async with self.session_factory() as session:
+                return await self._rebuild(context, sections, session, client)
+
+        key = self.key(context.learner_id)
+        mapping: Dict[str, Any] = {"schema": SCHEMA_VERSION}
+        expired = []
+        for section in sections:
+            data, until = await SECTION_BUILDERS[section](db, context.learner_id)
+            context.sections[section] = data
+            context.rebuilt.append(section)
+            mapping[section] = json.dumps(data, separators=(",", ":"))
+            mapping[f"{section}:built"] = context.revisions[section]
+            if until is not None:
+                mapping[f"{section}:until"] = until.timestamp()
+            else:
+                expired.append(f"{section}:until")
+        if client is None:
+            return
+        try:
+            pipeline = client.pipeline(transaction=False)
+            pipeline.hset(key, mapping=mapping)
+            if expired:
+                pipeline.hdel(key, *expired)
+            pipeline.expire(key, self.ttl_seconds)
+            await pipeline.execute()
+        except RedisError as exc:
+            logger.warning("Learner context write failed for %s: %s", context.learner_id, exc)
+
+    async def mark_stale(self, changes: Mapping[str, Iterable[str]]):
+        """Bump the revision of changed sections, per learner"""
+        client = await self.redis_factory()
+        pipeline = client.pipeline(transaction=False)
+        for learner_id, sections in changes.items():
+            for section in sections:
+                pipeline.hincrby(self.key(learner_id), f"{section}:rev", 1)
+            pipeline.expire(self.key(learner_id), self.ttl_seconds)
+        await pipeline.execute()
+
+    def mark_stale_blocking(self, changes: Mapping[str, Iterable[str]]):
+        """Same as ``mark_stale`` for code running outside the event loop"""
+        pipeline = get_sync_redis().pipeline(transaction=False)
+        for learner_id, sections in changes.items():
+            for section in sections:
+                pipeline.hincrby(self.key(learner_id), f"{section}:rev", 1)
+            pipeline.expire(self.key(learner_id), self.ttl_seconds)
+        pipeline.execute()
+
+    def refresh_soon(self, learner_ids: Iterable[str]):
+        """Rebuild stale sections of these learners in background tasks (needs a running loop)"""
+        loop = asyncio.get_running_loop()
+        for learner_id in learner_ids:
+            if learner_id in self._refreshing:
+                continue
+            self._refreshing.add(learner_id)
+            task = loop.create_task(self._refresh(learner_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, learner_id: str):
+        try:
+            await self.get(learner_id)
+        except Exception:
+            logger.exception("Background refresh of learner context %s failed", learner_id)
+        finally:
+            self._refreshing.discard(learner_id)
+
+
+learner_context_store = LearnerContextStore()
+
+
+# Change tracking: collect (learner, section) pairs of writes per session, apply on commit
+
+_CONTEXT_CHANGES_KEY = "learner_context_changes"
+_PLAN_LEARNERS_KEY = "learner_context_plan_learners"
+_NO_REFRESH_KEY = "learner_context_no_refresh"
+
+
+def context_changed_on_commit(session, learner_id: str, sections: Iterable[str], refresh: bool = True):
+    """Mark sections of a learner's context stale when the session commits (for writes that bypass ORM events).
+
+    With ``refresh=False`` (background jobs) the sections are left for the
+    next read to rebuild instead of being refreshed right away.
+    """
+    session = getattr(session, "sync_session", session)
+    session.info.setdefault(_CONTEXT_CHANGES_KEY, {}).setdefault(learner_id, set()).update(sections)
+    if not refresh:
+        session.info.setdefault(_NO_REFRESH_KEY, set()).add(learner_id)
+
+
+def _plan_learner(session, connection, plan_id: str) -> Optional[str]:
+    """Learner of a plan, looked up once per session"""
+    learners = session.info.setdefault(_PLAN_LEARNERS_KEY, {})
+    if plan_id not in learners:
+        learners[plan_id] = connection.scalar(select(LearningPlan.learner_id).where(LearningPlan.id == plan_id))
+    return learners[plan_id]
+
+
+def _record_plan(session, connection, plan: LearningPlan) -> Tuple[str, str]:
+    session.info.setdefault(_PLAN_LEARNERS_KEY, {})[plan.id] = plan.learner_id
+    return plan.learner_id, PLAN
+
+
+# Learner and context section each model's writes affect
+SECTION_WRITES: Dict[type, Callable[[Session, Any, Any], Tuple[Optional[str], str]]] = {
+    Learner: lambda session, connection, learner: (learner.id, PROFILE),
+    LearningPlan: _record_plan,
+    PlanStep: lambda session, connection, step: (_plan_learner(session, connection, step.plan_id), PLAN),
+    AssessmentAttempt: lambda session, connection, attempt: (attempt.learner_id, MASTERY),
+    CalendarEvent: lambda session, connection, calendar_event: (calendar_event.learner_id, CALENDAR),
+    CoachMessage: lambda session, connection, message: (message.learner_id, MESSAGES),
+}
+
+
+def _record_context_write(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    learner_id, section = SECTION_WRITES[type(target)](session, connection, target)
+    if learner_id is not None:
+        context_changed_on_commit(session, learner_id, [section])
+
+
+for _model in SECTION_WRITES:
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _record_context_write)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_context_changes(session):
+    session.info.pop(_PLAN_LEARNERS_KEY, None)
+    no_refresh = session.info.pop(_NO_REFRESH_KEY, set())
+    changes = session.info.pop(_CONTEXT_CHANGES_KEY, None)
+    if not changes:
+        return
+    # AsyncSession commits run in a greenlet, so the async client can be awaited inline
+    marking = learner_context_store.mark_stale(changes)
+    try:
+        await_only(marking)
+    except MissingGreenlet:
+        marking.close()
+        try:
+            learner_context_store.mark_stale_blocking(changes)
+        except (RedisError, OSError) as exc:
+            logger.warning("Learner context invalidation failed for %d learners: %s", len(changes), exc)
+        return
+    except (RedisError, OSError) as exc:
+        logger.warning("Learner context invalidation failed for %d learners: %s", len(changes), exc)
+        return
+    refreshing = [learner_id for learner_id in changes if learner_id not in no_refresh]
+    if refreshing and len(changes) <= EAGER_REFRESH_MAX_LEARNERS:
+        try:
+            learner_context_store.refresh_soon(refreshing)
+        except RuntimeError:  # No running event loop
+            pass
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_context_changes(session):
+    session.info.pop(_CONTEXT_CHANGES_KEY, None)
+    session.info.pop(_PLAN_LEARNERS_KEY, None)
+    session.info.pop(_NO_REFRESH_KEY, None)
+
+
+def render_learner_context(context: LearnerContext) -> str:
+    """Compact text of the context for the model's system turn (messages go in as turns)"""
+    lines = []
+    profile = context.sections.get(PROFILE) or {}
+    if profile.get("primary_goal"):
+        lines.append(f"Learner goal: {profile['primary_goal']}")
+    if profile.get("time_budget_hours"):
+        lines.append(f"Weekly study budget: {profile['time_budget_hours']} hours")
+    plan = context.sections.get(PLAN)
+    if plan:
+        lines.append(f"Active plan: {plan['title']} ({plan['steps_completed']}/{plan['steps_total']} steps done"
+                     + (f", target {plan['target_date'][:10]})" if plan.get("target_date") else ")"))
+        if plan.get("current_step"):
+            lines.append(f"Current step: {plan['current_step']['title']}")
+        if plan.get("next_steps"):
+            lines.append(f"Next steps: {', '.join(plan['next_steps'])}")
+    mastery = context.sections.get(MASTERY)
+    if mastery:
+        lines.append("Recent assessments: " + ", ".join(
+            f"{attempt['skill']} {attempt['mastery']:.0%}" for attempt in mastery
+        ))
+    upcoming = context.sections.get(CALENDAR)
+    if upcoming:
+        lines.append("Upcoming sessions: " + ", ".join(
+            f"{item['title']} on {item['start_at'][:16].replace('T', ' ')}" for item in upcoming
+        ))
+    return "\n".join(lines)
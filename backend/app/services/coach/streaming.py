@@ -0,0 +1,265 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+import asyncio
+import json
+import logging
+import uuid
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.coach import CoachMessage, MessageType
+from app.repositories import ContentItemRepository
+from app.services.rag import content_search_registry
+from app.services.llm import CITATION_MARKER, ChatTurn, LLMGateway, LLMRequest, SourceDocument, get_llm_gateway
+from .context import (
+    MESSAGES,
+    LearnerContext,
+    LearnerContextStore,
+    context_changed_on_commit,
+    learner_context_store,
+    render_learner_context,
+)
+
+logger = logging.getLogger(__name__)
+
+# Chunks buffered between the gateway and a slow client; when full, reading
+# from the gateway is paused until the client catches up
+STREAM_QUEUE_SIZE = 64
+
+# Retrieved sources in the prompt (recent conversation comes from the learner context)
+MAX_SOURCES = 5
+
+_END = object()
+
+# Persistence of interrupted streams runs detached from the cancelled request
+_background_tasks: Set[asyncio.Task] = set()
+
+
+@dataclass
+class StreamEvent:
+    """One event of a streamed coach answer"""
+
+    type: str  # 'start', 'token', 'citation', 'done', 'error' or 'heartbeat'
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    def payload(self) -> Dict[str, Any]:
+        return {"type": self.type, **self.data}
+
+    def sse(self, event_id: int) -> bytes:
+        """Encode as a server-sent event; heartbeats are comments clients ignore"""
+        if self.type == "heartbeat":
+            return b": keep-alive\n\n"
+        data = json.dumps(self.payload(), separators=(",", ":"))
+        return f"id: {event_id}\nevent: {self.type}\ndata: {data}\n\n".encode()
+
+
+class StreamLimiter:
+    """Caps concurrent coach streams per worker; excess requests are refused, not queued.
+
+    A slot is taken when a stream starts producing events and given back
+    when it ends, so a request that never starts its stream (the client
+    left first) holds nothing. ``has_room`` lets an endpoint refuse early.
+    """
+
+    def __init__(self, max_streams: int):
+        self.max_streams = max_streams
+        self.active = 0
+        self.refused = 0
+
+    def has_room(self) -> bool:
+        """Whether a stream could start now; counts a refusal if not"""
+        if self.active >= self.max_streams:
+            self.refused += 1
+            return False
+        return True
+
+    def try_acquire(self) -> bool:
+        if self.active >= self.max_streams:
+            self.refused += 1
+            return False
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active = max(self.active - 1, 0)
+
+
+coach_stream_limiter = StreamLimiter(settings.COACH_MAX_STREAMS_PER_WORKER)
+
+
+class CoachStream:
+    """One coach answer streamed token by token.
+
+    The answer comes from the LLM gateway, so a repeated or (for a first
+    question) similar question is answered from cache and identical
+    questions asked at the same time share one model call. It is read in
+    its own task into a bounded queue; the consumer forwards whatever has
+    accumulated as one token event, so a slow client gets fewer, larger
+    events. Citation markers are resolved against the retrieved sources
+    and sent as separate events once complete. The user and
+    assistant messages are written in one statement when the stream ends;
+    if the client goes away first, the partial answer is saved in the
+    background, marked as interrupted.
+    """
+
+    def __init__(self, learner_id: str, tenant_id: str, question: str, context: Optional[Dict[str, Any]] = None,
+                 gateway: Optional[LLMGateway] = None, session_factory: Callable = AsyncSessionLocal,
+                 limiter: Optional[StreamLimiter] = None, heartbeat_seconds: Optional[float] = None,
+                 context_store: Optional[LearnerContextStore] = None):
+        self.learner_id = learner_id
+        self.tenant_id = tenant_id
+        self.question = question
+        self.context = context or {}
+        self.gateway = gateway or get_llm_gateway()
+        self.context_store = context_store or learner_context_store
+        self.learner_context: Optional[LearnerContext] = None
+        self.session_factory = session_factory
+        self.limiter = limiter
+        self.heartbeat_seconds = heartbeat_seconds or settings.COACH_STREAM_HEARTBEAT_SECONDS
+        self.message_id = str(uuid.uuid4())
+        self.started_at = datetime.now(timezone.utc)
+
+        self._parts: List[str] = []
+        self._citations: Dict[int, SourceDocument] = {}
+        self._persisted = False
+
+    async def _prepare(self) -> LLMRequest:
+        """Gateway request grounded on the learner context snapshot and sources retrieved for the question"""
+        async with self.session_factory() as db:
+            self.learner_context = await self.context_store.get(self.learner_id, db)
+            engine = await content_search_registry.get()
+            hits = engine.search(self.question, limit=MAX_SOURCES)
+            items = await ContentItemRepository(db).get_by_ids_ordered([hit.item_id for hit in hits])
+
+        turns = []
+        grounding = render_learner_context(self.learner_context)
+        if grounding:
+            turns.append(ChatTurn("system", grounding))
+        turns += [ChatTurn("assistant" if message["sender"] == "assistant" else "user", message["content"])
+                  for message in self.learner_context.sections.get(MESSAGES) or ()]
+        sources = [
+            SourceDocument(index, item.id, item.title, item.uri, item.updated_at.isoformat() if item.updated_at else "")
+            for index, item in enumerate(items, start=1)
+        ]
+        return LLMRequest(self.tenant_id, self.question, history=turns, sources=sources, semantic=True)
+
+    async def _produce(self, request: LLMRequest, queue: asyncio.Queue):
+        try:
+            async for chunk in self.gateway.stream(request):
+                await queue.put(chunk)
+        except Exception as exc:
+            await queue.put(exc)
+        else:
+            await queue.put(_END)
+
+    async def events(self) -> AsyncIterator[StreamEvent]:
+        """Stream events; closing the iterator early counts as a client disconnect.
+
+        The limiter slot is taken here rather than by the caller, so it is
+        only held while the stream runs and always given back.
+        """
+        if self.limiter is not None and not self.limiter.try_acquire():
+            self.limiter = None
+            yield StreamEvent("error", {"message_id": self.message_id, "detail": "Too many active coach streams"})
+            return
+        producer: Optional[asyncio.Task] = None
+        finished = False
+        try:
+            yield StreamEvent("start", {"message_id": self.message_id})
+            request = await self._prepare()
+            by_index = {source.index: source for source in request.sources}
+
+            queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+            producer = asyncio.create_task(self._produce(request, queue))
+            carry = ""
+            while not finished:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield StreamEvent("heartbeat")
+                    continue
+
+                # Forward everything already buffered as one event
+                chunks = []
+                while True:
+                    if item is _END:
+                        finished = True
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    chunks.append(item)
+                    if queue.empty():
+                        break
+                    item = queue.get_nowait()
+                if not chunks:
+                    continue
+
+                text = "".join(chunks)
+                self._parts.append(text)
+                yield StreamEvent("token", {"content": text, "message_id": self.message_id})
+
+                # Markers can straddle chunks, so the tail of the previous text is rescanned
+                scanned = carry + text
+                for match in CITATION_MARKER.finditer(scanned):
+                    source = by_index.get(int(match.group(1)))
+                    if source is not None and source.index not in self._citations:
+                        self._citations[source.index] = source
+                        yield StreamEvent("citation", {**_citation(source), "message_id": self.message_id})
+                carry = scanned[-8:]
+
+            await self._persist(interrupted=False)
+            yield StreamEvent("done", {
+                "message_id": self.message_id,
+                "citations": [_citation(source) for source in self._citations.values()],
+            })
+        except Exception as exc:
+            logger.exception("Coach stream %s failed", self.message_id)
+            yield StreamEvent("error", {"message_id": self.message_id, "detail": str(exc) or type(exc).__name__})
+        finally:
+            if producer is not None and not producer.done():
+                producer.cancel()
+            if not self._persisted and self._parts:
+                # Awaiting here could be cancelled again with the request, so save detached
+                task = asyncio.get_running_loop().create_task(self._persist(interrupted=True))
+                _background_tasks.add(task)
+                task.add_done_callback(_background_tasks.discard)
+            if self.limiter is not None:
+                self.limiter.release()
+                self.limiter = None
+
+    async def _persist(self, interrupted: bool):
+        """Write the question and the (possibly partial) answer in one statement"""
+        self._persisted = True
+        metadata = {
+            "citations": [source.title for source in self._citations.values()],
+            "related_content": [source.content_id for source in self._citations.values()],
+            "context": self.context,
+        }
+        if self.learner_context is not None:
+            metadata["context_version"] = self.learner_context.version
+        if interrupted:
+            metadata["interrupted"] = True
+        rows = [
+            {"id": str(uuid.uuid4()), "learner_id": self.learner_id, "content": self.question, "sender": "user",
+             "type": MessageType.TEXT, "metadata": {"context": self.context}, "created_at": self.started_at},
+            {"id": self.message_id, "learner_id": self.learner_id, "content": "".join(self._parts),
+             "sender": "assistant", "type": MessageType.TEXT, "metadata": metadata,
+             "created_at": datetime.now(timezone.utc)},
+        ]
+        try:
+            async with self.session_factory() as db:
+                await db.execute(insert(CoachMessage.__table__), rows)
+                # Core inserts bypass ORM events, so the context snapshot is marked here
+                context_changed_on_commit(db, self.learner_id, [MESSAGES])
+                await db.commit()
+        except Exception:
+            logger.exception("Failed to save coach message %s", self.message_id)
+            if not interrupted:
+                raise
+
+
+def _citation(source: SourceDocument) -> Dict[str, Any]:
+    return {"index": source.index, "content_id": source.content_id, "title": source.title, "uri": source.uri}
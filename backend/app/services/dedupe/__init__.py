@@ -0,0 +1,15 @@
+# Content deduplication: MinHash/LSH near-duplicate clustering across providers
+
+from .minhash import MinHasher, DedupeResult, NearDuplicateIndex
+from .service import content_text, load_dedupe_index, DedupeIndexRegistry, dedupe_index_registry, assign_canonical
+
+__all__ = [
+    'MinHasher',
+    'DedupeResult',
+    'NearDuplicateIndex',
+    'content_text',
+    'load_dedupe_index',
+    'DedupeIndexRegistry',
+    'dedupe_index_registry',
+    'assign_canonical',
+]
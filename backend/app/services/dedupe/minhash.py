@@ -0,0 +1,362 @@
+from array import array
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import zlib
+
+import numpy as np
+
+from app.services.rag.text import tokenize
+
+# 64 minhash values of 16 bits each, split into 16 LSH bands of 4 values (one
+# 8-byte key per band). Pairs with Jaccard 0.7 share a band with probability
+# ~0.98, pairs at 0.3 with ~0.13; candidates are then verified
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 3
+
+# Estimated Jaccard similarity of shingle sets at which items are duplicates
+DUPLICATE_THRESHOLD = 0.7
+
+# Bucket members compared against a new item; clusters are transitive, so a
+# few members of a popular bucket are enough to find its cluster
+MAX_BUCKET_CANDIDATES = 32
+
+_SHINGLE_MULTIPLIERS = np.array([0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F], dtype=np.uint64)
+_TOKEN_CACHE_SIZE = 500_000
+
+
+class MinHasher:
+    """MinHash signatures over word shingles of normalized text.
+
+    Tokens are hashed once (and cached), shingles are combined from token
+    hashes arithmetically, and a whole batch of texts is hashed under all
+    permutations in a few numpy passes using multiply-shift hashing.
+    """
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, shingle_size: int = SHINGLE_SIZE,
+                 seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_permutations = num_permutations
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, 2**63, num_permutations, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, num_permutations, dtype=np.uint64)
+        self._tokens: Dict[str, int] = {}
+
+    def _token_hash(self, token: str) -> int:
+        value = self._tokens.get(token)
+        if value is None:
+            value = zlib.crc32(token.encode())
+            if len(self._tokens) < _TOKEN_CACHE_SIZE:
+                self._tokens[token] = value
+        return value
+
+    def _shingle_windows(self, hashes: np.ndarray) -> np.ndarray:
+        """Combine each run of shingle_size token hashes into one value"""
+        size = self.shingle_size
+        count = len(hashes) - size + 1
+        combined = np.zeros(max(count, 0), dtype=np.uint64)
+        for offset in range(size):
+            combined = combined * _SHINGLE_MULTIPLIERS[offset % len(_SHINGLE_MULTIPLIERS)] \
+                + hashes[offset:offset + count]
+        return combined & np.uint64(0xFFFFFFFF)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Distinct 32-bit shingle hashes of a text"""
+        hashes, lengths = self._token_hashes([text])
+        return np.unique(self._shingle_windows(hashes)) if lengths[0] else np.empty(0, dtype=np.uint64)
+
+    def _token_hashes(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Flat token hashes of all texts and the token count of each.
+
+        Texts shorter than one shingle are padded with zero hashes so they
+        still yield a single shingle.
+        """
+        size = self.shingle_size
+        hashes, lengths = array("Q"), array("q")
+        token_hash = self._token_hash
+        for text in texts:
+            tokens = tokenize(text)
+            hashes.extend(token_hash(token) for token in tokens)
+            if 0 < len(tokens) < size:
+                hashes.extend([0] * (size - len(tokens)))
+            lengths.append(max(len(tokens), size) if tokens else 0)
+        return np.frombuffer(hashes, dtype=np.uint64), np.frombuffer(lengths, dtype=np.int64)
+
+    def signatures(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """MinHash signatures (uint16, one row per text) and which texts had any shingles"""
+        hashes, lengths = self._token_hashes(texts)
+        has_shingles = lengths > 0
+        signatures = np.zeros((len(texts), self.num_permutations), dtype=np.uint16)
+        if not has_shingles.any():
+            return signatures, has_shingles
+
+        # Windows that start in one text and end in the next are dropped
+        windows = self._shingle_windows(hashes)
+        lengths = lengths[has_shingles]
+        ends = np.cumsum(lengths)
+        invalid = (ends[:, None] - np.arange(1, self.shingle_size)[None, :]).ravel()
+        valid = np.ones(len(windows) + self.shingle_size - 1, dtype=bool)
+        valid[invalid] = False
+        values = windows[valid[:len(windows)]]
+        counts = lengths - self.shingle_size + 1
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        # Multiply-shift hashing: the top 16 bits of a*x + b (mod 2^64)
+        hashed = ((values[:, None] * self._a[None, :] + self._b[None, :]) >> np.uint64(48)).astype(np.uint16)
+        signatures[has_shingles] = np.minimum.reduceat(hashed, starts, axis=0)
+        return signatures, has_shingles
+
+
+@dataclass
+class DedupeResult:
+    """Canonical assignments from one batch of additions"""
+
+    canonical: Dict[str, str] = field(default_factory=dict)  # added item ID -> canonical item ID
+    merged: Dict[str, str] = field(default_factory=dict)  # former canonical ID -> new canonical ID
+    regrouped: Dict[str, str] = field(default_factory=dict)  # re-clustered item ID -> canonical item ID
+
+
+class NearDuplicateIndex:
+    """Incremental near-duplicate clustering with MinHash + LSH banding.
+
+    Each added item is looked up in one hash table per band, candidates are
+    verified by estimated Jaccard similarity, and duplicates are merged with
+    union-find. The canonical item of a cluster is its earliest-added member,
+    so adding items never changes an existing canonical except when a new
+    item bridges two clusters (reported in ``DedupeResult.merged``).
+
+    Re-adding an item whose text changed re-signs it in place: its cluster is
+    dissolved and its members are clustered again from their signatures
+    (reported in ``DedupeResult.regrouped``).
+    """
+
+    def __init__(self, hasher: Optional[MinHasher] = None, bands: int = LSH_BANDS,
+                 threshold: float = DUPLICATE_THRESHOLD):
+        self.hasher = hasher or MinHasher()
+        if self.hasher.num_permutations % bands:
+            raise ValueError("num_permutations must be a multiple of bands")
+        self.bands = bands
+        self.rows_per_band = self.hasher.num_permutations // bands
+        self.threshold = threshold
+
+        self.item_ids: List[str] = []
+        self.ordinals: Dict[str, int] = {}
+        self._parent = array("i")
+        self._members: Dict[int, List[int]] = {}  # root -> ordinals, for clusters with duplicates
+        self._signatures = np.zeros((0, self.hasher.num_permutations), dtype=np.uint16)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._undo: Optional[List[Callable[[], None]]] = None  # set while previewing
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    # Union-find, with the smallest ordinal as root
+
+    def _find(self, ordinal: int) -> int:
+        parent = self._parent
+        root = ordinal
+        while parent[root] != root:
+            root = parent[root]
+        while parent[ordinal] != root:
+            parent[ordinal], ordinal = root, parent[ordinal]
+        return root
+
+    def _union(self, left: int, right: int) -> Optional[Tuple[int, int]]:
+        """Merge two clusters; returns (absorbed root, surviving root) if they were distinct"""
+        left, right = self._find(left), self._find(right)
+        if left == right:
+            return None
+        keep, absorb = min(left, right), max(left, right)
+        self._parent[absorb] = keep
+        self._set_members(keep, self._members.get(keep, [keep]) + self._members.get(absorb, [absorb]))
+        self._set_members(absorb, None)
+        return absorb, keep
+
+    def _dissolve(self, ordinals: Iterable[int]) -> List[int]:
+        """Split the clusters of the given items into singletons; returns all their members"""
+        members = set()
+        for root in {self._find(ordinal) for ordinal in ordinals}:
+            members.update(self._members.get(root, [root]))
+            self._set_members(root, None)
+        for ordinal in members:
+            self._parent[ordinal] = ordinal
+        return sorted(members)
+
+    def _reserve(self, count: int):
+        needed = len(self.item_ids) + count
+        if needed > len(self._signatures):
+            grown = np.zeros((max(needed, 2 * len(self._signatures), 1024), self.hasher.num_permutations),
+                             dtype=np.uint16)
+            grown[:len(self.item_ids)] = self._signatures[:len(self.item_ids)]
+            self._signatures = grown
+
+    # Mutations of members, buckets and signatures, recorded for undo while previewing
+
+    def _set_members(self, root: int, members: Optional[List[int]]):
+        previous = self._members.pop(root, None)
+        if members is not None:
+            self._members[root] = members
+        if self._undo is not None:
+            self._undo.append(lambda: self._restore(self._members, root, previous))
+
+    def _bucket(self, band: int, key: bytes, ordinal: int):
+        buckets = self._buckets[band]
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = bucket = []
+        elif len(bucket) >= MAX_BUCKET_CANDIDATES:
+            return
+        bucket.append(ordinal)
+        if self._undo is not None:
+            previous = bucket[:-1] or None
+            self._undo.append(lambda: self._restore(buckets, key, previous))
+
+    def _unbucket(self, band: int, key: bytes, ordinal: int):
+        buckets = self._buckets[band]
+        bucket = buckets.get(key)
+        if bucket is None or ordinal not in bucket:
+            return
+        if self._undo is not None:
+            previous = list(bucket)
+            self._undo.append(lambda: self._restore(buckets, key, previous))
+        bucket.remove(ordinal)
+        if not bucket:
+            del buckets[key]
+
+    def _resign(self, ordinal: int, signature: np.ndarray):
+        if self._undo is not None:
+            previous = self._signatures[ordinal].copy()
+            self._undo.append(lambda: self._signatures.__setitem__(ordinal, previous))
+        self._signatures[ordinal] = signature
+
+    @staticmethod
+    def _restore(table: dict, key, value):
+        if value is None:
+            table.pop(key, None)
+        else:
+            table[key] = value
+
+    def _band_keys(self, signatures: np.ndarray) -> List[List[bytes]]:
+        """One LSH key per band (outer list) per signature row (inner list)"""
+        width = self.rows_per_band
+        return [
+            np.ascontiguousarray(signatures[:, band * width:(band + 1) * width]).view(f"V{2 * width}").ravel().tolist()
+            for band in range(self.bands)
+        ]
+
+    # Public API
+
+    def add_many(self, items: Iterable[Tuple[str, str]], batch_size: int = 2_000) -> DedupeResult:
+        """Add (item ID, text) pairs in order and return their canonical assignments"""
+        result = DedupeResult()
+        batch: List[Tuple[str, str]] = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == batch_size:
+                self._add_batch(batch, result)
+                batch = []
+        if batch:
+            self._add_batch(batch, result)
+        return result
+
+    def add(self, item_id: str, text: str) -> str:
+        """Add one item and return its canonical item ID"""
+        return self.add_many([(item_id, text)]).canonical[item_id]
+
+    def preview(self, items: Iterable[Tuple[str, str]]) -> DedupeResult:
+        """Get the assignments ``add_many`` would return, leaving the index unchanged"""
+        count, parent = len(self.item_ids), self._parent[:]
+        self._undo = []
+        try:
+            return self.add_many(items)
+        finally:
+            undo, self._undo = self._undo, None
+            for step in reversed(undo):
+                step()
+            for item_id in self.item_ids[count:]:
+                del self.ordinals[item_id]
+            del self.item_ids[count:]
+            self._parent = parent
+
+    def _add_batch(self, batch: List[Tuple[str, str]], result: DedupeResult):
+        signatures, has_shingles = self.hasher.signatures([text for _, text in batch])
+        ordinals = self.ordinals
+        added, changed = [], []
+        for offset, (item_id, _) in enumerate(batch):
+            ordinal = ordinals.get(item_id)
+            if ordinal is None:
+                added.append(offset)
+            elif not np.array_equal(self._signatures[ordinal], signatures[offset]):
+                changed.append((ordinal, offset))
+
+        merges: Dict[int, int] = {}
+        start = len(self.item_ids)
+        regrouped: List[int] = []
+        if changed:
+            # Move changed items to the buckets of their new signatures, then
+            # cluster every member of their former clusters again
+            stale = self._band_keys(self._signatures[[ordinal for ordinal, _ in changed]])
+            for position, (ordinal, offset) in enumerate(changed):
+                for band in range(self.bands):
+                    self._unbucket(band, stale[band][position], ordinal)
+                self._resign(ordinal, signatures[offset])
+            resigned = {ordinal for ordinal, _ in changed}
+            regrouped = self._dissolve(resigned)
+            keys = self._band_keys(self._signatures[regrouped])
+            for position, ordinal in enumerate(regrouped):
+                if self._signatures[ordinal].any():
+                    self._link(ordinal, [keys[band][position] for band in range(self.bands)],
+                               ordinal in resigned, start, merges)
+
+        if added:
+            self._reserve(len(added))
+            keys = self._band_keys(signatures[added])
+            for position, offset in enumerate(added):
+                item_id = batch[offset][0]
+                ordinal = len(self.item_ids)
+                self.item_ids.append(item_id)
+                ordinals[item_id] = ordinal
+                self._parent.append(ordinal)
+                self._signatures[ordinal] = signatures[offset]
+                if has_shingles[offset]:
+                    self._link(ordinal, [keys[band][position] for band in range(self.bands)], True, start, merges)
+
+        item_ids = self.item_ids
+        for item_id, _ in batch:
+            result.canonical[item_id] = item_ids[self._find(ordinals[item_id])]
+        for absorbed in merges.keys() - set(regrouped):
+            result.merged[item_ids[absorbed]] = item_ids[self._find(absorbed)]
+        for ordinal in regrouped:
+            result.regrouped[item_ids[ordinal]] = item_ids[self._find(ordinal)]
+
+    def _link(self, ordinal: int, keys: List[bytes], insert: bool, start: int, merges: Dict[int, int]):
+        """Union an item with the verified duplicates among its band candidates"""
+        candidates = set()
+        for band, key in enumerate(keys):
+            bucket = self._buckets[band].get(key)
+            if bucket:
+                candidates.update(bucket)
+            if insert:
+                self._bucket(band, key, ordinal)
+        candidates.discard(ordinal)
+        if not candidates:
+            return
+
+        candidates = np.fromiter(candidates, dtype=np.int64)
+        similarity = (self._signatures[candidates] == self._signatures[ordinal]).mean(axis=1)
+        for candidate in candidates[similarity >= self.threshold].tolist():
+            merged = self._union(candidate, ordinal)
+            if merged is not None and merged[0] < start:
+                merges[merged[0]] = merged[1]
+
+    def canonical_of(self, item_id: str) -> Optional[str]:
+        """Get the canonical item ID of an item's cluster"""
+        ordinal = self.ordinals.get(item_id)
+        return None if ordinal is None else self.item_ids[self._find(ordinal)]
+
+    def clusters(self) -> Dict[str, List[str]]:
+        """Get canonical item ID -> member IDs for every cluster with duplicates"""
+        return {
+            self.item_ids[root]: [self.item_ids[ordinal] for ordinal in sorted(members)]
+            for root, members in self._members.items()
+        }
@@ -0,0 +1,163 @@
+from typing import Iterable, Optional, Sequence, Tuple
+import logging
+import threading
+import time
+
+from sqlalchemy import bindparam, event, or_, update
+from sqlalchemy.orm import Session
+
+from app.models.content import ContentItem
+from .minhash import DedupeResult, NearDuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+_content_items = ContentItem.__table__
+
+# (id, title, description) of a content item, the fields it is fingerprinted on
+DedupeRow = Tuple[str, str, Optional[str]]
+
+_DEDUPE_CHANGES_KEY = "dedupe_index_changes"
+
+
+def content_text(title: str, description: Optional[str] = None) -> str:
+    """Text a content item is fingerprinted on (index builds and ingestion alike)"""
+    return " ".join(part for part in (title, description) if part)
+
+
+def load_dedupe_index(db_session) -> NearDuplicateIndex:
+    """Build a near-duplicate index over all content items in (created_at, id) order"""
+    started = time.perf_counter()
+    index = NearDuplicateIndex()
+    rows = db_session.query(ContentItem.id, ContentItem.title, ContentItem.description).order_by(
+        ContentItem.created_at, ContentItem.id
+    ).yield_per(10_000)
+    index.add_many((item_id, content_text(title, description)) for item_id, title, description in rows)
+    logger.info("Built content dedupe index over %d items in %.1fs", len(index), time.perf_counter() - started)
+    return index
+
+
+class DedupeIndexRegistry:
+    """Process-wide near-duplicate index, built once and then extended incrementally.
+
+    The build reads the catalog without holding any lock; if two callers
+    race to build, the first published index wins and the other is
+    discarded. Only in-memory additions are serialized, so a writer never
+    waits on another's database I/O. Ingestion stages its additions and
+    they reach the index only once their transaction commits.
+    """
+
+    def __init__(self):
+        self._index: Optional[NearDuplicateIndex] = None
+        self._add_lock = threading.Lock()
+
+    @property
+    def current(self) -> Optional[NearDuplicateIndex]:
+        return self._index
+
+    def get(self, db_session) -> NearDuplicateIndex:
+        """Get the index, building it with the caller's session first if needed"""
+        index = self._index
+        if index is None:
+            index = load_dedupe_index(db_session)
+            with self._add_lock:
+                if self._index is None:
+                    self._index = index
+                index = self._index
+        return index
+
+    def add_many(self, db_session, items: Iterable[Tuple[str, str]]) -> DedupeResult:
+        """Add (item ID, text) pairs to the index"""
+        index = self.get(db_session)
+        items = list(items)
+        with self._add_lock:
+            return index.add_many(items)
+
+    def stage(self, db_session, items: Iterable[Tuple[str, str]]) -> DedupeResult:
+        """Get assignments for (item ID, text) pairs, adding them to the index when the session commits.
+
+        Pairs staged earlier in the same transaction are taken into account,
+        and a rolled-back transaction leaves the index untouched.
+        """
+        index = self.get(db_session)
+        session = getattr(db_session, "sync_session", db_session)
+        staged = session.info.setdefault(_DEDUPE_CHANGES_KEY, [])
+        staged.extend(items)
+        with self._add_lock:
+            return index.preview(staged)
+
+    def apply(self, items: Sequence[Tuple[str, str]]):
+        """Add committed pairs to the index (a later build reads them from the database instead)"""
+        with self._add_lock:
+            if self._index is not None:
+                self._index.add_many(items)
+
+    def refresh(self, db_session) -> NearDuplicateIndex:
+        """Rebuild the index from the database and publish it"""
+        index = load_dedupe_index(db_session)
+        with self._add_lock:
+            self._index = index
+        return index
+
+
+dedupe_index_registry = DedupeIndexRegistry()
+
+
+def assign_canonical(db_session, rows: Sequence[DedupeRow]) -> DedupeResult:
+    """Ingestion-time dedupe stage for upserted content items.
+
+    Fingerprints (id, title, description) rows, points ``canonical_id`` of
+    every row that duplicates an earlier item at that item's canonical,
+    re-points existing rows whose cluster was merged into another by a
+    bridging item, and re-assigns the clusters of re-ingested items whose
+    text changed. Rows must already be written (e.g. by the catalog upsert);
+    the caller commits, which is when the index itself is updated. Takes a
+    sync session; from async code use ``await db.run_sync(assign_canonical, rows)``.
+    """
+    result = dedupe_index_registry.stage(db_session, [
+        (item_id, content_text(title, description)) for item_id, title, description in rows
+    ])
+
+    duplicates = []
+    for item_id, _, _ in rows:
+        canonical_id = result.canonical[item_id]
+        if canonical_id != item_id and item_id not in result.regrouped:
+            duplicates.append({"item_id": item_id, "canonical": canonical_id})
+    if duplicates:
+        db_session.execute(
+            update(_content_items)
+            .where(_content_items.c.id == bindparam("item_id"))
+            .values(canonical_id=bindparam("canonical")),
+            duplicates,
+        )
+
+    for absorbed_id, canonical_id in result.merged.items():
+        db_session.execute(
+            update(_content_items)
+            .where(or_(_content_items.c.canonical_id == absorbed_id, _content_items.c.id == absorbed_id))
+            .values(canonical_id=canonical_id)
+        )
+
+    # Re-clustered items are written last, after any merge re-pointed them
+    if result.regrouped:
+        db_session.execute(
+            update(_content_items)
+            .where(_content_items.c.id == bindparam("item_id"))
+            .values(canonical_id=bindparam("canonical")),
+            [
+                {"item_id": item_id, "canonical": None if canonical_id == item_id else canonical_id}
+                for item_id, canonical_id in result.regrouped.items()
+            ],
+        )
+    return result
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_dedupe_changes(session):
+    items = session.info.pop(_DEDUPE_CHANGES_KEY, None)
+    if items:
+        dedupe_index_registry.apply(items)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dedupe_changes(session):
+    session.info.pop(_DEDUPE_CHANGES_KEY, None)
@@ -0,0 +1,26 @@
+# Analytics export: tenant-scoped, date-partitioned Parquet datasets of attempts, plan steps and calendar events
+
+from .tables import ExportColumn, ExportTable, EXPORT_TABLES, export_table
+from .writer import (
+    ExportReport,
+    ExportManifest,
+    PartitionWriter,
+    tenant_directory,
+    record_batch,
+    export_tenant_table,
+    export_tenant,
+)
+
+__all__ = [
+    'ExportColumn',
+    'ExportTable',
+    'EXPORT_TABLES',
+    'export_table',
+    'ExportReport',
+    'ExportManifest',
+    'PartitionWriter',
+    'tenant_directory',
+    'record_batch',
+    'export_tenant_table',
+    'export_tenant',
+]
@@ -0,0 +1,178 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Type
+import enum
+
+import pyarrow as pa
+from sqlalchemy import String, Text, cast, select, type_coerce
+from sqlalchemy.sql import ColumnElement, Select
+
+from app.models.assessment import Assessment, AssessmentAttempt, AttemptStatus
+from app.models.calendar import CalendarEvent, CalendarProvider, EventStatus
+from app.models.learner import Learner
+from app.models.plan import LearningPlan, PlanStep, StepKind, StepStatus
+from app.services.analytics.rollups import PASSING_SCORE
+
+TIMESTAMP = pa.timestamp("us", tz="UTC")
+LABEL = pa.dictionary(pa.int8(), pa.string())  # Enum values, stored once per row group
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    """One output column: the SQL expression it is read with and its Arrow type.
+
+    Enum columns are read as their stored names (skipping SQLAlchemy's
+    per-row enum conversion) and written as dictionary-encoded values.
+    """
+
+    name: str
+    expression: ColumnElement
+    type: pa.DataType
+    labels: Optional[Dict[str, str]] = None  # Stored enum name -> exported value
+
+
+def enum_column(name: str, column, enum_type: Type[enum.Enum]) -> ExportColumn:
+    return ExportColumn(name, type_coerce(column, String), LABEL, {member.name: member.value for member in enum_type})
+
+
+def json_field(name: str, column, key: str, type: pa.DataType) -> ExportColumn:
+    """A scalar JSON key extracted with its type in SQL, so rows are never parsed in Python"""
+    element = column[key]
+    if pa.types.is_integer(type):
+        expression = element.as_integer()
+    elif pa.types.is_floating(type):
+        expression = element.as_float()
+    elif pa.types.is_boolean(type):
+        expression = element.as_boolean()
+    else:
+        expression = element.as_string()
+    return ExportColumn(name, expression, type)
+
+
+def json_text(name: str, column) -> ExportColumn:
+    """The whole JSON document as text, for nested values the flattened columns leave out"""
+    return ExportColumn(name, cast(column, Text), pa.string())
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    """A tenant-scoped table export.
+
+    ``query`` builds the statement selecting ``columns`` for one tenant.
+    Rows are partitioned by the UTC date of the ``partition_by`` column
+    (a timestamp column among ``columns``) and exported incrementally on
+    ``updated_at``, which every model has.
+    """
+
+    name: str
+    columns: Sequence[ExportColumn]
+    partition_by: str
+    updated_at: ColumnElement
+    query: Callable[[Select, str], Select]
+
+    @property
+    def schema(self) -> pa.Schema:
+        return pa.schema([pa.field(column.name, column.type) for column in self.columns])
+
+    @property
+    def partition_index(self) -> int:
+        return [column.name for column in self.columns].index(self.partition_by)
+
+    def statement(self, tenant_id: str) -> Select:
+        """Rows of one tenant, in partition order so each date partition is written once per run"""
+        statement = self.query(select(*[column.expression.label(column.name) for column in self.columns]), tenant_id)
+        partition = self.columns[self.partition_index].expression
+        return statement.order_by(partition, self.columns[0].expression)
+
+
+_attempts = AssessmentAttempt.__table__
+_steps = PlanStep.__table__
+_events = CalendarEvent.__table__
+
+EXPORT_TABLES: Dict[str, ExportTable] = {table.name: table for table in (
+    ExportTable(
+        name="assessment_attempts",
+        columns=[
+            ExportColumn("id", _attempts.c.id, pa.string()),
+            ExportColumn("learner_id", _attempts.c.learner_id, pa.string()),
+            ExportColumn("assessment_id", _attempts.c.assessment_id, pa.string()),
+            ExportColumn("skill_id", Assessment.skill_id, pa.string()),
+            ExportColumn("attempt_number", _attempts.c.attempt_number, pa.int32()),
+            enum_column("status", _attempts.c.status, AttemptStatus),
+            ExportColumn("score", _attempts.c.score, pa.float64()),
+            ExportColumn("passing_score", PASSING_SCORE, pa.float64()),
+            ExportColumn("mastery_prob", _attempts.c.mastery_prob, pa.float64()),
+            ExportColumn("started_at", _attempts.c.started_at, TIMESTAMP),
+            ExportColumn("completed_at", _attempts.c.completed_at, TIMESTAMP),
+            json_field("details_time_taken_min", _attempts.c.details, "time_taken_min", pa.float64()),
+            json_text("details_json", _attempts.c.details),
+            ExportColumn("created_at", _attempts.c.created_at, TIMESTAMP),
+            ExportColumn("updated_at", _attempts.c.updated_at, TIMESTAMP),
+        ],
+        partition_by="started_at",
+        updated_at=_attempts.c.updated_at,
+        query=lambda statement, tenant_id: statement.select_from(_attempts)
+        .join(Learner, Learner.id == _attempts.c.learner_id)
+        .join(Assessment, Assessment.id == _attempts.c.assessment_id)
+        .where(Learner.tenant_id == tenant_id),
+    ),
+    ExportTable(
+        name="plan_steps",
+        columns=[
+            ExportColumn("id", _steps.c.id, pa.string()),
+            ExportColumn("learner_id", LearningPlan.learner_id, pa.string()),
+            ExportColumn("plan_id", _steps.c.plan_id, pa.string()),
+            ExportColumn("skill_id", _steps.c.skill_id, pa.string()),
+            ExportColumn("content_item_id", _steps.c.content_item_id, pa.string()),
+            enum_column("kind", _steps.c.kind, StepKind),
+            ExportColumn("title", _steps.c.title, pa.string()),
+            ExportColumn("effort_min", _steps.c.effort_min, pa.int32()),
+            ExportColumn("sequence", _steps.c.sequence, pa.int32()),
+            enum_column("status", _steps.c.status, StepStatus),
+            ExportColumn("progress_percentage", _steps.c.progress_percentage, pa.int32()),
+            ExportColumn("due_at", _steps.c.due_at, TIMESTAMP),
+            ExportColumn("completed_at", _steps.c.completed_at, TIMESTAMP),
+            json_field("metadata_estimated_difficulty", _steps.c["metadata"], "estimated_difficulty", pa.int32()),
+            json_field("metadata_notes", _steps.c["metadata"], "notes", pa.string()),
+            json_text("metadata_json", _steps.c["metadata"]),
+            ExportColumn("created_at", _steps.c.created_at, TIMESTAMP),
+            ExportColumn("updated_at", _steps.c.updated_at, TIMESTAMP),
+        ],
+        partition_by="created_at",
+        updated_at=_steps.c.updated_at,
+        query=lambda statement, tenant_id: statement.select_from(_steps)
+        .join(LearningPlan, LearningPlan.id == _steps.c.plan_id)
+        .join(Learner, Learner.id == LearningPlan.learner_id)
+        .where(Learner.tenant_id == tenant_id),
+    ),
+    ExportTable(
+        name="calendar_events",
+        columns=[
+            ExportColumn("id", _events.c.id, pa.string()),
+            ExportColumn("learner_id", _events.c.learner_id, pa.string()),
+            ExportColumn("plan_step_id", _events.c.plan_step_id, pa.string()),
+            enum_column("provider", _events.c.provider, CalendarProvider),
+            ExportColumn("title", _events.c.title, pa.string()),
+            ExportColumn("start_at", _events.c.start_at, TIMESTAMP),
+            ExportColumn("end_at", _events.c.end_at, TIMESTAMP),
+            enum_column("status", _events.c.status, EventStatus),
+            json_field("metadata_reminder_minutes", _events.c["metadata"], "reminder_minutes", pa.int32()),
+            json_field("metadata_recurrence", _events.c["metadata"], "recurrence", pa.string()),
+            json_text("metadata_json", _events.c["metadata"]),
+            ExportColumn("created_at", _events.c.created_at, TIMESTAMP),
+            ExportColumn("updated_at", _events.c.updated_at, TIMESTAMP),
+        ],
+        partition_by="start_at",
+        updated_at=_events.c.updated_at,
+        query=lambda statement, tenant_id: statement.select_from(_events)
+        .join(Learner, Learner.id == _events.c.learner_id)
+        .where(Learner.tenant_id == tenant_id),
+    ),
+)}
+
+
+def export_table(name: str) -> ExportTable:
+    table = EXPORT_TABLES.get(name)
+    if table is None:
+        raise ValueError(f"Unknown export table: {name} (one of {', '.join(EXPORT_TABLES)})")
+    return table
+
@@ -0,0 +1,242 @@
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from urllib.parse import quote
+import json
+import logging
+import os
+import time
+import uuid
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from app.core.config import settings
+from .tables import EXPORT_TABLES, ExportTable, export_table
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "_manifest.json"
+MANIFEST_MAX_RUNS = 100  # Older runs are dropped from the manifest, not their files
+
+_EPOCH = date(1970, 1, 1)
+
+
+@dataclass
+class ExportReport:
+    """Counters for one table export of one tenant"""
+
+    table: str
+    tenant_id: str
+    run_id: str
+    since: Optional[str]  # Rows updated at or after this watermark (None: everything)
+    until: str  # ... and before this one, the watermark the next run starts from
+    rows: int = 0
+    batches: int = 0
+    bytes_written: int = 0
+    elapsed_seconds: float = 0.0
+    files: List[Dict[str, Any]] = field(default_factory=list)  # Relative path and row count per file
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def tenant_directory(root: str, table: str, tenant_id: str) -> str:
+    """Hive-style ``<root>/<table>/tenant_id=<tenant>``, readable as one dataset per table"""
+    return os.path.join(root, table, f"tenant_id={quote(tenant_id, safe='')}")
+
+
+class ExportManifest:
+    """Runs and the watermark of one tenant's table export, as JSON replaced atomically"""
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, MANIFEST_NAME)
+
+    def load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as handle:
+                return json.load(handle)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def watermark(self) -> Optional[datetime]:
+        value = self.load().get("watermark")
+        return datetime.fromisoformat(value) if value else None
+
+    def record(self, report: ExportReport, replace: bool = False):
+        """Add a finished run and move the watermark to its end (``replace`` forgets earlier runs)"""
+        state = {} if replace else self.load()
+        runs = state.get("runs", []) + [{
+            **{key: value for key, value in asdict(report).items() if key not in ("table", "tenant_id")},
+            "finished_at": datetime.utcnow().isoformat(),
+        }]
+        state = {"table": report.table, "tenant_id": report.tenant_id, "watermark": report.until,
+                 "runs": runs[-MANIFEST_MAX_RUNS:]}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump(state, handle, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+class PartitionWriter:
+    """Writes record batches, sorted by partition date, to one Parquet file per date.
+
+    Files are written under a temporary name and renamed when the run
+    finishes, so readers of the dataset never see a partial run.
+    """
+
+    def __init__(self, directory: str, schema: pa.Schema, run_id: str, compression: Optional[str] = None):
+        self.directory = directory
+        self.schema = schema
+        self.run_id = run_id
+        self.compression = compression or settings.EXPORT_COMPRESSION
+        self.written: List[Dict[str, Any]] = []  # Closed files: path, rows
+        self._day: Optional[int] = None
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._rows = 0
+
+    def _path(self, day: int, suffix: str = "") -> str:
+        partition = (_EPOCH + timedelta(days=day)).isoformat()
+        return os.path.join(self.directory, f"date={partition}", f"part-{self.run_id}.parquet{suffix}")
+
+    def _open(self, day: int):
+        self._close()
+        path = self._path(day, ".tmp")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._day, self._rows = day, 0
+        self._writer = pq.ParquetWriter(path, self.schema, compression=self.compression)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self.written.append({"path": self._path(self._day), "rows": self._rows})
+            self._writer = None
+
+    def write(self, batch: pa.RecordBatch, days: np.ndarray):
+        """Write a batch given each row's partition day (days since the epoch, ascending)"""
+        boundaries = np.flatnonzero(np.diff(days)) + 1
+        for start, end in zip([0, *boundaries.tolist()], [*boundaries.tolist(), len(days)]):
+            if days[start] != self._day:
+                if self._day is not None and days[start] < self._day:
+                    raise ValueError("Export rows must come in partition order")
+                self._open(int(days[start]))
+            self._writer.write_batch(batch.slice(start, end - start))
+            self._rows += end - start
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Close the last file and publish every file of the run"""
+        self._close()
+        for written in self.written:
+            os.replace(f"{written['path']}.tmp", written["path"])
+        return self.written
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self.written.append({"path": self._path(self._day), "rows": self._rows})
+        for written in self.written:
+            try:
+                os.remove(f"{written['path']}.tmp")
+            except FileNotFoundError:
+                pass
+
+
+def record_batch(table: ExportTable, rows: Sequence[Sequence[Any]]) -> pa.RecordBatch:
+    """Arrow columns from a batch of result rows, one typed array per column"""
+    arrays = []
+    for column, values in zip(table.columns, zip(*rows)):
+        if column.labels is None:
+            arrays.append(pa.array(values, type=column.type))
+            continue
+        # Enum names are mapped once per distinct value, not once per row
+        encoded = pa.array(values, type=pa.string()).dictionary_encode()
+        labels = pa.array([column.labels.get(name, name) for name in encoded.dictionary.to_pylist()], pa.string())
+        arrays.append(pa.DictionaryArray.from_arrays(encoded.indices.cast(pa.int8()), labels))
+    return pa.RecordBatch.from_arrays(arrays, schema=table.schema)
+
+
+def partition_days(table: ExportTable, batch: pa.RecordBatch) -> np.ndarray:
+    days = pc.cast(batch.column(table.partition_index), pa.date32())
+    return days.to_numpy(zero_copy_only=False).astype("datetime64[D]").astype(np.int64)
+
+
+def export_tenant_table(db_session, tenant_id: str, table_name: str, root: Optional[str] = None,
+                        full: bool = False, batch_size: Optional[int] = None,
+                        until: Optional[datetime] = None) -> ExportReport:
+    """Export one table of a tenant to date-partitioned Parquet, from its watermark on.
+
+    Rows updated since the previous run's watermark (all rows on the first
+    run, or with ``full``) and before ``until`` (now, less
+    ``EXPORT_WATERMARK_LAG_SECONDS`` so transactions still in flight are
+    picked up by the next run) are read through a server-side cursor,
+    ``batch_size`` rows at a time, so memory stays bounded whatever the
+    table size. A row updated after an earlier run is exported again:
+    readers keep the latest ``updated_at`` per ``id``. A full export
+    replaces the tenant's earlier files once it has finished.
+
+    Takes a sync session; from async code use
+    ``await db.run_sync(export_tenant_table, tenant_id, "assessment_attempts")``.
+    """
+    table = export_table(table_name)
+    root = root or settings.EXPORT_DIR
+    batch_size = batch_size or settings.EXPORT_BATCH_ROWS
+    directory = tenant_directory(root, table.name, tenant_id)
+    manifest = ExportManifest(directory)
+    since = None if full else manifest.watermark()
+    until = until or datetime.utcnow() - timedelta(seconds=settings.EXPORT_WATERMARK_LAG_SECONDS)
+    run_id = f"{until:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    report = ExportReport(table.name, tenant_id, run_id, since.isoformat() if since else None, until.isoformat())
+    previous = manifest.load().get("runs", []) if full else []
+
+    statement = table.statement(tenant_id).where(table.updated_at < until)
+    if since is not None:
+        statement = statement.where(table.updated_at >= since)
+
+    started = time.perf_counter()
+    writer = PartitionWriter(directory, table.schema, run_id)
+    try:
+        result = db_session.connection().execution_options(yield_per=batch_size).execute(statement)
+        for rows in result.partitions():
+            batch = record_batch(table, rows)
+            writer.write(batch, partition_days(table, batch))
+            report.rows += len(rows)
+            report.batches += 1
+        written = writer.finish()
+    except BaseException:
+        writer.abort()
+        raise
+
+    for entry in written:
+        report.bytes_written += os.path.getsize(entry["path"])
+        report.files.append({"path": os.path.relpath(entry["path"], directory), "rows": entry["rows"]})
+    report.elapsed_seconds = time.perf_counter() - started
+    manifest.record(report, replace=full)
+    if full:
+        for run in previous:
+            for entry in run.get("files", []):
+                try:
+                    os.remove(os.path.join(directory, entry["path"]))
+                except FileNotFoundError:
+                    pass
+    logger.info("Exported %d %s rows of tenant %s in %d files (%.0f rows/s)", report.rows, table.name,
+                tenant_id, len(report.files), report.rows_per_second)
+    return report
+
+
+def export_tenant(db_session, tenant_id: str, tables: Optional[Iterable[str]] = None, root: Optional[str] = None,
+                  full: bool = False, batch_size: Optional[int] = None) -> Dict[str, ExportReport]:
+    """Export a tenant's attempts, plan steps and calendar events (or the given tables) to Parquet.
+
+    All tables share the same upper watermark, so an export is a
+    consistent cut across them.
+    """
+    until = datetime.utcnow() - timedelta(seconds=settings.EXPORT_WATERMARK_LAG_SECONDS)
+    return {
+        name: export_tenant_table(db_session, tenant_id, name, root=root, full=full, batch_size=batch_size,
+                                  until=until)
+        for name in (tables or EXPORT_TABLES)
+    }
@@ -0,0 +1,36 @@
+# Assessment grading: answer graders, a sandbox for code challenges and a fair process pool
+
+from .sandbox import SandboxLimits, SandboxResult, run_code_tests
+from .spec import normalize_answer, CompiledQuestion, CompiledSpec, compile_spec, SpecCache, spec_cache, compiled_spec
+from .graders import grade_question, grade_answers
+from .pool import (
+    GradingQueueFull,
+    GradingJob,
+    GradingStats,
+    GradingPool,
+    requeue_pending,
+    get_grading_pool,
+    set_grading_pool,
+)
+
+__all__ = [
+    'SandboxLimits',
+    'SandboxResult',
+    'run_code_tests',
+    'normalize_answer',
+    'CompiledQuestion',
+    'CompiledSpec',
+    'compile_spec',
+    'SpecCache',
+    'spec_cache',
+    'compiled_spec',
+    'grade_question',
+    'grade_answers',
+    'GradingQueueFull',
+    'GradingJob',
+    'GradingStats',
+    'GradingPool',
+    'requeue_pending',
+    'get_grading_pool',
+    'set_grading_pool',
+]
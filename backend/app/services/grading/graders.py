@@ -0,0 +1,45 @@
+from typing import Any, Dict, List, Optional
+
+from .sandbox import SandboxLimits, run_code_tests
+from .spec import CompiledQuestion, CompiledSpec, normalize_answer
+
+
+def grade_question(question: CompiledQuestion, answer: Any, limits: SandboxLimits = SandboxLimits()) -> Dict[str, Any]:
+    """Grade one answer against its question; code answers run the question's test cases"""
+    if answer is None:
+        return {"question_id": question.id, "answer": None, "points_possible": question.points,
+                "is_correct": False, "points_earned": 0}
+
+    if question.type == "code":
+        question_limits = SandboxLimits(
+            time_seconds=min(question.time_limit_seconds or limits.time_seconds, limits.time_seconds),
+            memory_mb=min(question.memory_limit_mb or limits.memory_mb, limits.memory_mb),
+            output_bytes=limits.output_bytes,
+        )
+        result = run_code_tests(str(answer), question.entrypoint, list(question.tests), question_limits)
+        return {
+            "question_id": question.id,
+            "answer": answer,
+            "points_possible": question.points,
+            "is_correct": result.all_passed,
+            "points_earned": question.points * result.passed / result.total if result.total else 0,
+            "tests_passed": result.passed,
+            "tests_total": result.total,
+            "error": result.error,
+        }
+
+    is_correct = normalize_answer(answer) in question.accepted
+    return {"question_id": question.id, "answer": answer, "points_possible": question.points,
+            "is_correct": is_correct, "points_earned": question.points if is_correct else 0}
+
+
+def grade_answers(spec: CompiledSpec, answers: List[Dict[str, Any]],
+                  limits: Optional[SandboxLimits] = None) -> List[Dict[str, Any]]:
+    """Grade submitted answers, one result per question in spec order (unanswered questions earn nothing).
+
+    Runs in a grading worker process; it takes a compiled spec and plain
+    answer dicts, so jobs pickle cheaply and nothing walks the spec JSON.
+    """
+    limits = limits or SandboxLimits()
+    submitted = {answer.get("question_id"): answer.get("answer") for answer in answers}
+    return [grade_question(question, submitted.get(question.id), limits) for question in spec.questions]
@@ -0,0 +1,266 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.assessment import Assessment, AssessmentAttempt, AttemptStatus
+from app.models.learner import Learner
+from .graders import grade_answers
+from .sandbox import SandboxLimits
+from .spec import CompiledSpec, compiled_spec
+
+logger = logging.getLogger(__name__)
+
+
+class GradingQueueFull(Exception):
+    """Raised when a submission cannot be queued; the client should retry later"""
+
+
+@dataclass
+class GradingJob:
+    """One submitted attempt waiting to be graded"""
+
+    attempt_id: str
+    tenant_id: str
+    spec: CompiledSpec
+    answers: List[Dict[str, Any]]
+    time_taken_min: int = 0
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class GradingStats:
+    """Per-worker grading counters"""
+
+    submitted: int = 0
+    rejected: int = 0
+    graded: int = 0
+    failed: int = 0
+    grading_seconds: float = 0.0  # Summed over jobs, from dispatch to graded answers
+    waiting_seconds: float = 0.0  # Summed over jobs, from queueing to the start of grading
+
+
+Persist = Callable[[GradingJob, List[Dict[str, Any]]], Awaitable[None]]
+
+
+class GradingPool:
+    """Grades submitted attempts in a process pool, fairly across tenants.
+
+    Submissions go into a bounded queue per tenant and are dispatched
+    round-robin over the tenants with work waiting, so one tenant's
+    certification deadline cannot starve everyone else. Grading is
+    CPU-bound (and spawns sandboxes for code challenges), so it runs in
+    worker processes; results are written back from the event loop by
+    ``persist``. A worker process that dies is replaced and the job
+    retried once before the attempt is marked abandoned.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_queued: int = settings.GRADING_MAX_QUEUED,
+                 max_queued_per_tenant: int = settings.GRADING_MAX_QUEUED_PER_TENANT,
+                 limits: Optional[SandboxLimits] = None, persist: Optional[Persist] = None,
+                 session_factory=AsyncSessionLocal):
+        self.workers = workers or settings.GRADING_WORKERS or os.cpu_count() or 1
+        self.max_queued = max_queued
+        self.max_queued_per_tenant = max_queued_per_tenant
+        self.limits = limits or SandboxLimits(settings.GRADING_CODE_TIME_LIMIT_SECONDS,
+                                              settings.GRADING_CODE_MEMORY_LIMIT_MB)
+        self.stats = GradingStats()
+        self._persist = persist or self._save
+        self._session_factory = session_factory
+        self._queues: Dict[str, Deque[GradingJob]] = {}
+        self._turns: Deque[str] = deque()  # Tenants with queued jobs, in round-robin order
+        self._queued = 0
+        self._running = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def has_capacity(self, tenant_id: str) -> bool:
+        queue = self._queues.get(tenant_id)
+        return self._queued < self.max_queued and (queue is None or len(queue) < self.max_queued_per_tenant)
+
+    def submit(self, job: GradingJob) -> int:
+        """Queue a job and return the number of jobs ahead of it for its tenant"""
+        if not self.has_capacity(job.tenant_id):
+            self.stats.rejected += 1
+            raise GradingQueueFull(f"Grading queue full for tenant {job.tenant_id}")
+        self._start()
+        queue = self._queues.get(job.tenant_id)
+        if queue is None:
+            queue = self._queues[job.tenant_id] = deque()
+            self._turns.append(job.tenant_id)
+        queue.append(job)
+        self._queued += 1
+        self.stats.submitted += 1
+        self._idle.clear()
+        self._wakeup.set()
+        return len(queue) - 1
+
+    def _start(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup, self._idle = asyncio.Event(), asyncio.Event()
+            self._idle.set()
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    def _next_job(self) -> GradingJob:
+        tenant_id = self._turns.popleft()
+        queue = self._queues[tenant_id]
+        job = queue.popleft()
+        if queue:
+            self._turns.append(tenant_id)
+        else:
+            del self._queues[tenant_id]
+        self._queued -= 1
+        return job
+
+    async def _dispatch(self):
+        # Twice as many jobs in flight as processes keeps them busy while results are saved
+        slots = asyncio.Semaphore(self.workers * 2)
+        tasks = set()
+        while True:
+            if not self._turns:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await slots.acquire()
+            job = self._next_job()
+            self._running += 1
+            task = asyncio.create_task(self._grade(job))
+            tasks.add(task)
+
+            def finished(task):
+                tasks.discard(task)
+                slots.release()
+                self._running -= 1
+                if not self._running and not self._queued:
+                    self._idle.set()
+
+            task.add_done_callback(finished)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned workers do not inherit the event loop, sockets or threads of this process
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def _grade(self, job: GradingJob):
+        started = time.monotonic()
+        self.stats.waiting_seconds += started - job.queued_at
+        loop = asyncio.get_running_loop()
+        graded = None
+        for _ in range(2):
+            executor = self._get_executor()
+            try:
+                graded = await loop.run_in_executor(executor, grade_answers, job.spec, job.answers, self.limits)
+                break
+            except BrokenProcessPool:
+                logger.warning("Grading worker died on attempt %s, restarting the pool", job.attempt_id)
+                if self._executor is executor:
+                    executor.shutdown(wait=False)
+                    self._executor = None
+            except Exception:
+                logger.exception("Grading failed for attempt %s", job.attempt_id)
+                break
+        self.stats.grading_seconds += time.monotonic() - started
+
+        try:
+            if graded is None:
+                self.stats.failed += 1
+                await self._fail(job)
+            else:
+                await self._persist(job, graded)
+                self.stats.graded += 1
+        except Exception:
+            self.stats.failed += 1
+            logger.exception("Saving grades failed for attempt %s", job.attempt_id)
+
+    async def _save(self, job: GradingJob, graded: List[Dict[str, Any]]):
+        """Complete the attempt with its graded answers (which also updates mastery)"""
+        async with self._session_factory() as db:
+            # Locked so a worker that requeued the same attempt cannot complete it twice
+            attempt = await db.get(AssessmentAttempt, job.attempt_id, with_for_update=True,
+                                   options=[selectinload(AssessmentAttempt.assessment)])
+            if attempt is None or attempt.status != AttemptStatus.GRADING:
+                return  # Graded by another worker after a requeue
+            await db.run_sync(lambda session: attempt.complete(graded, job.time_taken_min))
+            await db.commit()
+
+    async def _fail(self, job: GradingJob):
+        async with self._session_factory() as db:
+            attempt = await db.get(AssessmentAttempt, job.attempt_id, with_for_update=True)
+            if attempt is not None and attempt.status == AttemptStatus.GRADING:
+                attempt.status = AttemptStatus.ABANDONED
+                attempt.details = {**(attempt.details or {}), "grading_error": "Grading failed, please resubmit"}
+                await db.commit()
+
+    async def drain(self):
+        """Wait until every queued job has been graded and saved"""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats_snapshot(self) -> Dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            "workers": self.workers,
+            "queued": self._queued,
+            "running": self._running,
+            "tenants_waiting": len(self._turns),
+        }
+
+
+async def requeue_pending(pool: "GradingPool", session_factory=AsyncSessionLocal) -> int:
+    """Queue attempts left in grading by a stopped worker; run at worker startup"""
+    async with session_factory() as db:
+        rows = await db.execute(
+            select(AssessmentAttempt, Assessment, Learner.tenant_id)
+            .join(Assessment, Assessment.id == AssessmentAttempt.assessment_id)
+            .join(Learner, Learner.id == AssessmentAttempt.learner_id)
+            .where(AssessmentAttempt.status == AttemptStatus.GRADING)
+            .order_by(AssessmentAttempt.started_at)
+        )
+        requeued = 0
+        for attempt, assessment, tenant_id in rows.all():
+            if not pool.has_capacity(tenant_id):
+                continue
+            details = attempt.details or {}
+            pool.submit(GradingJob(attempt.id, tenant_id, compiled_spec(assessment), details.get("submitted", []),
+                                   details.get("time_taken_min", 0)))
+            requeued += 1
+    return requeued
+
+
+_pool: Optional[GradingPool] = None
+
+
+def get_grading_pool() -> GradingPool:
+    """Get the process-wide grading pool used by the submission endpoint"""
+    global _pool
+    if _pool is None:
+        _pool = GradingPool()
+    return _pool
+
+
+def set_grading_pool(pool: GradingPool):
+    """Replace the process-wide grading pool (e.g. one with fewer workers in benchmarks)"""
+    global _pool
+    _pool = pool
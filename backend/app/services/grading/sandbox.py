@@ -0,0 +1,242 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import builtins
+import json
+import logging
+import math
+import os
+import pwd
+import resource
+import select
+import selectors
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Runs inside the sandboxed interpreter, started as ``-c _RUNNER uid gid``:
+# drops to the sandbox user (uid -1 keeps the current one) and forbids new
+# processes before reading {"code", "entrypoint", "calls"} on stdin, then
+# writes the JSON-normalized return value (or exception type) of each call
+# to the original stdout. Expected values never enter the sandbox, so a
+# submission cannot forge a passing summary.
+_RUNNER = r"""
+import io, json, os, resource, sys
+uid, gid = int(sys.argv[1]), int(sys.argv[2])
+if uid >= 0:
+    os.setgroups([])
+    os.setgid(gid)
+    os.setuid(uid)
+resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+payload = json.loads(sys.stdin.read())
+out = os.dup(1)
+devnull = os.open(os.devnull, os.O_WRONLY)
+os.dup2(devnull, 1)
+os.dup2(devnull, 2)
+sys.stdout = sys.stderr = io.StringIO()
+values, errors = [], []
+try:
+    namespace = {"__name__": "__submission__"}
+    exec(compile(payload["code"], "<submission>", "exec"), namespace)
+    function = namespace[payload["entrypoint"]]
+    for call in payload["calls"]:
+        try:
+            values.append(json.loads(json.dumps(function(*call["args"], **call["kwargs"]), default=repr)))
+            errors.append(None)
+        except Exception as exc:
+            values.append(None)
+            errors.append(type(exc).__name__)
+except BaseException as exc:
+    errors.append(type(exc).__name__)
+os.write(out, json.dumps({"values": values, "errors": errors}).encode())
+"""
+
+# Errors reported back to learners: built-in exception names only, never messages
+_PUBLIC_ERRORS = frozenset(
+    name for name, value in vars(builtins).items() if isinstance(value, type) and issubclass(value, BaseException)
+)
+
+# Fresh PID (with its own /proc), network, mount, IPC and UTS namespaces: the
+# submission sees no other process, has no network, and everything it could
+# start dies with it
+_ISOLATION = ["--pid", "--fork", "--kill-child", "--mount-proc", "--net", "--ipc", "--uts"]
+
+
+@dataclass(frozen=True)
+class SandboxLimits:
+    """Resource limits of one code-challenge run"""
+
+    time_seconds: float = 5.0  # Wall clock; CPU time is capped at the same number of seconds
+    memory_mb: int = 256  # Address space
+    output_bytes: int = 64 * 1024  # Summary read back from the sandbox; more is an error
+
+
+@dataclass
+class SandboxResult:
+    """Outcome of running a submission against its test cases"""
+
+    passed: int
+    total: int
+    error: Optional[str] = None
+    timed_out: bool = False
+    duration_seconds: float = 0.0
+
+    @property
+    def all_passed(self) -> bool:
+        return self.total > 0 and self.passed == self.total
+
+
+def _apply_limits(limits: SandboxLimits):
+    memory = limits.memory_mb * 1024 * 1024
+    cpu = max(int(math.ceil(limits.time_seconds)), 1)
+
+    def apply():
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))  # No file writes
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        resource.setrlimit(resource.RLIMIT_NOFILE, (32, 32))
+
+    return apply
+
+
+def _sandbox_user() -> Tuple[int, int]:
+    """(uid, gid) the runner drops to, or (-1, -1) when not running as root"""
+    if os.geteuid() != 0:
+        return -1, -1
+    user = pwd.getpwnam(settings.GRADING_SANDBOX_USER)
+    return user.pw_uid, user.pw_gid
+
+
+def _command(uid: int, gid: int) -> List[str]:
+    command = [sys.executable, "-I", "-S", "-c", _RUNNER, str(uid), str(gid)]
+    if not settings.GRADING_SANDBOX_ISOLATION:
+        return command
+    unshare = shutil.which("unshare")
+    if unshare is None:
+        raise OSError("unshare (util-linux) is not installed")
+    # Without root, namespaces need a user namespace of their own
+    user_namespace = [] if os.geteuid() == 0 else ["--user", "--map-root-user"]
+    return [unshare, *user_namespace, *_ISOLATION, *command]
+
+
+# Why _exchange stopped before the sandbox closed its output
+TIME_LIMIT = "Time limit exceeded"
+OUTPUT_LIMIT = "Output limit exceeded"
+
+
+def _exchange(process: subprocess.Popen, payload: bytes, limits: SandboxLimits) -> Tuple[bytes, Optional[str]]:
+    """Write the payload to the sandbox and read its output until EOF.
+
+    Stops early, returning the reason, at the wall-clock limit or as soon
+    as the output exceeds ``limits.output_bytes``, so a submission that
+    floods its output can neither hold more than that in this process nor
+    outlast its time.
+    """
+    deadline = time.monotonic() + limits.time_seconds
+    pending = memoryview(payload)
+    chunks: List[bytes] = []
+    size = 0
+    with selectors.DefaultSelector() as selector:
+        selector.register(process.stdout, selectors.EVENT_READ)
+        selector.register(process.stdin, selectors.EVENT_WRITE)
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return b"".join(chunks), TIME_LIMIT
+            for key, _ in selector.select(remaining):
+                if key.fileobj is process.stdin:
+                    try:
+                        # At most PIPE_BUF bytes, so a writable pipe takes them without blocking
+                        pending = pending[os.write(process.stdin.fileno(), pending[:select.PIPE_BUF]):]
+                    except BrokenPipeError:
+                        pending = pending[:0]
+                    if not pending:
+                        selector.unregister(process.stdin)
+                        process.stdin.close()
+                    continue
+                data = os.read(process.stdout.fileno(), 64 * 1024)
+                if not data:
+                    selector.unregister(process.stdout)
+                    continue
+                size += len(data)
+                if size > limits.output_bytes:
+                    return b"".join(chunks), OUTPUT_LIMIT
+                chunks.append(data)
+    return b"".join(chunks), None
+
+
+def _public_error(error: Any) -> Optional[str]:
+    if not error:
+        return None
+    return error if error in _PUBLIC_ERRORS else "Submission raised an exception"
+
+
+def run_code_tests(code: str, entrypoint: str, tests: List[Dict[str, Any]],
+                   limits: SandboxLimits = SandboxLimits()) -> SandboxResult:
+    """Run a submitted function against test cases in a resource-limited subprocess.
+
+    The submission runs in an isolated interpreter (no site-packages, no
+    environment, an empty working directory) in its own process group and,
+    with ``GRADING_SANDBOX_ISOLATION``, in its own PID, network, mount and
+    IPC namespaces. It runs as ``GRADING_SANDBOX_USER`` when the API runs
+    as root, cannot start processes, and is under address-space, CPU,
+    file-size and descriptor limits; the whole group is killed when the
+    wall-clock limit passes. Test arguments and expected values are JSON,
+    and return values are compared after a JSON round trip in this
+    process. Only built-in exception names are reported back, never
+    messages, so nothing the submission reads can leave through the result.
+    """
+    calls = [{"args": test.get("args", []), "kwargs": test.get("kwargs", {})} for test in tests]
+    payload = json.dumps({"code": code, "entrypoint": entrypoint, "calls": calls})
+    try:
+        command = _command(*_sandbox_user())
+    except (KeyError, OSError) as exc:
+        logger.error("Code sandbox unavailable, not running submission: %s", exc)
+        return SandboxResult(0, len(tests), "Code sandbox unavailable")
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="grading-") as workdir:
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            cwd=workdir, env={}, start_new_session=True, preexec_fn=_apply_limits(limits),
+        )
+        try:
+            output, stopped = _exchange(process, payload.encode(), limits)
+        finally:
+            # Killed without reading any further; the pipes are closed unread
+            if process.poll() is None:
+                _kill_group(process)
+            process.wait()
+            for pipe in (process.stdin, process.stdout):
+                if not pipe.closed:
+                    pipe.close()
+    duration = time.perf_counter() - started
+    if stopped is not None:
+        return SandboxResult(0, len(tests), stopped, stopped == TIME_LIMIT, duration)
+
+    try:
+        summary = json.loads(output)
+        if not isinstance(summary, dict):
+            raise ValueError("Unexpected sandbox output")
+    except ValueError:
+        timed_out = process.returncode == -signal.SIGXCPU
+        return SandboxResult(0, len(tests), TIME_LIMIT if timed_out else "Submission crashed",
+                             timed_out, duration)
+    values = summary.get("values", [])
+    passed = sum(1 for test, value in zip(tests, values) if value == test.get("expected"))
+    error = next((error for error in summary.get("errors", []) if error), None)
+    return SandboxResult(passed, len(tests), _public_error(error), False, duration)
+
+
+def _kill_group(process: subprocess.Popen):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Hashable, Optional, Tuple
+import threading
+
+from app.core.config import settings
+
+
+def normalize_answer(value: Any) -> str:
+    """Answer text compared case- and whitespace-insensitively ("True" and true match)"""
+    return " ".join(str(value).split()).casefold()
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledQuestion:
+    """One question with its answer key normalized for grading"""
+
+    id: str
+    type: str
+    points: float
+    accepted: FrozenSet[str]  # Normalized correct answers (not for code challenges)
+    entrypoint: str = "solution"
+    tests: Tuple[Dict[str, Any], ...] = ()
+    time_limit_seconds: Optional[float] = None
+    memory_limit_mb: Optional[int] = None
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledSpec:
+    """Immutable, pre-walked form of an assessment spec.
+
+    Holds everything grading and the Assessment accessors need (answer
+    key, per-question points, totals and limits), so neither has to
+    traverse the spec JSON again. Built once per spec version and shared
+    through ``spec_cache``.
+    """
+
+    questions: Tuple[CompiledQuestion, ...]
+    total_points: float
+    passing_score: float
+    time_limit_min: Optional[int]
+    max_attempts: int
+    has_code: bool
+
+
+def compile_spec(spec: Optional[Dict[str, Any]]) -> CompiledSpec:
+    """Walk a spec once into its compiled form"""
+    spec = spec or {}
+    questions = []
+    for question in spec.get("questions", []):
+        accepted = question.get("accepted_answers") or [question.get("correct_answer")]
+        questions.append(CompiledQuestion(
+            id=question.get("id"),
+            type=question.get("type", ""),
+            points=question.get("points", 0),
+            accepted=frozenset(normalize_answer(answer) for answer in accepted if answer is not None),
+            entrypoint=question.get("entrypoint", "solution"),
+            tests=tuple(question.get("tests", [])),
+            time_limit_seconds=question.get("time_limit_seconds"),
+            memory_limit_mb=question.get("memory_limit_mb"),
+        ))
+    return CompiledSpec(
+        questions=tuple(questions),
+        total_points=sum(question.points for question in questions),
+        passing_score=spec.get("passing_score", 70),
+        time_limit_min=spec.get("time_limit_min"),
+        max_attempts=spec.get("max_attempts", 1),
+        has_code=any(question.type == "code" for question in questions),
+    )
+
+
+class SpecCache:
+    """Process-wide LRU of compiled specs keyed by spec version"""
+
+    def __init__(self, max_entries: int = settings.ASSESSMENT_SPEC_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CompiledSpec]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version: Hashable, spec: Optional[Dict[str, Any]]) -> CompiledSpec:
+        with self._lock:
+            compiled = self._entries.get(version)
+            if compiled is not None:
+                self._entries.move_to_end(version)
+                self.hits += 1
+                return compiled
+        compiled = compile_spec(spec)
+        with self._lock:
+            self.misses += 1
+            self._entries[version] = compiled
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def __len__(self):
+        return len(self._entries)
+
+
+spec_cache = SpecCache()
+
+
+def compiled_spec(assessment) -> CompiledSpec:
+    """Compiled spec of an assessment, versioned by (ID, updated_at)"""
+    if assessment.id is None or assessment.updated_at is None:
+        return compile_spec(assessment.spec)  # Not flushed yet, the spec may still change
+    return spec_cache.get((assessment.id, assessment.updated_at), assessment.spec)
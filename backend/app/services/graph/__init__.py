@@ -0,0 +1,15 @@
+# Skill graph services: compiled in-memory snapshots of skills and skill edges
+
+from .snapshot import SkillGraphSnapshot, SkillGraphRegistry, skill_graph_registry, get_skill_graph
+from .reachability import ReachabilityIndex, ReachabilityRegistry, reachability_registry, get_reachability_index
+
+__all__ = [
+    'SkillGraphSnapshot',
+    'SkillGraphRegistry',
+    'skill_graph_registry',
+    'get_skill_graph',
+    'ReachabilityIndex',
+    'ReachabilityRegistry',
+    'reachability_registry',
+    'get_reachability_index',
+]
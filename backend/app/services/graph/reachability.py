@@ -0,0 +1,418 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Iterable, List, Optional, Set
+import logging
+
+from app.core.background import BackgroundBuild
+from app.models.skill import SkillRelation
+from .snapshot import SkillGraphSnapshot, get_skill_graph, skill_graph_registry
+
+logger = logging.getLogger(__name__)
+
+# Above this many changed PREREQUISITE edges a full rebuild beats incremental updates
+MAX_INCREMENTAL_EDGES = 256
+
+_EMPTY = array("i")
+
+
+def _merge(left: array, right: Iterable[int]) -> array:
+    """Sorted union of a sorted node array and any iterable of nodes"""
+    merged = set(left)
+    merged.update(right)
+    return array("i", sorted(merged))
+
+
+def _contains(nodes: array, node: int) -> bool:
+    pos = bisect_left(nodes, node)
+    return pos < len(nodes) and nodes[pos] == node
+
+
+class ReachabilityIndex:
+    """Transitive closure of PREREQUISITE edges.
+
+    Every node keeps its ancestors (transitive prerequisites) and descendants
+    (skills it transitively unlocks) as sorted ``array('i')`` node lists, so
+    membership is a binary search and listing costs only the output size.
+    Node numbering follows the snapshot the index was built from; single
+    edges can be added or removed without a rebuild.
+    """
+
+    def __init__(self, graph: SkillGraphSnapshot):
+        num_nodes = len(graph)
+        forward = graph.adjacency(SkillRelation.PREREQUISITE)
+
+        self.graph = graph
+        self.version = graph.version
+        self.skill_ids = graph.skill_ids
+        self._index = {skill_id: node for node, skill_id in enumerate(graph.skill_ids)}
+        self._children: List[Set[int]] = [set(forward.neighbors(node)) for node in range(num_nodes)]
+        self._parents: List[Set[int]] = [set() for _ in range(num_nodes)]
+        for node, children in enumerate(self._children):
+            for child in children:
+                self._parents[child].add(node)
+
+        self.dropped_edges = self._break_cycles()
+        self._ancestors: List[array] = [_EMPTY] * num_nodes
+        self._descendants: List[array] = [_EMPTY] * num_nodes
+        self._recompute(range(num_nodes))
+
+    def __repr__(self):
+        return f"<ReachabilityIndex(version={self.version}, skills={len(self.skill_ids)})>"
+
+    def __len__(self):
+        return len(self.skill_ids)
+
+    # Construction helpers
+
+    def _topological_order(self, nodes: Iterable[int]) -> List[int]:
+        """Kahn's order of the subgraph induced by nodes (cycle members are omitted)"""
+        members = set(nodes)
+        in_degree = {node: len(self._parents[node] & members) for node in members}
+        queue = deque(sorted(node for node, degree in in_degree.items() if degree == 0))
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for child in self._children[node]:
+                if child in in_degree:
+                    in_degree[child] -= 1
+                    if in_degree[child] == 0:
+                        queue.append(child)
+        return order
+
+    def _components(self) -> List[int]:
+        """Strongly connected component of every node (Tarjan's algorithm, iterative)"""
+        num_nodes = len(self.skill_ids)
+        component = [-1] * num_nodes
+        index = [-1] * num_nodes
+        low = [0] * num_nodes
+        on_stack = [False] * num_nodes
+        stack: List[int] = []
+        counter = components = 0
+        for root in range(num_nodes):
+            if index[root] != -1:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, iter(sorted(self._children[root])))]
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if index[child] == -1:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = True
+                        work.append((child, iter(sorted(self._children[child]))))
+                    elif on_stack[child]:
+                        low[node] = min(low[node], index[child])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component[member] = components
+                        if member == node:
+                            break
+                    components += 1
+        return component
+
+    def _break_cycles(self) -> List[tuple]:
+        """Drop the edges inside prerequisite cycles (both ends in one strongly connected component)"""
+        component = self._components()
+        dropped = []
+        for node in range(len(self.skill_ids)):
+            for parent in sorted(self._parents[node]):
+                if component[parent] == component[node]:
+                    dropped.append((self.skill_ids[parent], self.skill_ids[node]))
+                    self._parents[node].discard(parent)
+                    self._children[parent].discard(node)
+        if dropped:
+            logger.warning("Dropped %d prerequisite edges that close cycles", len(dropped))
+        return dropped
+
+    def _recompute(self, nodes: Iterable[int]):
+        """Recompute ancestors/descendants of nodes from their neighbours"""
+        order = self._topological_order(nodes)
+        ancestors, descendants = self._ancestors, self._descendants
+
+        for node in order:
+            parents = self._parents[node]
+            if not parents:
+                ancestors[node] = _EMPTY
+                continue
+            reached = set(parents)
+            for parent in parents:
+                reached.update(ancestors[parent])
+            ancestors[node] = array("i", sorted(reached))
+
+        for node in reversed(order):
+            children = self._children[node]
+            if not children:
+                descendants[node] = _EMPTY
+                continue
+            reached = set(children)
+            for child in children:
+                reached.update(descendants[child])
+            descendants[node] = array("i", sorted(reached))
+
+    def _node(self, skill_id: str) -> int:
+        node = self._index.get(skill_id)
+        if node is None:
+            raise KeyError(f"Unknown skill: {skill_id}")
+        return node
+
+    # Node-level queries
+
+    def parent_indices(self, node: int) -> Set[int]:
+        """Get direct prerequisites of a node (cycle-closing edges excluded)"""
+        return self._parents[node]
+
+    def child_indices(self, node: int) -> Set[int]:
+        """Get nodes directly unlocked by a node (cycle-closing edges excluded)"""
+        return self._children[node]
+
+    def ancestor_indices(self, node: int) -> array:
+        """Get sorted node indices of all transitive prerequisites"""
+        return self._ancestors[node]
+
+    def descendant_indices(self, node: int) -> array:
+        """Get sorted node indices of all skills transitively unlocked"""
+        return self._descendants[node]
+
+    def reaches(self, src: int, dst: int) -> bool:
+        """Check whether src is a transitive prerequisite of dst"""
+        return _contains(self._ancestors[dst], src)
+
+    # Skill ID queries
+
+    def ancestors(self, skill_id: str) -> List[str]:
+        """Get IDs of all transitive prerequisites of a skill"""
+        skill_ids = self.skill_ids
+        return [skill_ids[node] for node in self._ancestors[self._node(skill_id)]]
+
+    def descendants(self, skill_id: str) -> List[str]:
+        """Get IDs of all skills a skill transitively unlocks"""
+        skill_ids = self.skill_ids
+        return [skill_ids[node] for node in self._descendants[self._node(skill_id)]]
+
+    def is_prerequisite(self, prerequisite_id: str, skill_id: str) -> bool:
+        """Check whether one skill is a transitive prerequisite of another"""
+        src, dst = self._index.get(prerequisite_id), self._index.get(skill_id)
+        if src is None or dst is None:
+            return False
+        return self.reaches(src, dst)
+
+    def closure_indices(self, targets: Iterable[int], known: Optional[Iterable[int]] = None) -> Set[int]:
+        """Get the minimal node set needed to reach targets.
+
+        Without known nodes this is the targets plus all their ancestors.
+        Known (already mastered) nodes cut the closure: they are excluded and
+        their own prerequisites are only included if reachable another way.
+        """
+        targets = set(targets)
+        known = set(known or ())
+        if not known:
+            closure = set(targets)
+            for node in targets:
+                closure.update(self._ancestors[node])
+            return closure
+
+        closure = set()
+        queue = deque(node for node in targets if node not in known)
+        while queue:
+            node = queue.popleft()
+            if node in closure:
+                continue
+            closure.add(node)
+            for parent in self._parents[node]:
+                if parent not in known and parent not in closure:
+                    queue.append(parent)
+        return closure
+
+    def prerequisite_closure(self, target_ids: Iterable[str], known_ids: Optional[Iterable[str]] = None) -> Set[str]:
+        """Get IDs of the minimal skill set needed to learn the target skills"""
+        index = self._index
+        targets = [index[skill_id] for skill_id in target_ids if skill_id in index]
+        known = [index[skill_id] for skill_id in known_ids or () if skill_id in index]
+        skill_ids = self.skill_ids
+        return {skill_ids[node] for node in self.closure_indices(targets, known)}
+
+    # Incremental maintenance
+
+    def add_edge(self, src_skill_id: str, dst_skill_id: str):
+        """Add a PREREQUISITE edge src -> dst and extend the closure"""
+        src, dst = self._node(src_skill_id), self._node(dst_skill_id)
+        if src == dst or self.reaches(dst, src):
+            raise ValueError(f"Edge {src_skill_id} -> {dst_skill_id} would create a prerequisite cycle")
+        if dst in self._children[src]:
+            return
+
+        already_reachable = self.reaches(src, dst)
+        self._children[src].add(dst)
+        self._parents[dst].add(src)
+        if already_reachable:
+            return
+
+        upstream = _merge(self._ancestors[src], (src,))
+        downstream = _merge(self._descendants[dst], (dst,))
+        for node in downstream:
+            self._ancestors[node] = _merge(self._ancestors[node], upstream)
+        for node in upstream:
+            self._descendants[node] = _merge(self._descendants[node], downstream)
+
+    def remove_edge(self, src_skill_id: str, dst_skill_id: str):
+        """Remove a PREREQUISITE edge src -> dst and shrink the closure"""
+        src, dst = self._node(src_skill_id), self._node(dst_skill_id)
+        if dst not in self._children[src]:
+            return
+
+        self._children[src].discard(dst)
+        self._parents[dst].discard(src)
+
+        # Only nodes downstream of dst can lose ancestors and only nodes
+        # upstream of src can lose descendants; everything else is untouched
+        downstream = set(self._descendants[dst])
+        downstream.add(dst)
+        upstream = set(self._ancestors[src])
+        upstream.add(src)
+
+        ancestors, descendants = self._ancestors, self._descendants
+        for node in self._topological_order(downstream):
+            reached = set(self._parents[node])
+            for parent in self._parents[node]:
+                reached.update(ancestors[parent])
+            ancestors[node] = array("i", sorted(reached))
+        for node in reversed(self._topological_order(upstream)):
+            reached = set(self._children[node])
+            for child in self._children[node]:
+                reached.update(descendants[child])
+            descendants[node] = array("i", sorted(reached))
+
+    def edges(self) -> Set[tuple]:
+        """Get the current PREREQUISITE edges as (src, dst) node pairs"""
+        return {(src, dst) for src, children in enumerate(self._children) for dst in children}
+
+    def copy(self) -> "ReachabilityIndex":
+        """Get an index that can be changed without affecting this one"""
+        clone = object.__new__(ReachabilityIndex)
+        clone.graph = self.graph
+        clone.version = self.version
+        clone.skill_ids = self.skill_ids
+        clone._index = self._index
+        clone._children = [set(children) for children in self._children]
+        clone._parents = [set(parents) for parents in self._parents]
+        clone.dropped_edges = list(self.dropped_edges)
+        # Closure arrays are replaced, never changed in place, so sharing them is safe
+        clone._ancestors = list(self._ancestors)
+        clone._descendants = list(self._descendants)
+        return clone
+
+    def synced(self, graph: SkillGraphSnapshot) -> Optional["ReachabilityIndex"]:
+        """Get a copy brought up to date with a newer snapshot of the same skill set.
+
+        Applies the PREREQUISITE edge difference incrementally to a copy, so
+        readers of this index are unaffected, and returns None if the skill
+        set changed or the difference is too large to be worth it. Edges
+        dropped for closing a cycle are not retried unless an edge was
+        removed since, which is when they may fit.
+        """
+        if graph.skill_ids != self.skill_ids:
+            return None
+        forward = graph.adjacency(SkillRelation.PREREQUISITE)
+        target = {(src, dst) for src in range(len(graph)) for dst in forward.neighbors(src)}
+        current = self.edges()
+        index = self._index
+        dropped = {(index[src], index[dst]) for src, dst in self.dropped_edges} & target
+        removed, added = current - target, target - current - dropped
+        if len(removed) + len(added) > MAX_INCREMENTAL_EDGES:
+            return None
+
+        synced = self.copy()
+        skill_ids = self.skill_ids
+        for src, dst in sorted(removed):
+            synced.remove_edge(skill_ids[src], skill_ids[dst])
+        if removed:
+            added |= dropped
+            dropped = set()
+        for src, dst in sorted(added):
+            try:
+                synced.add_edge(skill_ids[src], skill_ids[dst])
+            except ValueError:
+                dropped.add((src, dst))
+        synced.dropped_edges = [(skill_ids[src], skill_ids[dst]) for src, dst in sorted(dropped)]
+        synced.graph = graph
+        synced.version = graph.version
+        return synced
+
+
+class ReachabilityRegistry:
+    """Process-wide reachability index kept in step with the skill graph snapshot.
+
+    Like the snapshot it follows, the index is brought up to date on a
+    worker thread and published with a reference swap; readers keep the
+    previous index (and the snapshot it was built from) until then.
+    """
+
+    def __init__(self):
+        self._index: Optional[ReachabilityIndex] = None
+        self._build = BackgroundBuild("reachability index", self._advance, self._publish)
+
+    @property
+    def current(self) -> Optional[ReachabilityIndex]:
+        """Get the published index without syncing"""
+        return self._index
+
+    def _publish(self, index: ReachabilityIndex):
+        self._index = index
+
+    def _advance(self, graph: Optional[SkillGraphSnapshot] = None) -> ReachabilityIndex:
+        """Build an index for the latest snapshot, incrementally when possible"""
+        graph = graph or skill_graph_registry.current
+        index = self._index
+        if index is not None and index.version == graph.version:
+            return index
+        return (index.synced(graph) if index is not None else None) or ReachabilityIndex(graph)
+
+    async def get(self) -> ReachabilityIndex:
+        """Get the current index, starting a background sync if the snapshot moved on.
+
+        Waits only when nothing has been built yet, and then without
+        blocking the loop.
+        """
+        graph = await skill_graph_registry.get()
+        index = self._index
+        if index is None:
+            return await self._build.wait()
+        if index.version != graph.version:
+            self._build.start()
+        return index
+
+    def get_blocking(self, db_session) -> ReachabilityIndex:
+        """Same as ``get`` for sync code, syncing inline when nothing is built or there is no loop"""
+        graph = get_skill_graph(db_session)
+        index = self._index
+        if index is None or (index.version != graph.version and not self._build.start_soon()):
+            index = self._advance(graph)
+            self._publish(index)
+        return index
+
+
+reachability_registry = ReachabilityRegistry()
+
+
+def get_reachability_index(db_session) -> ReachabilityIndex:
+    """Get the process-wide reachability index.
+
+    Takes a sync session and is meant for sync code; async code uses
+    ``await reachability_registry.get()``.
+    """
+    return reachability_registry.get_blocking(db_session)
@@ -0,0 +1,365 @@
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import itertools
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.background import BackgroundBuild
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.skill import Skill, SkillEdge, SkillRelation, SkillDifficulty
+
+# Ordinal cost of each difficulty level, stored per node in the snapshot
+DIFFICULTY_RANK = {
+    SkillDifficulty.BEGINNER: 0,
+    SkillDifficulty.INTERMEDIATE: 1,
+    SkillDifficulty.ADVANCED: 2,
+}
+
+# Relations stored as undirected adjacency (both directions in one array)
+UNDIRECTED_RELATIONS = (SkillRelation.RELATED, SkillRelation.ALTERNATIVE)
+
+_version_counter = itertools.count(1)
+
+SkillRow = Tuple[str, Sequence[str], int, SkillDifficulty]
+EdgeRow = Tuple[str, str, SkillRelation, float]
+
+
+class CSRAdjacency:
+    """Compressed sparse row adjacency for a single relation and direction"""
+
+    __slots__ = ("offsets", "targets", "weights")
+
+    def __init__(self, num_nodes: int, edges: Iterable[Tuple[int, int, float]]):
+        edges = sorted(edges)
+        offsets = array("i", bytes(4 * (num_nodes + 1)))
+        for src, _, _ in edges:
+            offsets[src + 1] += 1
+        for node in range(num_nodes):
+            offsets[node + 1] += offsets[node]
+
+        self.offsets = offsets
+        self.targets = array("i", (dst for _, dst, _ in edges))
+        self.weights = array("d", (weight for _, _, weight in edges))
+
+    def __len__(self):
+        return len(self.targets)
+
+    def neighbors(self, node: int) -> array:
+        """Get target node indices for a node"""
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def weighted_neighbors(self, node: int) -> List[Tuple[int, float]]:
+        """Get (target node index, edge weight) pairs for a node"""
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return list(zip(self.targets[start:end], self.weights[start:end]))
+
+    def degree(self, node: int) -> int:
+        """Get number of edges leaving a node"""
+        return self.offsets[node + 1] - self.offsets[node]
+
+
+class SkillGraphSnapshot:
+    """Immutable, integer-indexed view of skills and skill edges.
+
+    Nodes are skills ordered by ID. PREREQUISITE edges point from the
+    prerequisite to the skill it unlocks and are stored in both directions;
+    RELATED and ALTERNATIVE edges are undirected. Prerequisites listed in
+    ``Skill.prerequisites`` are merged in as PREREQUISITE edges of weight 1.0
+    unless an explicit ``SkillEdge`` row carries its own weight.
+    """
+
+    __slots__ = (
+        "version",
+        "built_at",
+        "skill_ids",
+        "estimated_hours",
+        "difficulty",
+        "_index",
+        "_forward",
+        "_reverse",
+    )
+
+    def __init__(
+        self,
+        skill_ids: List[str],
+        estimated_hours: Sequence[int],
+        difficulty: Sequence[int],
+        edges: Dict[SkillRelation, Dict[Tuple[int, int], float]],
+        version: Optional[int] = None,
+    ):
+        num_nodes = len(skill_ids)
+        self.version = version if version is not None else next(_version_counter)
+        self.built_at = time.monotonic()
+        self.skill_ids = skill_ids
+        self.estimated_hours = array("i", estimated_hours)
+        self.difficulty = array("b", difficulty)
+        self._index = {skill_id: idx for idx, skill_id in enumerate(skill_ids)}
+
+        self._forward = {}
+        self._reverse = {}
+        for relation in SkillRelation:
+            pairs = edges.get(relation, {})
+            if relation in UNDIRECTED_RELATIONS:
+                both = {}
+                for (src, dst), weight in pairs.items():
+                    both[(src, dst)] = weight
+                    both.setdefault((dst, src), weight)
+                self._forward[relation] = CSRAdjacency(
+                    num_nodes, ((src, dst, w) for (src, dst), w in both.items())
+                )
+            else:
+                self._forward[relation] = CSRAdjacency(
+                    num_nodes, ((src, dst, w) for (src, dst), w in pairs.items())
+                )
+                self._reverse[relation] = CSRAdjacency(
+                    num_nodes, ((dst, src, w) for (src, dst), w in pairs.items())
+                )
+
+    def __repr__(self):
+        return f"<SkillGraphSnapshot(version={self.version}, skills={len(self.skill_ids)})>"
+
+    def __len__(self):
+        return len(self.skill_ids)
+
+    def __contains__(self, skill_id: str):
+        return skill_id in self._index
+
+    @classmethod
+    def from_rows(cls, skills: Iterable[SkillRow], edges: Iterable[EdgeRow], version: Optional[int] = None):
+        """Build a snapshot from (id, prerequisites, estimated_hours, difficulty) skill rows
+        and (src_skill_id, dst_skill_id, relation, weight) edge rows"""
+        skills = sorted(skills, key=lambda row: row[0])
+        skill_ids = [row[0] for row in skills]
+        index = {skill_id: idx for idx, skill_id in enumerate(skill_ids)}
+        estimated_hours = [row[2] or 0 for row in skills]
+        difficulty = [DIFFICULTY_RANK.get(row[3], 0) for row in skills]
+
+        relation_edges = {relation: {} for relation in SkillRelation}
+        prerequisite_edges = relation_edges[SkillRelation.PREREQUISITE]
+        for idx, row in enumerate(skills):
+            for prereq_id in row[1] or ():
+                src = index.get(prereq_id)
+                if src is not None and src != idx:
+                    prerequisite_edges[(src, idx)] = 1.0
+
+        for src_id, dst_id, relation, weight in edges:
+            src, dst = index.get(src_id), index.get(dst_id)
+            if src is None or dst is None or src == dst:
+                continue
+            relation_edges[relation][(src, dst)] = weight if weight is not None else 1.0
+
+        return cls(skill_ids, estimated_hours, difficulty, relation_edges, version=version)
+
+    @classmethod
+    def load(cls, db_session):
+        """Build a snapshot from the skills and skill_edges tables"""
+        skills = db_session.query(
+            Skill.id, Skill.prerequisites, Skill.estimated_hours, Skill.difficulty
+        ).all()
+        edges = db_session.query(
+            SkillEdge.src_skill_id, SkillEdge.dst_skill_id, SkillEdge.relation, SkillEdge.weight
+        ).all()
+        return cls.from_rows(skills, edges)
+
+    # Index-level access
+
+    def index_of(self, skill_id: str) -> Optional[int]:
+        """Get node index for a skill ID"""
+        return self._index.get(skill_id)
+
+    def skill_id(self, node: int) -> str:
+        """Get skill ID for a node index"""
+        return self.skill_ids[node]
+
+    def adjacency(self, relation: SkillRelation, reverse: bool = False) -> CSRAdjacency:
+        """Get CSR adjacency for a relation (reverse only applies to PREREQUISITE)"""
+        if reverse and relation not in UNDIRECTED_RELATIONS:
+            return self._reverse[relation]
+        return self._forward[relation]
+
+    def prerequisite_indices(self, node: int) -> array:
+        """Get direct prerequisites of a node"""
+        return self._reverse[SkillRelation.PREREQUISITE].neighbors(node)
+
+    def dependent_indices(self, node: int) -> array:
+        """Get nodes directly unlocked by a node"""
+        return self._forward[SkillRelation.PREREQUISITE].neighbors(node)
+
+    # Skill ID access
+
+    def _lookup(self, skill_id: str, relation: SkillRelation, reverse: bool = False) -> List[str]:
+        node = self._index.get(skill_id)
+        if node is None:
+            return []
+        skill_ids = self.skill_ids
+        return [skill_ids[target] for target in self.adjacency(relation, reverse).neighbors(node)]
+
+    def get_prerequisites(self, skill_id: str) -> List[str]:
+        """Get IDs of direct prerequisite skills"""
+        return self._lookup(skill_id, SkillRelation.PREREQUISITE, reverse=True)
+
+    def get_dependents(self, skill_id: str) -> List[str]:
+        """Get IDs of skills that list this skill as a direct prerequisite"""
+        return self._lookup(skill_id, SkillRelation.PREREQUISITE)
+
+    def get_related(self, skill_id: str) -> List[str]:
+        """Get IDs of related skills"""
+        return self._lookup(skill_id, SkillRelation.RELATED)
+
+    def get_alternatives(self, skill_id: str) -> List[str]:
+        """Get IDs of alternative skills"""
+        return self._lookup(skill_id, SkillRelation.ALTERNATIVE)
+
+    def get_weighted(self, skill_id: str, relation: SkillRelation, reverse: bool = False) -> List[Tuple[str, float]]:
+        """Get (skill ID, edge weight) pairs for a relation"""
+        node = self._index.get(skill_id)
+        if node is None:
+            return []
+        skill_ids = self.skill_ids
+        return [
+            (skill_ids[target], weight)
+            for target, weight in self.adjacency(relation, reverse).weighted_neighbors(node)
+        ]
+
+
+class SkillGraphRegistry:
+    """Process-wide holder of the current skill graph snapshot.
+
+    Readers get whatever snapshot is current; rebuilds run on a worker
+    thread with their own session and are published with a single
+    reference swap, so a reader never sees a partially built graph and
+    never waits for one. A rebuild starts when skills or edges were
+    committed in this process, or when the snapshot is older than
+    ``SKILL_GRAPH_MAX_AGE_SECONDS`` (to pick up changes made by other
+    workers); until it lands, readers keep the previous snapshot.
+    """
+
+    def __init__(self, max_age_seconds: Optional[float] = None, session_factory: Callable = SessionLocal):
+        self.max_age_seconds = max_age_seconds
+        self.session_factory = session_factory
+        self._snapshot: Optional[SkillGraphSnapshot] = None
+        self._stale = True
+        self._build = BackgroundBuild("skill graph snapshot", self._load, self._publish)
+
+    @property
+    def current(self) -> Optional[SkillGraphSnapshot]:
+        """Get the published snapshot without rebuilding"""
+        return self._snapshot
+
+    @property
+    def version(self) -> Optional[int]:
+        """Get the version of the published snapshot"""
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else None
+
+    def mark_stale(self):
+        """Rebuild the snapshot on the next read"""
+        self._stale = True
+
+    def is_fresh(self) -> bool:
+        """Check whether the published snapshot can be served as-is"""
+        snapshot = self._snapshot
+        if snapshot is None or self._stale:
+            return False
+        max_age = self.max_age_seconds
+        if max_age is None:
+            max_age = settings.SKILL_GRAPH_MAX_AGE_SECONDS
+        return max_age <= 0 or time.monotonic() - snapshot.built_at < max_age
+
+    def swap(self, snapshot: SkillGraphSnapshot) -> Optional[SkillGraphSnapshot]:
+        """Publish a snapshot and return the one it replaced"""
+        previous, self._snapshot = self._snapshot, snapshot
+        self._stale = False
+        return previous
+
+    def _publish(self, snapshot: SkillGraphSnapshot):
+        # Unlike swap(), leaves the flag alone: a commit that landed mid-build
+        # has already asked for the next rebuild
+        self._snapshot = snapshot
+
+    def _load(self) -> SkillGraphSnapshot:
+        with self.session_factory() as session:
+            return self._load_with(session)
+
+    def _load_with(self, db_session) -> SkillGraphSnapshot:
+        # Clear the flag before loading so commits that land mid-build
+        # trigger another rebuild instead of being lost
+        self._stale = False
+        try:
+            return SkillGraphSnapshot.load(db_session)
+        except Exception:
+            self._stale = True
+            raise
+
+    async def get(self) -> SkillGraphSnapshot:
+        """Get the current snapshot, starting a background rebuild if it is stale.
+
+        Waits only when nothing has been built yet, and then without
+        blocking the loop.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return await self._build.wait()
+        if not self.is_fresh():
+            self._build.start()
+        return snapshot
+
+    def get_blocking(self, db_session) -> SkillGraphSnapshot:
+        """Same as ``get`` for sync code, loading with the caller's session when nothing is built yet.
+
+        Under a running loop (``run_sync``) a stale snapshot is still served
+        while the rebuild runs in the background; without one the rebuild
+        happens inline.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or (not self.is_fresh() and not self._build.start_soon()):
+            snapshot = self._load_with(db_session)
+            self._publish(snapshot)
+        return snapshot
+
+    async def refresh(self) -> SkillGraphSnapshot:
+        """Rebuild and publish a new snapshot unconditionally"""
+        self.mark_stale()
+        return await self._build.wait()
+
+
+skill_graph_registry = SkillGraphRegistry()
+
+
+def get_skill_graph(db_session) -> SkillGraphSnapshot:
+    """Get the process-wide skill graph snapshot.
+
+    Takes a sync session and is meant for sync code; async code uses
+    ``await skill_graph_registry.get()``.
+    """
+    return skill_graph_registry.get_blocking(db_session)
+
+
+# Invalidation: flag sessions that write skills or edges, publish on commit
+
+_GRAPH_DIRTY_KEY = "skill_graph_dirty"
+
+
+def _flag_graph_change(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info[_GRAPH_DIRTY_KEY] = True
+
+
+for _model in (Skill, SkillEdge):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _flag_graph_change)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_graph_change(session):
+    if session.info.pop(_GRAPH_DIRTY_KEY, False):
+        skill_graph_registry.mark_stale()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_graph_change(session):
+    session.info.pop(_GRAPH_DIRTY_KEY, None)
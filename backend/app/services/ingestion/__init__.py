@@ -0,0 +1,15 @@
+# Catalog ingestion: streaming provider feeds into content_items with batched upserts
+
+from .feeds import FeedFormatError, read_jsonl, read_csv, open_feed
+from .pipeline import IngestionStats, FileCheckpoint, CatalogIngestor, ingest_feed
+
+__all__ = [
+    'FeedFormatError',
+    'read_jsonl',
+    'read_csv',
+    'open_feed',
+    'IngestionStats',
+    'FileCheckpoint',
+    'CatalogIngestor',
+    'ingest_feed',
+]
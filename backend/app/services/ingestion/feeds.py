@@ -0,0 +1,67 @@
+from typing import Any, BinaryIO, Dict, Iterator, Tuple, Union
+import csv
+import gzip
+import io
+import json
+import os
+
+# A feed yields (position, record) pairs. The position of a record is what
+# to pass back as ``start`` to resume right after it: a byte offset for
+# JSONL (of the decompressed stream), a record count for CSV. Lines that
+# cannot be parsed are yielded as a FeedFormatError in place of the record,
+# so one bad line does not stop the feed.
+FeedRecord = Tuple[int, Union[Dict[str, Any], "FeedFormatError"]]
+
+
+class FeedFormatError(ValueError):
+    """A feed line that cannot be parsed at all"""
+
+    def __init__(self, position: int, message: str):
+        super().__init__(message)
+        self.position = position
+
+
+def read_jsonl(stream: BinaryIO, start: int = 0) -> Iterator[FeedRecord]:
+    """Stream objects from a JSON Lines feed, one line in memory at a time"""
+    if start:
+        stream.seek(start)
+    offset = start
+    for line in stream:
+        offset += len(line)
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield offset, FeedFormatError(offset, f"Invalid JSON: {exc}")
+            continue
+        if not isinstance(record, dict):
+            yield offset, FeedFormatError(offset, "Expected a JSON object per line")
+            continue
+        yield offset, record
+
+
+def read_csv(stream: BinaryIO, start: int = 0) -> Iterator[FeedRecord]:
+    """Stream records from a CSV feed with a header row"""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    for count, record in enumerate(reader, start=1):
+        if count <= start:
+            continue
+        yield count, record
+
+
+def open_feed(path: str, start: int = 0) -> Iterator[FeedRecord]:
+    """Stream a feed file, picking the parser from its extension (.jsonl, .ndjson, .csv, optionally .gz)"""
+    name = path[:-3] if path.endswith(".gz") else path
+    extension = os.path.splitext(name)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        reader = read_jsonl
+    elif extension == ".csv":
+        reader = read_csv
+    else:
+        raise ValueError(f"Unsupported feed format: {path}")
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as stream:
+        yield from reader(stream, start)
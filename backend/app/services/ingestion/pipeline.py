@@ -0,0 +1,230 @@
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import logging
+import os
+import time
+import uuid
+
+from pydantic import ValidationError
+from sqlalchemy import func
+
+from app.core.cache import entity_tag, invalidate_on_commit
+from app.models.content import ContentItem, ContentProvider
+from app.schemas.content import ContentFeedItem
+from app.services.dedupe import assign_canonical
+from app.services.rag import search_changed_on_commit
+from app.services.tags import tags_changed_on_commit
+from .feeds import FeedFormatError, FeedRecord, open_feed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1_000
+
+# Rejected rows kept for the report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+# Columns refreshed when a feed row matches an existing (provider_id, uri)
+UPSERT_COLUMNS = (
+    "title", "description", "type", "duration_min", "level", "language", "cost", "license", "tags", "metadata",
+)
+
+_content_items = ContentItem.__table__
+
+
+@dataclass
+class IngestionStats:
+    """Counters for one ingestion run"""
+
+    rows_read: int = 0
+    rows_upserted: int = 0
+    rows_rejected: int = 0
+    batches: int = 0
+    position: int = 0  # Feed position after the last committed batch
+    elapsed_seconds: float = 0.0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def reject(self, position: int, message: str):
+        self.rows_rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"position": position, "error": message})
+
+
+class FileCheckpoint:
+    """Ingestion progress persisted as JSON, replaced atomically after each batch"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self, provider_id: str, feed: str) -> Optional[Dict[str, Any]]:
+        """Get saved progress for this provider and feed, if any"""
+        try:
+            with open(self.path) as handle:
+                state = json.load(handle)
+        except (FileNotFoundError, ValueError):
+            return None
+        if state.get("provider_id") != provider_id or state.get("feed") != feed:
+            return None
+        return state
+
+    def save(self, provider_id: str, feed: str, stats: IngestionStats):
+        state = {"provider_id": provider_id, "feed": feed, **asdict(stats)}
+        state["errors"] = state["errors"][:10]
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump(state, handle)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class CatalogIngestor:
+    """Streams a provider feed into content_items with batched upserts.
+
+    Rows are parsed lazily, validated and normalized through
+    ``ContentFeedItem``, and written ``batch_size`` at a time with one
+    multi-row ``INSERT ... ON CONFLICT (provider_id, uri) DO UPDATE`` per
+    batch, so memory stays bounded by the batch whatever the feed size.
+    Each written batch then goes through the near-duplicate stage, which
+    points re-published items at their canonical item.
+    Each batch is committed together with a checkpoint of the feed
+    position, so an interrupted run resumes after the last committed batch.
+    """
+
+    def __init__(self, db_session, provider_id: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 checkpoint: Optional[FileCheckpoint] = None):
+        provider = db_session.get(ContentProvider, provider_id)
+        if provider is None:
+            raise ValueError(f"Unknown content provider: {provider_id}")
+        self.db_session = db_session
+        self.provider_id = provider_id
+        self.default_license = provider.license
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self._insert = _upsert_statement(db_session.get_bind().dialect.name)
+
+    def normalize(self, item: ContentFeedItem) -> Dict[str, Any]:
+        """Map a validated feed row onto content_items columns"""
+        return {
+            "id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"{self.provider_id}:{item.uri}")),
+            "provider_id": self.provider_id,
+            "uri": item.uri,
+            "title": item.title,
+            "description": item.description,
+            "type": item.type,
+            "duration_min": item.duration_min,
+            "level": item.level,
+            "language": item.language,
+            "cost": item.cost,
+            "license": item.license or self.default_license,
+            "tags": item.tags,
+            "metadata": item.metadata,
+            "is_active": True,
+            "is_featured": False,
+        }
+
+    def run(self, records: Iterable[FeedRecord], stats: Optional[IngestionStats] = None,
+            feed: Optional[str] = None) -> IngestionStats:
+        """Ingest (position, record) pairs from a feed reader"""
+        stats = stats or IngestionStats()
+        started = time.perf_counter() - stats.elapsed_seconds
+        batch: Dict[str, Dict[str, Any]] = {}
+        position = stats.position
+
+        for position, record in records:
+            stats.rows_read += 1
+            if isinstance(record, FeedFormatError):
+                stats.reject(position, str(record))
+                continue
+            try:
+                row = self.normalize(ContentFeedItem.model_validate(record))
+            except ValidationError as exc:
+                stats.reject(position, "; ".join(
+                    f"{'.'.join(map(str, error['loc'])) or 'row'}: {error['msg']}" for error in exc.errors()
+                ))
+                continue
+            # Last occurrence of a URI in a batch wins (ON CONFLICT cannot touch a row twice)
+            batch[row["uri"]] = row
+            if len(batch) >= self.batch_size:
+                self._flush(batch, position, stats, started, feed)
+                batch = {}
+
+        self._flush(batch, position, stats, started, feed)
+        return stats
+
+    def _flush(self, batch: Dict[str, Dict[str, Any]], position: int, stats: IngestionStats,
+               started: float, feed: Optional[str]):
+        if batch:
+            rows = list(batch.values())
+            # Rows that already existed keep their stored id, not the one normalize() derived
+            stored = dict(self.db_session.execute(self._insert, rows).all())
+            for row in rows:
+                row["id"] = stored[row["uri"]]
+            # Same transaction, so a batch and its canonical assignments commit together
+            assign_canonical(self.db_session, [(row["id"], row["title"], row["description"]) for row in rows])
+            # Core upserts bypass ORM events, so cached detail responses, the tag index and the search
+            # engine are updated here
+            invalidate_on_commit(self.db_session, [entity_tag("content", row["id"]) for row in rows])
+            tags_changed_on_commit(self.db_session, ContentItem,
+                                   [(row["id"], tuple(row["tags"] or ()), self.provider_id, True) for row in rows])
+            search_changed_on_commit(self.db_session)
+            stats.rows_upserted += len(batch)
+            stats.batches += 1
+        stats.position = position
+        stats.elapsed_seconds = time.perf_counter() - started
+        self.db_session.commit()
+        if self.checkpoint is not None and feed is not None:
+            self.checkpoint.save(self.provider_id, feed, stats)
+
+
+def _upsert_statement(dialect: str):
+    """Multi-row insert that updates existing (provider_id, uri) rows, returning (uri, stored id) pairs"""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Catalog upserts are not implemented for {dialect}")
+    statement = insert(_content_items)
+    return statement.on_conflict_do_update(
+        index_elements=[_content_items.c.provider_id, _content_items.c.uri],
+        set_={
+            **{column: statement.excluded[column] for column in UPSERT_COLUMNS},
+            "is_active": True,
+            "updated_at": func.now(),
+        },
+    ).returning(_content_items.c.uri, _content_items.c.id)
+
+
+def ingest_feed(db_session, provider_id: str, path: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                checkpoint_path: Optional[str] = None) -> IngestionStats:
+    """Ingest a JSONL/CSV feed file for a provider, resuming from a checkpoint if one exists.
+
+    Takes a sync session; from async code use
+    ``await db.run_sync(ingest_feed, provider_id, path)``.
+    """
+    checkpoint = FileCheckpoint(checkpoint_path) if checkpoint_path else None
+    stats = IngestionStats()
+    feed = os.path.abspath(path)
+    if checkpoint is not None:
+        state = checkpoint.load(provider_id, feed)
+        if state is not None:
+            stats = IngestionStats(**{key: value for key, value in state.items()
+                                      if key in IngestionStats.__dataclass_fields__})
+            logger.info("Resuming %s for provider %s at position %d", path, provider_id, stats.position)
+
+    ingestor = CatalogIngestor(db_session, provider_id, batch_size=batch_size, checkpoint=checkpoint)
+    stats = ingestor.run(open_feed(path, start=stats.position), stats=stats, feed=feed)
+    logger.info("Ingested %s: %d rows read, %d upserted, %d rejected (%.0f rows/s)", path,
+                stats.rows_read, stats.rows_upserted, stats.rows_rejected, stats.rows_per_second)
+    if checkpoint is not None:
+        checkpoint.clear()
+    return stats
@@ -0,0 +1,39 @@
+# LLM access: chat model interface and the caching, coalescing gateway in front of it
+
+from .models import CITATION_MARKER, ChatTurn, SourceDocument, ChatModel, FakeChatModel, get_chat_model, set_chat_model
+from .gateway import (
+    LLMRequest,
+    LLMResponse,
+    CachedAnswer,
+    AnswerCache,
+    RedisAnswerStore,
+    SemanticIndex,
+    GatewayStats,
+    LLMGateway,
+    grounding_hash,
+    prompt_key,
+    get_llm_gateway,
+    set_llm_gateway,
+)
+
+__all__ = [
+    'CITATION_MARKER',
+    'ChatTurn',
+    'SourceDocument',
+    'ChatModel',
+    'FakeChatModel',
+    'get_chat_model',
+    'set_chat_model',
+    'LLMRequest',
+    'LLMResponse',
+    'CachedAnswer',
+    'AnswerCache',
+    'RedisAnswerStore',
+    'SemanticIndex',
+    'GatewayStats',
+    'LLMGateway',
+    'grounding_hash',
+    'prompt_key',
+    'get_llm_gateway',
+    'set_llm_gateway',
+]
@@ -0,0 +1,489 @@
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_binary_redis
+from app.services.rag import Embedder, HashingEmbedder, normalize_text
+from .models import CITATION_MARKER, ChatModel, ChatTurn, SourceDocument, get_chat_model
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "llm"
+
+# Semantic index rows allocated up front per tenant; grows by doubling
+SEMANTIC_INITIAL_ROWS = 64
+
+# Model calls run detached from the requests that follow them
+_background_tasks: Set[asyncio.Task] = set()
+
+
+@dataclass
+class LLMRequest:
+    """A prompt sent through the gateway.
+
+    ``history`` holds the turns before ``prompt`` and ``sources`` the
+    documents the answer is grounded on (citable as [index]). Semantic
+    reuse only applies to standalone prompts, with no conversation turns
+    before them (a follow-up's meaning depends on the conversation), and
+    only between prompts with the same system turns.
+    """
+
+    tenant_id: str
+    prompt: str
+    history: Sequence[ChatTurn] = ()
+    sources: Sequence[SourceDocument] = ()
+    semantic: bool = False  # Opt in to answers cached for similar prompts
+    ttl_seconds: Optional[int] = None  # Overrides the tenant's cache lifetime
+
+    def turns(self) -> List[ChatTurn]:
+        return [*self.history, ChatTurn("user", self.prompt)]
+
+
+@dataclass
+class LLMResponse:
+    """A complete answer and where it came from"""
+
+    text: str
+    origin: str  # 'model', 'coalesced', 'exact' or 'semantic'
+
+
+@dataclass
+class CachedAnswer:
+    """An answer with the version of every source it cites, by marker index"""
+
+    text: str
+    citations: Dict[int, Tuple[str, str]]  # index -> (content_id, version)
+    expires_at: float
+
+    def encode(self) -> bytes:
+        return json.dumps({
+            "text": self.text,
+            "citations": {str(index): list(cited) for index, cited in self.citations.items()},
+            "expires_at": self.expires_at,
+        }, separators=(",", ":")).encode()
+
+    @classmethod
+    def decode(cls, raw: bytes) -> Optional["CachedAnswer"]:
+        try:
+            data = json.loads(raw)
+            citations = {int(index): (cited[0], cited[1]) for index, cited in data["citations"].items()}
+            return cls(data["text"], citations, float(data["expires_at"]))
+        except (ValueError, KeyError, TypeError, IndexError):
+            return None
+
+    def rebind(self, sources: Sequence[SourceDocument]) -> Optional[str]:
+        """The answer with its markers renumbered for these sources.
+
+        None unless every cited document is among the sources at the same
+        version, so an answer is never reused once a source it relied on
+        has changed or is no longer retrieved for the prompt.
+        """
+        current = {source.content_id: source for source in sources}
+        renumbered: Dict[int, int] = {}
+        for index, (content_id, version) in self.citations.items():
+            source = current.get(content_id)
+            if source is None or source.version != version:
+                return None
+            renumbered[index] = source.index
+        if all(index == new_index for index, new_index in renumbered.items()):
+            return self.text
+        return CITATION_MARKER.sub(
+            lambda match: f"[{renumbered.get(int(match.group(1)), match.group(1))}]", self.text
+        )
+
+
+def grounding_hash(sources: Sequence[SourceDocument]) -> str:
+    """Fingerprint of the grounding context: sources in prompt order with their versions"""
+    digest = hashlib.blake2b(digest_size=16)
+    for source in sources:
+        digest.update(f"{source.index}\0{source.content_id}\0{source.version}\n".encode())
+    return digest.hexdigest()
+
+
+def prompt_key(model: str, request: LLMRequest) -> str:
+    """Exact-match key: model, tenant, normalized turns and the grounding hash"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{model}\0{request.tenant_id}\0".encode())
+    for turn in request.turns():
+        digest.update(f"{turn.role}\0{normalize_text(turn.content)}\n".encode())
+    digest.update(grounding_hash(request.sources).encode())
+    return digest.hexdigest()
+
+
+class AnswerCache:
+    """Thread-safe in-process LRU of answers with expiry"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries if max_entries is not None else settings.LLM_CACHE_MAX_ENTRIES
+        self._answers: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._answers)
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[CachedAnswer]:
+        with self._lock:
+            answer = self._answers.get(key)
+            if answer is None:
+                return None
+            if answer.expires_at <= (now or time.time()):
+                del self._answers[key]
+                return None
+            self._answers.move_to_end(key)
+            return answer
+
+    def put(self, key: str, answer: CachedAnswer):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._answers[key] = answer
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.max_entries:
+                self._answers.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._answers.clear()
+
+
+class RedisAnswerStore:
+    """Shared answer tier in Redis, one key per answer under the tenant's prefix.
+
+    Redis failures are logged and treated as misses, so the gateway keeps
+    answering (from the model) when Redis is unavailable.
+    """
+
+    def __init__(self, redis_factory: Callable[[], Awaitable] = get_binary_redis, prefix: str = REDIS_KEY_PREFIX):
+        self.redis_factory = redis_factory
+        self.prefix = prefix
+
+    def _redis_key(self, tenant_id: str, key: str) -> str:
+        return f"{self.prefix}:{tenant_id}:{key}"
+
+    async def get(self, tenant_id: str, key: str) -> Optional[CachedAnswer]:
+        try:
+            client = await self.redis_factory()
+            raw = await client.get(self._redis_key(tenant_id, key))
+        except RedisError as exc:
+            logger.warning("LLM cache read failed, treating as a miss: %s", exc)
+            return None
+        return CachedAnswer.decode(raw) if raw is not None else None
+
+    async def set(self, tenant_id: str, key: str, answer: CachedAnswer, ttl_seconds: int):
+        try:
+            client = await self.redis_factory()
+            await client.set(self._redis_key(tenant_id, key), answer.encode(), ex=ttl_seconds)
+        except RedisError as exc:
+            logger.warning("LLM cache write failed: %s", exc)
+
+
+class SemanticIndex:
+    """Embeddings of one tenant's recently answered standalone prompts.
+
+    A ring of at most ``max_entries`` rows: once full, the oldest answer is
+    overwritten. Lookups are one matrix-vector product over the ring.
+    """
+
+    def __init__(self, dimension: int, max_entries: Optional[int] = None):
+        self.dimension = dimension
+        self.max_entries = max_entries if max_entries is not None else settings.LLM_SEMANTIC_CACHE_MAX_ENTRIES
+        self._vectors = np.zeros((min(self.max_entries, SEMANTIC_INITIAL_ROWS), dimension), dtype=np.float32)
+        self._answers: List[CachedAnswer] = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._answers)
+
+    def add(self, vector: np.ndarray, answer: CachedAnswer):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if len(self._answers) < self.max_entries:
+                row = len(self._answers)
+                if row == len(self._vectors):
+                    grown = np.zeros((min(2 * row, self.max_entries), self.dimension), dtype=np.float32)
+                    grown[:row] = self._vectors
+                    self._vectors = grown
+                self._answers.append(answer)
+            else:
+                row = self._next
+                self._next = (row + 1) % self.max_entries
+                self._answers[row] = answer
+            self._vectors[row] = vector
+
+    def candidates(self, vector: np.ndarray, threshold: float,
+                   now: Optional[float] = None) -> List[Tuple[float, CachedAnswer]]:
+        """Unexpired answers at least ``threshold`` similar to the vector, most similar first"""
+        now = now or time.time()
+        with self._lock:
+            if not self._answers:
+                return []
+            similarity = self._vectors[:len(self._answers)] @ vector
+            rows = np.flatnonzero(similarity >= threshold)
+            found = [(float(similarity[row]), self._answers[row]) for row in rows.tolist()]
+        return sorted(
+            [(score, answer) for score, answer in found if answer.expires_at > now],
+            key=lambda pair: pair[0], reverse=True,
+        )
+
+
+class _Flight:
+    """One model call shared by every identical request made while it runs.
+
+    Chunks are kept as they arrive, so a request that joins late replays
+    the answer so far and then follows it live.
+    """
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def push(self, chunk: str):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def follow(self) -> AsyncIterator[str]:
+        position = 0
+        while True:
+            if position < len(self.chunks):
+                # Everything that arrived since the last read goes out as one chunk
+                chunk = "".join(self.chunks[position:])
+                position = len(self.chunks)
+                yield chunk
+            elif self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+
+@dataclass
+class GatewayStats:
+    """Per-worker counters of where answers came from"""
+
+    requests: int = 0
+    model_calls: int = 0
+    coalesced: int = 0
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    errors: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        return (self.exact_hits + self.semantic_hits) / self.requests if self.requests else 0.0
+
+
+class LLMGateway:
+    """Single entry point for chat model calls, with caching and coalescing.
+
+    A request is answered, in order of preference, from:
+
+    * the exact cache, keyed by ``prompt_key`` (tenant, model, normalized
+      turns and the grounding hash), in process and then in Redis;
+    * the semantic cache, when the request opts in: the answer to a
+      similar enough earlier prompt of the same tenant, provided every
+      document it cites is among the current sources, unchanged;
+    * a model call already running for the same key, which the request
+      follows instead of starting its own;
+    * a new model call, whose answer is then cached.
+
+    Tenants never share entries: the tenant is part of every key and each
+    tenant has its own semantic index. Cache lifetime is per tenant
+    (``LLM_CACHE_TENANT_TTL_SECONDS``, 0 disables caching for a tenant)
+    and can be overridden per request. The semantic index lives in the
+    worker; exact answers are shared through Redis.
+    """
+
+    def __init__(self, model: Optional[ChatModel] = None, embedder: Optional[Embedder] = None,
+                 cache: Optional[AnswerCache] = None, store: Optional[RedisAnswerStore] = None,
+                 semantic_threshold: Optional[float] = None, enabled: Optional[bool] = None):
+        self._model = model
+        self.embedder = embedder or HashingEmbedder()
+        self.cache = cache if cache is not None else AnswerCache()
+        self.store = store
+        self.semantic_threshold = (semantic_threshold if semantic_threshold is not None
+                                   else settings.LLM_SEMANTIC_CACHE_THRESHOLD)
+        self.enabled = enabled if enabled is not None else settings.LLM_CACHE_ENABLED
+        self.stats = GatewayStats()
+        self._flights: Dict[str, _Flight] = {}
+        self._semantic: Dict[Tuple[str, str, str], SemanticIndex] = {}
+        self._semantic_lock = threading.Lock()
+
+    @property
+    def model(self) -> ChatModel:
+        return self._model or get_chat_model()
+
+    def ttl_for(self, request: LLMRequest) -> int:
+        if request.ttl_seconds is not None:
+            return request.ttl_seconds
+        return settings.LLM_CACHE_TENANT_TTL_SECONDS.get(request.tenant_id, settings.LLM_CACHE_TTL_SECONDS)
+
+    async def stream(self, request: LLMRequest) -> AsyncIterator[str]:
+        """Stream the answer; cached answers arrive as a single chunk"""
+        _, answer = await self._open(request)
+        if isinstance(answer, str):
+            yield answer
+            return
+        async for chunk in answer.follow():
+            yield chunk
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        origin, answer = await self._open(request)
+        if isinstance(answer, str):
+            return LLMResponse(answer, origin)
+        return LLMResponse("".join([chunk async for chunk in answer.follow()]), origin)
+
+    async def _open(self, request: LLMRequest) -> Tuple[str, Union[str, _Flight]]:
+        """Find a cached answer or the model call to follow for a request"""
+        model = self.model
+        key = prompt_key(model.model, request)
+        self.stats.requests += 1
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.stats.coalesced += 1
+            return "coalesced", flight
+
+        ttl_seconds = self.ttl_for(request) if self.enabled else 0
+        vector = None
+        if ttl_seconds > 0:
+            answer = self.cache.get(key)
+            if answer is None and self.store is not None:
+                answer = await self.store.get(request.tenant_id, key)
+                if answer is not None:
+                    self.cache.put(key, answer)
+            if answer is not None:
+                self.stats.exact_hits += 1
+                return "exact", answer.text
+
+            if request.semantic and all(turn.role == "system" for turn in request.history):
+                vector = self.embedder.embed([request.prompt])[0]
+                index = self._semantic.get(_semantic_scope(model.model, request))
+                if index is not None:
+                    for _, candidate in index.candidates(vector, self.semantic_threshold):
+                        text = candidate.rebind(request.sources)
+                        if text is not None:
+                            self.stats.semantic_hits += 1
+                            return "semantic", text
+
+            # Another request may have started the same call while Redis was read
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats.coalesced += 1
+                return "coalesced", flight
+
+        flight = self._flights[key] = _Flight()
+        self.stats.model_calls += 1
+        task = asyncio.get_running_loop().create_task(self._call(model, key, request, flight, ttl_seconds, vector))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        return "model", flight
+
+    async def _call(self, model: ChatModel, key: str, request: LLMRequest, flight: _Flight,
+                    ttl_seconds: int, vector: Optional[np.ndarray]):
+        """Run the model once for every follower, then cache the answer.
+
+        The call is not tied to any one request, so it finishes (and is
+        cached) even if the request that started it goes away.
+        """
+        try:
+            async for chunk in model.stream(request.turns(), request.sources):
+                flight.push(chunk)
+        except Exception as exc:
+            self.stats.errors += 1
+            logger.warning("Chat model call failed: %s", exc)
+            flight.finish(exc)
+            self._flights.pop(key, None)
+            return
+        except asyncio.CancelledError:
+            flight.finish(RuntimeError("Chat model call was cancelled"))
+            self._flights.pop(key, None)
+            raise
+
+        flight.finish()
+        try:
+            if ttl_seconds > 0:
+                await self._save(model, key, request, "".join(flight.chunks), ttl_seconds, vector)
+        finally:
+            # Kept registered until cached so no identical request slips in between
+            self._flights.pop(key, None)
+
+    async def _save(self, model: ChatModel, key: str, request: LLMRequest, text: str, ttl_seconds: int,
+                    vector: Optional[np.ndarray]):
+        by_index = {source.index: source for source in request.sources}
+        citations = {}
+        for match in CITATION_MARKER.finditer(text):
+            source = by_index.get(int(match.group(1)))
+            if source is not None:
+                citations[source.index] = (source.content_id, source.version)
+        answer = CachedAnswer(text, citations, time.time() + ttl_seconds)
+
+        self.cache.put(key, answer)
+        if vector is not None:
+            self._semantic_index(_semantic_scope(model.model, request)).add(vector, answer)
+        if self.store is not None:
+            await self.store.set(request.tenant_id, key, answer, ttl_seconds)
+
+    def _semantic_index(self, scope: Tuple[str, str, str]) -> SemanticIndex:
+        with self._semantic_lock:
+            index = self._semantic.get(scope)
+            if index is None:
+                index = self._semantic[scope] = SemanticIndex(self.embedder.dimension)
+            return index
+
+    def stats_snapshot(self) -> Dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            "hit_ratio": round(self.stats.hit_ratio, 4),
+            "in_flight": len(self._flights),
+            "cached_answers": len(self.cache),
+            "semantic_tenants": len({scope[0] for scope in self._semantic}),
+        }
+
+
+def _semantic_scope(model: str, request: LLMRequest) -> Tuple[str, str, str]:
+    """Answers are only reused within a tenant, model and set of system turns"""
+    digest = hashlib.blake2b(digest_size=8)
+    for turn in request.history:
+        digest.update(f"{normalize_text(turn.content)}\n".encode())
+    return request.tenant_id, model, digest.hexdigest()
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Get the process-wide gateway used by the coach and the planner"""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway(store=RedisAnswerStore())
+    return _gateway
+
+
+def set_llm_gateway(gateway: LLMGateway):
+    """Replace the process-wide gateway (e.g. one without Redis in benchmarks)"""
+    global _gateway
+    _gateway = gateway
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Protocol, Sequence
+import asyncio
+import random
+import re
+
+# Source markers the model writes inline, e.g. "... see the pandas guide [2]."
+CITATION_MARKER = re.compile(r"\[(\d+)\]")
+
+
+@dataclass
+class ChatTurn:
+    """One message of the prompt sent to a chat model"""
+
+    role: str  # 'system', 'user' or 'assistant'
+    content: str
+
+
+@dataclass
+class SourceDocument:
+    """A retrieved source the model may cite as [index]"""
+
+    index: int
+    content_id: str
+    title: str
+    uri: str
+    version: str = ""  # Changes whenever the document does (e.g. its updated_at)
+
+
+class ChatModel(Protocol):
+    """Streams a completion as text chunks as they are generated"""
+
+    model: str
+
+    def stream(self, turns: Sequence[ChatTurn], sources: Sequence[SourceDocument]) -> AsyncIterator[str]:
+        ...
+
+
+class FakeChatModel:
+    """Deterministic local stand-in for a remote chat model.
+
+    Writes a short answer around the question and the retrieved sources,
+    citing them with [n] markers, and emits it word by word after
+    ``first_token_delay`` seconds at ``tokens_per_second``. Used when no
+    remote model is configured and to drive streaming benchmarks.
+    """
+
+    model = "local-fake-chat-v1"
+
+    def __init__(self, tokens_per_second: float = 40.0, first_token_delay: float = 0.3, seed: int = 0):
+        self.tokens_per_second = tokens_per_second
+        self.first_token_delay = first_token_delay
+        self.seed = seed
+
+    def compose(self, question: str, sources: Sequence[SourceDocument]) -> str:
+        rng = random.Random(f"{self.seed}:{question}")
+        topic = question.strip().rstrip("?.!") or "your plan"
+        sentences: List[str] = [f"Good question about {topic[:1].lower()}{topic[1:80]}."]
+        for source in sources[:3]:
+            sentences.append(rng.choice((
+                f"A solid place to start is {source.title} [{source.index}].",
+                f"{source.title} covers this step by step [{source.index}].",
+                f"You can practice it with {source.title} [{source.index}].",
+            )))
+        sentences.append(rng.choice((
+            "Try a short exercise after each section and note what felt unclear.",
+            "Break it into small sessions and review the previous one before moving on.",
+            "Once it clicks, apply it to a small project from your current plan.",
+        )))
+        return " ".join(sentences)
+
+    async def stream(self, turns: Sequence[ChatTurn], sources: Sequence[SourceDocument]) -> AsyncIterator[str]:
+        question = next((turn.content for turn in reversed(turns) if turn.role == "user"), "")
+        words = self.compose(question, sources).split(" ")
+        await asyncio.sleep(self.first_token_delay)
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for position, word in enumerate(words):
+            if position:
+                await asyncio.sleep(interval)
+            yield word if position == 0 else f" {word}"
+
+
+_chat_model: Optional[ChatModel] = None
+
+
+def get_chat_model() -> ChatModel:
+    """Get the process-wide chat model behind the LLM gateway"""
+    global _chat_model
+    if _chat_model is None:
+        _chat_model = FakeChatModel()
+    return _chat_model
+
+
+def set_chat_model(model: ChatModel):
+    """Replace the process-wide chat model (remote client, or a fake in benchmarks)"""
+    global _chat_model
+    _chat_model = model
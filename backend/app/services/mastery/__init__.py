@@ -0,0 +1,31 @@
+# Learner mastery: Bayesian Knowledge Tracing, online per attempt and vectorized in bulk
+
+from .bkt import BKTParams, update_mastery, ParamArrays, Observations, replay, FitReport, fit_em
+from .service import (
+    load_skill_params,
+    latest_mastery,
+    AttemptHistory,
+    load_attempt_history,
+    write_mastery,
+    save_skill_params,
+    MasteryRecompute,
+    recompute_mastery,
+)
+
+__all__ = [
+    'BKTParams',
+    'update_mastery',
+    'ParamArrays',
+    'Observations',
+    'replay',
+    'FitReport',
+    'fit_em',
+    'load_skill_params',
+    'latest_mastery',
+    'AttemptHistory',
+    'load_attempt_history',
+    'write_mastery',
+    'save_skill_params',
+    'MasteryRecompute',
+    'recompute_mastery',
+]
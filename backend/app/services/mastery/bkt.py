@@ -0,0 +1,284 @@
+from dataclasses import asdict, dataclass
+from typing import List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+PARAM_NAMES = ("p_init", "p_learn", "p_guess", "p_slip", "p_forget")
+
+# Fitted parameters are kept inside these bounds; guess and slip above 0.5
+# would let "not known" explain correct answers better than "known" does
+PARAM_BOUNDS = {
+    "p_init": (0.001, 0.999),
+    "p_learn": (0.001, 0.5),
+    "p_guess": (0.001, 0.4),
+    "p_slip": (0.001, 0.4),
+    "p_forget": (0.0, 0.2),
+}
+
+EM_MAX_ITERATIONS = 50
+EM_TOLERANCE = 1e-5  # Relative log-likelihood improvement below which EM stops
+
+
+@dataclass(frozen=True)
+class BKTParams:
+    """Bayesian Knowledge Tracing parameters of one skill.
+
+    ``p_init`` is the probability the skill is known before the first
+    observation, ``p_learn`` / ``p_forget`` the probability of moving from
+    unknown to known (and back) between observations, ``p_guess`` the
+    probability of a correct answer when unknown and ``p_slip`` of a wrong
+    one when known.
+    """
+
+    p_init: float = 0.2
+    p_learn: float = 0.15
+    p_guess: float = 0.2
+    p_slip: float = 0.1
+    p_forget: float = 0.0
+
+    @classmethod
+    def from_dict(cls, data: Optional[Mapping[str, float]]) -> "BKTParams":
+        """Parameters stored on a skill; missing values fall back to the defaults"""
+        if not data:
+            return cls()
+        return cls(**{name: float(data[name]) for name in PARAM_NAMES if name in data})
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def update_mastery(p_known: float, correct: bool, params: BKTParams) -> float:
+    """One BKT step in O(1): condition on the observation, then apply learning and forgetting"""
+    if correct:
+        known = p_known * (1.0 - params.p_slip)
+        evidence = known + (1.0 - p_known) * params.p_guess
+    else:
+        known = p_known * params.p_slip
+        evidence = known + (1.0 - p_known) * (1.0 - params.p_guess)
+    posterior = known / evidence if evidence > 0 else p_known
+    return posterior * (1.0 - params.p_forget) + (1.0 - posterior) * params.p_learn
+
+
+@dataclass
+class ParamArrays:
+    """BKT parameters of many skills as arrays indexed by skill code"""
+
+    p_init: np.ndarray
+    p_learn: np.ndarray
+    p_guess: np.ndarray
+    p_slip: np.ndarray
+    p_forget: np.ndarray
+
+    @classmethod
+    def from_params(cls, params: Sequence[BKTParams]) -> "ParamArrays":
+        return cls(*(np.array([getattr(p, name) for p in params], dtype=np.float64) for name in PARAM_NAMES))
+
+    def __len__(self):
+        return len(self.p_init)
+
+    def params(self, code: int) -> BKTParams:
+        return BKTParams(*(float(getattr(self, name)[code]) for name in PARAM_NAMES))
+
+    def copy(self) -> "ParamArrays":
+        return ParamArrays(*(getattr(self, name).copy() for name in PARAM_NAMES))
+
+    def clip(self):
+        for name, (low, high) in PARAM_BOUNDS.items():
+            np.clip(getattr(self, name), low, high, out=getattr(self, name))
+
+
+@dataclass
+class Observations:
+    """Attempt outcomes grouped into (learner, skill) sequences.
+
+    Observations of one sequence are contiguous and in time order, which
+    is what lets the replay and EM below advance every sequence one step
+    at a time with array operations. ``order`` maps back to the input
+    order, so ``values[observations.order]`` lines results up with it.
+    """
+
+    sequence: np.ndarray  # Sequence code per observation, non-decreasing
+    skill: np.ndarray  # Skill code per observation
+    correct: np.ndarray  # bool
+    order: np.ndarray  # Input index of each observation
+
+    @classmethod
+    def build(cls, learner: np.ndarray, skill: np.ndarray, time: np.ndarray, correct: np.ndarray) -> "Observations":
+        """Group and sort observations given per input row (learner and skill as integer codes)"""
+        order = np.lexsort((np.arange(len(time)), time, skill, learner))
+        learner, skill = learner[order], skill[order]
+        starts = np.ones(len(order), dtype=bool)
+        starts[1:] = (learner[1:] != learner[:-1]) | (skill[1:] != skill[:-1])
+        sequence = np.cumsum(starts) - 1
+        return cls(sequence, skill, np.asarray(correct, dtype=bool)[order], order)
+
+    def __len__(self):
+        return len(self.sequence)
+
+    def restore(self, values: np.ndarray) -> np.ndarray:
+        """Values per observation rearranged into input order"""
+        restored = np.empty_like(values)
+        restored[self.order] = values
+        return restored
+
+
+@dataclass
+class SequenceLayout:
+    """Position of every observation within its sequence, bucketed by position"""
+
+    position: np.ndarray
+    is_last: np.ndarray
+    by_position: np.ndarray  # Observation indices sorted by position
+    bounds: np.ndarray  # by_position[bounds[k]:bounds[k + 1]] are at position k
+
+    @classmethod
+    def build(cls, sequence: np.ndarray) -> "SequenceLayout":
+        count = len(sequence)
+        starts = np.flatnonzero(np.r_[True, sequence[1:] != sequence[:-1]]) if count else np.zeros(0, dtype=int)
+        lengths = np.diff(np.r_[starts, count])
+        position = np.arange(count) - np.repeat(starts, lengths)
+        is_last = np.zeros(count, dtype=bool)
+        is_last[starts + lengths - 1] = True
+        by_position = np.argsort(position, kind="stable")
+        longest = int(lengths.max()) if count else 0
+        bounds = np.searchsorted(position[by_position], np.arange(longest + 1))
+        return cls(position, is_last, by_position, bounds)
+
+    @property
+    def longest(self) -> int:
+        return len(self.bounds) - 1
+
+    def at(self, position: int) -> np.ndarray:
+        return self.by_position[self.bounds[position]:self.bounds[position + 1]]
+
+
+def _emissions(correct: np.ndarray, guess: np.ndarray, slip: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """P(observation | known) and P(observation | unknown)"""
+    return np.where(correct, 1.0 - slip, slip), np.where(correct, guess, 1.0 - guess)
+
+
+def _filter(observations: Observations, layout: SequenceLayout, params: ParamArrays
+            ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """Forward pass: P(known | observations so far) per observation, the emissions, and the log-likelihood"""
+    skill = observations.skill
+    learn, forget = params.p_learn[skill], params.p_forget[skill]
+    e_known, e_unknown = _emissions(observations.correct, params.p_guess[skill], params.p_slip[skill])
+    filtered = np.empty(len(observations))
+    log_likelihood = 0.0
+    for position in range(layout.longest):
+        index = layout.at(position)
+        if position == 0:
+            prior = params.p_init[skill[index]]
+        else:
+            previous = filtered[index - 1]
+            prior = previous * (1.0 - forget[index]) + (1.0 - previous) * learn[index]
+        known = prior * e_known[index]
+        evidence = known + (1.0 - prior) * e_unknown[index]
+        filtered[index] = known / evidence
+        log_likelihood += float(np.log(evidence).sum())
+    return filtered, e_known, e_unknown, log_likelihood
+
+
+def replay(observations: Observations, params: ParamArrays) -> np.ndarray:
+    """Mastery after every observation, as ``update_mastery`` would have recorded it one by one"""
+    layout = SequenceLayout.build(observations.sequence)
+    filtered, _, _, _ = _filter(observations, layout, params)
+    skill = observations.skill
+    return filtered * (1.0 - params.p_forget[skill]) + (1.0 - filtered) * params.p_learn[skill]
+
+
+@dataclass
+class FitReport:
+    """Outcome of an EM fit"""
+
+    iterations: int
+    log_likelihood: float
+    converged: bool
+    history: List[float]
+
+
+def fit_em(observations: Observations, initial: ParamArrays, max_iterations: int = EM_MAX_ITERATIONS,
+           tolerance: float = EM_TOLERANCE, fit_forget: bool = False) -> Tuple[ParamArrays, FitReport]:
+    """Fit per-skill parameters by expectation-maximization (Baum-Welch).
+
+    Every iteration is one forward and one backward pass over all
+    sequences at once, then the expected counts are summed per skill with
+    ``np.bincount``. Skills without observations keep their initial
+    parameters; ``p_forget`` stays fixed unless ``fit_forget`` is set.
+    """
+    params = initial.copy()
+    params.clip()
+    layout = SequenceLayout.build(observations.sequence)
+    skill, correct = observations.skill, observations.correct
+    num_skills = len(params)
+    is_first = layout.position == 0
+    has_next = ~layout.is_last
+    history: List[float] = []
+    converged = False
+
+    def per_skill(mask: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        return np.bincount(skill[mask], weights=weights[mask], minlength=num_skills)
+
+    for _ in range(max_iterations):
+        filtered, e_known, e_unknown, log_likelihood = _filter(observations, layout, params)
+        history.append(log_likelihood)
+        learn, forget = params.p_learn[skill], params.p_forget[skill]
+
+        # Backward pass: normalized P(known | future observations), then
+        # transition posteriors between each observation and the next
+        backward = np.full(len(observations), 0.5)
+        xi_unknown_known = np.zeros(len(observations))
+        xi_unknown_unknown = np.zeros(len(observations))
+        xi_known_unknown = np.zeros(len(observations))
+        xi_known_known = np.zeros(len(observations))
+        for position in range(layout.longest - 2, -1, -1):
+            index = layout.at(position)
+            index = index[has_next[index]]
+            following = index + 1
+            v_known = e_known[following] * backward[following]
+            v_unknown = e_unknown[following] * (1.0 - backward[following])
+            b_unknown = (1.0 - learn[following]) * v_unknown + learn[following] * v_known
+            b_known = forget[following] * v_unknown + (1.0 - forget[following]) * v_known
+            backward[index] = b_known / (b_known + b_unknown)
+
+            f = filtered[index]
+            uu = (1.0 - f) * (1.0 - learn[following]) * v_unknown
+            uk = (1.0 - f) * learn[following] * v_known
+            ku = f * forget[following] * v_unknown
+            kk = f * (1.0 - forget[following]) * v_known
+            total = uu + uk + ku + kk
+            xi_unknown_unknown[index], xi_unknown_known[index] = uu / total, uk / total
+            xi_known_unknown[index], xi_known_known[index] = ku / total, kk / total
+
+        known = filtered * backward
+        gamma_known = known / (known + (1.0 - filtered) * (1.0 - backward))
+        gamma_unknown = 1.0 - gamma_known
+
+        everywhere = np.ones(len(observations), dtype=bool)
+        firsts = per_skill(is_first, np.ones(len(observations)))
+        from_unknown = per_skill(has_next, xi_unknown_unknown + xi_unknown_known)
+        from_known = per_skill(has_next, xi_known_unknown + xi_known_known)
+        unknown_mass = per_skill(everywhere, gamma_unknown)
+        known_mass = per_skill(everywhere, gamma_known)
+
+        updated = params.copy()
+        _update(updated.p_init, per_skill(is_first, gamma_known), firsts)
+        _update(updated.p_learn, per_skill(has_next, xi_unknown_known), from_unknown)
+        if fit_forget:
+            _update(updated.p_forget, per_skill(has_next, xi_known_unknown), from_known)
+        _update(updated.p_guess, per_skill(everywhere, gamma_unknown * correct), unknown_mass)
+        _update(updated.p_slip, per_skill(everywhere, gamma_known * ~correct), known_mass)
+        updated.clip()
+        params = updated
+
+        if len(history) > 1 and abs(history[-1] - history[-2]) <= tolerance * abs(history[-2]):
+            converged = True
+            break
+
+    return params, FitReport(len(history), history[-1] if history else 0.0, converged, history)
+
+
+def _update(values: np.ndarray, numerator: np.ndarray, denominator: np.ndarray):
+    """Replace values with expected-count ratios where there is evidence"""
+    observed = denominator > 0
+    values[observed] = numerator[observed] / denominator[observed]
@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+import logging
+import time
+
+import numpy as np
+from sqlalchemy import bindparam
+
+from app.models.assessment import Assessment, AssessmentAttempt, AttemptStatus
+from app.models.learner import Learner
+from app.models.skill import Skill
+from app.services.coach.context import MASTERY, context_changed_on_commit
+from .bkt import BKTParams, FitReport, Observations, ParamArrays, fit_em, replay
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 5_000
+CHANGE_TOLERANCE = 1e-9  # Recomputed mastery closer than this to the stored value is not written
+
+
+def load_skill_params(db_session, skill_ids: Iterable[str]) -> Dict[str, BKTParams]:
+    """BKT parameters of the given skills (defaults for skills never fitted)"""
+    skill_ids = list(skill_ids)
+    rows = db_session.query(Skill.id, Skill.bkt_params).filter(Skill.id.in_(skill_ids)).all() if skill_ids else []
+    stored = dict(rows)
+    return {skill_id: BKTParams.from_dict(stored.get(skill_id)) for skill_id in skill_ids}
+
+
+def latest_mastery(db_session, learner_id: str, skill_id: str, exclude_id: Optional[str] = None) -> Optional[float]:
+    """Mastery recorded by the learner's most recent completed attempt on the skill"""
+    query = db_session.query(AssessmentAttempt.mastery_prob).join(
+        Assessment, Assessment.id == AssessmentAttempt.assessment_id
+    ).filter(
+        AssessmentAttempt.learner_id == learner_id,
+        Assessment.skill_id == skill_id,
+        AssessmentAttempt.status == AttemptStatus.COMPLETED,
+    )
+    if exclude_id is not None:
+        query = query.filter(AssessmentAttempt.id != exclude_id)
+    return query.order_by(AssessmentAttempt.completed_at.desc(), AssessmentAttempt.id.desc()).limit(1).scalar()
+
+
+@dataclass
+class AttemptHistory:
+    """Completed attempts as BKT observations, with the IDs to write results back to"""
+
+    attempt_ids: List[str]
+    learner_ids: List[str]  # Per attempt
+    skill_ids: List[str]  # By skill code
+    stored: np.ndarray  # Mastery currently stored per attempt
+    observations: Observations
+
+
+def load_attempt_history(db_session, tenant_id: Optional[str] = None) -> AttemptHistory:
+    """Completed attempts (of one tenant's learners, or all) as observations, passed or not"""
+    passing_query = db_session.query(Assessment.id, Assessment.spec)
+    attempts_query = db_session.query(
+        AssessmentAttempt.id, AssessmentAttempt.learner_id, Assessment.skill_id, AssessmentAttempt.assessment_id,
+        AssessmentAttempt.score, AssessmentAttempt.mastery_prob, AssessmentAttempt.completed_at,
+    ).join(Assessment, Assessment.id == AssessmentAttempt.assessment_id).filter(
+        AssessmentAttempt.status == AttemptStatus.COMPLETED,
+        AssessmentAttempt.completed_at.isnot(None),
+    )
+    if tenant_id is not None:
+        passing_query = passing_query.join(Learner, Learner.id == Assessment.learner_id).filter(
+            Learner.tenant_id == tenant_id
+        )
+        attempts_query = attempts_query.join(Learner, Learner.id == AssessmentAttempt.learner_id).filter(
+            Learner.tenant_id == tenant_id
+        )
+    passing = {assessment_id: (spec or {}).get("passing_score", 70) for assessment_id, spec in passing_query}
+
+    attempt_ids, learner_ids = [], []
+    learner_codes: Dict[str, int] = {}
+    skill_codes: Dict[str, int] = {}
+    learners, skills, times, correct, stored = [], [], [], [], []
+    rows = attempts_query.order_by(AssessmentAttempt.learner_id, Assessment.skill_id).yield_per(10_000)
+    for attempt_id, learner_id, skill_id, assessment_id, score, mastery, completed_at in rows:
+        attempt_ids.append(attempt_id)
+        learner_ids.append(learner_id)
+        learners.append(learner_codes.setdefault(learner_id, len(learner_codes)))
+        skills.append(skill_codes.setdefault(skill_id, len(skill_codes)))
+        times.append(completed_at.timestamp())
+        correct.append(score >= passing.get(assessment_id, 70))
+        stored.append(mastery)
+
+    observations = Observations.build(
+        np.array(learners, dtype=np.int64), np.array(skills, dtype=np.int64),
+        np.array(times, dtype=np.float64), np.array(correct, dtype=bool),
+    )
+    return AttemptHistory(attempt_ids, learner_ids, list(skill_codes), np.array(stored, dtype=np.float64),
+                          observations)
+
+
+def write_mastery(db_session, attempt_ids: List[str], mastery: np.ndarray, batch_size: int = WRITE_BATCH_SIZE):
+    """Bulk-update mastery_prob by attempt ID, one executemany per batch"""
+    table = AssessmentAttempt.__table__
+    statement = table.update().where(table.c.id == bindparam("attempt_id")).values(
+        mastery_prob=bindparam("new_mastery")
+    )
+    for start in range(0, len(attempt_ids), batch_size):
+        db_session.execute(statement, [
+            {"attempt_id": attempt_id, "new_mastery": float(value)}
+            for attempt_id, value in zip(attempt_ids[start:start + batch_size], mastery[start:start + batch_size])
+        ])
+
+
+def save_skill_params(db_session, skill_ids: List[str], params: ParamArrays):
+    """Store fitted parameters on the skills, indexed like ``skill_ids``"""
+    table = Skill.__table__
+    statement = table.update().where(table.c.id == bindparam("skill_id")).values(bkt_params=bindparam("fitted"))
+    if skill_ids:
+        db_session.execute(statement, [
+            {"skill_id": skill_id, "fitted": params.params(code).to_dict()} for code, skill_id in enumerate(skill_ids)
+        ])
+
+
+@dataclass
+class MasteryRecompute:
+    """Outcome of a bulk mastery recompute"""
+
+    attempts: int
+    updated: int
+    learners: int
+    skills: int
+    fit: Optional[FitReport]
+    elapsed: float
+
+
+def recompute_mastery(db_session, tenant_id: Optional[str] = None, refit: bool = False,
+                      fit_forget: bool = False) -> MasteryRecompute:
+    """Replay every completed attempt through BKT and write the mastery that changed.
+
+    With ``refit`` the per-skill parameters are first fitted by EM on the
+    same attempts and stored on the skills. Attempts are replayed per
+    (learner, skill) in completion order, so each stored value is what the
+    online update would have produced with the current parameters. The
+    caller commits. Takes a sync session; from async code use
+    ``await db.run_sync(recompute_mastery, tenant_id)``.
+    """
+    started = time.perf_counter()
+    history = load_attempt_history(db_session, tenant_id)
+    stored = load_skill_params(db_session, history.skill_ids)
+    params = ParamArrays.from_params([stored[skill_id] for skill_id in history.skill_ids])
+
+    report = None
+    if refit and len(history.observations):
+        params, report = fit_em(history.observations, params, fit_forget=fit_forget)
+        save_skill_params(db_session, history.skill_ids, params)
+
+    mastery = history.observations.restore(replay(history.observations, params))
+    changed = np.flatnonzero(np.abs(mastery - history.stored) > CHANGE_TOLERANCE)
+    write_mastery(db_session, [history.attempt_ids[i] for i in changed], mastery[changed])
+    learners = {history.learner_ids[i] for i in changed}
+    for learner_id in learners:
+        context_changed_on_commit(db_session, learner_id, [MASTERY])
+
+    result = MasteryRecompute(
+        attempts=len(history.attempt_ids), updated=len(changed), learners=len(learners),
+        skills=len(history.skill_ids), fit=report, elapsed=time.perf_counter() - started,
+    )
+    logger.info("Recomputed mastery for %d attempts (%d changed) in %.1fs",
+                result.attempts, result.updated, result.elapsed)
+    return result
@@ -0,0 +1,47 @@
+# Notifications: digests of the reminder nudges, sent over Slack, Teams and email within per-channel rate limits
+
+from .channels import (
+    DeliveryError,
+    Recipient,
+    Digest,
+    SendResult,
+    TokenBucket,
+    SharedTokenBucket,
+    Channel,
+    SlackChannel,
+    TeamsChannel,
+    SMTPPool,
+    EmailChannel,
+)
+from .dispatcher import (
+    DispatchReport,
+    NotificationDispatcher,
+    render_digest,
+    default_channels,
+    get_notification_client,
+    get_notification_dispatcher,
+    set_notification_dispatcher,
+)
+from .fake import FakeNotificationServer
+
+__all__ = [
+    'DeliveryError',
+    'Recipient',
+    'Digest',
+    'SendResult',
+    'TokenBucket',
+    'SharedTokenBucket',
+    'Channel',
+    'SlackChannel',
+    'TeamsChannel',
+    'SMTPPool',
+    'EmailChannel',
+    'DispatchReport',
+    'NotificationDispatcher',
+    'render_digest',
+    'default_channels',
+    'get_notification_client',
+    'get_notification_dispatcher',
+    'set_notification_dispatcher',
+    'FakeNotificationServer',
+]
@@ -0,0 +1,408 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.message import EmailMessage
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import queue
+import random
+import smtplib
+import time
+
+import httpx
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.notification import NotificationChannel
+from app.services.calendar_sync.http import retry_after
+
+logger = logging.getLogger(__name__)
+
+# Answers worth another try
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Shared token buckets, one hash per channel
+BUCKET_KEY_PREFIX = "notify:bucket"
+
+
+class DeliveryError(Exception):
+    """A send failed; ``retryable`` ones are tried again after ``retry_after`` seconds (or a backoff)"""
+
+    def __init__(self, message: str, retryable: bool = False, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+@dataclass
+class Recipient:
+    """Where a learner's digests go"""
+
+    learner_id: str
+    name: str
+    email: Optional[str]
+    channel: NotificationChannel
+    address: str  # Slack user ID, Teams webhook URL or email address
+
+
+@dataclass
+class Digest:
+    """One message to a learner, covering all the nudges coalesced for them"""
+
+    recipient: Recipient
+    subject: str
+    text: str
+    item_ids: List[str]
+
+
+@dataclass
+class SendResult:
+    sent: bool
+    attempts: int
+    error: Optional[str] = None
+
+
+class TokenBucket:
+    """Per-channel rate limit: ``rate`` sends a second on average, bursts of up to ``burst``.
+
+    Tokens refill continuously; a send that finds the bucket empty waits
+    for its token rather than being refused. When the service throttles
+    (429 with Retry-After), ``pause`` empties the bucket until then, so
+    every sender on the channel backs off together.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waited = 0.0  # Seconds senders spent waiting for tokens, summed
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    async def acquire(self):
+        """Take one token, waiting for it if the bucket is empty"""
+        # Taking the token up front reserves it, so waiters are served in turn without re-checking
+        self._refill(time.monotonic())
+        self.tokens -= 1
+        if self.tokens < 0:
+            delay = -self.tokens / self.rate + max(0.0, self.updated - time.monotonic())
+            self.waited += delay
+            await asyncio.sleep(delay)
+
+    async def pause(self, delay: float):
+        """Hold back the channel's sends for ``delay`` seconds"""
+        now = time.monotonic()
+        self._refill(now)
+        resume = now + delay
+        if resume > self.updated:
+            self.updated = resume
+            self.tokens = min(self.tokens, 0.0)
+
+
+# Refills the bucket at KEYS[1] (ARGV[1] tokens a second, up to ARGV[2]) by Redis' clock, then takes a token
+# when ARGV[3] is 0, or holds the bucket back for ARGV[3] seconds; returns how long the token's sender waits.
+# The hash expires once the bucket would be full again, which is the same as no hash
+_TAKE = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local rate, burst, pause = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens, updated = tonumber(state[1]) or burst, tonumber(state[2]) or now
+if now > updated then
+  tokens = math.min(burst, tokens + (now - updated) * rate)
+  updated = now
+end
+local delay = 0
+if pause > 0 then
+  if now + pause > updated then
+    updated = now + pause
+    tokens = math.min(tokens, 0)
+  end
+else
+  tokens = tokens - 1
+  if tokens < 0 then delay = -tokens / rate + math.max(0, updated - now) end
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(updated))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate + math.max(0, updated - now)) + 1)
+return tostring(delay)
+"""
+
+
+class SharedTokenBucket(TokenBucket):
+    """A ``TokenBucket`` kept in Redis, so all dispatchers sending on a channel share its rate.
+
+    Refilling and taking a token is one script run against Redis' clock,
+    so dispatchers on several replicas neither race for tokens nor rely
+    on their own clocks, and a pause for a 429 holds back every one of
+    them. A process's senders run the script one at a time (each holds
+    one connection for a round trip, then waits for its token without
+    it), which also serves them in turn. While Redis is unreachable the
+    in-process bucket is used, which limits each dispatcher to the full
+    rate on its own.
+    """
+
+    def __init__(self, key: str, rate: float, burst: int, redis_factory: Callable[[], Awaitable] = get_redis):
+        super().__init__(rate, burst)
+        self.key = key
+        self.redis_factory = redis_factory
+        self._lock = asyncio.Lock()
+
+    async def _run(self, pause: float) -> Optional[float]:
+        try:
+            async with self._lock:
+                client = await self.redis_factory()
+                return float(await client.eval(_TAKE, 1, self.key, self.rate, self.burst, pause))
+        except (RedisError, OSError) as exc:
+            logger.warning("Shared rate limit %s unavailable, limiting this process only: %s", self.key, exc)
+            return None
+
+    async def acquire(self):
+        delay = await self._run(0)
+        if delay is None:
+            await super().acquire()
+        elif delay > 0:
+            self.waited += delay
+            await asyncio.sleep(delay)
+
+    async def pause(self, delay: float):
+        if await self._run(delay) is None:
+            await super().pause(delay)
+
+
+@dataclass
+class ChannelStats:
+    sent: int = 0
+    failed: int = 0
+    attempts: int = 0
+    retries: int = 0
+    throttled: int = 0  # Answers asking to slow down (429, SMTP 421/451)
+
+
+class Channel:
+    """A way to reach learners; sends within its token bucket and concurrency, retrying transient failures"""
+
+    kind: NotificationChannel
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[int] = None, concurrency: Optional[int] = None,
+                 max_retries: Optional[int] = None, backoff_seconds: Optional[float] = None,
+                 bucket_prefix: str = BUCKET_KEY_PREFIX):
+        name = self.kind.value
+        self.bucket = SharedTokenBucket(f"{bucket_prefix}:{name}",
+                                        rate or settings.NOTIFY_RATE_PER_SECOND.get(name, 10.0),
+                                        burst or settings.NOTIFY_BURST.get(name, 10))
+        self.concurrency = concurrency or settings.NOTIFY_CONCURRENCY.get(name, 4)
+        self.max_retries = max_retries if max_retries is not None else settings.NOTIFY_MAX_RETRIES
+        self.backoff_seconds = backoff_seconds if backoff_seconds is not None else settings.NOTIFY_BACKOFF_SECONDS
+        self.stats = ChannelStats()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    def backoff(self, attempt: int) -> float:
+        delay = self.backoff_seconds * 2 ** attempt
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def deliver(self, digest: Digest) -> SendResult:
+        """Send a digest, retrying throttled and failed attempts up to ``max_retries`` times"""
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            async with self._semaphore:
+                self.stats.attempts += 1
+                try:
+                    await self.send(digest)
+                    self.stats.sent += 1
+                    return SendResult(True, attempt + 1)
+                except DeliveryError as exc:
+                    error = exc
+            if not error.retryable or attempt >= self.max_retries:
+                self.stats.failed += 1
+                return SendResult(False, attempt + 1, str(error))
+            delay = self.backoff(attempt)
+            if error.retry_after is not None:
+                self.stats.throttled += 1
+                delay = error.retry_after
+                await self.bucket.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+            attempt += 1
+            self.stats.retries += 1
+            logger.debug("Retrying %s digest to %s in %.2fs (attempt %d): %s",
+                         self.kind.value, digest.recipient.learner_id, delay, attempt, error)
+
+    async def send(self, digest: Digest):
+        """One attempt; raises ``DeliveryError``"""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class HTTPChannel(Channel):
+    """A channel posting JSON over the shared, pooled HTTP client"""
+
+    def __init__(self, client: httpx.AsyncClient, **limits):
+        super().__init__(**limits)
+        self.client = client
+
+    async def post(self, url: str, payload: Dict, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        try:
+            response = await self.client.post(url, json=payload, headers=headers)
+        except httpx.TransportError as exc:
+            raise DeliveryError(f"{type(exc).__name__}: {exc}", retryable=True)
+        if response.status_code == 429:
+            raise DeliveryError("429: rate limited", True, retry_after(response.headers, self.backoff(0)))
+        if response.status_code in RETRY_STATUSES:
+            raise DeliveryError(f"{response.status_code}: {response.text[:200]}", retryable=True)
+        if response.status_code >= 400:
+            raise DeliveryError(f"{response.status_code}: {response.text[:200]}")
+        return response
+
+
+class SlackChannel(HTTPChannel):
+    """Direct messages from the Slack app (``chat.postMessage`` to the learner's user ID)"""
+
+    kind = NotificationChannel.SLACK
+
+    def __init__(self, client: httpx.AsyncClient, token: Optional[str] = None, api_url: Optional[str] = None,
+                 **limits):
+        super().__init__(client, **limits)
+        self.token = token or settings.SLACK_BOT_TOKEN
+        self.api_url = (api_url or settings.SLACK_API_URL).rstrip("/")
+
+    async def send(self, digest: Digest):
+        response = await self.post(
+            f"{self.api_url}/chat.postMessage",
+            {"channel": digest.recipient.address, "text": f"*{digest.subject}*\n{digest.text}"},
+            {"Authorization": f"Bearer {self.token}"},
+        )
+        # Slack answers 200 with ok: false for most errors
+        body = response.json()
+        if not body.get("ok"):
+            error = body.get("error", "unknown_error")
+            if error == "ratelimited":
+                raise DeliveryError(error, True, retry_after(response.headers, self.backoff(0)))
+            raise DeliveryError(error, retryable=error in ("internal_error", "service_unavailable"))
+
+
+class TeamsChannel(HTTPChannel):
+    """Messages posted to a Teams incoming webhook: the learner's own, else the organisation's channel"""
+
+    kind = NotificationChannel.TEAMS
+
+    async def send(self, digest: Digest):
+        await self.post(digest.recipient.address, {
+            "@type": "MessageCard",
+            "@context": "https://schema.org/extensions",
+            "summary": digest.subject,
+            "title": f"{digest.recipient.name}: {digest.subject}",
+            "text": digest.text.replace("\n", "<br>"),
+        })
+
+
+class SMTPPool:
+    """Long-lived SMTP connections shared by the email channel, each used by one send at a time.
+
+    ``smtplib`` blocks, so sends run on a thread pool of the same size;
+    a connection the server dropped is reopened on its next use.
+    """
+
+    def __init__(self, host: str, port: int, size: int, username: Optional[str] = None,
+                 password: Optional[str] = None, timeout: float = 15.0):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.opened = 0
+        self._idle: "queue.LifoQueue[Optional[smtplib.SMTP]]" = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(None)
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="smtp")
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        connection.ehlo()
+        if connection.has_extn("starttls"):
+            connection.starttls()
+            connection.ehlo()
+        if self.username:
+            connection.login(self.username, self.password or "")
+        self.opened += 1
+        return connection
+
+    def _send(self, message: EmailMessage):
+        connection = self._idle.get()
+        try:
+            if connection is None:
+                connection = self._connect()
+            try:
+                connection.send_message(message)
+            except smtplib.SMTPServerDisconnected:
+                connection = self._connect()
+                connection.send_message(message)
+        except (smtplib.SMTPServerDisconnected, OSError) as exc:
+            if isinstance(exc, smtplib.SMTPException) and not isinstance(exc, smtplib.SMTPServerDisconnected):
+                raise  # The server answered (refused a recipient, say); the connection is still good
+            if connection is not None:
+                connection.close()
+            connection = None
+            raise
+        finally:
+            self._idle.put(connection)
+
+    async def send(self, message: EmailMessage):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._send, message)
+
+    def _close(self):
+        while not self._idle.empty():
+            connection = self._idle.get()
+            if connection is not None:
+                try:
+                    connection.quit()
+                except (smtplib.SMTPException, OSError):
+                    pass
+        for _ in range(self.size):
+            self._idle.put(None)
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close)
+        self._executor.shutdown(wait=False)
+
+
+class EmailChannel(Channel):
+    """Plain-text email over the pooled SMTP connections"""
+
+    kind = NotificationChannel.EMAIL
+
+    def __init__(self, pool: Optional[SMTPPool] = None, from_email: Optional[str] = None, **limits):
+        super().__init__(**limits)
+        self.pool = pool or SMTPPool(settings.SMTP_HOST, settings.SMTP_PORT, self.concurrency,
+                                     settings.SMTP_USERNAME, settings.SMTP_PASSWORD, settings.NOTIFY_TIMEOUT_SECONDS)
+        self.from_email = from_email or settings.FROM_EMAIL
+
+    async def send(self, digest: Digest):
+        message = EmailMessage()
+        message["From"] = self.from_email
+        message["To"] = digest.recipient.address
+        message["Subject"] = digest.subject
+        message.set_content(f"Hi {digest.recipient.name},\n\n{digest.text}\n")
+        try:
+            await self.pool.send(message)
+        except smtplib.SMTPRecipientsRefused as exc:
+            code, reply = next(iter(exc.recipients.values()))
+            raise DeliveryError(f"{code}: {reply.decode(errors='replace')}", retryable=400 <= code < 500)
+        except smtplib.SMTPResponseException as exc:
+            reply = exc.smtp_error.decode(errors="replace") if isinstance(exc.smtp_error, bytes) else exc.smtp_error
+            throttled = exc.smtp_code in (421, 451)
+            raise DeliveryError(f"{exc.smtp_code}: {reply}", 400 <= exc.smtp_code < 500,
+                                self.backoff(0) if throttled else None)
+        except (smtplib.SMTPException, OSError) as exc:
+            raise DeliveryError(f"{type(exc).__name__}: {exc}", retryable=True)
+
+    async def close(self):
+        await self.pool.close()
@@ -0,0 +1,315 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import time
+
+import httpx
+from redis.exceptions import RedisError
+from sqlalchemy import insert, select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis
+from app.models.learner import Learner
+from app.models.notification import DeliveryStatus, NotificationChannel, NotificationDelivery
+from app.models.user import User
+from app.services.reminders import NUDGE_QUEUE_KEY, SESSION_MISSED, Nudge, due_score
+from .channels import Channel, Digest, EmailChannel, Recipient, SendResult, SlackChannel, TeamsChannel
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "notify"
+
+# Moves up to ARGV[1] nudges off the queue onto their learner's pending list, and schedules the learner's
+# digest for ARGV[2] unless one is scheduled already; returns how many moved. Pending lists are named
+# from ARGV[3] inside the script, so this assumes a single Redis rather than a cluster
+_COLLECT = """
+local nudges = redis.call('LPOP', KEYS[1], ARGV[1])
+if not nudges then return 0 end
+for _, raw in ipairs(nudges) do
+  local learner = cjson.decode(raw)['learner_id']
+  redis.call('RPUSH', ARGV[3] .. learner, raw)
+  redis.call('ZADD', KEYS[2], 'NX', ARGV[2], learner)
+end
+return #nudges
+"""
+
+# Takes up to ARGV[2] learners whose digest is due by ARGV[1], with their pending nudges; returns
+# learner, nudges, learner, nudges, ... One script, so concurrent dispatchers never take the same digest
+_CLAIM = """
+local learners = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+local claimed = {}
+for _, learner in ipairs(learners) do
+  local key = ARGV[3] .. learner
+  claimed[#claimed + 1] = learner
+  claimed[#claimed + 1] = redis.call('LRANGE', key, 0, -1)
+  redis.call('DEL', key)
+  redis.call('ZREM', KEYS[1], learner)
+end
+return claimed
+"""
+
+
+@dataclass
+class DispatchReport:
+    """What one dispatch round did"""
+
+    collected: int = 0  # Nudges moved off the queue
+    digests: int = 0
+    nudges: int = 0  # Distinct nudges the digests covered
+    outcomes: Counter = field(default_factory=Counter)  # (channel, status) -> digests
+    elapsed_seconds: float = 0.0
+
+    def count(self, status: DeliveryStatus) -> int:
+        return sum(n for (_, outcome), n in self.outcomes.items() if outcome == status)
+
+    @property
+    def sent(self) -> int:
+        return self.count(DeliveryStatus.SENT)
+
+    @property
+    def failed(self) -> int:
+        return self.count(DeliveryStatus.FAILED)
+
+    @property
+    def skipped(self) -> int:
+        return self.count(DeliveryStatus.SKIPPED)
+
+
+def _format_due(value: str) -> str:
+    due = datetime.fromisoformat(value)
+    if due.tzinfo is None:
+        due = due.replace(tzinfo=timezone.utc)
+    return due.astimezone(timezone.utc).strftime("%a %d %b, %H:%M UTC")
+
+
+def render_digest(recipient: Recipient, nudges: Sequence[Nudge]) -> Digest:
+    """One message listing a learner's missed sessions and overdue steps, oldest first"""
+    nudges = sorted(nudges, key=lambda nudge: nudge.due_at)
+    lines = []
+    for nudge in nudges:
+        if nudge.kind == SESSION_MISSED:
+            lines.append(f"- Missed study session: {nudge.title} ({_format_due(nudge.due_at)})")
+        else:
+            lines.append(f"- Overdue: {nudge.title} (was due {_format_due(nudge.due_at)})")
+    subject = "1 learning reminder" if len(nudges) == 1 else f"{len(nudges)} learning reminders"
+    text = "\n".join(lines + ["", "Open your learning plan to reschedule or pick up where you left off."])
+    return Digest(recipient, subject, text, [nudge.item_id for nudge in nudges])
+
+
+class NotificationDispatcher:
+    """Turns the nudges queued by the overdue sweeper into one digest per learner, and sends them.
+
+    ``collect`` moves nudges off ``NUDGE_QUEUE_KEY`` onto a pending list
+    per learner and schedules the learner's digest ``digest_window_seconds``
+    after their first pending nudge, so a burst (a Monday-morning sweep)
+    becomes one message per learner rather than one per item.
+    ``dispatch`` claims the digests that are due in batches, resolves
+    each learner's channel from their preferences (Slack or Teams if set
+    up, else email), and sends through the channel's token bucket (in
+    Redis, so the rate holds across dispatchers) and concurrency limit
+    with retries. While a batch is being sent the next
+    one is claimed and loaded, and each batch's outcomes are recorded as
+    ``NotificationDelivery`` rows in one insert.
+
+    Several dispatchers can run at once: queue pops and digest claims are
+    atomic. A dispatcher that dies after claiming a batch loses that
+    batch's digests rather than risking sending them twice.
+    """
+
+    def __init__(self, channels: Optional[Dict[NotificationChannel, Channel]] = None,
+                 session_factory=AsyncSessionLocal, redis_factory: Callable[[], Awaitable] = get_redis,
+                 queue_key: str = NUDGE_QUEUE_KEY, prefix: str = KEY_PREFIX,
+                 digest_window_seconds: Optional[float] = None, batch_size: Optional[int] = None,
+                 teams_webhook_url: Optional[str] = None):
+        self.channels = channels if channels is not None else default_channels()
+        self.session_factory = session_factory
+        self.redis_factory = redis_factory
+        self.queue_key = queue_key
+        self.prefix = prefix
+        self.digest_window_seconds = (digest_window_seconds if digest_window_seconds is not None
+                                      else settings.NOTIFY_DIGEST_WINDOW_SECONDS)
+        self.batch_size = batch_size or settings.NOTIFY_BATCH_SIZE
+        self.teams_webhook_url = teams_webhook_url or settings.TEAMS_WEBHOOK_URL
+
+    @property
+    def digests_key(self) -> str:
+        return f"{self.prefix}:digests"
+
+    @property
+    def pending_prefix(self) -> str:
+        return f"{self.prefix}:pending:"
+
+    async def collect(self, now: Optional[datetime] = None) -> int:
+        """Move every queued nudge onto its learner's pending list; returns how many moved"""
+        now = now or datetime.now(timezone.utc)
+        client = await self.redis_factory()
+        due = due_score(now) + self.digest_window_seconds
+        collected = 0
+        while True:
+            moved = await client.eval(_COLLECT, 2, self.queue_key, self.digests_key,
+                                      self.batch_size * 10, due, self.pending_prefix)
+            collected += moved
+            if moved < self.batch_size * 10:
+                return collected
+
+    async def _claim(self, now: datetime) -> List[Tuple[str, List[Nudge]]]:
+        client = await self.redis_factory()
+        claimed = await client.eval(_CLAIM, 1, self.digests_key, due_score(now), self.batch_size,
+                                    self.pending_prefix)
+        batch = []
+        for learner_id, raws in zip(claimed[::2], claimed[1::2]):
+            nudges = {}
+            for raw in raws:
+                nudge = Nudge.from_json(raw)
+                nudges[nudge.item_id] = nudge  # An item nudged twice is listed once
+            learner_id = learner_id.decode() if isinstance(learner_id, bytes) else learner_id
+            batch.append((learner_id, list(nudges.values())))
+        return batch
+
+    def resolve(self, learner_id: str, name: str, email: Optional[str],
+                preferences: Dict[str, Any]) -> Tuple[Optional[Recipient], Optional[str]]:
+        """The learner's channel and address, or why they cannot be reached"""
+        if preferences.get("notification_frequency") == "never":
+            return None, "opted out"
+        wanted = preferences.get("notification_channel", NotificationChannel.EMAIL.value)
+        if wanted == NotificationChannel.SLACK.value and NotificationChannel.SLACK in self.channels:
+            if preferences.get("slack_user_id"):
+                return Recipient(learner_id, name, email, NotificationChannel.SLACK, preferences["slack_user_id"]), None
+        if wanted == NotificationChannel.TEAMS.value and NotificationChannel.TEAMS in self.channels:
+            webhook_url = preferences.get("teams_webhook_url") or self.teams_webhook_url
+            if webhook_url:
+                return Recipient(learner_id, name, email, NotificationChannel.TEAMS, webhook_url), None
+        if NotificationChannel.EMAIL in self.channels and email:
+            return Recipient(learner_id, name, email, NotificationChannel.EMAIL, email), None
+        return None, "no channel configured"
+
+    async def _prepare(self, batch: List[Tuple[str, List[Nudge]]]):
+        """Digests to send, and outcome rows of the learners skipped"""
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                select(Learner.id, User.name, User.email, Learner.preferences)
+                .join(User, User.id == Learner.user_id)
+                .where(Learner.id.in_([learner_id for learner_id, _ in batch]))
+            )).all()
+        learners = {learner_id: (name, email, preferences or {}) for learner_id, name, email, preferences in rows}
+        digests, skipped = [], []
+        for learner_id, nudges in batch:
+            recipient, reason = (self.resolve(learner_id, *learners[learner_id]) if learner_id in learners
+                                 else (None, "learner not found"))
+            if recipient is None:
+                skipped.append({"learner_id": learner_id, "channel": None, "status": DeliveryStatus.SKIPPED,
+                                "nudge_count": len(nudges), "item_ids": [nudge.item_id for nudge in nudges],
+                                "attempts": 0, "error": reason})
+            else:
+                digests.append(render_digest(recipient, nudges))
+        return digests, skipped
+
+    async def _deliver(self, digests: List[Digest], skipped: List[Dict[str, Any]], report: DispatchReport):
+        results: List[SendResult] = await asyncio.gather(*(
+            self.channels[digest.recipient.channel].deliver(digest) for digest in digests
+        ))
+        sent_at = datetime.now(timezone.utc)
+        rows = skipped + [
+            {"learner_id": digest.recipient.learner_id, "channel": digest.recipient.channel,
+             "status": DeliveryStatus.SENT if result.sent else DeliveryStatus.FAILED,
+             "nudge_count": len(digest.item_ids), "item_ids": digest.item_ids, "attempts": result.attempts,
+             "error": result.error, "sent_at": sent_at if result.sent else None}
+            for digest, result in zip(digests, results)
+        ]
+        if rows:
+            async with self.session_factory() as db:
+                await db.execute(insert(NotificationDelivery.__table__), rows)
+                await db.commit()
+        for row in rows:
+            report.outcomes[(row["channel"], row["status"])] += 1
+            report.nudges += row["nudge_count"]
+        report.digests += len(rows)
+
+    async def dispatch(self, now: Optional[datetime] = None) -> DispatchReport:
+        """Collect the queue, then send every digest due by ``now`` (default: the current time)"""
+        started = time.perf_counter()
+        now = now or datetime.now(timezone.utc)
+        report = DispatchReport(collected=await self.collect(now))
+        sending: Optional[asyncio.Task] = None
+        try:
+            while True:
+                batch = await self._claim(now)
+                prepared = await self._prepare(batch) if batch else None
+                if sending is not None:
+                    await sending
+                    sending = None
+                if not batch:
+                    break
+                # Claim and load the next batch while this one is being sent
+                sending = asyncio.create_task(self._deliver(*prepared, report))
+        finally:
+            if sending is not None:
+                await sending
+        report.elapsed_seconds = time.perf_counter() - started
+        if report.digests:
+            logger.info("Sent %d digests covering %d nudges in %.2fs (%d failed, %d skipped)", report.digests,
+                        report.nudges, report.elapsed_seconds, report.failed, report.skipped)
+        return report
+
+    async def run(self, interval_seconds: Optional[float] = None):
+        """Dispatch every ``interval_seconds`` until cancelled; run one per notification worker"""
+        interval = interval_seconds or settings.NOTIFY_POLL_INTERVAL_SECONDS
+        while True:
+            started = time.monotonic()
+            try:
+                await self.dispatch()
+            except (RedisError, OSError) as exc:
+                logger.warning("Notification dispatch failed, retrying next tick: %s", exc)
+            except Exception:
+                logger.exception("Notification dispatch failed")
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    async def close(self):
+        for channel in self.channels.values():
+            await channel.close()
+
+
+_client: Optional[httpx.AsyncClient] = None
+_dispatcher: Optional[NotificationDispatcher] = None
+
+
+def get_notification_client() -> httpx.AsyncClient:
+    """Get the process-wide HTTP client Slack and Teams sends go through, for pooled connections"""
+    global _client
+    if _client is None or _client.is_closed:
+        connections = sum(settings.NOTIFY_CONCURRENCY.get(channel, 4) for channel in ("slack", "teams"))
+        _client = httpx.AsyncClient(
+            timeout=settings.NOTIFY_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+        )
+    return _client
+
+
+def default_channels() -> Dict[NotificationChannel, Channel]:
+    """The channels configured in settings: Slack with a bot token, Teams with a webhook, email with an SMTP host"""
+    channels: Dict[NotificationChannel, Channel] = {}
+    if settings.SLACK_BOT_TOKEN:
+        channels[NotificationChannel.SLACK] = SlackChannel(get_notification_client())
+    # Learners can bring their own webhook, so Teams is always available
+    channels[NotificationChannel.TEAMS] = TeamsChannel(get_notification_client())
+    if settings.SMTP_HOST:
+        channels[NotificationChannel.EMAIL] = EmailChannel()
+    return channels
+
+
+def get_notification_dispatcher() -> NotificationDispatcher:
+    """Get the process-wide dispatcher over the configured channels"""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = NotificationDispatcher()
+    return _dispatcher
+
+
+def set_notification_dispatcher(dispatcher: Optional[NotificationDispatcher]):
+    """Replace the process-wide dispatcher (e.g. one pointed at fake Slack/Teams/SMTP servers)"""
+    global _dispatcher
+    _dispatcher = dispatcher
@@ -0,0 +1,208 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Set, Tuple
+import asyncio
+import threading
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class FakeMessage:
+    channel: str  # "slack", "teams" or "email"
+    address: str  # Slack user ID, webhook name or email address
+    subject: str
+
+
+@dataclass
+class FakeNotificationStats:
+    requests: int = 0  # HTTP requests and SMTP transactions
+    throttled: int = 0
+    smtp_sessions: int = 0
+    connections: Set[Tuple[str, int]] = field(default_factory=set)  # Client (host, port) pairs seen
+
+
+@dataclass
+class FakeEndpoints:
+    """Where a served ``FakeNotificationServer`` listens"""
+
+    slack_api_url: str
+    teams_webhook_url: str  # Base URL; append /<name> for another webhook
+    smtp_host: str
+    smtp_port: int
+
+
+class FakeNotificationServer:
+    """Local stand-in for Slack's Web API, Teams incoming webhooks and an SMTP relay.
+
+    Slack: ``POST /api/chat.postMessage`` with the bot token, answering
+    ``{"ok": true}``. Teams: ``POST /teams/<webhook>`` with a message
+    card. SMTP: a plain ESMTP server (no TLS or auth) taking any number
+    of messages per connection. Each answer takes ``latency`` seconds, as
+    a round trip to the real service would. Every ``throttle_every``-th
+    request or SMTP recipient is turned away: 429 with a Retry-After of
+    ``retry_after`` seconds over HTTP, 451 over SMTP. Delivered messages
+    are kept in ``messages``. ``serve`` runs the HTTP side with uvicorn
+    and the SMTP side on its own event loop, each in a background thread.
+    """
+
+    def __init__(self, slack_token: str = "xoxb-fake", latency: float = 0.01, throttle_every: int = 0,
+                 retry_after: float = 0.05):
+        self.slack_token = slack_token
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.messages: List[FakeMessage] = []
+        self.stats = FakeNotificationStats()
+        self._counter = 0
+        self._lock = threading.Lock()
+        self.app = self._build_app()
+
+    def _throttled(self) -> bool:
+        if not self.throttle_every:
+            return False
+        with self._lock:
+            self._counter += 1
+            throttled = self._counter % self.throttle_every == 0
+            if throttled:
+                self.stats.throttled += 1
+        return throttled
+
+    def _record(self, message: FakeMessage):
+        with self._lock:
+            self.messages.append(message)
+
+    def received(self) -> Dict[str, int]:
+        """Messages delivered per channel"""
+        counts: Dict[str, int] = {}
+        for message in self.messages:
+            counts[message.channel] = counts.get(message.channel, 0) + 1
+        return counts
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        def seen(request: Request):
+            self.stats.requests += 1
+            if request.client is not None:
+                self.stats.connections.add((request.client.host, request.client.port))
+
+        def too_many(body) -> JSONResponse:
+            return JSONResponse(body, status_code=429, headers={"Retry-After": str(self.retry_after)})
+
+        @app.post("/api/chat.postMessage")
+        async def slack_post_message(request: Request):
+            seen(request)
+            await asyncio.sleep(self.latency)
+            if request.headers.get("Authorization") != f"Bearer {self.slack_token}":
+                return {"ok": False, "error": "invalid_auth"}
+            if self._throttled():
+                return too_many({"ok": False, "error": "ratelimited"})
+            body = await request.json()
+            if not body.get("channel"):
+                return {"ok": False, "error": "channel_not_found"}
+            self._record(FakeMessage("slack", body["channel"], body.get("text", "").split("\n", 1)[0]))
+            return {"ok": True, "channel": body["channel"], "ts": f"{len(self.messages)}.000100"}
+
+        @app.post("/teams/{webhook}")
+        async def teams_webhook(webhook: str, request: Request):
+            seen(request)
+            await asyncio.sleep(self.latency)
+            if self._throttled():
+                return too_many({"error": "Microsoft Teams endpoint returned HTTP error 429"})
+            card = await request.json()
+            self._record(FakeMessage("teams", webhook, card.get("summary", "")))
+            return JSONResponse(1)  # Incoming webhooks answer "1"
+
+        return app
+
+    async def _smtp_session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats.smtp_sessions += 1
+        peer = writer.get_extra_info("peername")
+        if peer:
+            self.stats.connections.add(tuple(peer[:2]))
+        writer.write(b"220 fake.example ESMTP\r\n")
+        recipients: List[str] = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip()
+                verb = command[:4].upper()
+                if verb == "EHLO":
+                    writer.write(b"250-fake.example\r\n250-PIPELINING\r\n250-8BITMIME\r\n250 SIZE 10485760\r\n")
+                elif verb == "HELO":
+                    writer.write(b"250 fake.example\r\n")
+                elif verb == "MAIL":
+                    recipients = []
+                    writer.write(b"250 2.1.0 OK\r\n")
+                elif verb == "RCPT":
+                    if self._throttled():
+                        writer.write(b"451 4.7.1 Too many messages, try again later\r\n")
+                    else:
+                        recipients.append(command.split(":", 1)[1].strip().strip("<>"))
+                        writer.write(b"250 2.1.5 OK\r\n")
+                elif verb == "DATA":
+                    if not recipients:
+                        writer.write(b"503 5.5.1 No valid recipients\r\n")
+                        continue
+                    writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    await writer.drain()
+                    subject = ""
+                    while True:
+                        data = await reader.readline()
+                        if not data or data == b".\r\n":
+                            break
+                        if not subject and data.lower().startswith(b"subject:"):
+                            subject = data[8:].decode(errors="replace").strip()
+                    await asyncio.sleep(self.latency)
+                    self.stats.requests += 1
+                    for recipient in recipients:
+                        self._record(FakeMessage("email", recipient, subject))
+                    recipients = []
+                    writer.write(b"250 2.0.0 Queued\r\n")
+                elif verb in ("RSET", "NOOP"):
+                    recipients = []
+                    writer.write(b"250 2.0.0 OK\r\n")
+                elif verb == "QUIT":
+                    writer.write(b"221 2.0.0 Bye\r\n")
+                    await writer.drain()
+                    break
+                else:
+                    writer.write(b"502 5.5.2 Command not recognized\r\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @contextmanager
+    def serve(self, host: str = "127.0.0.1") -> Iterator[FakeEndpoints]:
+        """Run the HTTP and SMTP servers in background threads on free ports"""
+        import uvicorn
+
+        server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=0, log_level="warning", access_log=False))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+
+        loop = asyncio.new_event_loop()
+        smtp_server = loop.run_until_complete(asyncio.start_server(self._smtp_session, host, 0))
+        smtp_thread = threading.Thread(target=loop.run_forever, daemon=True)
+        smtp_thread.start()
+        try:
+            while not server.started:
+                if not thread.is_alive():
+                    raise RuntimeError("Fake notification server did not start")
+                thread.join(0.01)
+            port = server.servers[0].sockets[0].getsockname()[1]
+            smtp_port = smtp_server.sockets[0].getsockname()[1]
+            yield FakeEndpoints(f"http://{host}:{port}/api", f"http://{host}:{port}/teams", host, smtp_port)
+        finally:
+            server.should_exit = True
+            thread.join()
+            smtp_server.close()
+            loop.call_soon_threadsafe(loop.stop)
+            smtp_thread.join()
+            loop.close()
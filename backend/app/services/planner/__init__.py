@@ -0,0 +1,19 @@
+# Learning path planning: prerequisite-aware plan solver and plan narration
+
+from .solver import PlanRequest, PlannedStep, PlanResult, PlanSolver, build_plan_steps
+from .availability import PlanAvailability
+from .service import create_learning_plan, load_mastery
+from .narration import narration_prompt, narrate_plan
+
+__all__ = [
+    'PlanRequest',
+    'PlannedStep',
+    'PlanResult',
+    'PlanSolver',
+    'build_plan_steps',
+    'PlanAvailability',
+    'create_learning_plan',
+    'load_mastery',
+    'narration_prompt',
+    'narrate_plan',
+]
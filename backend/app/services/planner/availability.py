@@ -0,0 +1,93 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+from app.models.plan import PlanStep, StepStatus
+
+
+class PlanAvailability:
+    """Which steps of a plan can be started, computed in one pass.
+
+    Dependencies come from both ``PlanStep.prerequisites`` and the inverse
+    ``PlanStep.unlocks`` lists. A prerequisite is met once its step is
+    COMPLETED; a prerequisite that is not part of the plan never is (the
+    same rule ``PlanStep.can_start`` always applied). Each step keeps a count
+    of unmet prerequisites, so completing a step only touches the steps it
+    unlocks.
+    """
+
+    def __init__(self, steps: Iterable[PlanStep]):
+        self.steps: Dict[str, PlanStep] = {step.id: step for step in steps}
+        self._dependents: Dict[str, Set[str]] = defaultdict(set)
+        self._prerequisites: Dict[str, Set[str]] = defaultdict(set)
+
+        for step in self.steps.values():
+            for prereq_id in step.prerequisites or ():
+                self._prerequisites[step.id].add(prereq_id)
+                self._dependents[prereq_id].add(step.id)
+            for unlocked_id in step.unlocks or ():
+                if unlocked_id in self.steps:
+                    self._prerequisites[unlocked_id].add(step.id)
+                    self._dependents[step.id].add(unlocked_id)
+
+        self._unmet: Dict[str, int] = {}
+        for step_id in self.steps:
+            self._unmet[step_id] = sum(
+                1 for prereq_id in self._prerequisites.get(step_id, ())
+                if not self._is_met(prereq_id)
+            )
+
+    def __len__(self):
+        return len(self.steps)
+
+    @classmethod
+    def load(cls, db_session, plan_id: str):
+        """Build availability for a plan from a single steps query.
+
+        Takes a sync session; from async code use
+        ``await db.run_sync(lambda session: PlanAvailability.load(session, plan_id))``.
+        """
+        return cls(PlanStep.get_by_plan(db_session, plan_id))
+
+    def _is_met(self, step_id: str) -> bool:
+        step = self.steps.get(step_id)
+        return step is not None and step.status == StepStatus.COMPLETED
+
+    def can_start(self, step_id: str) -> bool:
+        """Check if all prerequisites of a step are completed"""
+        return self._unmet.get(step_id, 0) == 0
+
+    def unmet_prerequisites(self, step_id: str) -> List[str]:
+        """Get IDs of prerequisites still blocking a step"""
+        return sorted(
+            prereq_id for prereq_id in self._prerequisites.get(step_id, ())
+            if not self._is_met(prereq_id)
+        )
+
+    def available_steps(self) -> List[PlanStep]:
+        """Get PENDING steps whose prerequisites are all met, ordered by sequence"""
+        return sorted(
+            (
+                step for step in self.steps.values()
+                if step.status == StepStatus.PENDING and self._unmet[step.id] == 0
+            ),
+            key=lambda step: step.sequence,
+        )
+
+    def mark_completed(self, step_id: str) -> List[PlanStep]:
+        """Complete a step and return the PENDING steps it newly unlocks"""
+        step = self.steps[step_id]
+        if step.status == StepStatus.COMPLETED:
+            return []
+        step.complete()
+        if step.status != StepStatus.COMPLETED:
+            return []
+
+        unlocked = []
+        for dependent_id in self._dependents.get(step_id, ()):
+            if dependent_id not in self._unmet:
+                continue
+            self._unmet[dependent_id] -= 1
+            dependent = self.steps[dependent_id]
+            if self._unmet[dependent_id] == 0 and dependent.status == StepStatus.PENDING:
+                unlocked.append(dependent)
+        return sorted(unlocked, key=lambda s: s.sequence)
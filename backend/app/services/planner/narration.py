@@ -0,0 +1,40 @@
+from typing import Optional, Sequence
+import logging
+
+from app.models.plan import LearningPlan, PlanStep
+from app.services.llm import LLMGateway, LLMRequest, get_llm_gateway
+
+logger = logging.getLogger(__name__)
+
+# Steps described to the model; longer plans are summarized by their start
+MAX_NARRATED_STEPS = 20
+
+
+def narration_prompt(plan: LearningPlan, steps: Sequence[PlanStep]) -> str:
+    """Prompt asking for a short explanation of the plan's order and pacing.
+
+    Only the objective and the ordered steps with their effort go in, not
+    dates or learner details, so learners given the same plan share one
+    cached narration.
+    """
+    lines = [f"{step.sequence}. {step.title} ({step.effort_min} min)" for step in steps[:MAX_NARRATED_STEPS]]
+    if len(steps) > MAX_NARRATED_STEPS:
+        lines.append(f"... and {len(steps) - MAX_NARRATED_STEPS} more steps")
+    return (
+        f"Explain in a few sentences why this learning plan is ordered the way it is "
+        f"and how to pace it. Objective: {plan.objective}\n" + "\n".join(lines)
+    )
+
+
+async def narrate_plan(tenant_id: str, plan: LearningPlan, steps: Sequence[PlanStep],
+                       gateway: Optional[LLMGateway] = None) -> Optional[str]:
+    """Explain a solved plan through the LLM gateway; None if the model call fails"""
+    if not steps:
+        return None
+    gateway = gateway or get_llm_gateway()
+    try:
+        response = await gateway.complete(LLMRequest(tenant_id, narration_prompt(plan, steps)))
+    except Exception:
+        logger.exception("Failed to narrate plan %s", plan.id)
+        return None
+    return response.text
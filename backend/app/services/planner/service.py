@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.assessment import Assessment, AssessmentAttempt, AttemptStatus
+from app.models.learner import Learner
+from app.models.plan import LearningPlan, PlanStatus, PlanStep
+from app.models.skill import Skill
+from app.services.graph import reachability_registry
+from .solver import PlanRequest, PlanResult, PlanSolver, build_plan_steps
+
+
+async def load_mastery(db: AsyncSession, learner_id: str) -> Dict[str, float]:
+    """Get the best completed-attempt mastery probability per skill for a learner"""
+    result = await db.execute(
+        select(Assessment.skill_id, func.max(AssessmentAttempt.mastery_prob))
+        .join(AssessmentAttempt, AssessmentAttempt.assessment_id == Assessment.id)
+        .where(
+            AssessmentAttempt.learner_id == learner_id,
+            AssessmentAttempt.status == AttemptStatus.COMPLETED,
+        )
+        .group_by(Assessment.skill_id)
+    )
+    return {skill_id: mastery for skill_id, mastery in result.all()}
+
+
+def _utc(value: datetime) -> datetime:
+    """Aware UTC datetime; naive values are taken as UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+async def create_learning_plan(
+    db: AsyncSession,
+    learner: Learner,
+    title: str,
+    objective: str,
+    target_skill_ids: List[str],
+    target_date: datetime,
+    start_date: Optional[datetime] = None,
+    time_budget_hours: Optional[float] = None,
+) -> Tuple[LearningPlan, List[PlanStep], PlanResult]:
+    """Solve and persist a plan for a learner (the caller commits)"""
+    if time_budget_hours is None:
+        time_budget_hours = (learner.goals or {}).get("time_budget_hours")
+
+    # The solver subtracts the two, so both must be aware
+    target_date = _utc(target_date)
+    start_date = _utc(start_date) if start_date is not None else datetime.now(timezone.utc)
+
+    index = await reachability_registry.get()
+    request = PlanRequest(
+        target_skill_ids=target_skill_ids,
+        start_date=start_date,
+        target_date=target_date,
+        time_budget_hours=time_budget_hours,
+        mastery=await load_mastery(db, learner.id),
+    )
+    result = PlanSolver(index).solve(request)
+
+    skill_ids = [step.skill_id for step in result.steps]
+    labels = {}
+    if skill_ids:
+        rows = await db.execute(select(Skill.id, Skill.label).where(Skill.id.in_(skill_ids)))
+        labels = dict(rows.all())
+
+    plan = LearningPlan(
+        learner_id=learner.id,
+        title=title,
+        objective=objective,
+        status=PlanStatus.DRAFT,
+        total_hours=-(-result.total_effort_min // 60),
+        completed_hours=0,
+        start_date=request.start_date,
+        target_date=target_date,
+    )
+    steps = build_plan_steps(plan, result, labels)
+    db.add(plan)
+    db.add_all(steps)
+    return plan, steps, result
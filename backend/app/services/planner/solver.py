@@ -0,0 +1,182 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional
+import heapq
+import math
+import uuid
+
+from app.models.plan import LearningPlan, PlanStep, StepKind, StepStatus
+from app.services.graph import ReachabilityIndex
+
+# Skills at or above this mastery probability are treated as already known
+MASTERY_THRESHOLD = 0.8
+
+# Effort floor for a step, and the default for skills without an estimate
+MIN_STEP_MINUTES = 15
+DEFAULT_SKILL_MINUTES = 60
+
+
+@dataclass
+class PlanRequest:
+    """Constraints and learner state for a plan"""
+
+    target_skill_ids: List[str]
+    start_date: datetime
+    target_date: datetime
+    time_budget_hours: Optional[float] = None  # Study hours per week; None spreads work up to target_date
+    mastery: Mapping[str, float] = field(default_factory=dict)  # skill_id -> mastery probability
+
+
+@dataclass
+class PlannedStep:
+    """One skill in the solved plan, referencing other skills by ID"""
+
+    skill_id: str
+    sequence: int
+    effort_min: int
+    due_at: datetime
+    prerequisites: List[str]
+    unlocks: List[str]
+
+
+@dataclass
+class PlanResult:
+    """Ordered steps plus a feasibility report against the constraints"""
+
+    steps: List[PlannedStep]
+    total_effort_min: int
+    projected_completion: datetime
+    feasible: bool
+    required_weekly_hours: float
+    known_skill_ids: List[str]
+    unknown_skill_ids: List[str]
+
+
+class PlanSolver:
+    """Deterministic prerequisite-aware plan solver.
+
+    Resolves the prerequisite closure of the targets (cut at skills the
+    learner already masters), orders it topologically, preferring easier and
+    shorter skills whenever several are available, and lays the effort out
+    against the weekly time budget. No LLM is involved; narration of the
+    result is a separate concern.
+    """
+
+    def __init__(self, index: ReachabilityIndex, mastery_threshold: float = MASTERY_THRESHOLD):
+        self.index = index
+        self.graph = index.graph
+        self.mastery_threshold = mastery_threshold
+
+    def effort_minutes(self, node: int, mastery: float = 0.0) -> int:
+        """Estimate remaining effort for a skill, discounted by partial mastery"""
+        hours = self.graph.estimated_hours[node]
+        minutes = hours * 60 if hours else DEFAULT_SKILL_MINUTES
+        return max(MIN_STEP_MINUTES, int(math.ceil(minutes * (1.0 - mastery))))
+
+    def order(self, closure: Iterable[int]) -> List[int]:
+        """Topologically order a closure, cheapest available skill first"""
+        graph, index = self.graph, self.index
+        members = set(closure)
+        in_degree = {node: len(index.parent_indices(node) & members) for node in members}
+
+        def cost(node):
+            return (graph.difficulty[node], graph.estimated_hours[node], graph.skill_ids[node], node)
+
+        ready = [cost(node) for node, degree in in_degree.items() if degree == 0]
+        heapq.heapify(ready)
+        ordered = []
+        while ready:
+            node = heapq.heappop(ready)[-1]
+            ordered.append(node)
+            for child in index.child_indices(node):
+                if child in in_degree:
+                    in_degree[child] -= 1
+                    if in_degree[child] == 0:
+                        heapq.heappush(ready, cost(child))
+        return ordered
+
+    def solve(self, request: PlanRequest) -> PlanResult:
+        """Produce an ordered, scheduled plan for a request"""
+        graph, index = self.graph, self.index
+        mastery = request.mastery
+
+        targets, unknown = [], []
+        for skill_id in request.target_skill_ids:
+            node = graph.index_of(skill_id)
+            if node is None:
+                unknown.append(skill_id)
+            else:
+                targets.append(node)
+
+        known = [
+            node for node in (graph.index_of(skill_id) for skill_id, prob in mastery.items()
+                              if prob >= self.mastery_threshold)
+            if node is not None
+        ]
+        closure = index.closure_indices(targets, known)
+        ordered = self.order(closure)
+
+        efforts = [self.effort_minutes(node, mastery.get(graph.skill_ids[node], 0.0)) for node in ordered]
+        total_effort = sum(efforts)
+
+        start, deadline = request.start_date, request.target_date
+        available_days = max((deadline - start).total_seconds() / 86400, 1.0)
+        if request.time_budget_hours:
+            minutes_per_day = request.time_budget_hours * 60 / 7
+        else:
+            minutes_per_day = max(total_effort, 1) / available_days
+
+        steps = []
+        elapsed = 0
+        skill_ids = graph.skill_ids
+        for sequence, (node, effort) in enumerate(zip(ordered, efforts), start=1):
+            elapsed += effort
+            steps.append(PlannedStep(
+                skill_id=skill_ids[node],
+                sequence=sequence,
+                effort_min=effort,
+                due_at=start + timedelta(days=elapsed / minutes_per_day),
+                prerequisites=sorted(skill_ids[p] for p in index.parent_indices(node) if p in closure),
+                unlocks=sorted(skill_ids[c] for c in index.child_indices(node) if c in closure),
+            ))
+
+        projected = steps[-1].due_at if steps else start
+        return PlanResult(
+            steps=steps,
+            total_effort_min=total_effort,
+            projected_completion=projected,
+            feasible=projected <= deadline,
+            required_weekly_hours=round(total_effort / 60 / available_days * 7, 1),
+            known_skill_ids=sorted(skill_ids[node] for node in known),
+            unknown_skill_ids=unknown,
+        )
+
+
+def build_plan_steps(plan: LearningPlan, result: PlanResult, labels: Optional[Dict[str, str]] = None) -> List[PlanStep]:
+    """Create PlanStep rows for a solved plan.
+
+    Step IDs are derived from the plan ID and skill ID so the same plan
+    always yields the same steps and prerequisite/unlock references.
+    """
+    if plan.id is None:
+        plan.id = str(uuid.uuid4())
+    namespace = uuid.UUID(plan.id)
+    step_ids = {step.skill_id: str(uuid.uuid5(namespace, step.skill_id)) for step in result.steps}
+    labels = labels or {}
+
+    return [
+        PlanStep(
+            id=step_ids[step.skill_id],
+            plan_id=plan.id,
+            skill_id=step.skill_id,
+            kind=StepKind.LEARNING,
+            title=labels.get(step.skill_id, step.skill_id),
+            effort_min=step.effort_min,
+            sequence=step.sequence,
+            status=StepStatus.PENDING,
+            due_at=step.due_at,
+            prerequisites=[step_ids[skill_id] for skill_id in step.prerequisites],
+            unlocks=[step_ids[skill_id] for skill_id in step.unlocks],
+        )
+        for step in result.steps
+    ]
@@ -0,0 +1,39 @@
+# Content retrieval: hybrid lexical + vector search over the content catalog
+
+from .text import normalize_text, tokenize, content_tokens
+from .embeddings import Embedder, HashingEmbedder
+from .embedding_cache import embedding_key, EmbeddingCache, RedisEmbeddingStore, CachedEmbedder
+from .search import (
+    SearchFilters,
+    SearchHit,
+    SearchEngine,
+    HybridSearchEngine,
+    ContentSearchRegistry,
+    content_embedder,
+    content_search_registry,
+    embedding_text,
+    get_content_search_engine,
+    search_changed_on_commit,
+)
+
+__all__ = [
+    'normalize_text',
+    'tokenize',
+    'content_tokens',
+    'Embedder',
+    'HashingEmbedder',
+    'embedding_key',
+    'EmbeddingCache',
+    'RedisEmbeddingStore',
+    'CachedEmbedder',
+    'SearchFilters',
+    'SearchHit',
+    'SearchEngine',
+    'HybridSearchEngine',
+    'ContentSearchRegistry',
+    'content_embedder',
+    'content_search_registry',
+    'embedding_text',
+    'get_content_search_engine',
+    'search_changed_on_commit',
+]
@@ -0,0 +1,274 @@
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import logging
+import threading
+
+import numpy as np
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_binary_redis, get_sync_redis
+from .embeddings import Embedder
+from .text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "embedding"
+
+# Keys per MGET / pipeline round trip to Redis
+REDIS_CHUNK_SIZE = 1_000
+
+# Vectors are stored little-endian float32 whatever the host byte order
+_VECTOR_DTYPE = np.dtype("<f4")
+
+
+def embedding_key(model: str, text: str) -> bytes:
+    """Content address of a text's embedding: 16-byte BLAKE2b of model and normalized text"""
+    return hashlib.blake2b(f"{model}\0{normalize_text(text)}".encode(), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """Thread-safe in-process LRU of embedding vectors.
+
+    Vectors live in one preallocated float32 matrix that grows up to
+    ``max_entries`` rows; the LRU order only maps keys to row slots, so a
+    batch lookup or store is one fancy-indexing pass over the matrix and
+    the per-entry overhead is a dict slot rather than a numpy object.
+    """
+
+    def __init__(self, dimension: int, max_entries: Optional[int] = None):
+        self.dimension = dimension
+        self.max_entries = max_entries if max_entries is not None else settings.EMBEDDING_CACHE_MAX_ENTRIES
+        self._slots: "OrderedDict[bytes, int]" = OrderedDict()
+        self._vectors = np.zeros((min(self.max_entries, 1024), dimension), dtype=np.float32)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    @property
+    def nbytes(self) -> int:
+        return self._vectors.nbytes
+
+    def lookup(self, keys: Sequence[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+        """Cached vectors for the keys (zero rows for misses) and a mask of which were found"""
+        found = np.zeros(len(keys), dtype=bool)
+        positions, slots = [], []
+        with self._lock:
+            cached = self._slots
+            for position, key in enumerate(keys):
+                slot = cached.get(key)
+                if slot is not None:
+                    cached.move_to_end(key)
+                    positions.append(position)
+                    slots.append(slot)
+            vectors = np.zeros((len(keys), self.dimension), dtype=np.float32)
+            if slots:
+                vectors[positions] = self._vectors[slots]
+                found[positions] = True
+            self.hits += len(slots)
+            self.misses += len(keys) - len(slots)
+        return vectors, found
+
+    def store(self, keys: Sequence[bytes], vectors: np.ndarray):
+        """Insert or refresh vectors, evicting least recently used entries when full"""
+        if self.max_entries <= 0 or not len(keys):
+            return
+        if len(keys) > self.max_entries:
+            keys, vectors = keys[-self.max_entries:], vectors[-self.max_entries:]
+        with self._lock:
+            cached = self._slots
+            slots = []
+            for key in keys:
+                slot = cached.get(key)
+                if slot is not None:
+                    cached.move_to_end(key)
+                elif len(cached) < self.max_entries:
+                    slot = len(cached)
+                    cached[key] = slot
+                else:
+                    _, slot = cached.popitem(last=False)
+                    cached[key] = slot
+                slots.append(slot)
+            needed = len(cached)
+            if needed > len(self._vectors):
+                grown = np.zeros((min(max(needed, 2 * len(self._vectors)), self.max_entries), self.dimension),
+                                 dtype=np.float32)
+                grown[:len(self._vectors)] = self._vectors
+                self._vectors = grown
+            self._vectors[slots] = vectors
+
+    def clear(self):
+        with self._lock:
+            self._slots.clear()
+
+
+class RedisEmbeddingStore:
+    """Shared embedding tier in Redis, vectors stored as raw float32 bytes.
+
+    Redis failures are logged and treated as misses so embedding keeps
+    working (only slower) when Redis is unavailable. The ``_blocking``
+    variants use the blocking client, for code on worker threads.
+    """
+
+    def __init__(self, dimension: int, redis_factory: Callable[[], Awaitable] = get_binary_redis,
+                 ttl_seconds: Optional[int] = None, prefix: str = REDIS_KEY_PREFIX,
+                 sync_redis_factory: Callable = get_sync_redis):
+        self.dimension = dimension
+        self.redis_factory = redis_factory
+        self.sync_redis_factory = sync_redis_factory
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.EMBEDDING_CACHE_TTL_SECONDS
+        self.prefix = prefix
+
+    def _redis_key(self, key: bytes) -> str:
+        return f"{self.prefix}:{key.hex()}"
+
+    def _decode(self, keys: Sequence[bytes], values: Sequence[Optional[bytes]], found: Dict[bytes, np.ndarray]):
+        expected = self.dimension * _VECTOR_DTYPE.itemsize
+        for key, value in zip(keys, values):
+            if value is not None and len(value) == expected:
+                found[key] = np.frombuffer(value, dtype=_VECTOR_DTYPE)
+
+    async def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        """Vectors stored for the keys; missing or malformed entries are left out"""
+        found: Dict[bytes, np.ndarray] = {}
+        try:
+            client = await self.redis_factory()
+            for start in range(0, len(keys), REDIS_CHUNK_SIZE):
+                chunk = keys[start:start + REDIS_CHUNK_SIZE]
+                self._decode(chunk, await client.mget([self._redis_key(key) for key in chunk]), found)
+        except RedisError as exc:
+            logger.warning("Embedding cache read failed, treating as misses: %s", exc)
+        return found
+
+    def get_many_blocking(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        """Same as ``get_many`` for code running outside the event loop"""
+        found: Dict[bytes, np.ndarray] = {}
+        try:
+            client = self.sync_redis_factory()
+            for start in range(0, len(keys), REDIS_CHUNK_SIZE):
+                chunk = keys[start:start + REDIS_CHUNK_SIZE]
+                self._decode(chunk, client.mget([self._redis_key(key) for key in chunk]), found)
+        except RedisError as exc:
+            logger.warning("Embedding cache read failed, treating as misses: %s", exc)
+        return found
+
+    async def set_many(self, keys: Sequence[bytes], vectors: np.ndarray):
+        packed = np.ascontiguousarray(vectors, dtype=_VECTOR_DTYPE)
+        try:
+            client = await self.redis_factory()
+            for start in range(0, len(keys), REDIS_CHUNK_SIZE):
+                pipeline = client.pipeline(transaction=False)
+                for offset, key in enumerate(keys[start:start + REDIS_CHUNK_SIZE], start=start):
+                    pipeline.set(self._redis_key(key), packed[offset].tobytes(), ex=self.ttl_seconds or None)
+                await pipeline.execute()
+        except RedisError as exc:
+            logger.warning("Embedding cache write failed: %s", exc)
+
+    def set_many_blocking(self, keys: Sequence[bytes], vectors: np.ndarray):
+        """Same as ``set_many`` for code running outside the event loop"""
+        packed = np.ascontiguousarray(vectors, dtype=_VECTOR_DTYPE)
+        try:
+            client = self.sync_redis_factory()
+            for start in range(0, len(keys), REDIS_CHUNK_SIZE):
+                pipeline = client.pipeline(transaction=False)
+                for offset, key in enumerate(keys[start:start + REDIS_CHUNK_SIZE], start=start):
+                    pipeline.set(self._redis_key(key), packed[offset].tobytes(), ex=self.ttl_seconds or None)
+                pipeline.execute()
+        except RedisError as exc:
+            logger.warning("Embedding cache write failed: %s", exc)
+
+
+class CachedEmbedder:
+    """Embedder wrapper with a content-addressed two-tier cache.
+
+    Texts are keyed by ``embedding_key(model, text)``, so an unchanged text
+    is never sent to the model twice. ``embed`` is synchronous and uses the
+    in-process LRU only, which lets it stand in for the wrapped embedder
+    anywhere (such as query embedding on the event loop); ``embed_async``
+    and ``embed_blocking`` (for worker threads, such as the search index
+    build) also read and fill the shared Redis tier, so a restarted or new
+    worker warms its LRU from Redis instead of the model. Misses are
+    deduplicated and sent to the model in batches of ``batch_size`` texts.
+    """
+
+    def __init__(self, embedder: Embedder, cache: Optional[EmbeddingCache] = None,
+                 store: Optional[RedisEmbeddingStore] = None, batch_size: Optional[int] = None):
+        self.embedder = embedder
+        self.model = embedder.model
+        self.dimension = embedder.dimension
+        self.cache = cache if cache is not None else EmbeddingCache(embedder.dimension)
+        self.store = store
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.computed = 0  # Texts sent to the model
+
+    def keys(self, texts: Sequence[str]) -> List[bytes]:
+        model = self.model
+        return [embedding_key(model, text) for text in texts]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        keys = self.keys(texts)
+        vectors, found = self.cache.lookup(keys)
+        if not found.all():
+            self._compute(texts, keys, vectors, found)
+        return vectors
+
+    async def embed_async(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed through the in-process cache, then Redis, then the model"""
+        keys = self.keys(texts)
+        vectors, found = self.cache.lookup(keys)
+        if self.store is not None and not found.all():
+            missing = np.flatnonzero(~found)
+            shared = await self.store.get_many([keys[position] for position in missing])
+            self._fill(keys, missing, shared, vectors, found)
+        if not found.all():
+            computed_keys, computed = self._compute(texts, keys, vectors, found)
+            if self.store is not None:
+                await self.store.set_many(computed_keys, computed)
+        return vectors
+
+    def embed_blocking(self, texts: Sequence[str]) -> np.ndarray:
+        """Same as ``embed_async`` for code running outside the event loop"""
+        keys = self.keys(texts)
+        vectors, found = self.cache.lookup(keys)
+        if self.store is not None and not found.all():
+            missing = np.flatnonzero(~found)
+            shared = self.store.get_many_blocking([keys[position] for position in missing])
+            self._fill(keys, missing, shared, vectors, found)
+        if not found.all():
+            computed_keys, computed = self._compute(texts, keys, vectors, found)
+            if self.store is not None:
+                self.store.set_many_blocking(computed_keys, computed)
+        return vectors
+
+    def _fill(self, keys: List[bytes], missing: np.ndarray, shared: Dict[bytes, np.ndarray], vectors: np.ndarray,
+              found: np.ndarray):
+        """Fill in vectors found in the shared tier and keep them in the in-process cache"""
+        if shared:
+            positions = [position for position in missing.tolist() if keys[position] in shared]
+            vectors[positions] = np.vstack([shared[keys[position]] for position in positions])
+            found[positions] = True
+            self.cache.store([keys[position] for position in positions], vectors[positions])
+
+    def _compute(self, texts: Sequence[str], keys: List[bytes], vectors: np.ndarray,
+                 found: np.ndarray) -> Tuple[List[bytes], np.ndarray]:
+        """Embed the distinct missing texts in batches, fill them in and cache them"""
+        positions_by_key: Dict[bytes, List[int]] = {}
+        for position in np.flatnonzero(~found).tolist():
+            positions_by_key.setdefault(keys[position], []).append(position)
+        unique_keys = list(positions_by_key)
+        unique_texts = [texts[positions_by_key[key][0]] for key in unique_keys]
+
+        computed = np.vstack([
+            self.embedder.embed(unique_texts[start:start + self.batch_size])
+            for start in range(0, len(unique_texts), self.batch_size)
+        ]).astype(np.float32, copy=False)
+        self.computed += len(unique_texts)
+
+        for row, key in enumerate(unique_keys):
+            vectors[positions_by_key[key]] = computed[row]
+        self.cache.store(unique_keys, computed)
+        return unique_keys, computed
@@ -0,0 +1,64 @@
+from array import array
+from typing import Dict, List, Protocol, Sequence, Tuple
+import zlib
+
+import numpy as np
+
+from .text import tokenize
+
+LOCAL_EMBEDDING_DIMENSION = 64
+
+# Hashed features remembered per embedder; catalog vocabularies are small
+FEATURE_CACHE_SIZE = 200_000
+
+
+class Embedder(Protocol):
+    """Turns texts into L2-normalised float32 vectors"""
+
+    model: str
+    dimension: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        ...
+
+
+class HashingEmbedder:
+    """Deterministic offline embedder used in place of a remote model.
+
+    Tokens and token bigrams are hashed into signed buckets, so texts that
+    share vocabulary land close together. It has no notion of meaning, but
+    it is fast, reproducible and needs no network access, which is what
+    tests, benchmarks and offline deployments need.
+    """
+
+    def __init__(self, dimension: int = LOCAL_EMBEDDING_DIMENSION, model: str = "local-hashing-v1"):
+        self.dimension = dimension
+        self.model = model
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            value = zlib.crc32(feature.encode())
+            bucket = (value % self.dimension, 1.0 if value & 0x80000000 else -1.0)
+            if len(self._buckets) < FEATURE_CACHE_SIZE:
+                self._buckets[feature] = bucket
+        return bucket
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        rows, buckets, signs = array("i"), array("i"), array("f")
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features: List[str] = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                bucket, sign = self._bucket(feature)
+                rows.append(row)
+                buckets.append(bucket)
+                signs.append(sign)
+
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        np.add.at(vectors, (np.frombuffer(rows, dtype=np.int32), np.frombuffer(buckets, dtype=np.int32)),
+                  np.frombuffer(signs, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
@@ -0,0 +1,484 @@
+from array import array
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+import logging
+import time
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.background import BackgroundBuild
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.content import ContentItem, ContentType, LicenseType
+from .embedding_cache import CachedEmbedder, RedisEmbeddingStore
+from .embeddings import LOCAL_EMBEDDING_DIMENSION, Embedder, HashingEmbedder
+from .text import content_tokens, tokenize
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Reciprocal rank fusion: constant and how deep each ranking is read
+RRF_K = 60
+RRF_DEPTH = 100
+
+# Lexical pass: postings are read in impact order, in blocks, until each
+# query term has yielded this many filtered candidates per ranked result
+POSTING_BLOCK = 4096
+LEXICAL_CANDIDATE_FACTOR = 4
+
+# Vector pass: catalogs of at least IVF_MIN_ITEMS are clustered into
+# ~sqrt(N) inverted lists and a query scores the IVF_PROBES closest lists;
+# filters matching at most EXACT_VECTOR_CANDIDATES items are scored exactly
+IVF_MIN_ITEMS = 50_000
+IVF_PROBES = 16
+IVF_TRAIN_ITEMS_PER_LIST = 64
+IVF_TRAIN_ITERATIONS = 6
+EXACT_VECTOR_CANDIDATES = 20_000
+
+LICENSES = list(LicenseType)
+CONTENT_TYPES = list(ContentType)
+
+ContentRow = Tuple[str, str, Optional[str], Sequence[str], ContentType, LicenseType, str, str, int, float]
+
+
+def embedding_text(title: str, description: Optional[str], tags: Sequence[str]) -> str:
+    """Text a content item is embedded from"""
+    return f"{title} {' '.join(tags or ())} {description or ''}"
+
+
+@dataclass
+class SearchFilters:
+    """Hard constraints applied before ranking"""
+
+    licenses: List[LicenseType] = field(default_factory=list)
+    types: List[ContentType] = field(default_factory=list)
+    languages: List[str] = field(default_factory=list)
+    levels: List[str] = field(default_factory=list)
+    min_duration_min: Optional[int] = None
+    max_duration_min: Optional[int] = None
+    max_cost: Optional[float] = None
+
+
+@dataclass
+class SearchHit:
+    """A ranked content item with the ranks that produced its fused score"""
+
+    item_id: str
+    score: float
+    lexical_rank: Optional[int] = None
+    vector_rank: Optional[int] = None
+
+
+class SearchEngine(Protocol):
+    """Interface for content search backends"""
+
+    built_at: float  # time.monotonic() when the engine was built
+
+    def __len__(self) -> int:
+        ...
+
+    def search(self, query: str, filters: Optional[SearchFilters] = None, limit: int = 20) -> List[SearchHit]:
+        ...
+
+
+class HybridSearchEngine:
+    """In-process hybrid BM25 + dense vector search over active content items.
+
+    Items live in column arrays: BM25 term weights precomputed per posting
+    (CSR by term, with an impact-ordered permutation), an embedding matrix
+    grouped into IVF lists, and dictionary-encoded filter columns. A query
+    builds one boolean filter mask, only ranks masked-in items on both
+    signals and fuses the two rankings with reciprocal rank fusion.
+    """
+
+    def __init__(self, rows: Iterable[ContentRow], embedder: Optional[Embedder] = None,
+                 batch_size: int = 10_000, embed: Optional[Callable[[Sequence[str]], np.ndarray]] = None):
+        self.embedder = embedder or HashingEmbedder()
+        self.built_at = time.monotonic()
+        # Catalog texts may be embedded differently from queries (e.g. through a shared cache tier)
+        embed = embed or self.embedder.embed
+
+        item_ids: List[str] = []
+        term_ids: Dict[str, int] = {}
+        posting_terms, posting_docs = array("i"), array("i")
+        doc_lengths = array("i")
+        types, licenses, durations, costs = array("b"), array("b"), array("i"), array("f")
+        languages, levels = array("h"), array("h")
+        self._languages: Dict[str, int] = {}
+        self._levels: Dict[str, int] = {}
+        vectors, texts = [], []
+
+        for doc, (item_id, title, description, tags, type_, license_, language, level,
+                  duration_min, cost) in enumerate(rows):
+            item_ids.append(item_id)
+            tokens = content_tokens(title, description, tags)
+            doc_lengths.append(len(tokens))
+            for token in tokens:
+                posting_terms.append(term_ids.setdefault(token, len(term_ids)))
+                posting_docs.append(doc)
+            types.append(CONTENT_TYPES.index(type_))
+            licenses.append(LICENSES.index(license_))
+            languages.append(self._languages.setdefault(language, len(self._languages)))
+            levels.append(self._levels.setdefault(level, len(self._levels)))
+            durations.append(duration_min or 0)
+            costs.append(cost or 0.0)
+
+            texts.append(embedding_text(title, description, tags))
+            if len(texts) == batch_size:
+                vectors.append(embed(texts))
+                texts = []
+        if texts:
+            vectors.append(embed(texts))
+
+        self.item_ids = item_ids
+        self._term_ids = term_ids
+        self._types = np.frombuffer(types, dtype=np.int8)
+        self._licenses = np.frombuffer(licenses, dtype=np.int8)
+        self._language_codes = np.frombuffer(languages, dtype=np.int16)
+        self._level_codes = np.frombuffer(levels, dtype=np.int16)
+        self._durations = np.frombuffer(durations, dtype=np.int32)
+        self._costs = np.frombuffer(costs, dtype=np.float32)
+        self._build_postings(
+            np.frombuffer(posting_terms, dtype=np.int32),
+            np.frombuffer(posting_docs, dtype=np.int32),
+            np.frombuffer(doc_lengths, dtype=np.int32),
+        )
+        self._build_vector_lists(
+            np.vstack(vectors) if vectors else np.zeros((0, self.embedder.dimension), dtype=np.float32)
+        )
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    # Construction helpers
+
+    def _build_postings(self, terms: np.ndarray, docs: np.ndarray, doc_lengths: np.ndarray):
+        """Collapse (term, doc) occurrences into BM25-weighted CSR postings"""
+        num_docs, num_terms = max(len(self.item_ids), 1), len(self._term_ids)
+        keys, tf = np.unique(terms.astype(np.int64) * num_docs + docs, return_counts=True)
+        posting_terms = keys // num_docs
+        self._posting_docs = (keys % num_docs).astype(np.int32)
+        self._offsets = np.searchsorted(posting_terms, np.arange(num_terms + 1)).astype(np.int64)
+
+        df = np.diff(self._offsets).astype(np.float32)
+        idf = np.log1p((num_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 1.0
+        lengths = doc_lengths[self._posting_docs].astype(np.float32)
+        tf = tf.astype(np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(avg_length, 1.0))
+        self._weights = (idf[posting_terms] * tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32)
+
+        # Within each term, postings ordered by descending weight
+        self._impact_order = np.lexsort((-self._weights, posting_terms)).astype(np.int32)
+
+    def _build_vector_lists(self, vectors: np.ndarray):
+        """Cluster vectors into IVF lists and store them grouped by list"""
+        num_items = len(vectors)
+        if num_items < IVF_MIN_ITEMS:
+            centroids = np.zeros((1, vectors.shape[1]), dtype=np.float32)
+            assignment = np.zeros(num_items, dtype=np.int64)
+        else:
+            centroids = _train_centroids(vectors, int(np.sqrt(num_items)))
+            assignment = np.concatenate([
+                np.argmax(vectors[start:start + 65_536] @ centroids.T, axis=1)
+                for start in range(0, num_items, 65_536)
+            ])
+
+        order = np.argsort(assignment, kind="stable").astype(np.int32)
+        self._centroids = centroids
+        self._list_offsets = np.searchsorted(assignment[order], np.arange(len(centroids) + 1))
+        self._list_items = order
+        self._vectors = vectors[order]
+        self._vector_rows = np.empty(num_items, dtype=np.int32)
+        self._vector_rows[order] = np.arange(num_items, dtype=np.int32)
+
+    @classmethod
+    def load(cls, db_session, embedder: Optional[Embedder] = None,
+             embed: Optional[Callable[[Sequence[str]], np.ndarray]] = None):
+        """Build the engine from active canonical content items, streaming rows in batches"""
+        rows = db_session.query(
+            ContentItem.id, ContentItem.title, ContentItem.description, ContentItem.tags,
+            ContentItem.type, ContentItem.license, ContentItem.language, ContentItem.level,
+            ContentItem.duration_min, ContentItem.cost,
+        ).filter(
+            ContentItem.is_active == True,
+            ContentItem.canonical_id.is_(None),  # Near-duplicates are represented by their canonical item
+        ).yield_per(10_000)
+        return cls(rows, embedder=embedder, embed=embed)
+
+    # Query evaluation
+
+    def filter_mask(self, filters: Optional[SearchFilters]) -> Optional[np.ndarray]:
+        """Boolean mask of items passing the filters, or None when unfiltered"""
+        if filters is None:
+            return None
+        mask = None
+
+        def narrow(condition):
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        if filters.licenses:
+            narrow(_allowed(self._licenses, [LICENSES.index(value) for value in filters.licenses],
+                            len(LICENSES)))
+        if filters.types:
+            narrow(_allowed(self._types, [CONTENT_TYPES.index(value) for value in filters.types],
+                            len(CONTENT_TYPES)))
+        if filters.languages:
+            codes = [self._languages[value] for value in filters.languages if value in self._languages]
+            narrow(_allowed(self._language_codes, codes, len(self._languages)))
+        if filters.levels:
+            codes = [self._levels[value] for value in filters.levels if value in self._levels]
+            narrow(_allowed(self._level_codes, codes, len(self._levels)))
+        if filters.min_duration_min is not None:
+            narrow(self._durations >= filters.min_duration_min)
+        if filters.max_duration_min is not None:
+            narrow(self._durations <= filters.max_duration_min)
+        if filters.max_cost is not None:
+            narrow(self._costs <= filters.max_cost)
+        return mask
+
+    def lexical_ranking(self, query: str, mask: Optional[np.ndarray], depth: int = RRF_DEPTH) -> np.ndarray:
+        """Top item indices by BM25, considering only masked-in items.
+
+        Each term contributes the masked-in postings with the highest
+        weights (read in impact order until enough are found); the union of
+        those candidates is then scored exactly over all query terms.
+        """
+        terms = [self._term_ids[token] for token in set(tokenize(query)) if token in self._term_ids]
+        if not terms:
+            return np.empty(0, dtype=np.int32)
+
+        wanted = depth * LEXICAL_CANDIDATE_FACTOR
+        found = []
+        for term in terms:
+            start, end = self._offsets[term], self._offsets[term + 1]
+            count = 0
+            for block in range(start, end, POSTING_BLOCK):
+                docs = self._posting_docs[self._impact_order[block:min(block + POSTING_BLOCK, end)]]
+                if mask is not None:
+                    docs = docs[mask[docs]]
+                found.append(docs)
+                count += len(docs)
+                if count >= wanted:
+                    break
+        candidates = np.unique(np.concatenate(found))
+        if len(candidates) == 0:
+            return candidates
+
+        scores = np.zeros(len(candidates), dtype=np.float32)
+        for term in terms:
+            start, end = self._offsets[term], self._offsets[term + 1]
+            docs = self._posting_docs[start:end]
+            positions = np.minimum(np.searchsorted(docs, candidates), len(docs) - 1)
+            matched = docs[positions] == candidates
+            scores[matched] += self._weights[start:end][positions[matched]]
+        return candidates[_top(scores, depth)]
+
+    def vector_ranking(self, query: str, mask: Optional[np.ndarray], depth: int = RRF_DEPTH) -> np.ndarray:
+        """Top item indices by cosine similarity, considering only masked-in items"""
+        if len(self.item_ids) == 0:
+            return np.empty(0, dtype=np.int32)
+        vector = self.embedder.embed([query])[0]
+
+        if mask is not None and np.count_nonzero(mask) <= EXACT_VECTOR_CANDIDATES:
+            candidates = np.flatnonzero(mask).astype(np.int32)
+            scores = self._vectors[self._vector_rows[candidates]] @ vector
+            return candidates[_top(scores, depth)]
+
+        # Probe IVF lists closest to the query until enough masked-in items are seen
+        probed_items, probed_scores = [], []
+        count = 0
+        for probed, list_id in enumerate(np.argsort(-(self._centroids @ vector)), start=1):
+            start, end = self._list_offsets[list_id], self._list_offsets[list_id + 1]
+            items, vectors = self._list_items[start:end], self._vectors[start:end]
+            if mask is not None:
+                keep = mask[items]
+                items, vectors = items[keep], vectors[keep]
+            probed_items.append(items)
+            probed_scores.append(vectors @ vector)
+            count += len(items)
+            if probed >= IVF_PROBES and count >= depth:
+                break
+
+        items = np.concatenate(probed_items)
+        return items[_top(np.concatenate(probed_scores), depth)]
+
+    def search(self, query: str, filters: Optional[SearchFilters] = None, limit: int = 20) -> List[SearchHit]:
+        """Rank items for a query with reciprocal rank fusion of BM25 and vector rankings"""
+        mask = self.filter_mask(filters)
+        depth = max(RRF_DEPTH, limit)
+        lexical = self.lexical_ranking(query, mask, depth)
+        vector = self.vector_ranking(query, mask, depth)
+
+        hits: Dict[int, SearchHit] = {}
+        for rank, doc in enumerate(lexical.tolist(), start=1):
+            hit = hits.setdefault(doc, SearchHit(self.item_ids[doc], 0.0))
+            hit.score += 1.0 / (RRF_K + rank)
+            hit.lexical_rank = rank
+        for rank, doc in enumerate(vector.tolist(), start=1):
+            hit = hits.setdefault(doc, SearchHit(self.item_ids[doc], 0.0))
+            hit.score += 1.0 / (RRF_K + rank)
+            hit.vector_rank = rank
+        return sorted(hits.values(), key=lambda hit: (-hit.score, hit.item_id))[:limit]
+
+
+def _allowed(codes: np.ndarray, values: Sequence[int], num_codes: int) -> np.ndarray:
+    """Mask of rows whose dictionary code is one of values"""
+    table = np.zeros(max(num_codes, 1), dtype=bool)
+    table[list(values)] = True
+    return table[codes]
+
+
+def _train_centroids(vectors: np.ndarray, num_lists: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample of the vectors"""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), num_lists * IVF_TRAIN_ITEMS_PER_LIST)
+    sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    centroids = sample[:num_lists].copy()
+    for _ in range(IVF_TRAIN_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        filled = norms[:, 0] > 0
+        centroids[filled] = sums[filled] / norms[filled]
+    return centroids
+
+
+def _top(scores: np.ndarray, depth: int) -> np.ndarray:
+    """Indices of the highest scores in descending order"""
+    if len(scores) > depth:
+        top = np.argpartition(-scores, depth)[:depth]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class ContentSearchRegistry:
+    """Process-wide content search engine, rebuilt after CONTENT_SEARCH_MAX_AGE_SECONDS
+    or once a commit changed content items (see ``search_changed_on_commit``).
+
+    A rebuild runs on a worker thread with its own session and is published
+    with a reference swap; searches keep using the previous engine until
+    then and never wait for one, except before the first build.
+    """
+
+    def __init__(self, session_factory: Callable = SessionLocal):
+        self.session_factory = session_factory
+        self._engine: Optional[SearchEngine] = None
+        self._stale = True
+        self._build = BackgroundBuild("content search index", self._load, self._publish)
+
+    @property
+    def current(self) -> Optional[SearchEngine]:
+        return self._engine
+
+    def mark_stale(self):
+        """Rebuild the engine on the next search"""
+        self._stale = True
+
+    def is_fresh(self) -> bool:
+        engine = self._engine
+        if engine is None or self._stale:
+            return False
+        max_age = settings.CONTENT_SEARCH_MAX_AGE_SECONDS
+        return max_age <= 0 or time.monotonic() - engine.built_at < max_age
+
+    def swap(self, engine: SearchEngine) -> Optional[SearchEngine]:
+        """Publish an engine (for example one built by a worker) and return the old one"""
+        previous, self._engine = self._engine, engine
+        self._stale = False
+        return previous
+
+    def _publish(self, engine: SearchEngine):
+        # A mark_stale() that landed mid-build keeps the flag set for the next rebuild
+        self._engine = engine
+
+    def _load(self) -> SearchEngine:
+        with self.session_factory() as session:
+            return self._load_with(session)
+
+    def _load_with(self, db_session) -> SearchEngine:
+        self._stale = False
+        try:
+            # Builds run off the loop, so they can read and fill the shared Redis tier with the
+            # blocking client; queries keep using the in-process cache only
+            return HybridSearchEngine.load(db_session, embedder=content_embedder,
+                                           embed=content_embedder.embed_blocking)
+        except Exception:
+            self._stale = True
+            raise
+
+    def start_build(self):
+        """Start building a new engine in the background (needs a running loop)"""
+        self._build.start()
+
+    async def get(self) -> SearchEngine:
+        """Get the current engine, starting a background rebuild if it is stale"""
+        engine = self._engine
+        if engine is None:
+            return await self._build.wait()
+        if not self.is_fresh():
+            self._build.start()
+        return engine
+
+    def get_blocking(self, db_session) -> SearchEngine:
+        """Same as ``get`` for sync code, building with the caller's session when nothing is built yet"""
+        engine = self._engine
+        if engine is None or (not self.is_fresh() and not self._build.start_soon()):
+            engine = self._load_with(db_session)
+            self._publish(engine)
+        return engine
+
+
+# Shared by index rebuilds so only new or edited items reach the model
+content_embedder = CachedEmbedder(HashingEmbedder(), store=RedisEmbeddingStore(LOCAL_EMBEDDING_DIMENSION))
+
+content_search_registry = ContentSearchRegistry()
+
+
+def get_content_search_engine(db_session) -> SearchEngine:
+    """Get the process-wide content search engine.
+
+    Takes a sync session and is meant for sync code; async code uses
+    ``await content_search_registry.get()``.
+    """
+    return content_search_registry.get_blocking(db_session)
+
+
+# Maintenance: commits that write content items mark the engine stale
+
+_SEARCH_CHANGED_KEY = "content_search_changed"
+
+
+def search_changed_on_commit(session):
+    """Mark the search engine stale when the session commits (for writes that bypass ORM events)"""
+    session = getattr(session, "sync_session", session)
+    session.info[_SEARCH_CHANGED_KEY] = True
+
+
+def _record_content_write(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        search_changed_on_commit(session)
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(ContentItem, _event_name, _record_content_write)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_search_changes(session):
+    if session.info.pop(_SEARCH_CHANGED_KEY, False):
+        content_search_registry.mark_stale()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_search_changes(session):
+    session.info.pop(_SEARCH_CHANGED_KEY, None)
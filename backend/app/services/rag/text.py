@@ -0,0 +1,30 @@
+from typing import Iterable, List
+import re
+import unicodedata
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[+#][a-z0-9+#]*)?")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how in into is it of on or that the this to what with your you".split()
+)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and collapse whitespace"""
+    text = text or ""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into search tokens (keeps terms like c++ and c#)"""
+    return [token for token in _TOKEN_RE.findall(normalize_text(text)) if token not in STOPWORDS]
+
+
+def content_tokens(title: str, description: str, tags: Iterable[str]) -> List[str]:
+    """Tokens indexed for a content item; title and tags count double"""
+    title_tokens = tokenize(title)
+    tag_tokens = [token for tag in tags or () for token in tokenize(tag)]
+    return title_tokens * 2 + tag_tokens * 2 + tokenize(description or "")
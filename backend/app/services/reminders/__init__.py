@@ -0,0 +1,21 @@
+# Reminders: due-time index of study sessions and plan steps, and the sweeper that marks them missed/overdue and queues nudges
+
+from .index import DueSource, EVENTS, STEPS, DUE_SOURCES, DueIndex, due_index, due_score, due_changed_on_commit
+from .sweeper import NUDGE_QUEUE_KEY, SESSION_MISSED, STEP_OVERDUE, Nudge, SweepReport, OverdueSweeper
+
+__all__ = [
+    'DueSource',
+    'EVENTS',
+    'STEPS',
+    'DUE_SOURCES',
+    'DueIndex',
+    'due_index',
+    'due_score',
+    'due_changed_on_commit',
+    'NUDGE_QUEUE_KEY',
+    'SESSION_MISSED',
+    'STEP_OVERDUE',
+    'Nudge',
+    'SweepReport',
+    'OverdueSweeper',
+]
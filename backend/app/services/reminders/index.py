@@ -0,0 +1,245 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+import logging
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import MissingGreenlet
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.util import await_only
+
+from app.core.redis import get_redis, get_sync_redis
+from app.models.calendar import CalendarEvent, EventStatus
+from app.models.plan import PlanStep, StepStatus
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "due"
+
+
+@dataclass(frozen=True)
+class DueSource:
+    """A table whose rows fall due: which column, in which statuses, and what they become"""
+
+    kind: str
+    model: type
+    due_attribute: str
+    active: Tuple[Any, ...]  # Statuses that can fall due
+    due_status: Any = None  # Status a due row moves to
+    due_flag: Optional[str] = None  # Or a timestamp column set when it falls due, leaving the status alone
+
+    @property
+    def table(self):
+        return self.model.__table__
+
+    @property
+    def due_column(self):
+        return self.table.c[self.due_attribute]
+
+    def indexed(self, row) -> bool:
+        """Whether a row (ORM object) belongs in the index"""
+        if getattr(row, self.due_attribute) is None or row.status not in self.active:
+            return False
+        if self.due_flag is not None and getattr(row, self.due_flag) is not None:
+            return False
+        return self.model is not CalendarEvent or row.plan_step_id is not None
+
+    def where_indexed(self):
+        """The same as ``indexed``, as SQL criteria"""
+        criteria = [self.due_column.isnot(None), self.table.c.status.in_(self.active)]
+        if self.due_flag is not None:
+            criteria.append(self.table.c[self.due_flag].is_(None))
+        if self.model is CalendarEvent:
+            criteria.append(self.table.c.plan_step_id.isnot(None))
+        return criteria
+
+    def where_fell_due(self):
+        """SQL criterion for rows the sweeper moved"""
+        if self.due_flag is not None:
+            return self.table.c[self.due_flag].isnot(None)
+        return self.table.c.status == self.due_status
+
+    def due_values(self, now: datetime) -> Dict[str, Any]:
+        """Column values of a row that fell due at ``now``"""
+        if self.due_flag is not None:
+            return {self.due_flag: now}
+        return {"status": self.due_status}
+
+
+# Study sessions (events booked for a plan step) are missed when they end still scheduled;
+# other calendar events are the learner's own and never fall due. Overdue steps keep their status (an
+# overdue step can still be started or worked on) and get overdue_at instead
+EVENTS = DueSource("event", CalendarEvent, "end_at", (EventStatus.SCHEDULED,), EventStatus.MISSED)
+STEPS = DueSource("step", PlanStep, "due_at", (StepStatus.PENDING, StepStatus.IN_PROGRESS), due_flag="overdue_at")
+DUE_SOURCES: Dict[str, DueSource] = {source.kind: source for source in (EVENTS, STEPS)}
+_SOURCES_BY_MODEL = {source.model: source for source in DUE_SOURCES.values()}
+
+
+def due_score(value: datetime) -> float:
+    """Index score of a due time: seconds since the epoch, naive values taken as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+# Moves claims whose lease ran out back into the index (unless a write re-armed them since), then moves up
+# to ARGV[3] items due by ARGV[1] from the index to the claims, leased until ARGV[2]; returns the claimed IDs.
+# One script, so concurrent sweepers never claim the same item
+_CLAIM = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1], 'LIMIT', 0, ARGV[3])
+for _, member in ipairs(expired) do
+  redis.call('ZREM', KEYS[2], member)
+  redis.call('ZADD', KEYS[1], 'NX', ARGV[1], member)
+end
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[3])
+for _, member in ipairs(due) do
+  redis.call('ZREM', KEYS[1], member)
+  redis.call('ZADD', KEYS[2], ARGV[2], member)
+end
+return due
+"""
+
+
+class DueIndex:
+    """Rows that have yet to fall due, in Redis sorted sets scored by due time.
+
+    One sorted set per source (``due:event``, ``due:step``) holds row IDs
+    scored by ``end_at``/``due_at``; commits that insert a row or change
+    its due time or status add it again (see ``due_changed_on_commit``).
+    Finding what fell due since the last tick is a range query on the
+    score, so it costs the number of due rows, not the size of the table.
+
+    ``claim`` moves due IDs into a per-source set of claims under a lease
+    in one atomic script, so sweepers on several replicas each get their
+    own items; a claim not acknowledged before its lease runs out (the
+    replica died) goes back into the index for the next sweep. Entries are
+    hints: the sweeper re-checks status and due time in the database, so a
+    stale entry (row completed, deleted or moved later) is simply dropped.
+    """
+
+    def __init__(self, redis_factory: Callable[[], Awaitable] = get_redis, prefix: str = KEY_PREFIX):
+        self.redis_factory = redis_factory
+        self.prefix = prefix
+
+    def key(self, kind: str) -> str:
+        return f"{self.prefix}:{kind}"
+
+    def claims_key(self, kind: str) -> str:
+        return f"{self.prefix}:{kind}:claimed"
+
+    def watermark_key(self, kind: str) -> str:
+        return f"{self.prefix}:{kind}:watermark"
+
+    async def add(self, changes: Mapping[str, Mapping[str, float]]):
+        """Index row IDs by due score, per source kind"""
+        client = await self.redis_factory()
+        pipeline = client.pipeline(transaction=False)
+        for kind, scores in changes.items():
+            if scores:
+                pipeline.zadd(self.key(kind), dict(scores))
+        await pipeline.execute()
+
+    def add_blocking(self, changes: Mapping[str, Mapping[str, float]]):
+        """Same as ``add`` for code running outside the event loop"""
+        pipeline = get_sync_redis().pipeline(transaction=False)
+        for kind, scores in changes.items():
+            if scores:
+                pipeline.zadd(self.key(kind), dict(scores))
+        pipeline.execute()
+
+    async def claim(self, kind: str, now: float, limit: int, lease_seconds: float) -> List[str]:
+        """Claim up to ``limit`` IDs due by ``now`` for this sweeper"""
+        client = await self.redis_factory()
+        claimed = await client.eval(_CLAIM, 2, self.key(kind), self.claims_key(kind), now, now + lease_seconds, limit)
+        return [member.decode() if isinstance(member, bytes) else member for member in claimed]
+
+    async def acknowledge(self, kind: str, ids: Sequence[str], queue_key: Optional[str] = None,
+                          messages: Sequence[str] = ()):
+        """Drop finished claims, pushing their nudge messages onto ``queue_key`` in the same transaction"""
+        client = await self.redis_factory()
+        pipeline = client.pipeline(transaction=True)
+        if messages:
+            pipeline.rpush(queue_key, *messages)
+        if ids:
+            pipeline.zrem(self.claims_key(kind), *ids)
+        await pipeline.execute()
+
+    async def watermark(self, kind: str) -> Optional[float]:
+        client = await self.redis_factory()
+        value = await client.get(self.watermark_key(kind))
+        return float(value) if value is not None else None
+
+    async def set_watermark(self, kind: str, value: float):
+        client = await self.redis_factory()
+        await client.set(self.watermark_key(kind), value)
+
+    async def sizes(self, kind: str) -> Tuple[int, int]:
+        """Indexed and claimed IDs of a source"""
+        client = await self.redis_factory()
+        pipeline = client.pipeline(transaction=False)
+        pipeline.zcard(self.key(kind))
+        pipeline.zcard(self.claims_key(kind))
+        indexed, claimed = await pipeline.execute()
+        return indexed, claimed
+
+
+due_index = DueIndex()
+
+
+# Maintenance: record writes that (re)arm a row per session, index them on commit
+
+_DUE_CHANGES_KEY = "due_index_changes"
+
+
+def due_changed_on_commit(session, kind: str, scores: Mapping[str, float]):
+    """Index rows when the session commits (for writes that bypass ORM events)"""
+    session = getattr(session, "sync_session", session)
+    session.info.setdefault(_DUE_CHANGES_KEY, {}).setdefault(kind, {}).update(scores)
+
+
+def _record_due_write(mapper, connection, target):
+    session = object_session(target)
+    source = _SOURCES_BY_MODEL[type(target)]
+    if session is None or not source.indexed(target):
+        return
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in (source.due_attribute, "status")):
+        due_changed_on_commit(session, source.kind, {target.id: due_score(getattr(target, source.due_attribute))})
+
+
+def _record_due_insert(mapper, connection, target):
+    session = object_session(target)
+    source = _SOURCES_BY_MODEL[type(target)]
+    if session is not None and source.indexed(target):
+        due_changed_on_commit(session, source.kind, {target.id: due_score(getattr(target, source.due_attribute))})
+
+
+for _source in DUE_SOURCES.values():
+    event.listen(_source.model, "after_insert", _record_due_insert)
+    event.listen(_source.model, "after_update", _record_due_write)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_due_changes(session):
+    changes = session.info.pop(_DUE_CHANGES_KEY, None)
+    if not changes:
+        return
+    # AsyncSession commits run in a greenlet, so the async client can be awaited inline
+    adding = due_index.add(changes)
+    try:
+        await_only(adding)
+    except MissingGreenlet:
+        adding.close()
+        try:
+            due_index.add_blocking(changes)
+        except (RedisError, OSError) as exc:
+            logger.warning("Due index update failed for %d rows: %s", sum(map(len, changes.values())), exc)
+    except (RedisError, OSError) as exc:
+        # The sweeper's catch-up pass indexes them from updated_at
+        logger.warning("Due index update failed for %d rows: %s", sum(map(len, changes.values())), exc)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_due_changes(session):
+    session.info.pop(_DUE_CHANGES_KEY, None)
@@ -0,0 +1,209 @@
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import asyncio
+import json
+import logging
+import time
+
+from redis.exceptions import RedisError
+from sqlalchemy import case, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.plan import LearningPlan
+from app.services.analytics.progress import progress_changed_on_commit
+from app.services.coach.context import CALENDAR, PLAN, context_changed_on_commit
+from .index import DUE_SOURCES, EVENTS, DueIndex, DueSource, due_index, due_score
+
+logger = logging.getLogger(__name__)
+
+# Redis list the nudge jobs are pushed onto, oldest first
+NUDGE_QUEUE_KEY = "nudges:queue"
+
+# Nudge kinds
+SESSION_MISSED = "session_missed"
+STEP_OVERDUE = "step_overdue"
+_NUDGE_KINDS = {"event": SESSION_MISSED, "step": STEP_OVERDUE}
+
+
+@dataclass
+class Nudge:
+    """A reminder to send a learner about an item that fell due"""
+
+    kind: str  # SESSION_MISSED or STEP_OVERDUE
+    learner_id: str
+    item_id: str  # Calendar event or plan step
+    title: str
+    due_at: str  # ISO time the item fell due at
+    plan_step_id: Optional[str] = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw) -> "Nudge":
+        return cls(**json.loads(raw))
+
+
+@dataclass
+class SweepReport:
+    """What one sweep did, per source kind"""
+
+    claimed: Dict[str, int] = field(default_factory=dict)
+    transitioned: Dict[str, int] = field(default_factory=dict)  # Rows moved to their due status, one nudge each
+    indexed: Dict[str, int] = field(default_factory=dict)  # Rows (re)indexed by the catch-up pass
+    elapsed_seconds: float = 0.0
+
+    @property
+    def nudges(self) -> int:
+        return sum(self.transitioned.values())
+
+
+def _iso(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+class OverdueSweeper:
+    """Marks study sessions MISSED and plan steps overdue when they fall due, and queues a nudge for each.
+
+    A sweep first indexes rows written since the previous sweep outside
+    the ORM (bulk scheduling, calendar sync upserts) from their indexed
+    ``updated_at``, then claims the IDs due by now from the ``DueIndex``
+    in batches. Each batch is one ``UPDATE ... RETURNING`` that re-checks
+    status and due time, so only rows still active and still due move;
+    after the commit their nudges go onto ``queue_key`` in the same
+    Redis transaction that acknowledges the claims. The update bypasses
+    ORM events, so the learners' coach context (calendar or plan section)
+    and cached progress are marked stale explicitly, for the next read to
+    rebuild. A sweep therefore costs the rows that fell due plus those
+    recently written, whatever the table sizes.
+
+    Sweepers on several replicas can run at once: claims are atomic, the
+    status check makes a transition happen once, and only the sweeper
+    that made it queues its nudge. If a replica dies between its commit
+    and the acknowledgement, the claims come back after their lease and
+    find nothing left to move, so that batch's nudges are lost rather
+    than sent twice.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, index: Optional[DueIndex] = None,
+                 batch_size: Optional[int] = None, lease_seconds: Optional[int] = None,
+                 catch_up_lag_seconds: Optional[int] = None, queue_key: str = NUDGE_QUEUE_KEY):
+        self.session_factory = session_factory
+        self.index = index or due_index
+        self.batch_size = batch_size or settings.REMINDER_SWEEP_BATCH_SIZE
+        self.lease_seconds = lease_seconds or settings.REMINDER_CLAIM_LEASE_SECONDS
+        self.catch_up_lag_seconds = (catch_up_lag_seconds if catch_up_lag_seconds is not None
+                                     else settings.REMINDER_CATCH_UP_LAG_SECONDS)
+        self.queue_key = queue_key
+
+    async def sweep(self, now: Optional[datetime] = None) -> SweepReport:
+        """Transition everything due by ``now`` (default: the current time) and queue its nudges"""
+        started = time.perf_counter()
+        now = now or datetime.now(timezone.utc)
+        report = SweepReport()
+        for source in DUE_SOURCES.values():
+            report.indexed[source.kind] = await self.catch_up(source, now)
+            report.claimed[source.kind], report.transitioned[source.kind] = await self._sweep_source(source, now)
+        report.elapsed_seconds = time.perf_counter() - started
+        if report.nudges:
+            logger.info("Overdue sweep moved %s in %.2fs", report.transitioned, report.elapsed_seconds)
+        return report
+
+    async def catch_up(self, source: DueSource, now: datetime) -> int:
+        """Index active rows updated since the last sweep (minus the lag); all of them on the first run"""
+        watermark = await self.index.watermark(source.kind)
+        table = source.table
+        # The first run pages through the table by id; later ones by (updated_at, id), reading a range of
+        # the updated_at index
+        keys = (table.c.id,) if watermark is None else (table.c.updated_at, table.c.id)
+        query = (select(table.c.id, source.due_column, *keys)
+                 .where(*source.where_indexed())
+                 .order_by(*keys)
+                 .limit(self.batch_size * 10))
+        if watermark is not None:
+            since = datetime.fromtimestamp(watermark - self.catch_up_lag_seconds, timezone.utc)
+            query = query.where(table.c.updated_at >= since)
+        indexed = 0
+        async with self.session_factory() as db:
+            last = None
+            while True:
+                page = query if last is None else query.where(tuple_(*keys) > tuple_(*last))
+                rows = (await db.execute(page)).all()
+                if rows:
+                    await self.index.add({source.kind: {row[0]: due_score(row[1]) for row in rows}})
+                    indexed += len(rows)
+                    last = tuple(rows[-1][2:])
+                if len(rows) < self.batch_size * 10:
+                    break
+        await self.index.set_watermark(source.kind, due_score(now))
+        return indexed
+
+    async def _sweep_source(self, source: DueSource, now: datetime):
+        claimed = transitioned = 0
+        score = due_score(now)
+        while True:
+            ids = await self.index.claim(source.kind, score, self.batch_size, self.lease_seconds)
+            if not ids:
+                break
+            claimed += len(ids)
+            async with self.session_factory() as db:
+                nudges = await self._transition(db, source, ids, now)
+                await db.commit()
+            await self.index.acknowledge(source.kind, ids, self.queue_key, [nudge.to_json() for nudge in nudges])
+            transitioned += len(nudges)
+            if len(ids) < self.batch_size:
+                break
+        return claimed, transitioned
+
+    async def _transition(self, db: AsyncSession, source: DueSource, ids: List[str], now: datetime) -> List[Nudge]:
+        table = source.table
+        values = source.due_values(now)
+        if source is EVENTS:
+            # Missing a session is local news: an event that was in sync with its provider stays so
+            values["synced_at"] = case((table.c.updated_at == table.c.synced_at, now), else_=table.c.synced_at)
+            values["updated_at"] = now
+            returned = (table.c.id, table.c.learner_id, table.c.title, source.due_column, table.c.plan_step_id)
+        else:
+            returned = (table.c.id, table.c.plan_id, table.c.title, source.due_column)
+        rows = (await db.execute(
+            update(table)
+            .where(table.c.id.in_(ids), source.due_column <= now, *source.where_indexed())
+            .values(**values)
+            .returning(*returned)
+        )).all()
+        kind = _NUDGE_KINDS[source.kind]
+        if source is EVENTS:
+            nudges = [Nudge(kind, learner_id, event_id, title, _iso(due), plan_step_id)
+                      for event_id, learner_id, title, due, plan_step_id in rows]
+            section = CALENDAR
+        else:
+            plan_ids = {plan_id for _, plan_id, _, _ in rows}
+            learners = dict((await db.execute(
+                select(LearningPlan.id, LearningPlan.learner_id).where(LearningPlan.id.in_(plan_ids))
+            )).all()) if plan_ids else {}
+            nudges = [Nudge(kind, learners[plan_id], step_id, title, _iso(due), step_id)
+                      for step_id, plan_id, title, due in rows]
+            section = PLAN
+        learner_ids = {nudge.learner_id for nudge in nudges}
+        for learner_id in learner_ids:
+            context_changed_on_commit(db, learner_id, [section], refresh=False)
+        progress_changed_on_commit(db, learner_ids)
+        return nudges
+
+    async def run(self, interval_seconds: Optional[float] = None):
+        """Sweep every ``interval_seconds`` until cancelled; run one per replica"""
+        interval = interval_seconds or settings.REMINDER_SWEEP_INTERVAL_SECONDS
+        while True:
+            started = time.monotonic()
+            try:
+                await self.sweep()
+            except (RedisError, OSError) as exc:
+                logger.warning("Overdue sweep failed, retrying next tick: %s", exc)
+            except Exception:
+                logger.exception("Overdue sweep failed")
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
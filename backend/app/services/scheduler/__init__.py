@@ -0,0 +1,32 @@
+# Calendar scheduling: pending plan steps placed into study blocks around learners' events and working hours
+
+from .intervals import Interval, IntervalIndex
+from .hours import WorkingHours, to_minutes, from_minutes
+from .service import (
+    AUTO_SCHEDULED,
+    BlockRules,
+    StudyBlock,
+    LearnerSchedule,
+    schedule_learner,
+    schedule_chunk,
+    schedule_learners,
+    ScheduleReport,
+    schedule_tenant,
+)
+
+__all__ = [
+    'Interval',
+    'IntervalIndex',
+    'WorkingHours',
+    'to_minutes',
+    'from_minutes',
+    'AUTO_SCHEDULED',
+    'BlockRules',
+    'StudyBlock',
+    'LearnerSchedule',
+    'schedule_learner',
+    'schedule_chunk',
+    'schedule_learners',
+    'ScheduleReport',
+    'schedule_tenant',
+]
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.core.config import settings
+
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_minutes(value: datetime, round_up: bool = False) -> int:
+    """Minutes since the epoch; naive timestamps are taken as UTC, as the database returns them"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    seconds = (value - _EPOCH).total_seconds()
+    minutes = int(seconds // 60)
+    return minutes + 1 if round_up and minutes * 60 < seconds else minutes
+
+
+def from_minutes(minutes: int) -> datetime:
+    return _EPOCH + timedelta(minutes=minutes)
+
+
+def _parse_time(value: Any, default: str) -> time:
+    try:
+        return time.fromisoformat(str(value or default))
+    except ValueError:
+        return time.fromisoformat(default)
+
+
+def _parse_days(value: Any) -> Tuple[int, ...]:
+    days = set()
+    for day in value or ():
+        if isinstance(day, int) and 0 <= day < 7:
+            days.add(day)
+        elif str(day)[:3].lower() in DAY_NAMES:
+            days.add(DAY_NAMES.index(str(day)[:3].lower()))
+    return tuple(sorted(days))
+
+
+@dataclass(frozen=True)
+class WorkingHours:
+    """When a learner can take study blocks: a daily window on some weekdays, in their timezone.
+
+    Read from ``Learner.preferences["working_hours"]``, e.g.
+    ``{"days": ["mon", "tue", "wed", "thu", "fri"], "start": "09:00", "end": "17:00"}``,
+    and the timezone in ``Learner.profile``. ``daily_minutes`` caps the
+    study time scheduled on one day: ``preferences["max_daily_study_minutes"]``,
+    else the weekly ``goals["time_budget_hours"]`` spread over the days,
+    else ``SCHEDULER_DAILY_STUDY_MINUTES``.
+    """
+
+    days: Tuple[int, ...]  # Weekdays, 0 is Monday
+    start: time
+    end: time
+    timezone: str
+    daily_minutes: int
+
+    @classmethod
+    def from_learner(cls, preferences: Optional[Dict[str, Any]], profile: Optional[Dict[str, Any]],
+                     goals: Optional[Dict[str, Any]] = None) -> "WorkingHours":
+        preferences, profile, goals = preferences or {}, profile or {}, goals or {}
+        hours = preferences.get("working_hours") or {}
+        days = _parse_days(hours.get("days")) or _parse_days(settings.SCHEDULER_WORKING_DAYS)
+        start = _parse_time(hours.get("start"), settings.SCHEDULER_WORKING_HOURS_START)
+        end = _parse_time(hours.get("end"), settings.SCHEDULER_WORKING_HOURS_END)
+        if end <= start:
+            start = _parse_time(None, settings.SCHEDULER_WORKING_HOURS_START)
+            end = _parse_time(None, settings.SCHEDULER_WORKING_HOURS_END)
+
+        daily_minutes = preferences.get("max_daily_study_minutes")
+        if not daily_minutes and goals.get("time_budget_hours"):
+            daily_minutes = float(goals["time_budget_hours"]) * 60 / len(days)
+        try:
+            daily_minutes = int(daily_minutes or settings.SCHEDULER_DAILY_STUDY_MINUTES)
+        except (TypeError, ValueError):
+            daily_minutes = settings.SCHEDULER_DAILY_STUDY_MINUTES
+
+        tz = str(profile.get("timezone") or "UTC")
+        try:
+            ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            tz = "UTC"
+        return cls(days, start, end, tz, max(daily_minutes, 0))
+
+    def windows(self, start: datetime, end: datetime) -> Tuple[Tuple[int, int], ...]:
+        """The learner's windows overlapping [start, end), as UTC minutes since the epoch"""
+        zone = ZoneInfo(self.timezone)
+        start_min, end_min = to_minutes(start), to_minutes(end, round_up=True)
+        first = from_minutes(start_min).astimezone(zone).date() - timedelta(days=1)
+        last = from_minutes(end_min).astimezone(zone).date()
+        return tuple(
+            window for window in _windows(self.days, self.start, self.end, self.timezone, first, last)
+            if window[1] > start_min and window[0] < end_min
+        )
+
+
+@lru_cache(maxsize=1024)
+def _windows(days: Tuple[int, ...], start: time, end: time, tz: str, first: date,
+             last: date) -> Tuple[Tuple[int, int], ...]:
+    """Windows of every matching local date in [first, last], shared by learners with the same hours"""
+    zone = ZoneInfo(tz)
+    windows = []
+    day = first
+    while day <= last:
+        if day.weekday() in days:
+            windows.append((to_minutes(datetime.combine(day, start, tzinfo=zone)),
+                            to_minutes(datetime.combine(day, end, tzinfo=zone))))
+        day += timedelta(days=1)
+    return tuple(windows)
@@ -0,0 +1,61 @@
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Tuple
+
+Interval = Tuple[int, int]  # Half-open [start, end), in minutes since the epoch (UTC)
+
+
+class IntervalIndex:
+    """A learner's busy time as sorted, disjoint intervals.
+
+    Overlapping and touching intervals are merged as they are added, so
+    the index stays two parallel sorted lists and every lookup is a
+    binary search. Free time is whatever lies between the intervals.
+    """
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        for start, end in sorted(interval for interval in intervals if interval[1] > interval[0]):
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[Interval]:
+        return zip(self.starts, self.ends)
+
+    def add(self, start: int, end: int):
+        """Mark [start, end) busy, merging it with the intervals it overlaps or touches"""
+        if end <= start:
+            return
+        first = bisect_left(self.ends, start)
+        last = bisect_right(self.starts, end)
+        if first < last:
+            start = min(start, self.starts[first])
+            end = max(end, self.ends[last - 1])
+        self.starts[first:last] = [start]
+        self.ends[first:last] = [end]
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """Whether any busy interval intersects [start, end)"""
+        if end <= start:
+            return False
+        index = bisect_right(self.ends, start)
+        return index < len(self.starts) and self.starts[index] < end
+
+    def free(self, start: int, end: int) -> Iterator[Interval]:
+        """Free gaps within [start, end), in order"""
+        index = bisect_right(self.ends, start)
+        while start < end:
+            if index < len(self.starts) and self.starts[index] <= start:
+                start = self.ends[index]
+                index += 1
+                continue
+            gap_end = min(end, self.starts[index]) if index < len(self.starts) else end
+            if gap_end > start:
+                yield start, gap_end
+            start = gap_end
@@ -0,0 +1,349 @@
+from bisect import bisect_right
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import multiprocessing
+import os
+import time
+
+from sqlalchemy import delete, insert, select
+
+from app.core.config import settings
+from app.models.calendar import CalendarEvent, CalendarProvider, EventStatus
+from app.models.learner import Learner
+from app.models.plan import LearningPlan, PlanStatus, PlanStep, StepStatus
+from app.services.coach.context import CALENDAR, context_changed_on_commit
+from .hours import WorkingHours, from_minutes, to_minutes
+from .intervals import Interval, IntervalIndex
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 5_000
+
+# Metadata flag of the study blocks the scheduler owns and replaces on every run
+AUTO_SCHEDULED = "auto_scheduled"
+
+# Steps that still need time
+SCHEDULED_STEP_STATUSES = (StepStatus.PENDING, StepStatus.IN_PROGRESS)
+
+_events = CalendarEvent.__table__
+
+StepInput = Tuple[str, int, int]  # (step_id, minutes left, due, as minutes since the epoch)
+PlanInput = Tuple[int, List[StepInput]]  # (plan start, steps in sequence order)
+LearnerInput = Tuple[str, WorkingHours, List[Interval], List[PlanInput]]  # (learner_id, hours, busy, plans)
+
+
+@dataclass(frozen=True)
+class BlockRules:
+    """How step effort is cut into study blocks"""
+
+    min_block: int  # Minutes; a step's blocks are at least this long, unless the step is shorter
+    max_block: int  # Minutes; longer steps are split over several blocks
+    slot: int  # Blocks start on multiples of this many minutes
+
+    @classmethod
+    def from_settings(cls) -> "BlockRules":
+        return cls(settings.SCHEDULER_MIN_BLOCK_MINUTES, settings.SCHEDULER_MAX_BLOCK_MINUTES,
+                   settings.SCHEDULER_SLOT_MINUTES)
+
+
+@dataclass(slots=True)
+class StudyBlock:
+    """One block of a step's effort, block ``block`` of ``blocks``"""
+
+    step_id: str
+    start: int  # Minutes since the epoch (UTC)
+    end: int
+    block: int
+    blocks: int
+
+    @property
+    def start_at(self) -> datetime:
+        return from_minutes(self.start)
+
+    @property
+    def end_at(self) -> datetime:
+        return from_minutes(self.end)
+
+
+@dataclass
+class LearnerSchedule:
+    """Study blocks placed for a learner's pending steps, and the steps that did not fit before their due date"""
+
+    learner_id: str
+    blocks: List[StudyBlock] = field(default_factory=list)
+    unscheduled: List[str] = field(default_factory=list)
+
+
+def _round_up(minutes: int, slot: int) -> int:
+    return -(-minutes // slot) * slot
+
+
+def _place(index: IntervalIndex, windows: Sequence[Interval], window_starts: List[int], used: List[int],
+           daily_minutes: int, at: int, minutes: int, deadline: int, rules: BlockRules) -> Optional[List[Interval]]:
+    """First-fit a step's minutes into free time in [at, deadline); None (and nothing taken) if it does not fit"""
+    blocks, taken = [], {}
+    remaining = minutes
+    for gap_start, gap_end in index.free(at, deadline):
+        start = gap_start
+        while remaining:
+            start = _round_up(start, rules.slot)
+            if start >= gap_end:
+                break
+            window = bisect_right(window_starts, start) - 1
+            if window < 0 or windows[window][1] <= start:
+                break
+            end = min(gap_end, windows[window][1])
+            room = min(end - start, daily_minutes - used[window] - taken.get(window, 0))
+            if room < min(rules.min_block, remaining):
+                start = end
+                continue
+            length = min(room, rules.max_block, remaining)
+            # Leave no remainder shorter than a block for later
+            if 0 < remaining - length < rules.min_block and remaining - rules.min_block >= rules.min_block:
+                length = remaining - rules.min_block
+            blocks.append((start, start + length))
+            taken[window] = taken.get(window, 0) + length
+            remaining -= length
+            start += length
+        if not remaining:
+            break
+    if remaining:
+        return None
+    for window, length in taken.items():
+        used[window] += length
+    return blocks
+
+
+def schedule_learner(learner: LearnerInput, now: int, horizon_end: int, rules: BlockRules) -> LearnerSchedule:
+    """Place a learner's pending steps into their free time, plan by plan and step by step.
+
+    Busy time is the learner's events and everything outside their
+    working hours, held in one ``IntervalIndex``. Each step is placed
+    first-fit after the previous step of its plan ends and before it is
+    due; blocks go into the index as they are placed, so the result
+    never overlaps itself or the learner's events. Plans come earliest
+    target date first and get first pick. A step that does not fit is
+    reported unscheduled and the next one is tried from the same point.
+    """
+    learner_id, hours, busy, plans = learner
+    schedule = LearnerSchedule(learner_id)
+    windows = hours.windows(from_minutes(now), from_minutes(horizon_end))
+
+    off_hours, previous = [], now
+    for start, end in windows:
+        if start > previous:
+            off_hours.append((previous, start))
+        previous = max(previous, end)
+    off_hours.append((previous, horizon_end))
+    index = IntervalIndex([*busy, *off_hours])
+
+    window_starts = [start for start, _ in windows]
+    used = [0] * len(windows)
+    for plan_start, steps in plans:
+        at = max(now, plan_start)
+        for step_id, minutes, due in steps:
+            placed = _place(index, windows, window_starts, used, hours.daily_minutes, at, minutes,
+                            min(due, horizon_end), rules)
+            if placed is None:
+                schedule.unscheduled.append(step_id)
+                continue
+            for number, (start, end) in enumerate(placed, 1):
+                index.add(start, end)
+                schedule.blocks.append(StudyBlock(step_id, start, end, number, len(placed)))
+            at = placed[-1][1]
+    return schedule
+
+
+def schedule_chunk(learners: List[LearnerInput], now: int, horizon_end: int,
+                   rules: BlockRules) -> List[LearnerSchedule]:
+    """Schedule a chunk of learners (runs in a scheduler worker)"""
+    return [schedule_learner(learner, now, horizon_end, rules) for learner in learners]
+
+
+@dataclass
+class _Chunk:
+    learners: List[LearnerInput]
+    titles: Dict[str, str]  # Step titles, for the events written in the main process
+    replaced: List[str]  # The learners' future auto-scheduled blocks, deleted when the new ones are written
+    steps: int = 0
+
+
+def _read_chunk(db_session, learner_ids: Sequence[str], now: int, horizon_end: int) -> _Chunk:
+    now_at, horizon_at = from_minutes(now), from_minutes(horizon_end)
+    learners = db_session.execute(
+        select(Learner.id, Learner.preferences, Learner.profile, Learner.goals).where(Learner.id.in_(learner_ids))
+    ).all()
+
+    busy: Dict[str, List[Interval]] = {learner_id: [] for learner_id, *_ in learners}
+    replaced = []
+    events = db_session.execute(
+        select(_events.c.id, _events.c.learner_id, _events.c.start_at, _events.c.end_at,
+               _events.c["metadata"][AUTO_SCHEDULED].as_boolean())
+        .where(_events.c.learner_id.in_(learner_ids), _events.c.status == EventStatus.SCHEDULED,
+               _events.c.end_at > now_at, _events.c.start_at < horizon_at)
+    )
+    for event_id, learner_id, start_at, end_at, auto_scheduled in events:
+        start = to_minutes(start_at)
+        if auto_scheduled and start >= now:
+            replaced.append(event_id)
+        else:
+            busy[learner_id].append((start, to_minutes(end_at, round_up=True)))
+
+    plans: Dict[str, List[PlanInput]] = {learner_id: [] for learner_id in busy}
+    titles = {}
+    chunk = _Chunk([], titles, replaced)
+    steps = db_session.execute(
+        select(LearningPlan.learner_id, LearningPlan.id, LearningPlan.start_date, LearningPlan.target_date,
+               PlanStep.id, PlanStep.title, PlanStep.effort_min, PlanStep.status, PlanStep.progress_percentage,
+               PlanStep.due_at)
+        .join(LearningPlan, LearningPlan.id == PlanStep.plan_id)
+        .where(LearningPlan.learner_id.in_(learner_ids), LearningPlan.status == PlanStatus.ACTIVE,
+               PlanStep.status.in_(SCHEDULED_STEP_STATUSES))
+        .order_by(LearningPlan.learner_id, LearningPlan.target_date, LearningPlan.id, PlanStep.sequence)
+    )
+    current_plan = None
+    for learner_id, plan_id, start_date, target_date, step_id, title, effort, status, progress, due_at in steps:
+        minutes = effort or 0
+        if status == StepStatus.IN_PROGRESS:
+            minutes = -(-minutes * (100 - min(progress or 0, 100)) // 100)
+        if minutes <= 0:
+            continue
+        if plan_id != current_plan:
+            current_plan = plan_id
+            plan_steps: List[StepInput] = []
+            plans[learner_id].append((to_minutes(start_date), plan_steps))
+        plan_steps.append((step_id, minutes, to_minutes(due_at or target_date)))
+        titles[step_id] = title
+        chunk.steps += 1
+
+    chunk.learners = [
+        (learner_id, WorkingHours.from_learner(preferences, profile, goals), busy[learner_id], plans[learner_id])
+        for learner_id, preferences, profile, goals in learners
+    ]
+    return chunk
+
+
+def _write_chunk(db_session, chunk: _Chunk, schedules: Iterable[LearnerSchedule], refresh: bool = True) -> int:
+    """Replace the chunk's future auto-scheduled blocks with the new ones; returns the blocks written"""
+    connection = db_session.connection()
+    for offset in range(0, len(chunk.replaced), WRITE_BATCH_SIZE):
+        connection.execute(delete(_events).where(_events.c.id.in_(chunk.replaced[offset:offset + WRITE_BATCH_SIZE])))
+    rows = [
+        {
+            "learner_id": schedule.learner_id,
+            "plan_step_id": block.step_id,
+            "provider": CalendarProvider.INTERNAL,
+            "title": chunk.titles[block.step_id],
+            "start_at": block.start_at,
+            "end_at": block.end_at,
+            "status": EventStatus.SCHEDULED,
+            "attendees": [],
+            "metadata": {AUTO_SCHEDULED: True, "block": block.block, "blocks": block.blocks},
+        }
+        for schedule in schedules
+        for block in schedule.blocks
+    ]
+    for offset in range(0, len(rows), WRITE_BATCH_SIZE):
+        connection.execute(insert(_events), rows[offset:offset + WRITE_BATCH_SIZE])
+    for learner_id, *_ in chunk.learners:
+        context_changed_on_commit(db_session, learner_id, [CALENDAR], refresh=refresh)
+    return len(rows)
+
+
+def _horizon(now: Optional[datetime]) -> Tuple[int, int]:
+    start = to_minutes(now or datetime.now(timezone.utc), round_up=True)
+    return start, start + settings.SCHEDULER_HORIZON_DAYS * 24 * 60
+
+
+def schedule_learners(db_session, learner_ids: Sequence[str], now: Optional[datetime] = None
+                      ) -> Dict[str, LearnerSchedule]:
+    """Reschedule the pending steps of a few learners in this process (see ``schedule_tenant``).
+
+    The caller commits. Takes a sync session; from async code use
+    ``await db.run_sync(schedule_learners, [learner_id])``.
+    """
+    now, horizon_end = _horizon(now)
+    rules = BlockRules.from_settings()
+    chunk = _read_chunk(db_session, list(learner_ids), now, horizon_end)
+    schedules = schedule_chunk(chunk.learners, now, horizon_end, rules)
+    _write_chunk(db_session, chunk, schedules)
+    return {schedule.learner_id: schedule for schedule in schedules}
+
+
+@dataclass
+class ScheduleReport:
+    """Counters for one tenant scheduling run"""
+
+    tenant_id: str
+    workers: int
+    learners: int = 0
+    chunks: int = 0
+    steps: int = 0
+    scheduled_steps: int = 0
+    unscheduled_steps: int = 0
+    blocks: int = 0
+    replaced_blocks: int = 0
+    elapsed_seconds: float = 0.0
+
+
+def schedule_tenant(db_session, tenant_id: str, workers: int = 0,
+                    chunk_learners: int = settings.SCHEDULER_CHUNK_LEARNERS,
+                    now: Optional[datetime] = None) -> ScheduleReport:
+    """Auto-schedule the pending steps of every learner in a tenant into study blocks.
+
+    Learners are read in chunks; each chunk is scheduled in a worker
+    process while the next one is read, and its blocks are written (in
+    place of the learners' earlier future auto-scheduled blocks) as the
+    worker returns them. Learners are independent, so the result is the
+    same as scheduling them one by one. Run one scheduling job per tenant
+    at a time. The caller commits. Takes a sync session; from async code
+    use ``await db.run_sync(schedule_tenant, tenant_id)``.
+    """
+    started = time.perf_counter()
+    workers = workers or settings.SCHEDULER_WORKERS or os.cpu_count() or 1
+    report = ScheduleReport(tenant_id=tenant_id, workers=workers)
+    now, horizon_end = _horizon(now)
+    rules = BlockRules.from_settings()
+
+    learner_ids = db_session.execute(
+        select(Learner.id).where(Learner.tenant_id == tenant_id).order_by(Learner.id)
+    ).scalars().all()
+    report.learners = len(learner_ids)
+    batches = [learner_ids[start:start + chunk_learners] for start in range(0, len(learner_ids), chunk_learners)]
+    report.chunks = len(batches)
+
+    def write(chunk: _Chunk, schedules: List[LearnerSchedule]):
+        report.blocks += _write_chunk(db_session, chunk, schedules, refresh=False)
+        report.replaced_blocks += len(chunk.replaced)
+        for schedule in schedules:
+            report.unscheduled_steps += len(schedule.unscheduled)
+            report.scheduled_steps += len({block.step_id for block in schedule.blocks})
+
+    if workers == 1:
+        for batch in batches:
+            chunk = _read_chunk(db_session, batch, now, horizon_end)
+            report.steps += chunk.steps
+            write(chunk, schedule_chunk(chunk.learners, now, horizon_end, rules))
+    elif batches:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            pending = {}
+            for batch in batches:
+                chunk = _read_chunk(db_session, batch, now, horizon_end)
+                report.steps += chunk.steps
+                pending[executor.submit(schedule_chunk, chunk.learners, now, horizon_end, rules)] = chunk
+                # Read ahead of the workers by at most one chunk each
+                while len(pending) > workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(pending.pop(future), future.result())
+            for future, chunk in pending.items():
+                write(chunk, future.result())
+
+    report.elapsed_seconds = time.perf_counter() - started
+    logger.info("Scheduled tenant %s: %d learners, %d of %d steps in %d blocks (%d did not fit), %d chunks, %.1fs",
+                tenant_id, report.learners, report.scheduled_steps, report.steps, report.blocks,
+                report.unscheduled_steps, report.chunks, report.elapsed_seconds)
+    return report
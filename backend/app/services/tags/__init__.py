@@ -0,0 +1,15 @@
+# Tag indexes: compressed bitmaps of row ordinals per tag for skills and content items
+
+from .bitmap import RoaringBitmap
+from .index import TagSource, TagSearchResult, TagIndex, TagIndexRegistry, tag_index_registry, get_tag_index, tags_changed_on_commit
+
+__all__ = [
+    'RoaringBitmap',
+    'TagSource',
+    'TagSearchResult',
+    'TagIndex',
+    'TagIndexRegistry',
+    'tag_index_registry',
+    'get_tag_index',
+    'tags_changed_on_commit',
+]
@@ -0,0 +1,258 @@
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+# Values are split into 16-bit chunks; a chunk with at most this many values
+# is stored as a sorted uint16 array, a fuller one as a 65536-bit bitset
+ARRAY_CONTAINER_MAX = 4096
+
+_CHUNK_BITS = 16
+_CHUNK_SIZE = 1 << _CHUNK_BITS
+_LOW_MASK = _CHUNK_SIZE - 1
+
+Container = Union[np.ndarray, int]
+
+
+def _bits(container: int) -> np.ndarray:
+    """Expand a bitset container into a boolean array of 65536 entries"""
+    raw = np.frombuffer(container.to_bytes(_CHUNK_SIZE // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little").view(bool)
+
+
+def _test(container: int, values: np.ndarray) -> np.ndarray:
+    """Which of the given low values are set in a bitset container"""
+    raw = np.frombuffer(container.to_bytes(_CHUNK_SIZE // 8, "little"), dtype=np.uint8)
+    return ((raw[values >> 3] >> (values & 7).astype(np.uint8)) & 1).astype(bool)
+
+
+def _to_bitset(values: np.ndarray) -> int:
+    bits = np.zeros(_CHUNK_SIZE, dtype=bool)
+    bits[values] = True
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+def _values(container: Container) -> np.ndarray:
+    if isinstance(container, int):
+        return np.flatnonzero(_bits(container)).astype(np.uint16)
+    return container
+
+
+def _cardinality(container: Container) -> int:
+    if isinstance(container, int):
+        return container.bit_count()
+    return len(container)
+
+
+def _normalize(container: Container) -> Optional[Container]:
+    """Pick the smaller representation; None for an empty chunk"""
+    if isinstance(container, int):
+        count = container.bit_count()
+        if count == 0:
+            return None
+        return _values(container) if count <= ARRAY_CONTAINER_MAX else container
+    if len(container) == 0:
+        return None
+    return _to_bitset(container) if len(container) > ARRAY_CONTAINER_MAX else container
+
+
+def _and(left: Container, right: Container) -> Optional[Container]:
+    if isinstance(left, int) and isinstance(right, int):
+        return _normalize(left & right)
+    if isinstance(left, int):
+        left, right = right, left
+    if isinstance(right, int):
+        return _normalize(left[_test(right, left)])
+    return _normalize(np.intersect1d(left, right, assume_unique=True))
+
+
+def _or(left: Container, right: Container) -> Container:
+    if isinstance(left, int) or isinstance(right, int):
+        left = left if isinstance(left, int) else _to_bitset(left)
+        right = right if isinstance(right, int) else _to_bitset(right)
+        return _normalize(left | right)
+    return _normalize(np.union1d(left, right))
+
+
+def _and_not(left: Container, right: Container) -> Optional[Container]:
+    if isinstance(left, int):
+        right = right if isinstance(right, int) else _to_bitset(right)
+        return _normalize(left & ~right)
+    if isinstance(right, int):
+        return _normalize(left[~_test(right, left)])
+    return _normalize(np.setdiff1d(left, right, assume_unique=True))
+
+
+def _and_cardinality(left: Container, right: Container) -> int:
+    if isinstance(left, int) and isinstance(right, int):
+        return (left & right).bit_count()
+    if isinstance(left, int):
+        left, right = right, left
+    if isinstance(right, int):
+        return int(np.count_nonzero(_test(right, left)))
+    return len(np.intersect1d(left, right, assume_unique=True))
+
+
+class RoaringBitmap:
+    """Compressed set of non-negative integers (row ordinals).
+
+    Roaring-style layout: values are grouped by their high 16 bits and each
+    group is stored as a sorted array while sparse or as a bitset once dense,
+    so memory tracks the data and AND/OR/ANDNOT run chunk by chunk.
+    Operators return new bitmaps; ``add``/``discard`` mutate in place.
+    """
+
+    __slots__ = ("_chunks",)
+
+    def __init__(self, values: Iterable[int] = ()):
+        self._chunks: Dict[int, Container] = {}
+        values = np.unique(np.fromiter(values, dtype=np.int64))
+        if len(values):
+            high = values >> _CHUNK_BITS
+            bounds = np.flatnonzero(np.diff(high)) + 1
+            for chunk in np.split(values, bounds):
+                key = int(chunk[0] >> _CHUNK_BITS)
+                self._chunks[key] = _normalize((chunk & _LOW_MASK).astype(np.uint16))
+
+    @classmethod
+    def _from_chunks(cls, chunks: Dict[int, Container]) -> "RoaringBitmap":
+        bitmap = cls()
+        bitmap._chunks = chunks
+        return bitmap
+
+    def __repr__(self):
+        return f"<RoaringBitmap(cardinality={len(self)}, chunks={len(self._chunks)})>"
+
+    def __len__(self):
+        return sum(_cardinality(container) for container in self._chunks.values())
+
+    def __bool__(self):
+        return bool(self._chunks)
+
+    def __contains__(self, value: int):
+        container = self._chunks.get(value >> _CHUNK_BITS)
+        if container is None:
+            return False
+        low = value & _LOW_MASK
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        pos = int(np.searchsorted(container, low))
+        return pos < len(container) and container[pos] == low
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.to_array().tolist())
+
+    def __eq__(self, other):
+        if not isinstance(other, RoaringBitmap):
+            return NotImplemented
+        return np.array_equal(self.to_array(), other.to_array())
+
+    def copy(self) -> "RoaringBitmap":
+        return self._from_chunks(dict(self._chunks))
+
+    # Mutation
+
+    def add(self, value: int):
+        key, low = value >> _CHUNK_BITS, value & _LOW_MASK
+        container = self._chunks.get(key)
+        if container is None:
+            self._chunks[key] = np.array([low], dtype=np.uint16)
+        elif isinstance(container, int):
+            self._chunks[key] = container | (1 << low)
+        else:
+            pos = int(np.searchsorted(container, low))
+            if pos == len(container) or container[pos] != low:
+                self._chunks[key] = _normalize(np.insert(container, pos, low))
+
+    def discard(self, value: int):
+        key, low = value >> _CHUNK_BITS, value & _LOW_MASK
+        container = self._chunks.get(key)
+        if container is None:
+            return
+        if isinstance(container, int):
+            container = _normalize(container & ~(1 << low))
+        else:
+            container = _normalize(container[container != low])
+        if container is None:
+            del self._chunks[key]
+        else:
+            self._chunks[key] = container
+
+    # Algebra
+
+    def __and__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        chunks = {}
+        small, large = sorted((self._chunks, other._chunks), key=len)
+        for key, container in small.items():
+            if key in large:
+                result = _and(container, large[key])
+                if result is not None:
+                    chunks[key] = result
+        return self._from_chunks(chunks)
+
+    def __or__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        chunks = dict(self._chunks)
+        for key, container in other._chunks.items():
+            chunks[key] = _or(chunks[key], container) if key in chunks else container
+        return self._from_chunks(chunks)
+
+    def __sub__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        chunks = {}
+        for key, container in self._chunks.items():
+            if key in other._chunks:
+                container = _and_not(container, other._chunks[key])
+            if container is not None:
+                chunks[key] = container
+        return self._from_chunks(chunks)
+
+    def and_cardinality(self, other: "RoaringBitmap") -> int:
+        """Size of the intersection without building it"""
+        small, large = sorted((self._chunks, other._chunks), key=len)
+        return sum(
+            _and_cardinality(container, large[key])
+            for key, container in small.items() if key in large
+        )
+
+    @classmethod
+    def union(cls, bitmaps: Iterable["RoaringBitmap"]) -> "RoaringBitmap":
+        result = cls()
+        for bitmap in bitmaps:
+            result = result | bitmap
+        return result
+
+    # Export
+
+    def to_array(self) -> np.ndarray:
+        """All values in ascending order as int64"""
+        parts = [
+            _values(self._chunks[key]).astype(np.int64) + (key << _CHUNK_BITS)
+            for key in sorted(self._chunks)
+        ]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def select(self, skip: int = 0, limit: Optional[int] = None) -> np.ndarray:
+        """Values at ranks skip .. skip+limit, touching only the chunks needed"""
+        parts = []
+        remaining = limit
+        for key in sorted(self._chunks):
+            container = self._chunks[key]
+            count = _cardinality(container)
+            if skip >= count:
+                skip -= count
+                continue
+            values = _values(container)[skip:]
+            skip = 0
+            if remaining is not None:
+                values = values[:remaining]
+                remaining -= len(values)
+            parts.append(values.astype(np.int64) + (key << _CHUNK_BITS))
+            if remaining == 0:
+                break
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the containers"""
+        return sum(
+            _CHUNK_SIZE // 8 if isinstance(container, int) else container.nbytes
+            for container in self._chunks.values()
+        )
@@ -0,0 +1,405 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import heapq
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.background import BackgroundBuild
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.content import ContentItem
+from app.models.skill import Skill
+from .bitmap import RoaringBitmap
+
+logger = logging.getLogger(__name__)
+
+# (id, tags, scope key, live)
+TagRow = Tuple[str, Sequence[str], Optional[str], bool]
+
+# Facets for results up to this size are tallied from the matching rows
+FACET_SCAN_MAX_ROWS = 5_000
+
+_EMPTY = RoaringBitmap()
+
+
+@dataclass(frozen=True)
+class TagSource:
+    """How to index the tags of one model.
+
+    Neither skills nor content items carry a tenant column, so scoping uses
+    the closest key each table has (skill domain, content provider); a
+    tenant's view is the union of the scope keys it may see. ``live_column``
+    marks rows that exist but are hidden from queries (inactive content).
+    """
+
+    model: type
+    scope_column: str
+    live_column: Optional[str] = None
+
+    def row(self, instance) -> TagRow:
+        live = True if self.live_column is None else bool(getattr(instance, self.live_column))
+        return instance.id, tuple(instance.tags or ()), getattr(instance, self.scope_column), live
+
+
+TAG_SOURCES: Dict[str, TagSource] = {
+    Skill.__tablename__: TagSource(Skill, "domain"),
+    ContentItem.__tablename__: TagSource(ContentItem, "provider_id", "is_active"),
+}
+
+
+@dataclass
+class TagSearchResult:
+    """One page of a tag query plus totals over the whole match"""
+
+    ids: List[str]
+    total: int
+    facets: Dict[str, int] = field(default_factory=dict)
+
+
+class TagIndex:
+    """Tag -> bitmap of row ordinals for one table.
+
+    Rows get ordinals in (created_at, id) order when the index is built and
+    later inserts are appended, so ordinal order is creation order. Each tag,
+    scope key and the set of live rows is a RoaringBitmap; AND/OR/NOT tag
+    queries, counts and facet totals are bitmap algebra over them.
+    """
+
+    def __init__(self, rows: Iterable[TagRow] = ()):
+        self.built_at = time.monotonic()
+        self.ids: List[Optional[str]] = []
+        self.ordinals: Dict[str, int] = {}
+        self.tags: Dict[str, RoaringBitmap] = {}
+        self.scopes: Dict[str, RoaringBitmap] = {}
+        self.live = RoaringBitmap()
+        self._rows: Dict[int, TagRow] = {}
+        self._lock = threading.RLock()
+
+        tag_ordinals: Dict[str, List[int]] = {}
+        scope_ordinals: Dict[str, List[int]] = {}
+        live_ordinals: List[int] = []
+        for row in rows:
+            item_id, tags, scope, live = row
+            ordinal = len(self.ids)
+            self.ids.append(item_id)
+            self.ordinals[item_id] = ordinal
+            self._rows[ordinal] = row
+            for tag in set(tags):
+                tag_ordinals.setdefault(tag, []).append(ordinal)
+            if scope is not None:
+                scope_ordinals.setdefault(scope, []).append(ordinal)
+            if live:
+                live_ordinals.append(ordinal)
+
+        self.tags = {tag: RoaringBitmap(ordinals) for tag, ordinals in tag_ordinals.items()}
+        self.scopes = {scope: RoaringBitmap(ordinals) for scope, ordinals in scope_ordinals.items()}
+        self.live = RoaringBitmap(live_ordinals)
+
+    def __repr__(self):
+        return f"<TagIndex(rows={len(self._rows)}, tags={len(self.tags)})>"
+
+    def __len__(self):
+        return len(self._rows)
+
+    @classmethod
+    def load(cls, db_session, source: TagSource):
+        """Build the index for a source from one streamed query"""
+        model = source.model
+        columns = [model.id, model.tags, getattr(model, source.scope_column)]
+        if source.live_column:
+            columns.append(getattr(model, source.live_column))
+        rows = db_session.query(*columns).order_by(model.created_at, model.id).yield_per(10_000)
+        if source.live_column:
+            return cls((item_id, tuple(tags or ()), scope, bool(live)) for item_id, tags, scope, live in rows)
+        return cls((item_id, tuple(tags or ()), scope, True) for item_id, tags, scope in rows)
+
+    # Maintenance
+
+    def upsert(self, row: TagRow):
+        """Insert a row or bring an existing one up to date"""
+        item_id, tags, scope, live = row
+        with self._lock:
+            ordinal = self.ordinals.get(item_id)
+            if ordinal is None:
+                ordinal = len(self.ids)
+                self.ids.append(item_id)
+                self.ordinals[item_id] = ordinal
+                previous_tags, previous_scope = (), None
+            else:
+                _, previous_tags, previous_scope, _ = self._rows[ordinal]
+
+            for tag in set(previous_tags) - set(tags):
+                self._discard(self.tags, tag, ordinal)
+            for tag in set(tags) - set(previous_tags):
+                self.tags.setdefault(tag, RoaringBitmap()).add(ordinal)
+            if scope != previous_scope:
+                if previous_scope is not None:
+                    self._discard(self.scopes, previous_scope, ordinal)
+                if scope is not None:
+                    self.scopes.setdefault(scope, RoaringBitmap()).add(ordinal)
+            if live:
+                self.live.add(ordinal)
+            else:
+                self.live.discard(ordinal)
+            self._rows[ordinal] = (item_id, tuple(tags), scope, live)
+
+    def remove(self, item_id: str):
+        """Drop a deleted row; its ordinal is not reused"""
+        with self._lock:
+            ordinal = self.ordinals.pop(item_id, None)
+            if ordinal is None:
+                return
+            _, tags, scope, _ = self._rows.pop(ordinal)
+            for tag in set(tags):
+                self._discard(self.tags, tag, ordinal)
+            if scope is not None:
+                self._discard(self.scopes, scope, ordinal)
+            self.live.discard(ordinal)
+            self.ids[ordinal] = None
+
+    @staticmethod
+    def _discard(bitmaps: Dict[str, RoaringBitmap], key: str, ordinal: int):
+        bitmap = bitmaps.get(key)
+        if bitmap is not None:
+            bitmap.discard(ordinal)
+            if not bitmap:
+                del bitmaps[key]
+
+    # Queries
+
+    def query(self, all_of: Iterable[str] = (), any_of: Iterable[str] = (), none_of: Iterable[str] = (),
+              scopes: Optional[Iterable[str]] = None) -> RoaringBitmap:
+        """Ordinals of live rows having all of, any of and none of the given tags"""
+        with self._lock:
+            result = self.live
+            if scopes is not None:
+                result = result & RoaringBitmap.union(self.scopes.get(scope, _EMPTY) for scope in scopes)
+            # Most selective tag first so the running result shrinks fastest
+            for tag in sorted(set(all_of), key=lambda tag: len(self.tags.get(tag, _EMPTY))):
+                if not result:
+                    break
+                result = result & self.tags.get(tag, _EMPTY)
+            any_of = set(any_of)
+            if any_of and result:
+                result = result & RoaringBitmap.union(self.tags.get(tag, _EMPTY) for tag in any_of)
+            for tag in set(none_of):
+                if not result:
+                    break
+                result = result - self.tags.get(tag, _EMPTY)
+            return result.copy() if result is self.live else result
+
+    def facets(self, matches: RoaringBitmap, tags: Optional[Iterable[str]] = None,
+               limit: Optional[int] = 20) -> Dict[str, int]:
+        """Count matching rows per tag, largest first"""
+        with self._lock:
+            if tags is None and len(matches) <= FACET_SCAN_MAX_ROWS:
+                # Small result: tally the rows' own tags instead of intersecting every tag bitmap
+                counter = Counter(tag for ordinal in matches for tag in set(self._rows[ordinal][1]))
+                counts = list(counter.items())
+            else:
+                names = self.tags if tags is None else [tag for tag in tags if tag in self.tags]
+                counts = self._facet_counts(matches, names, limit)
+        counts = sorted((item for item in counts if item[1]), key=lambda item: (-item[1], item[0]))
+        return dict(counts[:limit] if limit is not None else counts)
+
+    def _facet_counts(self, matches: RoaringBitmap, names: Iterable[str], limit: Optional[int]):
+        """Intersection sizes per tag, skipping tags too small to reach the top limit"""
+        sized = sorted(((len(self.tags[tag]), tag) for tag in names), reverse=True)
+        counts, best = [], []
+        for size, tag in sized:
+            if limit is not None and len(best) >= limit and size <= best[0]:
+                break
+            count = matches.and_cardinality(self.tags[tag])
+            counts.append((tag, count))
+            if limit is not None:
+                if len(best) < limit:
+                    heapq.heappush(best, count)
+                elif count > best[0]:
+                    heapq.heapreplace(best, count)
+        return counts
+
+    def ids_for(self, matches: RoaringBitmap, skip: int = 0, limit: Optional[int] = None) -> List[str]:
+        """Row IDs for a slice of matches, in ordinal (creation) order"""
+        ids = self.ids
+        return [ids[ordinal] for ordinal in matches.select(skip, limit).tolist()]
+
+    def search(self, all_of: Iterable[str] = (), any_of: Iterable[str] = (), none_of: Iterable[str] = (),
+               scopes: Optional[Iterable[str]] = None, skip: int = 0, limit: int = 100,
+               facet_limit: Optional[int] = 20) -> TagSearchResult:
+        """Run a tag query and return one page of IDs with total and facet counts"""
+        matches = self.query(all_of, any_of, none_of, scopes)
+        return TagSearchResult(
+            ids=self.ids_for(matches, skip, limit),
+            total=len(matches),
+            facets=self.facets(matches, limit=facet_limit) if facet_limit else {},
+        )
+
+
+class TagIndexRegistry:
+    """Process-wide tag indexes, one per table in TAG_SOURCES.
+
+    Committed inserts, updates and deletes from this process are applied
+    incrementally; an index older than ``TAG_INDEX_MAX_AGE_SECONDS`` is
+    rebuilt on a worker thread (to pick up changes made by other workers)
+    while queries keep using the old one. Changes committed during a
+    rebuild are replayed onto the new index before it is published.
+    """
+
+    def __init__(self, max_age_seconds: Optional[float] = None, session_factory: Callable = SessionLocal):
+        self.max_age_seconds = max_age_seconds
+        self.session_factory = session_factory
+        self._indexes: Dict[str, TagIndex] = {}
+        self._builds: Dict[str, BackgroundBuild] = {
+            table: BackgroundBuild(f"{table} tag index", partial(self._load, table), partial(self._publish, table))
+            for table in TAG_SOURCES
+        }
+        self._pending: Dict[str, List[Tuple[str, str, Optional[TagRow]]]] = {}
+
+    def current(self, table: str) -> Optional[TagIndex]:
+        """Get the published index for a table without building it"""
+        return self._indexes.get(table)
+
+    def is_fresh(self, index: Optional[TagIndex]) -> bool:
+        if index is None:
+            return False
+        max_age = self.max_age_seconds
+        if max_age is None:
+            max_age = settings.TAG_INDEX_MAX_AGE_SECONDS
+        return max_age <= 0 or time.monotonic() - index.built_at < max_age
+
+    def _start(self, table: str):
+        """Start a background rebuild unless one is running (raises RuntimeError without a running loop)"""
+        build = self._builds[table]
+        if not build.running:
+            build.start()
+            # Changes committed from here on may be missing from the rows read; keep them for replay
+            self._pending[table] = []
+
+    def _load(self, table: str) -> TagIndex:
+        try:
+            with self.session_factory() as session:
+                return TagIndex.load(session, TAG_SOURCES[table])
+        except Exception:
+            self._pending.pop(table, None)
+            raise
+
+    def _publish(self, table: str, index: TagIndex):
+        for _, item_id, row in self._pending.pop(table, ()):
+            if row is None:
+                index.remove(item_id)
+            else:
+                index.upsert(row)
+        self._indexes[table] = index
+
+    async def get(self, model) -> TagIndex:
+        """Get the index for a model, starting a background rebuild if it is too old.
+
+        Waits only when nothing has been built yet, and then without
+        blocking the loop.
+        """
+        table = model.__tablename__
+        index = self._indexes.get(table)
+        if index is None:
+            self._start(table)
+            return await self._builds[table].wait()
+        if not self.is_fresh(index):
+            self._start(table)
+        return index
+
+    def get_blocking(self, db_session, model) -> TagIndex:
+        """Same as ``get`` for sync code, building with the caller's session when nothing is built yet"""
+        table = model.__tablename__
+        index = self._indexes.get(table)
+        if index is not None and not self.is_fresh(index):
+            try:
+                self._start(table)
+            except RuntimeError:
+                index = None
+        if index is None:
+            started = time.perf_counter()
+            index = TagIndex.load(db_session, TAG_SOURCES[table])
+            self._indexes[table] = index
+            logger.info("Built %s tag index over %d rows in %.2fs",
+                        table, len(index), time.perf_counter() - started)
+        return index
+
+    def apply(self, changes: Iterable[Tuple[str, str, Optional[TagRow]]]):
+        """Apply committed (table, id, row or None for deletes) changes to built indexes"""
+        for change in changes:
+            table, item_id, row = change
+            pending = self._pending.get(table)
+            if pending is not None:
+                pending.append(change)
+            index = self._indexes.get(table)
+            if index is None:
+                continue
+            if row is None:
+                index.remove(item_id)
+            else:
+                index.upsert(row)
+
+    def clear(self):
+        """Drop all indexes so the next get() rebuilds them"""
+        self._indexes = {}
+
+
+tag_index_registry = TagIndexRegistry()
+
+
+def get_tag_index(db_session, model) -> TagIndex:
+    """Get the process-wide tag index for Skill or ContentItem.
+
+    Takes a sync session and is meant for sync code; async code uses
+    ``await tag_index_registry.get(Skill)``.
+    """
+    return tag_index_registry.get_blocking(db_session, model)
+
+
+# Maintenance: record tag-relevant writes per session, apply them on commit
+
+_TAG_CHANGES_KEY = "tag_index_changes"
+
+
+def tags_changed_on_commit(session, model, rows: Iterable[TagRow]):
+    """Apply upserted rows to the tag index when the session commits (for writes that bypass ORM events)"""
+    session = getattr(session, "sync_session", session)
+    session.info.setdefault(_TAG_CHANGES_KEY, []).extend((model.__tablename__, row[0], row) for row in rows)
+
+
+def _record_upsert(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        source = TAG_SOURCES[target.__tablename__]
+        session.info.setdefault(_TAG_CHANGES_KEY, []).append(
+            (target.__tablename__, target.id, source.row(target))
+        )
+
+
+def _record_delete(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_TAG_CHANGES_KEY, []).append((target.__tablename__, target.id, None))
+
+
+for _source in TAG_SOURCES.values():
+    event.listen(_source.model, "after_insert", _record_upsert)
+    event.listen(_source.model, "after_update", _record_upsert)
+    event.listen(_source.model, "after_delete", _record_delete)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_tag_changes(session):
+    changes = session.info.pop(_TAG_CHANGES_KEY, None)
+    if changes:
+        tag_index_registry.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tag_changes(session):
+    session.info.pop(_TAG_CHANGES_KEY, None)
@@ -0,0 +1 @@
+# Benchmarks for the Learning Path Generator backend (run with `python -m benchmarks.<name>`)
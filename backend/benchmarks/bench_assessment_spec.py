@@ -0,0 +1,144 @@
+"""Compiled assessment specs: scoring accessors, grading and attempt completion.
+
+Compares walking the spec JSON on every call (what the Assessment accessors
+and an ad-hoc grader did before) with the cached compiled spec, for a
+100-question assessment, then completes attempts against a SQLite database
+where the learner already has many attempts, counting the statements each
+completion issues and timing the relationship load the old attempt
+numbering needed.
+
+    python -m benchmarks.bench_assessment_spec [num_prior_attempts]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.assessment import Assessment, AssessmentAttempt, AssessmentType, AttemptStatus
+from app.models.base import Base
+from app.models.learner import Learner
+from app.models.skill import Skill
+from app.models.user import User
+from app.services.grading import grade_answers, normalize_answer
+
+QUESTIONS = 100
+REPEATS = 2_000
+
+SPEC = {
+    "questions": [
+        {"id": f"q{i}", "type": "multiple_choice", "question": f"Question {i}?", "options": ["a", "b", "c", "d"],
+         "correct_answer": "c", "points": 1 + i % 3}
+        for i in range(QUESTIONS)
+    ],
+    "time_limit_min": 60,
+    "passing_score": 70,
+    "max_attempts": 1_000_000,
+}
+ANSWERS = [{"question_id": f"q{i}", "answer": "c" if i % 4 else "a"} for i in range(QUESTIONS)]
+
+
+def walk_accessors(spec):
+    """The accessors as they were: one spec walk per call"""
+    total = sum(question.get("points", 0) for question in spec.get("questions", []))
+    return total, spec.get("passing_score", 70), spec.get("time_limit_min"), spec.get("max_attempts", 1)
+
+
+def walk_grade(spec, answers):
+    """Grading straight off the spec JSON"""
+    submitted = {answer["question_id"]: answer["answer"] for answer in answers}
+    graded = []
+    for question in spec.get("questions", []):
+        accepted = {normalize_answer(a) for a in question.get("accepted_answers") or [question.get("correct_answer")]}
+        answer = submitted.get(question.get("id"))
+        is_correct = answer is not None and normalize_answer(answer) in accepted
+        graded.append({"question_id": question.get("id"), "is_correct": is_correct,
+                       "points_earned": question.get("points", 0) if is_correct else 0,
+                       "points_possible": question.get("points", 0)})
+    return graded
+
+
+def timed(label, function, repeats=REPEATS):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    elapsed = (time.perf_counter() - started) / repeats * 1e6
+    print(f"{label:<48} {elapsed:9.1f} us")
+    return elapsed
+
+
+def main(num_prior_attempts: int = 500):
+    workdir = tempfile.mkdtemp(prefix="bench-spec-")
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'spec.db')}")
+    Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session_factory = sessionmaker(engine, expire_on_commit=False)
+
+    now = datetime.utcnow()
+    with session_factory() as db:
+        db.execute(insert(Skill.__table__), [
+            {"id": "skill", "slug": "skill", "label": "Skill", "description": "", "domain": "bench"}
+        ])
+        db.execute(insert(User.__table__), [
+            {"id": "user", "email": "user@bench.example", "name": "User", "tenant_id": "bench"}
+        ])
+        db.execute(insert(Learner.__table__), [{"id": "learner", "user_id": "user", "tenant_id": "bench"}])
+        db.execute(insert(Assessment.__table__), [{
+            "id": "assessment", "learner_id": "learner", "skill_id": "skill", "type": AssessmentType.SUMMATIVE,
+            "title": "Certification", "spec": SPEC, "attempt_count": num_prior_attempts,
+        }])
+        db.execute(insert(AssessmentAttempt.__table__), [
+            {"id": f"prior-{n}", "assessment_id": "assessment", "learner_id": "learner", "attempt_number": n + 1,
+             "status": AttemptStatus.COMPLETED, "score": 80.0, "mastery_prob": 0.5,
+             "details": {"answers": ANSWERS}, "completed_at": now - timedelta(minutes=n)}
+            for n in range(num_prior_attempts)
+        ])
+        db.commit()
+
+    with session_factory() as db:
+        assessment = db.get(Assessment, "assessment")
+        print(f"{QUESTIONS}-question assessment, {num_prior_attempts:,} prior attempts")
+        before = timed("accessors, walking the spec", lambda: walk_accessors(assessment.spec))
+        after = timed("accessors, compiled spec", lambda: (
+            assessment.get_total_points(), assessment.get_passing_score(), assessment.get_time_limit(),
+            assessment.get_max_attempts(),
+        ))
+        print(f"{'':<48} {before / after:9.1f}x")
+        before = timed("grade an attempt, walking the spec", lambda: walk_grade(assessment.spec, ANSWERS))
+        compiled = assessment.compiled_spec()
+        after = timed("grade an attempt, compiled spec", lambda: grade_answers(compiled, ANSWERS))
+        print(f"{'':<48} {before / after:9.1f}x")
+
+    with session_factory() as db:
+        started = time.perf_counter()
+        prior = len(db.get(Assessment, "assessment").attempts)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{'loading the attempts relationship (old numbering)':<48} {elapsed:9.1f} ms ({prior:,} rows)")
+
+    with session_factory() as db:
+        assessment = db.get(Assessment, "assessment")
+        timings = []
+        for n in range(20):
+            attempt = AssessmentAttempt(id=f"new-{n}", assessment=assessment, learner_id="learner",
+                                        attempt_number=num_prior_attempts + n + 1, status=AttemptStatus.GRADING)
+            db.add(attempt)
+            db.flush()
+            graded = grade_answers(assessment.compiled_spec(), ANSWERS)
+            del statements[:]
+            started = time.perf_counter()
+            attempt.complete(graded, 30)
+            db.flush()
+            timings.append((time.perf_counter() - started) * 1000)
+        db.commit()
+        print(f"{'complete() incl. mastery update and flush':<48} {sorted(timings)[len(timings) // 2]:9.1f} ms "
+              f"({len(statements)} statements, attempt number {attempt.attempt_number}, score {attempt.score:.1f})")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,100 @@
+"""Bayesian Knowledge Tracing: per-attempt updates vs the vectorized replay and EM fit.
+
+Simulates learners answering assessments on many skills from known BKT
+parameters, then times replaying every attempt one by one with
+update_mastery (what recomputing through the online path costs) against
+the vectorized replay over all (learner, skill) sequences at once, fits
+the parameters back by EM and reports how close they land to the truth.
+
+    python -m benchmarks.bench_bkt [num_attempts]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from app.services.mastery import BKTParams, Observations, ParamArrays, fit_em, replay, update_mastery
+
+NUM_SKILLS = 200
+MEAN_SEQUENCE_LENGTH = 12
+ONLINE_SAMPLE = 200_000  # Attempts replayed one by one; the rate is extrapolated
+
+
+def simulate(num_attempts: int, seed: int = 3):
+    """(learner, skill, time, correct) arrays drawn from random true parameters"""
+    rng = np.random.default_rng(seed)
+    truth = ParamArrays(
+        rng.uniform(0.1, 0.5, NUM_SKILLS), rng.uniform(0.05, 0.3, NUM_SKILLS), rng.uniform(0.1, 0.3, NUM_SKILLS),
+        rng.uniform(0.05, 0.2, NUM_SKILLS), np.zeros(NUM_SKILLS),
+    )
+    lengths = rng.geometric(1.0 / MEAN_SEQUENCE_LENGTH, num_attempts // MEAN_SEQUENCE_LENGTH * 2)
+    lengths = lengths[np.cumsum(lengths) <= num_attempts]
+    num_sequences = len(lengths)
+    skills = rng.integers(0, NUM_SKILLS, num_sequences)
+
+    sequence = np.repeat(np.arange(num_sequences), lengths)
+    skill = skills[sequence]
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    position = np.arange(len(sequence)) - np.repeat(starts, lengths)
+
+    known = rng.random(num_sequences) < truth.p_init[skills]
+    correct = np.empty(len(sequence), dtype=bool)
+    by_position = np.argsort(position, kind="stable")
+    bounds = np.searchsorted(position[by_position], np.arange(lengths.max() + 1))
+    for step in range(lengths.max()):
+        index = by_position[bounds[step]:bounds[step + 1]]
+        owner, s = sequence[index], skill[index]
+        p_correct = np.where(known[owner], 1.0 - truth.p_slip[s], truth.p_guess[s])
+        correct[index] = rng.random(len(index)) < p_correct
+        known[owner] |= rng.random(len(index)) < truth.p_learn[s]
+
+    # Shuffle rows the way a database scan would return them
+    shuffle = rng.permutation(len(sequence))
+    learner = sequence[shuffle]  # One learner per sequence is enough for the replay
+    return learner, skill[shuffle], position[shuffle].astype(np.float64), correct[shuffle], truth
+
+
+def main(num_attempts: int = 2_000_000):
+    learner, skill, when, correct, truth = simulate(num_attempts)
+    print(f"{len(learner):,} attempts in {len(np.unique(learner)):,} sequences over {NUM_SKILLS} skills")
+
+    started = time.perf_counter()
+    observations = Observations.build(learner, skill, when, correct)
+    print(f"group and sort: {time.perf_counter() - started:.2f}s")
+
+    defaults = ParamArrays.from_params([BKTParams()] * NUM_SKILLS)
+    sample = min(ONLINE_SAMPLE, len(observations))
+    per_skill = [defaults.params(code) for code in range(NUM_SKILLS)]
+    seq = observations.sequence[:sample].tolist()
+    sk, ok = observations.skill[:sample].tolist(), observations.correct[:sample].tolist()
+    online = np.empty(sample)
+    started = time.perf_counter()
+    previous_sequence, p_known = -1, 0.0
+    for i in range(sample):
+        params = per_skill[sk[i]]
+        if seq[i] != previous_sequence:
+            previous_sequence, p_known = seq[i], params.p_init
+        p_known = update_mastery(p_known, ok[i], params)
+        online[i] = p_known
+    online_elapsed = (time.perf_counter() - started) / sample * len(observations)
+    print(f"update_mastery one by one: {online_elapsed:.2f}s (extrapolated from {sample:,} attempts)")
+
+    started = time.perf_counter()
+    mastery = replay(observations, defaults)
+    replay_elapsed = time.perf_counter() - started
+    print(f"vectorized replay: {replay_elapsed:.2f}s ({online_elapsed / replay_elapsed:.0f}x), "
+          f"max difference from one by one {np.abs(mastery[:sample] - online).max():.1e}")
+
+    started = time.perf_counter()
+    fitted, report = fit_em(observations, defaults)
+    elapsed = time.perf_counter() - started
+    print(f"EM fit: {report.iterations} iterations in {elapsed:.2f}s ({elapsed / report.iterations:.2f}s each), "
+          f"converged {report.converged}, log-likelihood {report.history[0]:,.0f} -> {report.log_likelihood:,.0f}")
+    for name in ("p_init", "p_learn", "p_guess", "p_slip"):
+        error = np.abs(getattr(fitted, name) - getattr(truth, name))
+        print(f"  {name:<8} mean abs error {error.mean():.3f} (median {np.median(error):.3f})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
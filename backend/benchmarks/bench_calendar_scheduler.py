@@ -0,0 +1,189 @@
+"""Auto-scheduling a whole tenant's pending plan steps into study blocks.
+
+Seeds a synthetic SQLite tenant (in a child process) where every learner
+has an active plan of pending steps, working hours in one of a few
+timezones and existing calendar events, then schedules the tenant with
+the given number of worker processes and times it. Checks the result
+against the learners' calendars: no two scheduled events of a learner
+overlap, every block lies within the learner's working hours, steps are
+placed in sequence order and finish before they are due. Runs the
+tenant a second time to time a reschedule, which replaces the blocks
+of the first run.
+
+    python -m benchmarks.bench_calendar_scheduler [num_learners] [steps_per_learner] [workers]
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.calendar import CalendarEvent, CalendarProvider, EventStatus
+from app.models.learner import Learner
+from app.models.plan import LearningPlan, PlanStatus, PlanStep, StepStatus
+from app.models.skill import Skill
+from app.models.user import User
+from app.services.scheduler import AUTO_SCHEDULED, WorkingHours, schedule_tenant, to_minutes
+
+TENANT = "bench"
+SKILLS = 200
+EVENTS_PER_LEARNER = 40
+SEED_BATCH = 50_000
+TIMEZONES = ["UTC", "Europe/Berlin", "America/New_York", "America/Los_Angeles", "Asia/Kolkata", "Asia/Tokyo"]
+HOURS = [
+    None,  # Defaults
+    {"days": ["mon", "tue", "wed", "thu", "fri"], "start": "08:00", "end": "12:00"},
+    {"days": ["mon", "wed", "fri"], "start": "13:00", "end": "18:00"},
+    {"days": ["sat", "sun"], "start": "10:00", "end": "16:00"},
+]
+
+
+def _insert(db, table, rows):
+    for offset in range(0, len(rows), SEED_BATCH):
+        db.execute(insert(table), rows[offset:offset + SEED_BATCH])
+
+
+def seed(path: str, num_learners: int, steps_per_learner: int, now: datetime):
+    """Learners with one active plan each and events over the next weeks (runs in a child process)"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    rng = random.Random(5)
+    with sessionmaker(engine)() as db:
+        _insert(db, Skill.__table__, [
+            {"id": f"skill-{s}", "slug": f"skill-{s}", "label": f"Skill {s}", "description": "", "domain": "bench"}
+            for s in range(SKILLS)
+        ])
+        _insert(db, User.__table__, [
+            {"id": f"user-{n}", "email": f"user-{n}@bench.example", "name": "User", "tenant_id": TENANT}
+            for n in range(num_learners)
+        ])
+        learners, plans, steps, events = [], [], [], []
+        for n in range(num_learners):
+            learner_id = f"learner-{n:06d}"
+            hours, budget = rng.choice(HOURS), rng.choice([5, 8, 10, 15])
+            learners.append({
+                "id": learner_id, "user_id": f"user-{n}", "tenant_id": TENANT,
+                "profile": {"timezone": rng.choice(TIMEZONES)},
+                "preferences": {"working_hours": hours} if hours else {},
+                "goals": {"time_budget_hours": budget},
+            })
+            target = now + timedelta(days=120)
+            plans.append({"id": f"plan-{n}", "learner_id": learner_id, "title": "Plan", "objective": "Bench",
+                          "status": PlanStatus.ACTIVE, "start_date": now, "target_date": target})
+            due = now
+            for k in range(steps_per_learner):
+                effort = rng.randrange(20, 181, 5)
+                due += timedelta(days=effort / (budget * 60 / 7) * 1.3)  # Paced on the weekly budget, with slack
+                steps.append({"id": f"step-{n}-{k}", "plan_id": f"plan-{n}", "skill_id": f"skill-{rng.randrange(SKILLS)}",
+                              "title": f"Step {k}", "effort_min": effort, "sequence": k,
+                              "status": StepStatus.IN_PROGRESS if k == 0 else StepStatus.PENDING,
+                              "progress_percentage": 50 if k == 0 else 0, "due_at": min(due, target)})
+            for e in range(EVENTS_PER_LEARNER):
+                start = now + timedelta(minutes=rng.randrange(0, 60 * 24 * 90, 15))
+                events.append({"learner_id": learner_id, "provider": CalendarProvider.GOOGLE, "title": "Meeting",
+                               "start_at": start, "end_at": start + timedelta(minutes=rng.choice([30, 60, 90])),
+                               "status": EventStatus.SCHEDULED, "attendees": [], "metadata": {}})
+        _insert(db, Learner.__table__, learners)
+        _insert(db, LearningPlan.__table__, plans)
+        _insert(db, PlanStep.__table__, steps)
+        _insert(db, CalendarEvent.__table__, events)
+        db.commit()
+    engine.dispose()
+
+
+def check(db, now: datetime) -> dict:
+    """Conflicts, blocks outside working hours, out-of-order and late steps across the tenant"""
+    learners = {
+        learner_id: WorkingHours.from_learner(preferences, profile, goals)
+        for learner_id, preferences, profile, goals in db.execute(
+            select(Learner.id, Learner.preferences, Learner.profile, Learner.goals))
+    }
+    steps = {step_id: (plan_id, sequence, to_minutes(due_at)) for step_id, plan_id, sequence, due_at in db.execute(
+        select(PlanStep.id, PlanStep.plan_id, PlanStep.sequence, PlanStep.due_at))}
+    events = db.execute(
+        select(CalendarEvent.learner_id, CalendarEvent.start_at, CalendarEvent.end_at, CalendarEvent.plan_step_id,
+               CalendarEvent.__table__.c["metadata"][AUTO_SCHEDULED].as_boolean())
+        .where(CalendarEvent.status == EventStatus.SCHEDULED)
+        .order_by(CalendarEvent.learner_id, CalendarEvent.start_at)
+    )
+    counts = defaultdict(int)
+    current, any_end, block_end = None, 0, 0  # Latest end of any event and of any block so far, per learner
+    blocks = defaultdict(list)
+    windows = {}
+    for learner_id, start_at, end_at, step_id, auto_scheduled in events:
+        start, end = to_minutes(start_at), to_minutes(end_at)
+        if learner_id != current:
+            current, any_end, block_end = learner_id, 0, 0
+        # Seeded events may overlap each other; blocks must overlap nothing
+        if start < (any_end if auto_scheduled else block_end):
+            counts["conflicts"] += 1
+        any_end = max(any_end, end)
+        if not auto_scheduled:
+            continue
+        block_end = max(block_end, end)
+        counts["blocks"] += 1
+        if learner_id not in windows:
+            windows[learner_id] = learners[learner_id].windows(now, now + timedelta(days=200))
+        if not any(w_start <= start and end <= w_end for w_start, w_end in windows[learner_id]):
+            counts["outside_hours"] += 1
+        plan_id, sequence, due = steps[step_id]
+        if end > due:
+            counts["late"] += 1
+        blocks[plan_id].append((sequence, start, end))
+    for plan_blocks in blocks.values():
+        last_sequence = None
+        for sequence, start, end in sorted(plan_blocks, key=lambda block: block[1]):
+            if last_sequence is not None and sequence < last_sequence:
+                counts["out_of_order"] += 1
+            last_sequence = sequence
+    return dict(counts)
+
+
+def main(num_learners: int = 10_000, steps_per_learner: int = 50, workers: int = 0):
+    workdir = tempfile.mkdtemp(prefix="bench-scheduler-")
+    path = os.path.join(workdir, "scheduler.db")
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+
+    started = time.perf_counter()
+    child = multiprocessing.get_context("spawn").Process(target=seed, args=(path, num_learners, steps_per_learner, now))
+    child.start()
+    child.join()
+    print(f"seeded {num_learners:,} learners x {steps_per_learner} steps, {EVENTS_PER_LEARNER} events each "
+          f"({time.perf_counter() - started:.0f}s)")
+
+    engine = create_engine(f"sqlite:///{path}")
+    session_factory = sessionmaker(engine)
+    for label in ("schedule", "reschedule"):
+        with session_factory() as db:
+            report = schedule_tenant(db, TENANT, workers=workers, now=now)
+            db.commit()
+        print(f"{label:<11} {report.elapsed_seconds:7.1f}s with {report.workers} workers: "
+              f"{report.scheduled_steps:,} of {report.steps:,} steps in {report.blocks:,} blocks, "
+              f"{report.unscheduled_steps:,} did not fit, {report.replaced_blocks:,} blocks replaced "
+              f"({report.steps / report.elapsed_seconds:,.0f} steps/s)")
+
+    with session_factory() as db:
+        started = time.perf_counter()
+        counts = check(db, now)
+    print(f"checked in {time.perf_counter() - started:.0f}s: {counts}")
+    assert counts.get("blocks") == report.blocks
+    assert not any(counts.get(key) for key in ("conflicts", "outside_hours", "late", "out_of_order"))
+    engine.dispose()
+    os.remove(path)
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 0,
+    )
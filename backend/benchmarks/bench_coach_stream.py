@@ -0,0 +1,127 @@
+"""Coach streaming latency and concurrency with the local fake chat model.
+
+Runs N concurrent coach streams in one event loop (one worker) against a
+SQLite catalog, with the fake model emitting tokens at a fixed rate after
+a fixed first-token delay, and reports time to first byte (the start
+event), time to first token, total stream time and event-loop lag. The
+model's own first-token delay is the floor for time to first token; the
+overhead above it is what the streaming path costs.
+
+    python -m benchmarks.bench_coach_stream [max_concurrency]
+"""
+
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.models.base import Base
+from app.models.content import ContentItem, ContentProvider, ProviderKind
+from app.services.coach import CoachStream, StreamLimiter
+from app.services.llm import FakeChatModel, LLMGateway
+from app.services.rag import get_content_search_engine
+from benchmarks.synthetic import TOPICS, content_rows
+
+CATALOG_ITEMS = 5_000
+TOKENS_PER_SECOND = 30.0
+FIRST_TOKEN_DELAY = 0.3
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def seed(session_factory):
+    async with session_factory() as db:
+        db.add(ContentProvider(id="bench", name="Bench", kind=ProviderKind.INTERNAL, cost_model={}, settings={}))
+        for item_id, title, description, tags, type_, license_, language, level, duration, cost in \
+                content_rows(CATALOG_ITEMS):
+            db.add(ContentItem(id=item_id, provider_id="bench", uri=f"https://bench.example/{item_id}",
+                               title=title, description=description, tags=tags, type=type_, license=license_,
+                               language=language, level=level, duration_min=duration, cost=cost))
+        await db.commit()
+
+
+async def run_stream(stream: CoachStream, started: float, timings: dict):
+    first_byte = first_token = None
+    async for event in stream.events():
+        now = time.perf_counter() - started
+        if first_byte is None:
+            first_byte = now
+        if event.type == "token" and first_token is None:
+            first_token = now
+    timings["first_byte"].append(first_byte)
+    timings["first_token"].append(first_token)
+    timings["total"].append(time.perf_counter() - started)
+
+
+async def loop_lag(stop: asyncio.Event, samples: list, interval: float = 0.01):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+
+async def scenario(session_factory, concurrency: int):
+    model = FakeChatModel(tokens_per_second=TOKENS_PER_SECOND, first_token_delay=FIRST_TOKEN_DELAY)
+    # Every stream calls the model: no answer cache, one tenant per learner so nothing is coalesced
+    gateway = LLMGateway(model, enabled=False)
+    limiter = StreamLimiter(concurrency)
+    timings = {"first_byte": [], "first_token": [], "total": []}
+    lag, stop = [], asyncio.Event()
+    lag_task = asyncio.create_task(loop_lag(stop, lag))
+
+    tasks = []
+    for i in range(concurrency):
+        question = f"How should I learn {TOPICS[i % len(TOPICS)]}?"
+        stream = CoachStream(f"learner-{i}", f"tenant-{i}", question, gateway=gateway,
+                             session_factory=session_factory, limiter=limiter)
+        tasks.append(run_stream(stream, time.perf_counter(), timings))
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await lag_task
+
+    ms = lambda samples, pct: percentile(samples, pct) * 1000
+    print(f"{concurrency:>5} streams: "
+          f"TTFB p50 {ms(timings['first_byte'], 0.5):.1f} ms, "
+          f"first token p50 {ms(timings['first_token'], 0.5):.0f} / p95 {ms(timings['first_token'], 0.95):.0f} ms, "
+          f"stream p50 {statistics.median(timings['total']):.2f}s, "
+          f"loop lag p95 {ms(lag, 0.95):.1f} ms, wall {elapsed:.1f}s")
+
+
+async def run(max_concurrency: int):
+    workdir = tempfile.mkdtemp(prefix="bench-coach-")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, 'coach.db')}",
+                                 connect_args={"timeout": 60})
+    async with engine.begin() as connection:
+        # Learner rows are not needed: SQLite does not enforce foreign keys by default
+        await connection.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    await seed(session_factory)
+    # Without Redis, learner contexts are assembled from the database on every turn; that is fine here
+    logging.getLogger("app.services.coach.context").setLevel(logging.ERROR)
+    async with session_factory() as db:
+        await db.run_sync(get_content_search_engine)  # Build the search index outside the measurements
+
+    print(f"fake model: {TOKENS_PER_SECOND:.0f} tokens/s after {FIRST_TOKEN_DELAY * 1000:.0f} ms")
+    concurrency = 1
+    while concurrency <= max_concurrency:
+        await scenario(session_factory, concurrency)
+        concurrency *= 4 if concurrency < 4 else 2
+    await engine.dispose()
+
+
+def main(max_concurrency: int = 512):
+    asyncio.run(run(max_concurrency))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 512)
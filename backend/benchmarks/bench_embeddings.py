@@ -0,0 +1,86 @@
+"""Embedding cache effectiveness on a catalog re-sync.
+
+Embeds a synthetic catalog cold, then re-embeds it after changing 2% of
+the items (a typical provider sync) and reports how many texts reached
+the model and how long each pass took, against embedding everything
+uncached. When Redis is reachable at REDIS_URL, also measures a fresh
+worker warming its in-process cache from the shared Redis tier.
+
+    python -m benchmarks.bench_embeddings [num_items]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from redis.exceptions import RedisError
+
+from app.core.redis import close_redis, get_binary_redis
+from app.services.rag import CachedEmbedder, HashingEmbedder, RedisEmbeddingStore, embedding_text
+from benchmarks.synthetic import FILLER, content_rows
+
+CHANGED_FRACTION = 0.02
+
+
+def catalog_texts(num_items: int, seed: int = 7):
+    return [embedding_text(title, description, tags)
+            for _, title, description, tags, *_ in content_rows(num_items, seed=seed)]
+
+
+def timed(label: str, embedder: CachedEmbedder, embed):
+    computed = embedder.computed
+    started = time.perf_counter()
+    vectors = embed()
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {elapsed:.2f}s, {embedder.computed - computed:,} texts embedded by the model")
+    return vectors
+
+
+async def redis_available() -> bool:
+    try:
+        return await (await get_binary_redis()).ping()
+    except (RedisError, OSError):
+        return False
+
+
+async def shared_tier(texts):
+    if not await redis_available():
+        print("redis: not reachable, skipping the shared tier")
+        return
+    dimension = HashingEmbedder().dimension
+    first = CachedEmbedder(HashingEmbedder(), store=RedisEmbeddingStore(dimension))
+    started = time.perf_counter()
+    await first.embed_async(texts)
+    print(f"redis fill: {time.perf_counter() - started:.2f}s, {first.computed:,} texts embedded by the model")
+
+    fresh = CachedEmbedder(HashingEmbedder(), store=RedisEmbeddingStore(dimension))
+    started = time.perf_counter()
+    await fresh.embed_async(texts)
+    print(f"fresh worker from redis: {time.perf_counter() - started:.2f}s, "
+          f"{fresh.computed:,} texts embedded by the model")
+    await close_redis()
+
+
+def main(num_items: int = 500_000):
+    texts = catalog_texts(num_items)
+    rng = random.Random(3)
+    changed = list(texts)
+    for position in rng.sample(range(num_items), int(num_items * CHANGED_FRACTION)):
+        changed[position] = f"{changed[position]} {rng.choice(FILLER)} updated"
+
+    model = HashingEmbedder()
+    started = time.perf_counter()
+    model.embed(texts)
+    print(f"uncached: {time.perf_counter() - started:.2f}s, {num_items:,} texts embedded by the model")
+
+    embedder = CachedEmbedder(HashingEmbedder())
+    timed("cold cache", embedder, lambda: embedder.embed(texts))
+    timed(f"re-sync with {CHANGED_FRACTION:.0%} changed", embedder, lambda: embedder.embed(changed))
+    print(f"in-process cache: {len(embedder.cache):,} entries, {embedder.cache.nbytes / 2**20:.0f} MiB of vectors")
+
+    asyncio.run(shared_tier(texts))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
@@ -0,0 +1,182 @@
+"""Parquet export of assessment attempts: throughput and peak memory.
+
+Seeds a synthetic SQLite attempts table (in a child process, so its
+memory is not counted), exports the tenant in full to date-partitioned
+Parquet, then exports again after touching 1% of the rows to time an
+incremental run from the watermark. Reports rows per second, peak RSS
+of the exporting process and the size of the dataset against the JSON
+the paginated API would have sent, and reads the dataset back to check
+the row counts.
+
+    python -m benchmarks.bench_export [num_attempts] [batch_rows]
+"""
+
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pyarrow.dataset as ds
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.assessment import Assessment, AssessmentType
+from app.models.base import Base
+from app.models.learner import Learner
+from app.models.skill import Skill
+from app.models.user import User
+from app.services.export import export_tenant_table
+
+TENANT = "bench"
+LEARNERS = 5_000
+ASSESSMENTS = 20_000
+SKILLS = 200
+HISTORY_DAYS = 365
+SEED_BATCH = 100_000
+
+
+def _format(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def seed(path: str, num_attempts: int, now: datetime):
+    """Fill the database with raw executemany batches (runs in a child process)"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    rng = random.Random(3)
+    with sessionmaker(engine)() as db:
+        db.execute(insert(Skill.__table__), [
+            {"id": f"skill-{s}", "slug": f"skill-{s}", "label": f"Skill {s}", "description": "", "domain": "bench"}
+            for s in range(SKILLS)
+        ])
+        db.execute(insert(User.__table__), [
+            {"id": f"user-{n}", "email": f"user-{n}@bench.example", "name": "User", "tenant_id": TENANT}
+            for n in range(LEARNERS)
+        ])
+        db.execute(insert(Learner.__table__), [
+            {"id": f"learner-{n}", "user_id": f"user-{n}", "tenant_id": TENANT} for n in range(LEARNERS)
+        ])
+        db.execute(insert(Assessment.__table__), [
+            {"id": f"assessment-{a}", "learner_id": f"learner-{a % LEARNERS}", "skill_id": f"skill-{a % SKILLS}",
+             "type": AssessmentType.FORMATIVE, "title": "Check", "spec": {"passing_score": 70}}
+            for a in range(ASSESSMENTS)
+        ])
+        db.commit()
+    connection = engine.raw_connection()
+    cursor = connection.cursor()
+    cursor.execute("PRAGMA synchronous = OFF")
+    for offset in range(0, num_attempts, SEED_BATCH):
+        rows = []
+        for n in range(offset, min(offset + SEED_BATCH, num_attempts)):
+            a = rng.randrange(ASSESSMENTS)
+            started = now - timedelta(days=HISTORY_DAYS, hours=3) + timedelta(seconds=rng.randrange(HISTORY_DAYS * 86_400))
+            completed = started + timedelta(minutes=rng.randrange(5, 90))
+            details = json.dumps({"answers": [{"question_id": f"q{q}", "answer": "c", "is_correct": q % 3 > 0,
+                                               "points_earned": 1} for q in range(5)],
+                                  "time_taken_min": rng.randrange(5, 90), "attempt_number": 1})
+            rows.append((f"attempt-{n:09d}", f"assessment-{a}", f"learner-{a % LEARNERS}", 1,
+                         float(rng.randrange(30, 100)), rng.random(), "COMPLETED", _format(started),
+                         _format(completed), details, _format(started), _format(completed)))
+        cursor.executemany(
+            "INSERT INTO assessment_attempts (id, assessment_id, learner_id, attempt_number, score, mastery_prob, "
+            "status, started_at, completed_at, details, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        connection.commit()
+    connection.close()
+    engine.dispose()
+
+
+class PeakRSS:
+    """Samples the process's resident set size while a block runs"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = self.baseline = self._current()
+        self._done = threading.Event()
+
+    @staticmethod
+    def _current() -> int:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, self._current())
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._current())
+
+
+def report_line(label, report, rss=None):
+    mib = 1024 * 1024
+    line = (f"{label:<22} {report.rows:>12,} rows {report.elapsed_seconds:8.1f}s {report.rows_per_second:>10,.0f} rows/s, "
+            f"{len(report.files):,} files, {report.bytes_written / mib:,.0f} MiB")
+    if rss is not None:
+        line += f", peak RSS {rss.peak / mib:,.0f} MiB ({(rss.peak - rss.baseline) / mib:+,.0f} MiB during export)"
+    print(line)
+
+
+def main(num_attempts: int = 50_000_000, batch_rows: int = 10_000):
+    workdir = tempfile.mkdtemp(prefix="bench-export-")
+    path, root = os.path.join(workdir, "export.db"), os.path.join(workdir, "datasets")
+    now = datetime.utcnow()
+
+    started = time.perf_counter()
+    child = multiprocessing.get_context("spawn").Process(target=seed, args=(path, num_attempts, now))
+    child.start()
+    child.join()
+    print(f"seeded {num_attempts:,} attempts over {HISTORY_DAYS} days "
+          f"({os.path.getsize(path) / 1024 ** 3:.1f} GiB SQLite, {time.perf_counter() - started:.0f}s)")
+
+    engine = create_engine(f"sqlite:///{path}")
+    session_factory = sessionmaker(engine)
+    with session_factory() as db, PeakRSS() as rss:
+        full = export_tenant_table(db, TENANT, "assessment_attempts", root=root, full=True, batch_size=batch_rows,
+                                   until=now - timedelta(hours=1))
+    report_line("full export", full, rss)
+
+    touched = max(1, num_attempts // 100)
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "UPDATE assessment_attempts SET mastery_prob = mastery_prob / 2, updated_at = ? "
+            "WHERE rowid % 100 = 0", (_format(now - timedelta(minutes=30)),))
+    with session_factory() as db:
+        incremental = export_tenant_table(db, TENANT, "assessment_attempts", root=root, batch_size=batch_rows,
+                                          until=now)
+    report_line(f"incremental ({touched:,})", incremental)
+
+    started = time.perf_counter()
+    dataset = ds.dataset(os.path.join(root, "assessment_attempts"), format="parquet", partitioning="hive")
+    rows = dataset.count_rows()
+    print(f"read back: {rows:,} rows ({full.rows + incremental.rows:,} exported), "
+          f"{time.perf_counter() - started:.1f}s to count")
+    assert rows == full.rows + incremental.rows == num_attempts + incremental.rows
+
+    # The same rows as paginated JSON (serialized sample, extrapolated)
+    sample = dataset.head(10_000).to_pylist()
+    json_bytes = len(json.dumps(sample, default=str)) / len(sample) * num_attempts
+    print(f"dataset {full.bytes_written / 1024 ** 2:,.0f} MiB against ~{json_bytes / 1024 ** 2:,.0f} MiB of JSON; "
+          f"process peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:,.0f} MiB")
+    engine.dispose()
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10_000,
+    )
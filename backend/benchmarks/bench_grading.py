@@ -0,0 +1,106 @@
+"""Assessment grading: graded submissions per second per core, and fairness under a burst.
+
+Queues a certification-deadline burst from one tenant followed by a trickle
+from others, as a mix of multiple-choice quizzes and code challenges whose
+test cases run in the sandbox, through a GradingPool with the given number
+of worker processes (grades are counted instead of saved). Reports
+throughput per core and how long the small tenants waited behind the burst.
+
+    python -m benchmarks.bench_grading [num_submissions] [workers]
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+from app.services.grading import GradingJob, GradingPool, compile_spec
+
+QUIZ_QUESTIONS = 50
+CODE_SHARE = 0.2  # Submissions that are code challenges
+BURST_SHARE = 0.8  # Submissions from the tenant at its deadline, queued first
+SMALL_TENANTS = 5
+
+QUIZ_SPEC = compile_spec({
+    "questions": [
+        {"id": f"q{i}", "type": "multiple_choice", "options": ["a", "b", "c", "d"], "correct_answer": "b",
+         "points": 2}
+        for i in range(QUIZ_QUESTIONS)
+    ],
+})
+
+CODE_SPEC = compile_spec({
+    "questions": [{
+        "id": "fizzbuzz", "type": "code", "entrypoint": "fizzbuzz", "points": 10,
+        "tests": [{"args": [n], "expected": ["Fizz" * (i % 3 == 0) + "Buzz" * (i % 5 == 0) or str(i)
+                                             for i in range(1, n + 1)]} for n in (1, 15, 100)],
+    }],
+})
+
+CODE_ANSWERS = (
+    "def fizzbuzz(n):\n    return ['Fizz' * (i % 3 == 0) + 'Buzz' * (i % 5 == 0) or str(i) for i in range(1, n + 1)]\n",
+    "def fizzbuzz(n):\n    return [str(i) for i in range(1, n + 1)]\n",
+    "def fizzbuzz(n):\n    while True:\n        pass\n",
+)
+
+
+def submissions(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    burst = int(count * BURST_SHARE)
+    jobs = []
+    for n in range(count):
+        tenant = "deadline" if n < burst else f"tenant-{rng.randrange(SMALL_TENANTS)}"
+        if rng.random() < CODE_SHARE:
+            # Mostly correct solutions; the occasional infinite loop hits the time limit
+            answer = rng.choices(CODE_ANSWERS, weights=(80, 19, 1))[0]
+            jobs.append(GradingJob(f"attempt-{n}", tenant, CODE_SPEC, [{"question_id": "fizzbuzz", "answer": answer}]))
+        else:
+            answers = [{"question_id": f"q{i}", "answer": rng.choice("abbb")} for i in range(QUIZ_QUESTIONS)]
+            jobs.append(GradingJob(f"attempt-{n}", tenant, QUIZ_SPEC, answers))
+    return jobs
+
+
+async def run(count: int, workers: int):
+    finished = {}
+    scores = []
+
+    async def persist(job, graded):
+        finished[job.attempt_id] = time.monotonic()
+        scores.append(sum(answer["points_earned"] for answer in graded))
+
+    pool = GradingPool(workers=workers, max_queued=count, max_queued_per_tenant=count, persist=persist)
+    warmup = GradingJob("warmup", "warmup", QUIZ_SPEC, [])
+    pool.submit(warmup)
+    await pool.drain()  # Start the worker processes before timing
+
+    jobs = submissions(count)
+    started = time.monotonic()
+    for job in jobs:
+        pool.submit(job)
+    await pool.drain()
+    elapsed = time.monotonic() - started
+    await pool.close()
+
+    code = sum(1 for job in jobs if job.spec is CODE_SPEC)
+    print(f"{count:,} submissions ({code:,} code challenges) with {workers} worker processes: "
+          f"{elapsed:.1f}s, {count / elapsed:,.0f}/s, {count / elapsed / workers:,.0f}/s per core")
+    for tenant in ("deadline", "small tenants"):
+        waits = [finished[job.attempt_id] - job.queued_at for job in jobs
+                 if (job.tenant_id == "deadline") == (tenant == "deadline")]
+        print(f"  {tenant:>13}: {len(waits):,} submissions, time to graded p50 {statistics.median(waits):.2f}s, "
+              f"max {max(waits):.2f}s")
+    print(f"  a FIFO queue would have graded the first small-tenant submission after ~{elapsed * BURST_SHARE:.1f}s")
+    print(f"stats: {pool.stats_snapshot()}")
+
+
+def main(count: int = 2_000, workers: int = 0):
+    asyncio.run(run(count, workers or os.cpu_count() or 1))
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 0,
+    )
@@ -0,0 +1,153 @@
+"""Learner context: assembling coach grounding per turn vs reading the snapshot.
+
+Seeds a SQLite database with learners that each have an active plan,
+graded attempts, calendar events and a coach conversation, then compares
+assembling every context section from the database (what each coach turn
+did before) with decoding a stored snapshot, and, when Redis is reachable
+at REDIS_URL, with a full LearnerContextStore.get that hits the snapshot.
+
+    python -m benchmarks.bench_learner_context [num_learners]
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from redis.exceptions import RedisError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.redis import close_redis, get_binary_redis
+from app.models.assessment import Assessment, AssessmentAttempt, AssessmentType, AttemptStatus
+from app.models.base import Base
+from app.models.calendar import CalendarEvent, CalendarProvider
+from app.models.coach import CoachMessage
+from app.models.learner import Learner
+from app.models.plan import LearningPlan, PlanStatus, PlanStep, StepStatus
+from app.models.skill import Skill
+from app.models.user import User
+from app.services.coach import SECTIONS, LearnerContextStore, decode_snapshot
+from app.services.coach.context import SCHEMA_VERSION, SECTION_BUILDERS
+
+STEPS_PER_PLAN = 30
+ATTEMPTS_PER_LEARNER = 50
+EVENTS_PER_LEARNER = 20
+MESSAGES_PER_LEARNER = 100
+SAMPLES = 200
+
+
+async def seed(session_factory, num_learners: int):
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        await db.execute(insert(Skill.__table__), [
+            {"id": f"skill-{i}", "slug": f"skill-{i}", "label": f"Skill {i}", "description": "", "domain": "bench"}
+            for i in range(STEPS_PER_PLAN)
+        ])
+        for n in range(num_learners):
+            learner_id, plan_id = f"learner-{n}", f"plan-{n}"
+            await db.execute(insert(User.__table__), [
+                {"id": f"user-{n}", "email": f"user{n}@bench.example", "name": f"User {n}", "tenant_id": "bench"}
+            ])
+            await db.execute(insert(Learner.__table__), [{
+                "id": learner_id, "user_id": f"user-{n}", "tenant_id": "bench",
+                "goals": {"primary_goal": "Become a data scientist", "time_budget_hours": 6},
+            }])
+            await db.execute(insert(LearningPlan.__table__), [
+                {"id": f"{plan_id}-old{k}", "learner_id": learner_id, "title": "Old plan", "objective": "old",
+                 "status": PlanStatus.ARCHIVED, "start_date": now, "target_date": now}
+                for k in range(3)
+            ] + [{"id": plan_id, "learner_id": learner_id, "title": "Data science", "objective": "data science",
+                  "status": PlanStatus.ACTIVE, "start_date": now, "target_date": now + timedelta(days=90)}])
+            await db.execute(insert(PlanStep.__table__), [
+                {"id": f"{plan_id}-step-{i}", "plan_id": plan_id, "skill_id": f"skill-{i}", "title": f"Step {i}",
+                 "effort_min": 60, "sequence": i + 1,
+                 "status": StepStatus.COMPLETED if i < STEPS_PER_PLAN // 3 else StepStatus.PENDING}
+                for i in range(STEPS_PER_PLAN)
+            ])
+            await db.execute(insert(Assessment.__table__), [{
+                "id": f"{learner_id}-assessment", "learner_id": learner_id, "skill_id": "skill-0",
+                "type": AssessmentType.FORMATIVE, "title": "Quiz",
+            }])
+            await db.execute(insert(AssessmentAttempt.__table__), [
+                {"id": f"{learner_id}-attempt-{i}", "assessment_id": f"{learner_id}-assessment",
+                 "learner_id": learner_id, "status": AttemptStatus.COMPLETED, "score": 0.7, "mastery_prob": 0.6,
+                 "started_at": now - timedelta(days=i), "completed_at": now - timedelta(days=i)}
+                for i in range(ATTEMPTS_PER_LEARNER)
+            ])
+            await db.execute(insert(CalendarEvent.__table__), [
+                {"id": f"{learner_id}-event-{i}", "learner_id": learner_id, "provider": CalendarProvider.INTERNAL,
+                 "title": f"Study session {i}", "start_at": now + timedelta(days=i - 5),
+                 "end_at": now + timedelta(days=i - 5, hours=1)}
+                for i in range(EVENTS_PER_LEARNER)
+            ])
+            await db.execute(insert(CoachMessage.__table__), [
+                {"id": f"{learner_id}-message-{i}", "learner_id": learner_id, "content": f"Message {i} " * 20,
+                 "sender": "user" if i % 2 == 0 else "assistant", "created_at": now - timedelta(minutes=i)}
+                for i in range(MESSAGES_PER_LEARNER)
+            ])
+        await db.commit()
+
+
+async def assemble(db, learner_id: str):
+    return {section: await SECTION_BUILDERS[section](db, learner_id) for section in SECTIONS}
+
+
+async def run(num_learners: int):
+    workdir = tempfile.mkdtemp(prefix="bench-context-")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(workdir, 'context.db')}")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    await seed(session_factory, num_learners)
+
+    timings = []
+    async with session_factory() as db:
+        for sample in range(SAMPLES):
+            started = time.perf_counter()
+            await assemble(db, f"learner-{sample % num_learners}")
+            timings.append((time.perf_counter() - started) * 1000)
+    print(f"assemble {len(SECTIONS)} sections from the database: p50 {statistics.median(timings):.2f} ms")
+
+    # What HGETALL returns for a current snapshot
+    async with session_factory() as db:
+        sections = await assemble(db, "learner-0")
+    fields = {b"schema": str(SCHEMA_VERSION).encode()}
+    for section, (data, _) in sections.items():
+        fields[section.encode()] = json.dumps(data, separators=(",", ":")).encode()
+        fields[f"{section}:built".encode()] = b"0"
+    size = sum(len(key) + len(value) for key, value in fields.items())
+    started = time.perf_counter()
+    for _ in range(SAMPLES * 10):
+        decode_snapshot(fields)
+    decode_ms = (time.perf_counter() - started) / (SAMPLES * 10) * 1000
+    print(f"decode snapshot ({size:,} bytes): {decode_ms:.3f} ms")
+
+    try:
+        await (await get_binary_redis()).ping()
+    except (RedisError, OSError):
+        print("redis: not reachable, skipping snapshot read latency")
+    else:
+        store = LearnerContextStore(session_factory=session_factory)
+        await store.rebuild("learner-0")
+        timings = []
+        for _ in range(SAMPLES):
+            started = time.perf_counter()
+            context = await store.get("learner-0")
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"LearnerContextStore.get from Redis: p50 {statistics.median(timings):.2f} ms "
+              f"(rebuilt on last read: {context.rebuilt or 'none'})")
+        await close_redis()
+    await engine.dispose()
+
+
+def main(num_learners: int = 200):
+    asyncio.run(run(num_learners))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,175 @@
+"""Learner progress for a 500-learner dashboard page: per-learner ORM walks versus one batched load.
+
+Seeds a SQLite tenant where every learner has a few learning plans and
+mastery on several skills, then times one page of progress computed the
+way the model helpers did it (load each learner's plans through the
+relationship, find the current plan, read the latest mastery of each of
+their skills) against ``load_progress`` and against the cached path the
+endpoints use, counting the statements each issues.
+
+    python -m benchmarks.bench_learner_progress [num_learners] [page_size]
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.analytics import LearnerSkillState
+from app.models.assessment import Assessment, AssessmentAttempt, AssessmentType, AttemptStatus
+from app.models.base import Base
+from app.models.learner import Learner
+from app.models.plan import LearningPlan, PlanStatus
+from app.models.skill import Skill
+from app.models.user import User
+from app.services.analytics import ProgressCache, learner_progress, load_progress
+from app.services.mastery import latest_mastery
+
+TENANT = "bench"
+SKILLS = 300
+PLANS_PER_LEARNER = 4
+SKILLS_PER_LEARNER = 6
+REPEATS = 5
+
+
+def seed(session_factory, num_learners: int, rng: random.Random):
+    now = datetime.utcnow()
+    statuses = list(PlanStatus)
+    with session_factory() as db:
+        db.execute(insert(Skill.__table__), [
+            {"id": f"skill-{s}", "slug": f"skill-{s}", "label": f"Skill {s}", "description": "", "domain": "bench"}
+            for s in range(SKILLS)
+        ])
+        users, learners, plans, assessments, attempts, states = [], [], [], [], [], []
+        for n in range(num_learners):
+            learner_id = f"learner-{n:06d}"
+            users.append({"id": f"user-{n}", "email": f"user-{n}@bench.example", "name": "User", "tenant_id": TENANT})
+            learners.append({"id": learner_id, "user_id": f"user-{n}", "tenant_id": TENANT,
+                             "profile": {"department": f"Department {n % 20}"},
+                             "created_at": now - timedelta(seconds=num_learners - n)})
+            for k in range(PLANS_PER_LEARNER):
+                total = rng.randrange(10, 80)
+                plans.append({"id": f"plan-{n}-{k}", "learner_id": learner_id, "title": f"Plan {k}",
+                              "objective": "Grow", "status": rng.choice(statuses), "total_hours": total,
+                              "completed_hours": rng.randrange(total + 1), "start_date": now,
+                              "target_date": now + timedelta(days=60),
+                              "updated_at": now - timedelta(minutes=rng.randrange(10_000))})
+            for s in rng.sample(range(SKILLS), SKILLS_PER_LEARNER):
+                at, mastery = now - timedelta(days=rng.randrange(90)), rng.random()
+                assessments.append({"id": f"assessment-{n}-{s}", "learner_id": learner_id, "skill_id": f"skill-{s}",
+                                    "type": AssessmentType.FORMATIVE, "title": "Check", "attempt_count": 1})
+                attempts.append({"id": f"attempt-{n}-{s}", "assessment_id": f"assessment-{n}-{s}",
+                                 "learner_id": learner_id, "attempt_number": 1, "status": AttemptStatus.COMPLETED,
+                                 "score": 80.0, "mastery_prob": mastery, "completed_at": at})
+                states.append({"id": f"state-{n}-{s}", "learner_id": learner_id, "skill_id": f"skill-{s}",
+                               "tenant_id": TENANT, "team": f"Department {n % 20}", "mastery": mastery,
+                               "first_active_at": at, "last_active_at": at})
+        for table, rows in ((User, users), (Learner, learners), (LearningPlan, plans), (Assessment, assessments),
+                            (AssessmentAttempt, attempts), (LearnerSkillState, states)):
+            db.execute(insert(table.__table__), rows)
+        db.commit()
+
+
+def walk_page(db, learner_ids):
+    """Progress as the model helpers computed it: one learner at a time"""
+    page = []
+    for learner_id in learner_ids:
+        learner = db.get(Learner, learner_id)
+        total = completed = 0
+        for plan in learner.learning_plans:
+            if plan.status in (PlanStatus.ACTIVE, PlanStatus.COMPLETED):
+                total += plan.total_hours
+                completed += plan.completed_hours
+        current = learner.get_current_plan()
+        skill_ids = db.execute(select(Assessment.skill_id).where(Assessment.learner_id == learner_id)).scalars()
+        mastery = {skill_id: latest_mastery(db, learner_id, skill_id) for skill_id in skill_ids}
+        page.append((completed / total * 100 if total else 0, current.id if current else None, mastery))
+    return page
+
+
+def timed(label, statements, function):
+    timings = []
+    for _ in range(REPEATS):
+        del statements[:]
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    elapsed = statistics.median(timings)
+    print(f"  {label:<40} {elapsed:9.1f} ms ({len(statements):,} statements)")
+    return elapsed
+
+
+async def time_cached(path: str, learner_ids):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    cache = ProgressCache(ttl_seconds=60)
+    async with AsyncSession(engine) as db:
+        started = time.perf_counter()
+        await learner_progress(db, learner_ids, cache=cache)
+        cold = (time.perf_counter() - started) * 1000
+        timings = []
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            await learner_progress(db, learner_ids, cache=cache)
+            timings.append((time.perf_counter() - started) * 1000)
+    await engine.dispose()
+    print(f"  {'learner_progress, cold cache':<40} {cold:9.1f} ms")
+    print(f"  {'learner_progress, warm cache':<40} {statistics.median(timings):9.1f} ms "
+          f"({cache.hits:,} hits, {cache.misses:,} misses)")
+
+
+def main(num_learners: int = 20_000, page_size: int = 500):
+    workdir = tempfile.mkdtemp(prefix="bench-progress-")
+    path = os.path.join(workdir, "progress.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session_factory = sessionmaker(engine)
+    seed(session_factory, num_learners, random.Random(5))
+
+    with session_factory() as db:
+        learner_ids = db.execute(
+            select(Learner.id).where(Learner.tenant_id == TENANT).order_by(Learner.created_at, Learner.id)
+            .offset(num_learners // 2).limit(page_size)
+        ).scalars().all()
+    print(f"{num_learners:,} learners, {PLANS_PER_LEARNER} plans and {SKILLS_PER_LEARNER} skills each; "
+          f"page of {len(learner_ids)}")
+
+    def walk():
+        with session_factory() as db:
+            return walk_page(db, learner_ids)
+
+    def batched():
+        with session_factory() as db:
+            return load_progress(db, learner_ids)
+
+    before = timed("per-learner ORM walk", statements, walk)
+    after = timed("load_progress", statements, batched)
+    print(f"  {'':<40} {before / after:9.1f}x")
+
+    # Same answers either way
+    walked, loaded = walk(), batched()
+    for learner_id, (percentage, current_id, mastery) in zip(learner_ids, walked):
+        entry = loaded[learner_id]
+        assert abs(entry.progress_percentage - round(percentage, 1)) < 1e-9, learner_id
+        assert (entry.current_plan.id if entry.current_plan else None) == current_id, learner_id
+        assert {skill.skill_id: skill.mastery for skill in entry.skills} == \
+            {skill_id: round(value, 3) for skill_id, value in mastery.items()}, learner_id
+
+    asyncio.run(time_cached(path, learner_ids))
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 500,
+    )
@@ -0,0 +1,117 @@
+"""LLM gateway: model calls and latency saved by coalescing and caching.
+
+Replays a skewed question workload (a few popular questions asked over and
+over with small wording variations, by learners of several tenants) in
+waves of concurrent requests against the local fake chat model with a fixed
+first-token delay and token rate: once straight to the model, once through
+the gateway with the semantic cache on. Midway some sources are edited, so
+answers citing them have to be regenerated.
+
+    python -m benchmarks.bench_llm_gateway [num_requests] [first_token_delay_ms]
+"""
+
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+
+from app.services.llm import AnswerCache, FakeChatModel, LLMGateway, LLMRequest, SourceDocument
+from benchmarks.synthetic import TOPICS
+
+TENANTS = 4
+ASPECTS = ("from scratch", "for work", "for interviews", "in a month", "with projects")
+QUESTIONS = [f"{topic} {aspect}" for aspect in ASPECTS for topic in TOPICS]
+WAVE_SIZE = 50  # Requests arriving together
+TOKENS_PER_SECOND = 200.0
+EDITED_SOURCES = 0.1  # Share of sources edited halfway through
+
+VARIANTS = (
+    "How should I learn {question}?",
+    "how should i learn {question}",
+    "How should I learn {question}!",
+    "How should I  learn {question} ?",
+)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+def workload(num_requests: int, seed: int = 11):
+    """(tenant, question number, prompt) triples, question popularity Zipf-like"""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(QUESTIONS))]
+    questions = rng.choices(range(len(QUESTIONS)), weights=weights, k=num_requests)
+    return [
+        (f"tenant-{rng.randrange(TENANTS)}", question, rng.choice(VARIANTS).format(question=QUESTIONS[question]))
+        for question in questions
+    ]
+
+
+def sources_for(question: int, versions: dict):
+    return [
+        SourceDocument(index, f"content-{question}-{index}", f"Guide {question}.{index}",
+                       f"https://example.com/{question}/{index}", versions.get((question, index), "v1"))
+        for index in range(1, 4)
+    ]
+
+
+async def replay(requests, call):
+    versions, latencies = {}, []
+    rng = random.Random(5)
+    started = time.perf_counter()
+    for start in range(0, len(requests), WAVE_SIZE):
+        if start <= len(requests) // 2 < start + WAVE_SIZE:
+            for question in range(len(QUESTIONS)):
+                for index in range(1, 4):
+                    if rng.random() < EDITED_SOURCES:
+                        versions[(question, index)] = "v2"
+
+        async def one(tenant, question, prompt):
+            began = time.perf_counter()
+            await call(LLMRequest(tenant, prompt, sources=sources_for(question, versions), semantic=True))
+            latencies.append(time.perf_counter() - began)
+
+        await asyncio.gather(*(one(*request) for request in requests[start:start + WAVE_SIZE]))
+    return latencies, time.perf_counter() - started
+
+
+async def run(num_requests: int, first_token_delay: float):
+    requests = workload(num_requests)
+    print(f"{num_requests:,} requests, {len({(t, q) for t, q, _ in requests}):,} distinct tenant questions, "
+          f"waves of {WAVE_SIZE}, model first token {first_token_delay * 1000:.0f} ms at {TOKENS_PER_SECOND:.0f} tok/s")
+
+    model = FakeChatModel(tokens_per_second=TOKENS_PER_SECOND, first_token_delay=first_token_delay)
+    calls = Counter()
+
+    async def direct(request):
+        calls["model"] += 1
+        return "".join([chunk async for chunk in model.stream(request.turns(), request.sources)])
+
+    gateway = LLMGateway(model, cache=AnswerCache(max_entries=10_000))
+    origins = Counter()
+
+    async def through_gateway(request):
+        response = await gateway.complete(request)
+        origins[response.origin] += 1
+
+    for label, call in (("direct", direct), ("gateway", through_gateway)):
+        latencies, elapsed = await replay(requests, call)
+        model_calls = calls["model"] if label == "direct" else gateway.stats.model_calls
+        print(f"{label:>8}: {model_calls:>5,} model calls, latency p50 {percentile(latencies, 0.5) * 1000:6.1f} ms "
+              f"/ p95 {percentile(latencies, 0.95) * 1000:6.1f} ms, wall {elapsed:.1f}s")
+    print(f"gateway answers by origin: {dict(origins.most_common())}")
+    print(f"gateway stats: {gateway.stats_snapshot()}")
+
+
+def main(num_requests: int = 2_000, first_token_delay_ms: float = 200.0):
+    asyncio.run(run(num_requests, first_token_delay_ms / 1000))
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2_000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 200.0,
+    )
@@ -0,0 +1,306 @@
+"""Notification fan-out: a Monday-morning wave of nudges against local fake Slack/Teams/SMTP servers.
+
+Seeds a synthetic SQLite tenant (in a child process) of learners reached
+over Slack, Teams (their own webhook) or email, a few opted out, then
+queues a wave of nudges on the Redis at REDIS_URL (under a separate key
+prefix), several per learner and some repeated. Times, over real
+connections to the fake servers (each answer ``latency`` seconds):
+
+* the dispatchers (``dispatchers`` of them at once, as on replicas):
+  nudges coalesced into one digest per learner, sent through per-channel
+  token buckets shared in Redis over pooled connections, outcomes
+  recorded in bulk;
+* for comparison, a sample of the wave sent the naive way: one message
+  per nudge, a new connection each, no rate limit; extrapolated;
+* a second wave while the servers turn away every ``throttle_every``-th
+  request or recipient (429 / SMTP 451), all retried.
+
+Checks that every reachable learner got exactly one message per wave,
+each digest was recorded, and no channel went over its rate across all
+dispatchers.
+
+    python -m benchmarks.bench_notifications [num_nudges] [num_learners] [throttle_every] [dispatchers]
+"""
+
+import asyncio
+import multiprocessing
+import os
+import random
+import smtplib
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+
+import httpx
+from redis.exceptions import RedisError
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.redis import close_redis, get_redis
+from app.models.base import Base
+from app.models.learner import Learner
+from app.models.notification import NotificationChannel, NotificationDelivery
+from app.models.user import User
+from app.services.notifications import (
+    DispatchReport,
+    EmailChannel,
+    FakeNotificationServer,
+    NotificationDispatcher,
+    SlackChannel,
+    SMTPPool,
+    TeamsChannel,
+)
+from app.services.reminders import NUDGE_QUEUE_KEY, SESSION_MISSED, STEP_OVERDUE, Nudge
+
+TENANT = "bench"
+PREFIX = "bench-notify"
+QUEUE_KEY = f"{PREFIX}:{NUDGE_QUEUE_KEY}"
+WINDOW = 60  # Digest window, seconds
+LATENCY = 0.01  # Seconds per answer from the fake servers
+RATES = {"slack": 300.0, "teams": 150.0, "email": 300.0}  # Sends a second per channel
+CONCURRENCY = {"slack": 20, "teams": 10, "email": 20}
+NAIVE_SAMPLE = 1_500  # Nudges sent the naive way
+
+
+def channel_of(n: int) -> str:
+    return ("slack", "email", "teams", "email", "slack", "email")[n % 6]
+
+
+def seed(path: str, num_learners: int, teams_url: str):
+    """Learners reached over Slack, Teams or email, one in a hundred opted out (runs in a child process)"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    learners = []
+    for n in range(num_learners):
+        preferences = {"notification_frequency": "never" if n % 100 == 99 else "daily",
+                       "notification_channel": channel_of(n)}
+        if channel_of(n) == "slack":
+            preferences["slack_user_id"] = f"U{n:07d}"
+        elif channel_of(n) == "teams":
+            preferences["teams_webhook_url"] = f"{teams_url}/learner-{n}"
+        learners.append({"id": f"learner-{n}", "user_id": f"user-{n}", "tenant_id": TENANT, "profile": {},
+                         "preferences": preferences, "goals": {}})
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__), [
+            {"id": f"user-{n}", "email": f"user-{n}@bench.example", "name": f"Learner {n}", "tenant_id": TENANT}
+            for n in range(num_learners)
+        ])
+        connection.execute(insert(Learner.__table__), learners)
+    engine.dispose()
+
+
+def wave(num_nudges: int, num_learners: int, rng: random.Random, now: datetime, round_: int):
+    """Nudges for a skewed share of learners, several each, some repeated by a second sweep"""
+    nudges = []
+    for k in range(num_nudges):
+        n = min(int(rng.expovariate(1.5 / num_learners)), num_learners - 1)
+        item = rng.randrange(num_nudges) if rng.random() < 0.02 else k  # Repeats of another item
+        kind = SESSION_MISSED if item % 3 == 0 else STEP_OVERDUE
+        nudges.append(Nudge(kind, f"learner-{n}", f"item-{round_}-{item}", f"Step {item}",
+                            (now - timedelta(minutes=rng.randrange(1, 600))).isoformat()))
+    return nudges
+
+
+def expected(nudges):
+    """Reachable learners in the wave, and the distinct nudges of all its learners"""
+    items = {}
+    for nudge in nudges:
+        items.setdefault(nudge.learner_id, set()).add(nudge.item_id)
+    reachable = {learner_id for learner_id in items if int(learner_id.split("-")[1]) % 100 != 99}
+    return reachable, sum(map(len, items.values()))
+
+
+def channels(client: httpx.AsyncClient, endpoints, server: FakeNotificationServer):
+    def limits(name):
+        return {"rate": RATES[name], "burst": CONCURRENCY[name], "concurrency": CONCURRENCY[name],
+                "backoff_seconds": 0.05, "bucket_prefix": f"{PREFIX}:bucket"}
+
+    return {
+        NotificationChannel.SLACK: SlackChannel(client, server.slack_token, endpoints.slack_api_url,
+                                                **limits("slack")),
+        NotificationChannel.TEAMS: TeamsChannel(client, **limits("teams")),
+        NotificationChannel.EMAIL: EmailChannel(
+            SMTPPool(endpoints.smtp_host, endpoints.smtp_port, CONCURRENCY["email"]), **limits("email")),
+    }
+
+
+async def queue(client, nudges):
+    for start in range(0, len(nudges), 5_000):
+        await client.rpush(QUEUE_KEY, *(nudge.to_json() for nudge in nudges[start:start + 5_000]))
+
+
+async def naive(nudges, endpoints, server: FakeNotificationServer, learners) -> float:
+    """One message per nudge, each over a new connection; returns messages a second"""
+    semaphore = asyncio.Semaphore(sum(CONCURRENCY.values()))
+
+    def send_email(address: str, subject: str):
+        message = EmailMessage()
+        message["From"], message["To"], message["Subject"] = "noreply@bench.example", address, subject
+        message.set_content("Reminder")
+        with smtplib.SMTP(endpoints.smtp_host, endpoints.smtp_port) as connection:
+            connection.send_message(message)
+
+    async def send(nudge: Nudge):
+        preferences = learners[nudge.learner_id]
+        channel = preferences["notification_channel"]
+        async with semaphore:
+            if channel == "email":
+                await asyncio.to_thread(send_email, f"{nudge.learner_id}@bench.example", nudge.title)
+                return
+            async with httpx.AsyncClient() as client:
+                if channel == "slack":
+                    await client.post(f"{endpoints.slack_api_url}/chat.postMessage",
+                                      json={"channel": preferences["slack_user_id"], "text": nudge.title},
+                                      headers={"Authorization": f"Bearer {server.slack_token}"})
+                else:
+                    await client.post(preferences["teams_webhook_url"], json={"summary": nudge.title})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(nudge) for nudge in nudges))
+    return len(nudges) / (time.perf_counter() - started)
+
+
+def merged(reports) -> DispatchReport:
+    """One report for dispatchers that ran side by side"""
+    report = DispatchReport(elapsed_seconds=max(report.elapsed_seconds for report in reports))
+    for part in reports:
+        report.collected += part.collected
+        report.digests += part.digests
+        report.nudges += part.nudges
+        report.outcomes.update(part.outcomes)
+    return report
+
+
+def attempts_by_channel(channel_sets):
+    """Send attempts per channel kind, summed over the dispatchers"""
+    totals = Counter()
+    for by_channel in channel_sets:
+        for kind, channel in by_channel.items():
+            totals[kind] += channel.stats.attempts
+    return totals
+
+
+def check_wave(label, report, collected, server, channel_sets, nudges, received, attempts):
+    reachable, distinct = expected(nudges)
+    messages = server.messages[received:]
+    per_channel = Counter(message.channel for message in messages)
+    print(f"{label:<24} {report.elapsed_seconds:7.2f}s  {collected:,} nudges -> {report.digests:,} digests "
+          f"({report.sent:,} sent, {report.failed} failed, {report.skipped} skipped)  "
+          f"{report.sent / report.elapsed_seconds:6.0f} messages/s  "
+          + "  ".join(f"{name} {count:,}" for name, count in sorted(per_channel.items())))
+    for kind, total in attempts_by_channel(channel_sets).items():
+        # Every attempt, retries included, took a token from the one bucket all dispatchers share
+        limit = RATES[kind.value] * report.elapsed_seconds + CONCURRENCY[kind.value]
+        assert total - attempts[kind] <= limit, (kind, total - attempts[kind], limit)
+    assert report.sent == len(reachable) == len(messages), (report.sent, len(reachable), len(messages))
+    assert max(Counter(message.address for message in messages).values()) == 1
+    assert report.nudges == distinct and not report.failed, (report.nudges, distinct, report.failed)
+
+
+async def run(path: str, num_nudges: int, num_learners: int, throttle_every: int, dispatchers: int, server,
+              endpoints):
+    redis = await get_redis()
+    await redis.delete(QUEUE_KEY)
+    keys = [key async for key in redis.scan_iter(f"{PREFIX}:*")]
+    if keys:
+        await redis.delete(*keys)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 120})
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    rng = random.Random(5)
+    now = datetime.now(timezone.utc)
+    async with session_factory() as db:
+        learners = dict((await db.execute(select(Learner.id, Learner.preferences))).all())
+
+    total_connections = sum(CONCURRENCY[name] for name in ("slack", "teams")) * dispatchers
+    async with httpx.AsyncClient(timeout=30, limits=httpx.Limits(max_connections=total_connections,
+                                                                  max_keepalive_connections=total_connections)) as client:
+        # Channels of their own per dispatcher, as in separate processes; only Redis is shared
+        channel_sets = [channels(client, endpoints, server) for _ in range(dispatchers)]
+        replicas = [NotificationDispatcher(by_channel, session_factory, queue_key=QUEUE_KEY, prefix=PREFIX,
+                                           digest_window_seconds=WINDOW, batch_size=500)
+                    for by_channel in channel_sets]
+
+        rounds = {}
+        for round_, throttle in ((1, 0), (2, throttle_every)):
+            nudges = wave(num_nudges, num_learners, rng, now, round_)
+            await queue(redis, nudges)
+            server.throttle_every = throttle
+            received, throttled = len(server.messages), server.stats.throttled
+            attempts = attempts_by_channel(channel_sets)
+            # Collected now, due once the digest window has passed
+            collected = await replicas[0].collect(now)
+            due = now + timedelta(seconds=WINDOW + 1)
+            report = rounds[round_] = merged(await asyncio.gather(*(replica.dispatch(due) for replica in replicas)))
+            check_wave(f"{dispatchers} dispatchers" + (", throttled" if throttle else ""), report, collected, server,
+                       channel_sets, nudges, received, attempts)
+            if throttle:
+                retries = sum(c.stats.retries for by_channel in channel_sets for c in by_channel.values())
+                print(f"{'':<24} {server.stats.throttled - throttled:,} requests and recipients turned away "
+                      f"(every {throttle}th), {retries:,} retries")
+
+        async with session_factory() as db:
+            recorded = dict((await db.execute(
+                select(NotificationDelivery.status, func.count()).group_by(NotificationDelivery.status)
+            )).all())
+        digests = sum(report.digests for report in rounds.values())
+        print(f"recorded: {sum(recorded.values()):,} deliveries for {digests:,} digests "
+              f"({', '.join(f'{status.value} {count:,}' for status, count in recorded.items())}); "
+              f"{len(server.stats.connections):,} connections opened, "
+              f"{sum(by_channel[NotificationChannel.EMAIL].pool.opened for by_channel in channel_sets)} of them SMTP")
+        assert sum(recorded.values()) == digests
+        for replica in replicas:
+            await replica.close()
+
+    server.throttle_every = 0
+    sample = wave(NAIVE_SAMPLE, num_learners, rng, now, 3)
+    connections = len(server.stats.connections)
+    rate = await naive(sample, endpoints, server, learners)
+    print(f"naive, one per nudge      {NAIVE_SAMPLE:,} nudges at {rate:.0f} messages/s, "
+          f"{len(server.stats.connections) - connections:,} connections: the wave of {num_nudges:,} would take "
+          f"{num_nudges / rate:.0f}s unthrottled (dispatcher: {rounds[1].elapsed_seconds:.0f}s within rate limits)")
+
+    keys = [key async for key in redis.scan_iter(f"{PREFIX}:*")]
+    if keys:
+        await redis.delete(*keys)
+    await engine.dispose()
+    await close_redis()
+
+
+async def redis_available() -> bool:
+    try:
+        return await (await get_redis()).ping()
+    except (RedisError, OSError):
+        return False
+    finally:
+        await close_redis()  # The seed runs in between, the benchmark in a fresh event loop
+
+
+def main(num_nudges: int = 60_000, num_learners: int = 20_000, throttle_every: int = 25, dispatchers: int = 2):
+    if not asyncio.run(redis_available()):
+        print("redis: not reachable, nothing to benchmark")
+        return
+    workdir = tempfile.mkdtemp(prefix="bench-notifications-")
+    path = os.path.join(workdir, "notifications.db")
+    server = FakeNotificationServer(latency=LATENCY, retry_after=0.05)
+    with server.serve() as endpoints:
+        child = multiprocessing.get_context("spawn").Process(
+            target=seed, args=(path, num_learners, endpoints.teams_webhook_url))
+        child.start()
+        child.join()
+        print(f"{num_nudges:,} nudges per wave for {num_learners:,} learners; fake servers answer in "
+              f"{LATENCY * 1000:.0f}ms; rates {RATES}")
+        asyncio.run(run(path, num_nudges, num_learners, throttle_every, dispatchers, server, endpoints))
+    os.remove(path)
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 60_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20_000,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 25,
+        int(sys.argv[4]) if len(sys.argv) > 4 else 2,
+    )
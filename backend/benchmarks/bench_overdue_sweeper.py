@@ -0,0 +1,207 @@
+"""Overdue sweeps: cost per tick against the items that fell due, not the table size.
+
+Seeds a synthetic SQLite tenant (in a child process) with plan steps and
+study sessions due over the past day and the next month, then, against
+the Redis at REDIS_URL (under a separate key prefix):
+
+* backfills the due index and sweeps everything already due;
+* sweeps a series of one-minute ticks, each timed next to the query a
+  naive sweeper would run (every active row with a due time up to now,
+  which scans the table);
+* sweeps one hour with several sweepers at once, as replicas would.
+
+Checks that nothing active is left due, every transition queued exactly
+one nudge and no item was nudged twice.
+
+    python -m benchmarks.bench_overdue_sweeper [num_steps] [replicas]
+"""
+
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from redis.exceptions import RedisError
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.redis import close_redis, get_redis
+from app.models.base import Base
+from app.models.calendar import CalendarEvent, CalendarProvider, EventStatus
+from app.models.learner import Learner
+from app.models.plan import LearningPlan, PlanStatus, PlanStep, StepStatus
+from app.models.skill import Skill
+from app.models.user import User
+from app.services.reminders import DUE_SOURCES, NUDGE_QUEUE_KEY, DueIndex, Nudge, OverdueSweeper
+
+TENANT = "bench"
+PREFIX = "bench-due"
+QUEUE_KEY = f"{PREFIX}:{NUDGE_QUEUE_KEY}"
+STEPS_PER_LEARNER = 50
+SEED_BATCH = 50_000
+TICKS = 10
+READ_PAGE = 5_000  # Nudges read back per LRANGE
+
+
+def seed(path: str, num_steps: int, now: datetime):
+    """Learners with a plan of steps and a study session for every other step (runs in a child process)"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    rng = random.Random(3)
+    num_learners = max(1, num_steps // STEPS_PER_LEARNER)
+    statuses = [StepStatus.PENDING] * 6 + [StepStatus.IN_PROGRESS] * 2 + [StepStatus.COMPLETED] * 2
+    written = now - timedelta(days=1)  # Planned a day ago, so the catch-up pass has nothing recent to re-index
+    with engine.begin() as connection:
+        connection.execute(insert(Skill.__table__), [
+            {"id": "skill-0", "slug": "skill-0", "label": "Skill", "description": "", "domain": "bench"}
+        ])
+        connection.execute(insert(User.__table__), [
+            {"id": f"user-{n}", "email": f"user-{n}@bench.example", "name": "User", "tenant_id": TENANT}
+            for n in range(num_learners)
+        ])
+        connection.execute(insert(Learner.__table__), [
+            {"id": f"learner-{n}", "user_id": f"user-{n}", "tenant_id": TENANT, "profile": {}, "preferences": {},
+             "goals": {}}
+            for n in range(num_learners)
+        ])
+        connection.execute(insert(LearningPlan.__table__), [
+            {"id": f"plan-{n}", "learner_id": f"learner-{n}", "title": "Plan", "objective": "Bench",
+             "status": PlanStatus.ACTIVE, "start_date": now, "target_date": now + timedelta(days=30)}
+            for n in range(num_learners)
+        ])
+        steps, events = [], []
+        for k in range(num_steps):
+            n = k // STEPS_PER_LEARNER
+            due = now + timedelta(minutes=rng.randrange(-24 * 60, 30 * 24 * 60))
+            steps.append({"id": f"step-{k}", "plan_id": f"plan-{n}", "skill_id": "skill-0", "title": f"Step {k}",
+                          "sequence": k % STEPS_PER_LEARNER, "status": rng.choice(statuses), "due_at": due,
+                          "created_at": written, "updated_at": written})
+            if k % 2 == 0:
+                events.append({"id": f"event-{k}", "learner_id": f"learner-{n}", "plan_step_id": f"step-{k}",
+                               "provider": CalendarProvider.INTERNAL, "title": f"Study: Step {k}",
+                               "start_at": due - timedelta(minutes=45), "end_at": due,
+                               "status": EventStatus.SCHEDULED, "attendees": [], "metadata": {},
+                               "created_at": written, "updated_at": written})
+            if len(steps) == SEED_BATCH:
+                connection.execute(insert(PlanStep.__table__), steps)
+                steps = []
+            if len(events) == SEED_BATCH:
+                connection.execute(insert(CalendarEvent.__table__), events)
+                events = []
+        if steps:
+            connection.execute(insert(PlanStep.__table__), steps)
+        if events:
+            connection.execute(insert(CalendarEvent.__table__), events)
+    engine.dispose()
+
+
+def naive_due(engine, now: datetime) -> int:
+    """What a sweeper without the index reads every tick"""
+    with engine.connect() as connection:
+        total = 0
+        for source in DUE_SOURCES.values():
+            total += len(connection.execute(
+                select(source.table.c.id).where(source.due_column <= now, *source.where_indexed())
+            ).all())
+        return total
+
+
+async def clear(client):
+    keys = [key async for key in client.scan_iter(f"{PREFIX}:*")]
+    if keys:
+        await client.delete(*keys)
+    await client.delete(QUEUE_KEY)
+
+
+async def run(path: str, replicas: int, now: datetime):
+    client = await get_redis()
+    await clear(client)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 120})
+    sync_engine = create_engine(f"sqlite:///{path}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    index = DueIndex(prefix=PREFIX)
+    sweeper = OverdueSweeper(session_factory, index, queue_key=QUEUE_KEY)
+
+    report = await sweeper.sweep(now)
+    print(f"backfill + first sweep {report.elapsed_seconds:6.2f}s: indexed {sum(report.indexed.values()):,}, "
+          f"moved {report.transitioned}")
+
+    sweep_total = naive_total = 0.0
+    moved = 0
+    for tick in range(1, TICKS + 1):
+        at = now + timedelta(minutes=tick)
+        report = await sweeper.sweep(at)
+        started = time.perf_counter()
+        due = naive_due(sync_engine, at)
+        naive_seconds = time.perf_counter() - started
+        sweep_total += report.elapsed_seconds
+        naive_total += naive_seconds
+        moved += report.nudges
+        print(f"tick {tick:2}: sweep {report.elapsed_seconds * 1000:7.1f}ms for {report.nudges:4} due items; "
+              f"naive scan {naive_seconds * 1000:7.1f}ms ({due} left due)")
+    print(f"{TICKS} ticks: sweeps {sweep_total:.2f}s for {moved:,} items, naive scans {naive_total:.2f}s "
+          f"({naive_total / sweep_total:.1f}x)")
+
+    at = now + timedelta(minutes=TICKS + 60)
+    sweepers = [OverdueSweeper(session_factory, index, batch_size=200, queue_key=QUEUE_KEY) for _ in range(replicas)]
+    started = time.perf_counter()
+    reports = await asyncio.gather(*(replica.sweep(at) for replica in sweepers))
+    print(f"{replicas} replicas, one hour: {time.perf_counter() - started:.2f}s, moved "
+          f"{[report.nudges for report in reports]}")
+
+    nudges = []
+    for start in range(0, await client.llen(QUEUE_KEY), READ_PAGE):
+        nudges += [Nudge.from_json(raw) for raw in await client.lrange(QUEUE_KEY, start, start + READ_PAGE - 1)]
+    with sync_engine.connect() as connection:
+        transitioned = sum(
+            connection.scalar(select(func.count()).select_from(source.table)
+                              .where(source.where_fell_due()))
+            for source in DUE_SOURCES.values()
+        )
+    left = naive_due(sync_engine, at)
+    print(f"checked: {len(nudges):,} nudges for {transitioned:,} transitions, "
+          f"{len({nudge.item_id for nudge in nudges}):,} distinct items, {left} active items left due")
+    assert len(nudges) == transitioned == len({nudge.item_id for nudge in nudges}) and left == 0
+
+    await clear(client)
+    await engine.dispose()
+    sync_engine.dispose()
+    await close_redis()
+
+
+async def redis_available() -> bool:
+    try:
+        return await (await get_redis()).ping()
+    except (RedisError, OSError):
+        return False
+    finally:
+        await close_redis()  # The seed runs in between, the benchmark in a fresh event loop
+
+
+def main(num_steps: int = 1_000_000, replicas: int = 3):
+    if not asyncio.run(redis_available()):
+        print("redis: not reachable, nothing to benchmark")
+        return
+    workdir = tempfile.mkdtemp(prefix="bench-sweeper-")
+    path = os.path.join(workdir, "sweeper.db")
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    started = time.perf_counter()
+    child = multiprocessing.get_context("spawn").Process(target=seed, args=(path, num_steps, now))
+    child.start()
+    child.join()
+    print(f"seeded {num_steps:,} steps and {num_steps // 2:,} study sessions "
+          f"({time.perf_counter() - started:.0f}s)")
+    asyncio.run(run(path, replicas, now))
+    os.remove(path)
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+    )
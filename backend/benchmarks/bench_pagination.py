@@ -0,0 +1,81 @@
+"""Keyset vs. offset pagination latency from page 1 to page 10,000.
+
+Uses an on-disk-free SQLite database so it runs anywhere; point
+DATABASE_URL-style engines at Postgres for production numbers.
+
+    python -m benchmarks.bench_pagination [num_rows]
+"""
+
+from datetime import datetime, timedelta, timezone
+import statistics
+import sys
+import time
+import uuid
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.pagination import encode_cursor
+from app.models.base import Base
+from app.models.skill import Skill, SkillDifficulty
+
+PAGE_SIZE = 20
+PAGES = (1, 10, 100, 1_000, 10_000)
+
+
+def seed(session, num_rows: int):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    batch = []
+    for i in range(num_rows):
+        batch.append({
+            "id": str(uuid.UUID(int=i)),
+            "created_at": start + timedelta(seconds=i // 3),  # Ties exercise the id tie-breaker
+            "updated_at": start,
+            "slug": f"skill-{i}",
+            "label": f"Skill {i}",
+            "description": "",
+            "tags": [],
+            "domain": "engineering",
+            "level_range": {},
+            "prerequisites": [],
+            "estimated_hours": 1,
+            "difficulty": SkillDifficulty.BEGINNER,
+        })
+        if len(batch) == 10_000:
+            session.execute(insert(Skill), batch)
+            batch = []
+    if batch:
+        session.execute(insert(Skill), batch)
+    session.commit()
+
+
+def timed(fn, repeats: int = 20):
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(durations)
+
+
+def run(num_rows: int):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(engine)()
+    seed(session, num_rows)
+
+    ordered = session.query(Skill.created_at, Skill.id).order_by(Skill.created_at, Skill.id)
+    print(f"\n{num_rows} skills, page size {PAGE_SIZE}")
+    print(f"{'page':>8}{'offset ms':>12}{'keyset ms':>12}")
+    for page in PAGES:
+        skip = (page - 1) * PAGE_SIZE
+        if skip >= num_rows:
+            break
+        cursor = encode_cursor(ordered.offset(skip - 1).first()) if skip else None
+        offset_ms = timed(lambda: Skill.get_by_domain(session, "engineering", skip=skip, limit=PAGE_SIZE))
+        keyset_ms = timed(lambda: Skill.get_by_domain(session, "engineering", limit=PAGE_SIZE, cursor=cursor))
+        print(f"{page:>8}{offset_ms:>12.2f}{keyset_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 250_000)
@@ -0,0 +1,62 @@
+"""Plan solver latency over synthetic skill graphs of increasing size.
+
+    python -m benchmarks.bench_planner [num_skills ...]
+"""
+
+from datetime import datetime, timedelta, timezone
+import random
+import statistics
+import sys
+import time
+
+from app.services.graph import ReachabilityIndex, SkillGraphSnapshot
+from app.services.planner import PlanRequest, PlanSolver
+from benchmarks.synthetic import skill_graph_rows
+
+CLOSURE_SIZES = (50, 200, 500)
+
+
+def pick_targets(index, rng, closure_size):
+    """Add random targets until their prerequisite closure reaches closure_size"""
+    targets = []
+    while len(index.prerequisite_closure(targets)) < closure_size:
+        targets.append(rng.choice(index.skill_ids))
+    return targets
+
+
+def run(num_skills: int, repeats: int = 50):
+    skills, edges = skill_graph_rows(num_skills)
+    index = ReachabilityIndex(SkillGraphSnapshot.from_rows(skills, edges))
+    solver = PlanSolver(index)
+    rng = random.Random(5)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    print(f"\n{num_skills} skills, {len(edges)} edges")
+    print(f"{'closure':>8}{'steps':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for closure_size in CLOSURE_SIZES:
+        if closure_size > num_skills:
+            continue
+        durations, step_counts = [], []
+        for _ in range(repeats):
+            targets = pick_targets(index, rng, closure_size)
+            mastery = {skill_id: rng.random() for skill_id in rng.sample(index.skill_ids, 20)}
+            request = PlanRequest(
+                target_skill_ids=targets,
+                start_date=start,
+                target_date=start + timedelta(days=180),
+                time_budget_hours=8,
+                mastery=mastery,
+            )
+            began = time.perf_counter()
+            result = solver.solve(request)
+            durations.append((time.perf_counter() - began) * 1e3)
+            step_counts.append(len(result.steps))
+        durations.sort()
+        print(f"{closure_size:>8}{int(statistics.mean(step_counts)):>8}"
+              f"{statistics.median(durations):>10.2f}{durations[int(len(durations) * 0.95)]:>10.2f}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 50_000]
+    for size in sizes:
+        run(size)
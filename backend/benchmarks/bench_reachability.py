@@ -0,0 +1,86 @@
+"""Reachability index vs. naive recursive prerequisite walk.
+
+    python -m benchmarks.bench_reachability [num_skills ...]
+"""
+
+from collections import defaultdict
+import random
+import statistics
+import sys
+import time
+
+from app.models.skill import SkillRelation
+from app.services.graph import ReachabilityIndex, SkillGraphSnapshot
+from benchmarks.synthetic import skill_graph_rows
+
+
+def naive_ancestors(prereqs_by_skill, skill_id, seen=None):
+    """Recursive walk equivalent to chaining SkillEdge.get_prerequisites_for_skill"""
+    seen = set() if seen is None else seen
+    for prereq_id in prereqs_by_skill.get(skill_id, ()):
+        if prereq_id not in seen:
+            seen.add(prereq_id)
+            naive_ancestors(prereqs_by_skill, prereq_id, seen)
+    return seen
+
+
+def timed(fn, samples):
+    durations = []
+    for sample in samples:
+        start = time.perf_counter()
+        fn(sample)
+        durations.append((time.perf_counter() - start) * 1e6)
+    durations.sort()
+    return statistics.median(durations), durations[int(len(durations) * 0.95)]
+
+
+def run(num_skills: int, queries: int = 2000):
+    skills, edges = skill_graph_rows(num_skills)
+    prereqs_by_skill = defaultdict(list)
+    for src, dst, relation, _ in edges:
+        if relation == SkillRelation.PREREQUISITE:
+            prereqs_by_skill[dst].append(src)
+
+    graph = SkillGraphSnapshot.from_rows(skills, edges)
+    start = time.perf_counter()
+    index = ReachabilityIndex(graph)
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    rng = random.Random(1)
+    sample_ids = [rng.choice(graph.skill_ids) for _ in range(queries)]
+    pairs = [(rng.choice(graph.skill_ids), rng.choice(graph.skill_ids)) for _ in range(queries)]
+    target_sets = [rng.sample(graph.skill_ids, 20) for _ in range(queries // 20)]
+
+    rows = [
+        ("ancestors", timed(index.ancestors, sample_ids), timed(lambda s: naive_ancestors(prereqs_by_skill, s), sample_ids)),
+        ("descendants", timed(index.descendants, sample_ids), None),
+        ("is_prerequisite", timed(lambda p: index.is_prerequisite(*p), pairs),
+         timed(lambda p: p[0] in naive_ancestors(prereqs_by_skill, p[1]), pairs)),
+        ("closure(20 targets)", timed(index.prerequisite_closure, target_sets),
+         timed(lambda ts: set().union(*(naive_ancestors(prereqs_by_skill, t) for t in ts)), target_sets)),
+    ]
+
+    add_us, remove_us = [], []
+    for src, dst, relation, _ in rng.sample(edges, 200):
+        if relation != SkillRelation.PREREQUISITE:
+            continue
+        start = time.perf_counter()
+        index.remove_edge(src, dst)
+        remove_us.append((time.perf_counter() - start) * 1e6)
+        start = time.perf_counter()
+        index.add_edge(src, dst)
+        add_us.append((time.perf_counter() - start) * 1e6)
+
+    print(f"\n{num_skills} skills, {len(edges)} edges, index build {build_ms:.0f} ms")
+    print(f"{'query':<22}{'index p50/p95 (us)':>22}{'naive p50/p95 (us)':>22}")
+    for name, indexed, naive in rows:
+        naive_col = f"{naive[0]:.1f} / {naive[1]:.1f}" if naive else "-"
+        print(f"{name:<22}{indexed[0]:>11.1f} / {indexed[1]:<8.1f}{naive_col:>22}")
+    print(f"{'remove_edge':<22}{statistics.median(remove_us):>11.1f}")
+    print(f"{'add_edge':<22}{statistics.median(add_us):>11.1f}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [5_000, 50_000]
+    for size in sizes:
+        run(size)
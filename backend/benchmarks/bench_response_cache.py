@@ -0,0 +1,105 @@
+"""Response cache encoding cost and, with Redis at REDIS_URL, hit latency.
+
+Encodes a plan detail payload of realistic size into the cache entry
+format and compares it with plain JSON, then (when Redis is reachable)
+measures ResponseCache.respond for hits, 304 revalidations and misses
+after invalidation.
+
+    python -m benchmarks.bench_response_cache [num_steps]
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from redis.exceptions import RedisError
+from starlette.requests import Request
+
+from app.core.cache import ResponseCache, build_entry, decode_entry, encode_entry, entity_tag
+from app.core.redis import close_redis, get_binary_redis
+
+ITERATIONS = 2_000
+
+
+def plan_payload(num_steps: int) -> dict:
+    start = datetime(2024, 1, 15)
+    return {
+        "data": {
+            "id": "plan-1", "learner_id": "learner-1", "title": "Data Science Fundamentals",
+            "objective": "Master core data science skills including statistics and visualization",
+            "status": "active", "total_hours": 120, "completed_hours": 45, "progress_percentage": 37.5,
+            "start_date": start.isoformat(), "target_date": (start + timedelta(days=90)).isoformat(),
+            "steps": [{
+                "id": f"step-{i}", "skill_id": f"skill-{i % 40}", "content_item_id": f"content-{i}",
+                "kind": "learning", "title": f"Step {i}: working with data frames and plots", "effort_min": 45,
+                "sequence": i, "status": "pending", "due_at": (start + timedelta(days=i)).isoformat(),
+                "completed_at": None, "prerequisites": [f"step-{i - 1}"] if i else [], "unlocks": [f"step-{i + 1}"],
+            } for i in range(num_steps)],
+        },
+        "message": "Learning plan retrieved successfully",
+        "status": "success",
+    }
+
+
+def per_call_us(fn, iterations: int = ITERATIONS) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def request(path: str, etag: str = None) -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": headers})
+
+
+async def redis_latency(payload: dict):
+    try:
+        await (await get_binary_redis()).ping()
+    except (RedisError, OSError):
+        print("redis: not reachable, skipping request latency")
+        return
+
+    cache = ResponseCache()
+    tags = [entity_tag("plan", "bench-plan")]
+
+    async def load():
+        return payload, []
+
+    async def timed(etag=None, invalidate=False, samples=500):
+        timings = []
+        for _ in range(samples):
+            if invalidate:
+                await cache.invalidate(tags)
+            started = time.perf_counter()
+            response = await cache.respond(request("/plans/bench-plan", etag), "bench.plan", tags, load)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), response
+
+    _, response = await timed(samples=1)
+    hit, _ = await timed()
+    not_modified, _ = await timed(etag=response.headers["etag"])
+    miss, _ = await timed(invalidate=True)
+    print(f"respond p50: hit {hit:.2f} ms, 304 {not_modified:.2f} ms, miss after invalidation {miss:.2f} ms")
+    print(cache.stats_snapshot())
+    await close_redis()
+
+
+def main(num_steps: int = 40):
+    payload = plan_payload(num_steps)
+    entry = build_entry(payload, {entity_tag("plan", "plan-1"): 3})
+    encoded = encode_entry(entry)
+    print(f"payload with {num_steps} steps: json {len(entry.body):,} bytes, cache entry {len(encoded):,} bytes "
+          f"({len(encoded) / len(entry.body):.0%})")
+    print(f"build entry {per_call_us(lambda: build_entry(payload, entry.tags)):.0f} us, "
+          f"encode {per_call_us(lambda: encode_entry(entry)):.0f} us, "
+          f"decode {per_call_us(lambda: decode_entry(encoded)):.0f} us, "
+          f"json.loads of the body {per_call_us(lambda: json.loads(entry.body)):.0f} us")
+    asyncio.run(redis_latency(payload))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 40)
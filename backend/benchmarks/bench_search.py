@@ -0,0 +1,59 @@
+"""Hybrid content search latency on a synthetic catalog.
+
+Builds HybridSearchEngine in memory (no database) with the offline hashing
+embedder and reports p50/p95 query latency, unfiltered and with filters
+of varying selectivity.
+
+    python -m benchmarks.bench_search [num_items]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from app.models.content import ContentType, LicenseType
+from app.services.rag import HybridSearchEngine, SearchFilters
+from benchmarks.synthetic import TOPICS, content_rows
+
+QUERIES = 200
+
+SCENARIOS = {
+    "no filters": None,
+    "free, en": SearchFilters(licenses=[LicenseType.FREE], languages=["en"]),
+    "video, <= 20 min": SearchFilters(types=[ContentType.VIDEO], max_duration_min=20),
+    "selective": SearchFilters(
+        licenses=[LicenseType.FREE], languages=["de"], levels=["advanced"], types=[ContentType.PROJECT]
+    ),
+}
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main(num_items: int = 1_000_000):
+    started = time.perf_counter()
+    rows = content_rows(num_items)
+    print(f"generated {num_items:,} items in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    engine = HybridSearchEngine(rows)
+    del rows
+    print(f"built index in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(11)
+    queries = [" ".join(rng.sample(TOPICS, rng.randint(1, 3))) for _ in range(QUERIES)]
+    for name, filters in SCENARIOS.items():
+        engine.search(queries[0], filters)
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            engine.search(query, filters)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{name:>18}: p50 {statistics.median(timings):6.2f} ms   p95 {percentile(timings, 0.95):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
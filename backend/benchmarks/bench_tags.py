@@ -0,0 +1,72 @@
+"""Tag index query latency vs. a full scan of the tags column.
+
+The scan stands in for one JSON ``tags.contains([tag])`` filter per tag,
+which is what the database does without an index.
+
+    python -m benchmarks.bench_tags [num_rows]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from app.services.tags import TagIndex
+from benchmarks.synthetic import TOPICS
+
+QUERIES = 50
+EXTRA_TAGS = [f"tag-{i}" for i in range(2_000)]
+
+
+def tag_rows(num_rows: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(num_rows):
+        tags = rng.sample(TOPICS, rng.randint(1, 3)) + rng.sample(EXTRA_TAGS, rng.randint(0, 4))
+        yield f"row-{i:07d}", tuple(tags), f"provider-{i % 20}", rng.random() > 0.05
+
+
+def timed(fn, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(*query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), sorted(timings)[int(len(timings) * 0.95)]
+
+
+def main(num_rows: int = 1_000_000):
+    rows = list(tag_rows(num_rows))
+    started = time.perf_counter()
+    index = TagIndex(rows)
+    print(f"built index over {num_rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(11)
+    queries = [
+        (rng.sample(TOPICS, 2), rng.sample(EXTRA_TAGS, 3), [rng.choice(TOPICS)], [f"provider-{rng.randrange(20)}"])
+        for _ in range(QUERIES)
+    ]
+
+    def scan(all_of, any_of, none_of, scopes):
+        return [
+            item_id for item_id, tags, scope, live in rows
+            if live and scope in scopes and all(tag in tags for tag in all_of)
+            and any(tag in tags for tag in any_of) and not any(tag in tags for tag in none_of)
+        ]
+
+    def bitmap(all_of, any_of, none_of, scopes):
+        return index.search(all_of, any_of, none_of, scopes, limit=20)
+
+    def bitmap_all(all_of, any_of, none_of, scopes):
+        return index.search(all_of[:1], scopes=None, limit=20)
+
+    for name, fn, sample in (
+        ("full scan", scan, queries[:5]),
+        ("bitmap AND/OR/NOT + scope", bitmap, queries),
+        ("bitmap single tag + facets", bitmap_all, queries),
+    ):
+        p50, p95 = timed(fn, sample)
+        print(f"{name:>28}: p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,205 @@
+"""Team analytics: rollup reads versus scanning raw history, backfill and incremental cost.
+
+Seeds a SQLite tenant of learners spread over departments, each with
+completed assessment attempts on a few skills and a learning plan, then
+compares computing the team view on request (scanning every attempt and
+plan step of the tenant) with reading the team × skill rollups, times the
+parallel backfill that builds them, and measures what the rollup hooks add
+to committing one attempt completion.
+
+    python -m benchmarks.bench_team_rollups [num_learners] [workers]
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.assessment import Assessment, AssessmentAttempt, AssessmentType, AttemptStatus
+from app.models.base import Base
+from app.models.learner import Learner
+from app.models.plan import LearningPlan, PlanStep, StepStatus
+from app.models.skill import Skill
+from app.models.user import User
+from app.services.analytics import backfill_team_rollups, team_analytics
+from app.services.analytics import rollups
+
+TENANT = "bench"
+DEPARTMENTS = 25
+SKILLS = 200
+SKILLS_PER_LEARNER = 3
+ATTEMPTS_PER_SKILL = 3
+STEPS_PER_LEARNER = 6
+HISTORY_DAYS = 180
+BATCH = 20_000
+
+
+def seed(session_factory, num_learners: int, rng: random.Random):
+    now = datetime.utcnow()
+
+    def rows(table, batch):
+        if batch:
+            db.execute(insert(table.__table__), batch)
+            del batch[:]
+
+    with session_factory() as db:
+        db.execute(insert(Skill.__table__), [
+            {"id": f"skill-{s}", "slug": f"skill-{s}", "label": f"Skill {s}", "description": "", "domain": "bench"}
+            for s in range(SKILLS)
+        ])
+        users, learners, plans, assessments, attempts, steps = [], [], [], [], [], []
+        for n in range(num_learners):
+            learner_id = f"learner-{n:06d}"
+            users.append({"id": f"user-{n}", "email": f"user-{n}@bench.example", "name": "User", "tenant_id": TENANT})
+            learners.append({"id": learner_id, "user_id": f"user-{n}", "tenant_id": TENANT,
+                             "profile": {"department": f"Department {n % DEPARTMENTS}"}})
+            started = now - timedelta(days=rng.randrange(30, HISTORY_DAYS))
+            plans.append({"id": f"plan-{n}", "learner_id": learner_id, "title": "Plan", "objective": "Grow",
+                          "start_date": started, "target_date": now + timedelta(days=60)})
+            skills = rng.sample(range(SKILLS), SKILLS_PER_LEARNER)
+            for s in skills:
+                assessment_id = f"assessment-{n}-{s}"
+                assessments.append({"id": assessment_id, "learner_id": learner_id, "skill_id": f"skill-{s}",
+                                    "type": AssessmentType.FORMATIVE, "title": "Check", "spec": {"passing_score": 70},
+                                    "attempt_count": ATTEMPTS_PER_SKILL})
+                mastery, at = rng.random() * 0.3, started
+                for k in range(ATTEMPTS_PER_SKILL):
+                    at += timedelta(days=rng.randrange(1, 10), minutes=rng.randrange(600))
+                    mastery = min(1.0, mastery + rng.random() * 0.35)
+                    attempts.append({"id": f"attempt-{n}-{s}-{k}", "assessment_id": assessment_id,
+                                     "learner_id": learner_id, "attempt_number": k + 1,
+                                     "status": AttemptStatus.COMPLETED, "score": rng.randrange(40, 100),
+                                     "mastery_prob": mastery, "completed_at": at})
+            for k in range(STEPS_PER_LEARNER):
+                created = started + timedelta(hours=k)
+                completed = rng.random() < 0.6
+                steps.append({"id": f"step-{n}-{k}", "plan_id": f"plan-{n}", "skill_id": f"skill-{skills[k % 3]}",
+                              "title": "Step", "sequence": k, "created_at": created,
+                              "status": StepStatus.COMPLETED if completed else StepStatus.PENDING,
+                              "completed_at": created + timedelta(hours=rng.randrange(1, 400)) if completed else None})
+            if len(attempts) >= BATCH:
+                for table, batch in ((User, users), (Learner, learners), (LearningPlan, plans),
+                                     (Assessment, assessments), (AssessmentAttempt, attempts), (PlanStep, steps)):
+                    rows(table, batch)
+        for table, batch in ((User, users), (Learner, learners), (LearningPlan, plans), (Assessment, assessments),
+                             (AssessmentAttempt, attempts), (PlanStep, steps)):
+            rows(table, batch)
+        db.commit()
+
+
+def scan_history(db):
+    """The team view computed on request: every attempt and plan step of the tenant"""
+    latest, departments = {}, {}
+    for learner_id, profile in db.execute(select(Learner.id, Learner.profile).where(Learner.tenant_id == TENANT)):
+        departments[learner_id] = profile.get("department")
+    attempts = db.execute(
+        select(AssessmentAttempt.learner_id, Assessment.skill_id, AssessmentAttempt.completed_at,
+               AssessmentAttempt.mastery_prob, AssessmentAttempt.score)
+        .join(Assessment, Assessment.id == AssessmentAttempt.assessment_id)
+        .join(Learner, Learner.id == AssessmentAttempt.learner_id)
+        .where(Learner.tenant_id == TENANT, AssessmentAttempt.status == AttemptStatus.COMPLETED)
+    ).all()
+    for learner_id, skill_id, completed_at, mastery, _ in attempts:
+        key = (departments[learner_id], skill_id)
+        previous = latest.setdefault(key, {}).get(learner_id)
+        if previous is None or previous[0] < completed_at:
+            latest[key][learner_id] = (completed_at, mastery)
+    coverage = {key: (len(by_learner), sum(m for _, m in by_learner.values()) / len(by_learner))
+                for key, by_learner in latest.items()}
+    steps = db.execute(
+        select(LearningPlan.learner_id, PlanStep.status)
+        .join(LearningPlan, LearningPlan.id == PlanStep.plan_id)
+        .join(Learner, Learner.id == LearningPlan.learner_id)
+        .where(Learner.tenant_id == TENANT)
+    ).all()
+    completed = sum(1 for _, status in steps if status == StepStatus.COMPLETED)
+    return coverage, completed / len(steps), len(attempts) + len(steps)
+
+
+async def read_rollups(path: str, repeats: int = 20):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    today = datetime.utcnow().date()
+    cases = {
+        "whole tenant, last 30 days": {},
+        "one department": {"department": "Department 3"},
+        "quarter ending 60 days ago": {"date_from": today - timedelta(days=150), "date_to": today - timedelta(days=60)},
+    }
+    async with AsyncSession(engine) as db:
+        for label, filters in cases.items():
+            await team_analytics(db, TENANT, **filters)
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                data = await team_analytics(db, TENANT, **filters)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"  rollups, {label:<28} p50 {statistics.median(timings):6.1f} ms, max {max(timings):6.1f} ms "
+                  f"({len(data['skill_heatmap']):,} heatmap cells, "
+                  f"{data['team_overview']['total_learners']:,} learners)")
+    await engine.dispose()
+
+
+def time_completions(session_factory, count: int = 100):
+    """Median commit time of one attempt completion"""
+    timings = []
+    with session_factory() as db:
+        assessments = db.execute(select(Assessment.id, Assessment.learner_id).limit(count)).all()
+        for assessment_id, learner_id in assessments:
+            started = time.perf_counter()
+            db.add(AssessmentAttempt(id=f"live-{time.monotonic_ns()}", assessment_id=assessment_id,
+                                     learner_id=learner_id, status=AttemptStatus.COMPLETED, score=80.0,
+                                     mastery_prob=0.9, completed_at=datetime.utcnow()))
+            db.commit()
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main(num_learners: int = 40_000, workers: int = 0):
+    workdir = tempfile.mkdtemp(prefix="bench-rollups-")
+    path = os.path.join(workdir, "rollups.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(engine)
+    rng = random.Random(11)
+
+    started = time.perf_counter()
+    seed(session_factory, num_learners, rng)
+    print(f"seeded {num_learners:,} learners in {DEPARTMENTS} departments, "
+          f"{num_learners * SKILLS_PER_LEARNER * ATTEMPTS_PER_SKILL:,} attempts, "
+          f"{num_learners * STEPS_PER_LEARNER:,} plan steps ({time.perf_counter() - started:.0f}s)")
+
+    with session_factory() as db:
+        started = time.perf_counter()
+        coverage, completion_rate, scanned = scan_history(db)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"  on request, scanning history       {elapsed:9.1f} ms ({scanned:,} rows, {len(coverage):,} cells)")
+
+    workers = workers or os.cpu_count() or 1
+    for backfill_workers in sorted({1, workers}):
+        with session_factory() as db:
+            report = backfill_team_rollups(db, TENANT, workers=backfill_workers)
+            db.commit()
+        print(f"backfill with {backfill_workers} worker(s): {report.elapsed_seconds:.1f}s, {report.chunks} chunks, "
+              f"{report.rollup_rows:,} daily rollup rows, {report.learner_states:,} learner states")
+
+    asyncio.run(read_rollups(path))
+
+    with_hooks = time_completions(session_factory)
+    event.remove(AssessmentAttempt, "after_insert", rollups._record_attempt)
+    without_hooks = time_completions(session_factory)
+    print(f"commit one attempt completion: {without_hooks:.2f} ms without rollups, {with_hooks:.2f} ms with")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 40_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 0,
+    )
@@ -0,0 +1,65 @@
+"""Synthetic skill graphs for benchmarks"""
+
+from typing import List, Tuple
+import random
+
+from app.models.skill import SkillDifficulty, SkillRelation
+
+DIFFICULTIES = list(SkillDifficulty)
+
+
+def skill_graph_rows(num_skills: int, domain_size: int = 100, max_prereqs: int = 3,
+                     cross_domain_rate: float = 0.05, seed: int = 7) -> Tuple[List[tuple], List[tuple]]:
+    """Generate domain-clustered (skill rows, edge rows) for SkillGraphSnapshot.from_rows.
+
+    Skills in a domain only depend on earlier skills of the same domain, with
+    an occasional prerequisite from an earlier domain, which keeps the graph
+    acyclic and its transitive closure realistic.
+    """
+    rng = random.Random(seed)
+    skills, edges = [], []
+    for i in range(num_skills):
+        skill_id = f"skill-{i:06d}"
+        skills.append((skill_id, [], rng.randint(1, 12), rng.choice(DIFFICULTIES)))
+
+        domain_start = i - i % domain_size
+        if i > domain_start:
+            for _ in range(rng.randint(0, max_prereqs)):
+                src = rng.randint(max(domain_start, i - 20), i - 1)
+                edges.append((f"skill-{src:06d}", skill_id, SkillRelation.PREREQUISITE, 1.0))
+        if domain_start > 0 and rng.random() < cross_domain_rate:
+            src = rng.randint(0, domain_start - 1)
+            edges.append((f"skill-{src:06d}", skill_id, SkillRelation.PREREQUISITE, 0.5))
+        if i > 0 and rng.random() < 0.1:
+            edges.append((f"skill-{rng.randint(0, i - 1):06d}", skill_id, SkillRelation.RELATED, 1.0))
+    return skills, edges
+
+
+TOPICS = (
+    "python java rust go typescript kubernetes docker terraform aws azure sql postgres redis kafka spark "
+    "pandas numpy pytorch tensorflow statistics regression clustering security oauth networking linux git "
+    "testing react graphql microservices observability leadership negotiation design accessibility c++ c#"
+).split()
+FORMS = "introduction fundamentals advanced deep dive workshop handbook patterns masterclass crash course".split()
+FILLER = "learn build practical hands-on projects examples production teams real-world concepts skills".split()
+LEVELS = ("beginner", "intermediate", "advanced")
+LANGUAGES = ("en", "en", "en", "es", "de", "fr", "pt", "ja")
+
+
+def content_rows(num_items: int, seed: int = 7) -> List[tuple]:
+    """Generate content rows in the column order HybridSearchEngine expects"""
+    from app.models.content import ContentType, LicenseType
+
+    rng = random.Random(seed)
+    types, licenses = list(ContentType), list(LicenseType)
+    rows = []
+    for i in range(num_items):
+        topics = rng.sample(TOPICS, 3)
+        title = f"{topics[0]} {rng.choice(FORMS)} {topics[1]}"
+        description = " ".join(rng.choices(FILLER + topics, k=rng.randint(8, 24)))
+        rows.append((
+            f"content-{i:07d}", title, description, topics[:rng.randint(1, 3)],
+            rng.choice(types), rng.choice(licenses), rng.choice(LANGUAGES), rng.choice(LEVELS),
+            rng.choice((5, 10, 20, 45, 90, 180, 480)), rng.choice((0.0, 0.0, 9.99, 29.99, 199.0)),
+        ))
+    return rows
@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
@@ -6,6 +8,9 @@ import uvicorn
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.core.health import health_router
+from app.services.grading import get_grading_pool, requeue_pending
+from app.services.notifications import get_notification_dispatcher
+from app.services.reminders import OverdueSweeper
 
 app = FastAPI(
     title="Learning Path Generator API",
@@ -34,6 +39,28 @@ app.add_middleware(
 app.include_router(health_router, prefix="/health", tags=["health"])
 app.include_router(api_router, prefix="/api/v1")
 
+# Long-running loops started with the app, cancelled on shutdown
+background_tasks = []
+
+@app.on_event("startup")
+async def resume_background_work():
+    # Attempts a stopped worker left in grading; the pool skips any graded meanwhile
+    await requeue_pending(get_grading_pool())
+    if settings.REMINDER_SWEEP_ENABLED:
+        background_tasks.append(asyncio.create_task(OverdueSweeper().run()))
+    if settings.NOTIFY_DISPATCH_ENABLED:
+        background_tasks.append(asyncio.create_task(get_notification_dispatcher().run()))
+
+@app.on_event("shutdown")
+async def stop_background_work():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    await get_grading_pool().close()
+    if settings.NOTIFY_DISPATCH_ENABLED:
+        await get_notification_dispatcher().close()
+
 @app.get("/")
 async def root():
     return {
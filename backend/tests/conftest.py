@@ -0,0 +1,58 @@
+from typing import List
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.models.base import Base
+
+
+class StatementCounter:
+    """SQL statements sent through an engine while ``counting`` is on"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self.counting = False
+
+    def __len__(self):
+        return len(self.statements)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.counting:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        self.counting = True
+        return self
+
+    def __exit__(self, *exc_info):
+        self.counting = False
+
+
+@pytest_asyncio.fixture
+async def engine():
+    """Fresh in-memory SQLite database with every table created"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def statements(engine) -> StatementCounter:
+    """Counter of the statements the engine executes inside ``with statements:``"""
+    counter = StatementCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter.before_cursor_execute)
+    yield counter
+    event.remove(engine.sync_engine, "before_cursor_execute", counter.before_cursor_execute)
+
+
+@pytest_asyncio.fixture
+async def db(engine) -> AsyncSession:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,98 @@
+"""Statement counts of the repository loaders: fixed, whatever the number of rows"""
+from datetime import datetime, timedelta, timezone
+import uuid
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.learner import Learner
+from app.models.plan import LearningPlan, PlanStatus, PlanStep, StepStatus
+from app.models.skill import Skill
+from app.models.user import User
+from app.repositories.learners import LearnerRepository
+from app.repositories.plans import LearningPlanRepository, PlanStepRepository
+
+pytestmark = pytest.mark.asyncio
+
+
+def _id() -> str:
+    return str(uuid.uuid4())
+
+
+async def seed(engine, num_plans: int, steps_per_plan: int) -> str:
+    """Insert a learner with plans of chained steps; returns the learner ID.
+
+    Core inserts, so no ORM commit hooks (caches, Redis) run.
+    """
+    now = datetime.now(timezone.utc)
+    user_id, learner_id, skill_id = _id(), _id(), _id()
+    plans, steps = [], []
+    for _ in range(num_plans):
+        plan_id = _id()
+        plans.append({
+            "id": plan_id, "learner_id": learner_id, "title": "Plan", "objective": "Learn",
+            "status": PlanStatus.ACTIVE, "total_hours": 1, "completed_hours": 0,
+            "start_date": now, "target_date": now + timedelta(days=30), "metadata": {},
+        })
+        previous = None
+        for sequence in range(steps_per_plan):
+            step_id = _id()
+            steps.append({
+                "id": step_id, "plan_id": plan_id, "skill_id": skill_id, "title": f"Step {sequence}",
+                "sequence": sequence, "effort_min": 30, "progress_percentage": 0,
+                # Every other step is done, so availability depends on prerequisites
+                "status": StepStatus.COMPLETED if sequence % 2 == 0 else StepStatus.PENDING,
+                "prerequisites": [previous] if previous else [], "unlocks": [], "metadata": {},
+            })
+            previous = step_id
+
+    async with engine.begin() as conn:
+        await conn.execute(insert(User.__table__), [{
+            "id": user_id, "email": f"{user_id}@example.com", "name": "Learner",
+            "tenant_id": "tenant", "is_active": True, "is_verified": True,
+        }])
+        await conn.execute(insert(Learner.__table__), [{
+            "id": learner_id, "user_id": user_id, "tenant_id": "tenant", "profile": {}, "goals": {},
+        }])
+        await conn.execute(insert(Skill.__table__), [{
+            "id": skill_id, "slug": "skill", "label": "Skill", "description": "Skill", "domain": "test",
+        }])
+        await conn.execute(insert(LearningPlan.__table__), plans)
+        await conn.execute(insert(PlanStep.__table__), steps)
+    return learner_id
+
+
+@pytest.mark.parametrize("steps_per_plan", [1, 10, 100])
+async def test_get_with_steps_is_two_queries(engine, db, statements, steps_per_plan):
+    learner_id = await seed(engine, 1, steps_per_plan)
+    plan_id = (await LearningPlanRepository(db).get_by_learner(learner_id))[0].id
+    db.expunge_all()
+
+    with statements:
+        plan = await LearningPlanRepository(db).get_with_steps(plan_id)
+        assert len(plan.plan_steps) == steps_per_plan
+    assert len(statements) == 2, statements.statements
+
+
+@pytest.mark.parametrize("num_plans", [1, 10, 50])
+async def test_get_with_plans_is_two_queries(engine, db, statements, num_plans):
+    learner_id = await seed(engine, num_plans, 2)
+
+    with statements:
+        learner = await LearnerRepository(db).get_with_plans(learner_id)
+        assert len(learner.learning_plans) == num_plans
+    assert len(statements) == 2, statements.statements
+
+
+@pytest.mark.parametrize("steps_per_plan", [1, 10, 100])
+async def test_get_available_steps_is_one_query(engine, db, statements, steps_per_plan):
+    learner_id = await seed(engine, 1, steps_per_plan)
+    plan_id = (await LearningPlanRepository(db).get_by_learner(learner_id))[0].id
+    db.expunge_all()
+
+    with statements:
+        available = await PlanStepRepository(db).get_available_steps(plan_id)
+        # Pending steps all follow a completed one
+        assert len(available) == steps_per_plan // 2
+        assert all(step.status == StepStatus.PENDING for step in available)
+    assert len(statements) == 1, statements.statements
@@ -0,0 +1,65 @@
+"""Vectorized BKT: replay agrees with the online update, and EM recovers the parameters it was sampled from"""
+import numpy as np
+import pytest
+
+from app.services.mastery import BKTParams, Observations, ParamArrays, fit_em, replay, update_mastery
+
+SKILLS = [
+    BKTParams(p_init=0.3, p_learn=0.2, p_guess=0.15, p_slip=0.08),
+    BKTParams(p_init=0.1, p_learn=0.1, p_guess=0.25, p_slip=0.12, p_forget=0.05),
+]
+
+
+def sample(rng: np.random.Generator, params: BKTParams, length: int) -> list:
+    """Outcomes of one learner on one skill, drawn from the BKT generative model"""
+    known = rng.random() < params.p_init
+    outcomes = []
+    for _ in range(length):
+        outcomes.append(bool(rng.random() < (1.0 - params.p_slip if known else params.p_guess)))
+        known = rng.random() >= params.p_forget if known else rng.random() < params.p_learn
+    return outcomes
+
+
+def shuffled_rows(sequences) -> list:
+    """(learner, skill, step, outcome) rows of (learner, skill, outcomes) sequences, in shuffled input order"""
+    rows = [(learner, skill, step, outcome)
+            for learner, skill, outcomes in sequences for step, outcome in enumerate(outcomes)]
+    return [rows[index] for index in np.random.default_rng(0).permutation(len(rows))]
+
+
+def observations_of(rows) -> Observations:
+    learner, skill, time, correct = (np.array(column) for column in zip(*rows))
+    return Observations.build(learner, skill, time, correct)
+
+
+def test_replay_matches_online_updates_on_ragged_sequences():
+    rng = np.random.default_rng(3)
+    sequences = [(learner, skill, sample(rng, SKILLS[skill], int(rng.integers(1, 12))))
+                 for learner in range(40) for skill in range(len(SKILLS)) if rng.random() < 0.8]
+    rows = shuffled_rows(sequences)
+    observations = observations_of(rows)
+
+    replayed = observations.restore(replay(observations, ParamArrays.from_params(SKILLS)))
+
+    expected = {}
+    for learner, skill, outcomes in sequences:
+        p_known = SKILLS[skill].p_init
+        for step, outcome in enumerate(outcomes):
+            p_known = update_mastery(p_known, outcome, SKILLS[skill])
+            expected[learner, skill, step] = p_known
+    assert replayed.tolist() == pytest.approx([expected[learner, skill, step] for learner, skill, step, _ in rows],
+                                              abs=1e-12)
+
+
+def test_em_recovers_the_sampling_parameters():
+    rng = np.random.default_rng(11)
+    truth = SKILLS[0]
+    observations = observations_of(shuffled_rows([(learner, 0, sample(rng, truth, 15)) for learner in range(3000)]))
+
+    fitted, report = fit_em(observations, ParamArrays.from_params([BKTParams()]), max_iterations=200)
+
+    assert report.converged
+    assert all(later >= earlier - 1e-6 for earlier, later in zip(report.history, report.history[1:]))
+    for name in ("p_init", "p_learn", "p_guess", "p_slip"):
+        assert getattr(fitted.params(0), name) == pytest.approx(getattr(truth, name), abs=0.02), name
+    assert fitted.params(0).p_forget == 0.0
@@ -0,0 +1,55 @@
+"""Near-duplicate index: re-signing items whose text changed, and side-effect-free previews"""
+from app.services.dedupe import NearDuplicateIndex
+
+LESSON = "an introduction to linear algebra covering vectors matrices determinants and eigenvalues with worked examples"
+RECIPE = "a slow cooker recipe for vegetable soup with lentils carrots celery onions garlic and fresh thyme"
+POEM = "the old lighthouse keeper watched the winter storm roll across the harbour until morning came"
+
+
+def test_changed_item_leaves_its_cluster_and_rest_of_cluster_stays_together():
+    index = NearDuplicateIndex()
+    index.add_many([("a", LESSON), ("b", LESSON), ("c", LESSON)])
+    assert index.clusters() == {"a": ["a", "b", "c"]}
+
+    result = index.add_many([("a", RECIPE)])
+
+    assert result.canonical == {"a": "a"}
+    assert result.regrouped == {"a": "a", "b": "b", "c": "b"}
+    assert index.clusters() == {"b": ["b", "c"]}
+    assert len(index) == 3
+
+
+def test_changed_item_joins_the_cluster_it_now_duplicates():
+    index = NearDuplicateIndex()
+    index.add_many([("a", LESSON), ("b", RECIPE), ("c", RECIPE)])
+
+    result = index.add_many([("a", RECIPE)])
+
+    assert result.canonical == {"a": "a"}
+    assert result.merged == {"b": "a"}
+    assert index.clusters() == {"a": ["a", "b", "c"]}
+
+
+def test_unchanged_items_are_not_regrouped():
+    index = NearDuplicateIndex()
+    index.add_many([("a", LESSON), ("b", LESSON)])
+
+    result = index.add_many([("b", LESSON), ("c", POEM)])
+
+    assert result.canonical == {"b": "a", "c": "c"}
+    assert result.regrouped == {}
+    assert result.merged == {}
+
+
+def test_preview_matches_add_many_and_leaves_index_unchanged():
+    index = NearDuplicateIndex()
+    index.add_many([("a", LESSON), ("b", LESSON), ("c", RECIPE)])
+    items = [("b", POEM), ("d", RECIPE), ("e", POEM), ("f", LESSON)]
+
+    previewed = index.preview(items)
+
+    assert len(index) == 3
+    assert index.clusters() == {"a": ["a", "b"]}
+    assert index.canonical_of("d") is None
+    assert index.add_many(items) == previewed
+    assert index.clusters() == {"a": ["a", "f"], "b": ["b", "e"], "c": ["c", "d"]}
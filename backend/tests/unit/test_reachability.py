@@ -0,0 +1,36 @@
+"""Prerequisite closure over graphs with cycles: only the edges inside a cycle are dropped"""
+from app.models.skill import SkillDifficulty, SkillRelation
+from app.services.graph.reachability import ReachabilityIndex
+from app.services.graph.snapshot import SkillGraphSnapshot
+
+
+def index_of(edges) -> ReachabilityIndex:
+    skill_ids = sorted({skill_id for edge in edges for skill_id in edge})
+    skills = [(skill_id, [], 1, SkillDifficulty.BEGINNER) for skill_id in skill_ids]
+    rows = [(src, dst, SkillRelation.PREREQUISITE, 1.0) for src, dst in edges]
+    return ReachabilityIndex(SkillGraphSnapshot.from_rows(skills, rows))
+
+
+def test_cycle_with_downstream_nodes_keeps_edges_leaving_the_cycle():
+    index = index_of([("A", "B"), ("B", "A"), ("B", "C"), ("C", "D"), ("E", "D")])
+
+    assert sorted(index.dropped_edges) == [("A", "B"), ("B", "A")]
+    assert index.ancestors("D") == ["B", "C", "E"]
+    assert index.is_prerequisite("C", "D")
+    assert index.is_prerequisite("B", "D")
+    assert index.descendants("B") == ["C", "D"]
+
+
+def test_nested_cycles_drop_every_edge_inside_the_component_only():
+    index = index_of([("A", "B"), ("B", "C"), ("C", "A"), ("C", "B"), ("X", "A"), ("C", "Y"), ("Y", "Z")])
+
+    assert sorted(index.dropped_edges) == [("A", "B"), ("B", "C"), ("C", "A"), ("C", "B")]
+    assert index.ancestors("Z") == ["C", "Y"]
+    assert index.descendants("X") == ["A"]
+
+
+def test_acyclic_graph_drops_nothing():
+    index = index_of([("A", "B"), ("A", "C"), ("B", "D"), ("C", "D")])
+
+    assert index.dropped_edges == []
+    assert index.ancestors("D") == ["A", "B", "C"]